@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the Python overhead of the GLIR parser in commands per second.
+
+The gl namespace used by the parser is replaced with no-op functions, so
+that no context is needed and only the time spent in dispatching GLIR
+commands is measured. Run this script on two revisions to compare the
+dispatch cost before and after a change.
+"""
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+
+from vispy.gloo import gl, glir
+
+
+class NullGL(object):
+    """ Stand-in for vispy.gloo.gl that calls into nothing.
+    """
+
+    def __init__(self):
+        self.current_backend = gl.gl2
+
+    def __getattr__(self, name):
+        if name.startswith('GL_'):
+            return getattr(gl, name)
+        if name == 'glGetProgramParameter':
+            def func(handle, pname):
+                return int(pname in (gl.GL_LINK_STATUS,
+                                     gl.GL_VALIDATE_STATUS))
+        elif name == 'glGetParameter':
+            def func(pname):
+                return '2.1 NullGL' if pname == gl.GL_VERSION else 4096
+        elif name.startswith(('glCreate', 'glGet')):
+            def func(*args):
+                return 1
+        else:
+            def func(*args):
+                pass
+        setattr(self, name, func)  # cache, like a real module attribute
+        return func
+
+
+def make_frame(n_programs, n_uniforms):
+    """ Commands to draw one frame with the given number of programs.
+    """
+    frame = [('CURRENT', 0, 0)]
+    value = np.eye(4, dtype=np.float32)
+    for i in range(1, n_programs + 1):
+        for j in range(n_uniforms):
+            frame.append(('UNIFORM', i, 'u_%i' % j, 'mat4', value))
+        frame.append(('ATTRIBUTE', i, 'a_position', 'vec3', (1000, 12, 0)))
+        frame.append(('FUNC', 'glEnable', 'blend'))
+        frame.append(('DRAW', i, 'triangles', (0, 3)))
+    return frame
+
+
+def main(n_programs=100, n_uniforms=10, n_frames=50):
+    with mock.patch('vispy.gloo.glir.gl', NullGL()):
+        parser = glir.GlirParser()
+        setup = [('CREATE', 1000, 'VertexBuffer')]
+        for i in range(1, n_programs + 1):
+            setup += [('CREATE', i, 'Program'), ('LINK', i)]
+        parser.parse(setup)
+
+        frame = make_frame(n_programs, n_uniforms)
+        parser.parse(frame)  # warm up caches
+        t0 = time.perf_counter()
+        for _ in range(n_frames):
+            parser.parse(frame)
+        elapsed = time.perf_counter() - t0
+
+    n_commands = len(frame) * n_frames
+    print('%i commands in %0.3f s: %0.0f commands/s, %0.2f ms/frame'
+          % (n_commands, elapsed, n_commands / elapsed,
+             1000 * elapsed / n_frames))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
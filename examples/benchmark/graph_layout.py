@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure one iteration of the force-directed graph layout.
+
+Random graphs with 1e3 nodes up to the given maximum number of nodes, and
+an average of three edges per node, are laid out with the exact and the
+grid solvers. The exact solver is only run while its (N, N) arrays fit in
+memory comfortably.
+"""
+import sys
+import time
+
+import numpy as np
+
+from vispy.visuals.graphs.layouts.force_directed import _calculate_delta_pos
+
+
+def main(max_nodes=1000000, degree=3, max_exact=10000):
+    rng = np.random.RandomState(0)
+    n = 1000
+    while n <= max_nodes:
+        pos = rng.rand(n, 2).astype(np.float32)
+        edges = rng.randint(0, n, (degree * n, 2))
+        weights = np.ones(len(edges))
+        optimal = 1 / np.sqrt(n)
+        timings = []
+        for solver in ('exact', 'grid'):
+            if solver == 'exact' and n > max_exact:
+                timings.append('-')
+                continue
+            t0 = time.perf_counter()
+            _calculate_delta_pos(edges, weights, pos, 0.1, optimal, solver)
+            timings.append('%0.3f s' % (time.perf_counter() - t0))
+        print('%8i nodes: exact %s, grid %s' % (n, timings[0], timings[1]))
+        n *= 10
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
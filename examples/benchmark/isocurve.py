@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the time to compute the isocurves of a 2D array, 2000x2000 by default.
+
+The vectorized marching squares of vispy.geometry.isocurve.isocurves are
+timed for a single level and for all levels at once, and compared to the
+previous implementation, which loops over the cells and joins the segments
+in Python one level at a time, and to skimage.measure.find_contours when
+it is installed. Pass 0 as third argument to skip the reference
+implementation, which is the slowest.
+
+Usage: python isocurve.py [size] [n_levels] [reference]
+"""
+import sys
+import time
+
+import numpy as np
+
+from vispy.geometry.isocurve import isocurves, _pad_edges
+
+
+def isocurve_python(data, level):
+    """ The previous implementation of
+    ``isocurve(data, level, connected=True, extend_to_edge=True)``
+    """
+    data = _pad_edges(data)
+    side_table = [[], [0, 1], [1, 2], [0, 2], [0, 3], [1, 3], [0, 1, 2, 3],
+                  [2, 3], [2, 3], [0, 1, 2, 3], [1, 3], [0, 3], [0, 2],
+                  [1, 2], [0, 1], []]
+    edge_key = [[(0, 1), (0, 0)], [(0, 0), (1, 0)], [(1, 0), (1, 1)],
+                [(1, 1), (0, 1)]]
+    level = float(level)
+    lines = []
+    mask = data < level
+    index = np.zeros([x-1 for x in data.shape], dtype=np.ubyte)
+    slices = [slice(0, -1), slice(1, None)]
+    for i in [0, 1]:
+        for j in [0, 1]:
+            index += (mask[slices[i], slices[j]] *
+                      2**(i+2*j)).astype(np.ubyte)
+    for i in range(index.shape[0]):
+        for j in range(index.shape[1]):
+            sides = side_table[index[i, j]]
+            for side_idx in range(0, len(sides), 2):
+                edges = sides[side_idx:side_idx+2]
+                pts = []
+                for m in [0, 1]:
+                    p1, p2 = edge_key[edges[m]]
+                    v1 = data[i+p1[0], j+p1[1]]
+                    v2 = data[i+p2[0], j+p2[1]]
+                    f = (level-v1) / (v2-v1)
+                    fi = 1.0 - f
+                    p = (p1[0]*fi + p2[0]*f + i + 0.5,
+                         p1[1]*fi + p2[1]*f + j + 0.5)
+                    p = (min(data.shape[0]-2, max(0, p[0]-1)),
+                         min(data.shape[1]-2, max(0, p[1]-1)))
+                    gridKey = (i + (1 if edges[m] == 2 else 0),
+                               j + (1 if edges[m] == 3 else 0),
+                               edges[m] % 2)
+                    pts.append((p, gridKey))
+                lines.append(pts)
+
+    points = {}
+    for a, b in lines:
+        points.setdefault(a[1], []).append([a, b])
+        points.setdefault(b[1], []).append([b, a])
+    for k in list(points.keys()):
+        try:
+            chains = points[k]
+        except KeyError:
+            continue
+        for chain in chains:
+            x = None
+            while True:
+                if x == chain[-1][1]:
+                    break
+                x = chain[-1][1]
+                if x == k:
+                    break
+                y = chain[-2][1]
+                connects = points[x]
+                for conn in connects[:]:
+                    if conn[1][1] != y:
+                        chain.extend(conn[1:])
+                del points[x]
+            if chain[0][1] == chain[-1][1]:
+                chains.pop()
+                break
+    lines = []
+    for chain in points.values():
+        if len(chain) == 2:
+            chain = chain[1][1:][::-1] + chain[0]
+        else:
+            chain = chain[0]
+        lines.append([pt[0] for pt in chain])
+    return lines
+
+
+def make_data(size):
+    """ Smooth waves with some noise
+    """
+    x, y = np.ogrid[-1:1:size * 1j, -1:1:size * 1j]
+    noise = np.random.RandomState(0).rand(size, size)
+    return np.sin(8 * x) * np.cos(6 * y) + 0.05 * noise
+
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+
+def main(size=2000, n_levels=10, reference=1):
+    data = make_data(size)
+    levels = np.linspace(-0.8, 0.8, n_levels)
+    print('%ix%i grid, %i levels' % (size, size, n_levels))
+
+    t, curves = timed(lambda: isocurves(data, levels[:1], True))
+    print('%-36s %9.3fs (%i vertices)'
+          % ('vectorized, one level', t, len(curves[0][0])))
+    t, curves = timed(lambda: isocurves(data, levels, True))
+    print('%-36s %9.3fs (%i vertices)'
+          % ('vectorized, all levels at once', t,
+             sum(len(v) for v, c in curves)))
+    t, _ = timed(lambda: [isocurves(data, [level], True)
+                          for level in levels])
+    print('%-36s %9.3fs' % ('vectorized, one level at a time', t))
+
+    try:
+        from skimage.measure import find_contours
+    except ImportError:
+        print('%-36s %10s' % ('skimage find_contours, one level', 'n/a'))
+    else:
+        t, _ = timed(lambda: find_contours(data, levels[0]))
+        print('%-36s %9.3fs' % ('skimage find_contours, one level', t))
+
+    if reference:
+        t, lines = timed(lambda: isocurve_python(data, levels[0]))
+        print('%-36s %9.3fs (%i vertices)'
+              % ('previous implementation, one level', t,
+                 sum(len(line) for line in lines)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the time to build the topology of meshes with 1e4 to 1e7 faces.
+
+For each size, a height field is triangulated and given to MeshData as
+vertices indexed by faces, like meshes loaded from STL files. The time to
+merge the vertices, compute the vertex-face adjacency and the vertex
+normals, and to compact the vertices with vispy.geometry.normals is
+printed.
+"""
+import sys
+import time
+
+import numpy as np
+
+from vispy.geometry import MeshData, create_grid_mesh
+from vispy.geometry.normals import compact
+
+
+def make_mesh(n_faces):
+    """ Vertices (Nf, 3, 3) of a wavy grid with about n_faces faces.
+    """
+    n = int(np.sqrt(n_faces / 2.)) + 1
+    xs, ys = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    zs = np.sin(10 * xs) * np.cos(10 * ys)
+    vertices, faces = create_grid_mesh(xs, ys, zs)
+    return vertices[faces].astype(np.float32)
+
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+
+def main(min_exp=4, max_exp=7):
+    print('%10s %10s %10s %10s %10s' % ('faces', 'dedup', 'adjacency',
+                                        'normals', 'compact'))
+    for exp in range(min_exp, max_exp + 1):
+        indexed = make_mesh(10 ** exp)
+        mesh = MeshData(vertices=indexed)
+        t_dedup, _ = timed(mesh.get_vertices)
+        t_adjacency, _ = timed(lambda: mesh.get_vertex_faces(csr=True))
+        t_normals, _ = timed(mesh.get_vertex_normals)
+        t_compact, _ = timed(lambda: compact(mesh.get_vertices(),
+                                             mesh.get_faces()))
+        print('%10i %9.3fs %9.3fs %9.3fs %9.3fs'
+              % (len(indexed), t_dedup, t_adjacency, t_normals, t_compact))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
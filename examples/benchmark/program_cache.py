@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the time to the first frame of a canvas with many different
+visuals, with and without the on-disk cache of program binaries.
+
+Each measurement starts a new process, like the start of an application:
+without the cache, with an empty cache (which saves the binaries), and
+with the binaries saved by the previous process. The cache needs the gl+
+backend (PyOpenGL) and a driver that supports program binaries (GL 4.1).
+
+Usage: program_cache.py [n_visuals [n_runs]]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def first_frame(n_visuals, path):
+    """ Show a canvas with *n_visuals* visuals and print the time from the
+    creation of the canvas to the end of its first draw, and the hits and
+    misses of the program binary cache.
+    """
+    import numpy as np
+    from vispy import config, scene, use
+
+    use(gl='gl+')
+    config.update(program_cache_path=path or None)
+
+    t0 = time.perf_counter()
+    canvas = scene.SceneCanvas(size=(400, 400), show=True)
+    view = canvas.central_widget.add_view()
+
+    # Visuals that need different programs
+    data = np.random.RandomState(0).rand(32, 32).astype(np.float32)
+    image = scene.visuals.Image(data, parent=view.scene)
+    makers = [lambda interp=interp: scene.visuals.Image(
+        data, interpolation=interp, parent=view.scene)
+        for interp in image._interpolation_names]
+    makers += [lambda shading=shading: scene.visuals.Mesh(
+        data[:3, :3], np.array([[0, 1, 2]]), shading=shading,
+        parent=view.scene) for shading in (None, 'flat', 'smooth')]
+    makers += [lambda: scene.visuals.Markers(pos=data[:, :2],
+                                             parent=view.scene),
+               lambda: scene.visuals.Line(data[:, :2], parent=view.scene),
+               lambda: scene.visuals.Text('vispy', parent=view.scene)]
+    for i in range(n_visuals - 1):
+        makers[i % len(makers)]()
+
+    canvas.render()
+    elapsed = time.perf_counter() - t0
+    binaries = canvas.context.shared.parser.program_binaries
+    stats = binaries.stats if binaries is not None else dict(hits=0,
+                                                             misses=0)
+    print('%f %i %i %i' % (elapsed, binaries is not None, stats['hits'],
+                           stats['misses']))
+    canvas.close()
+
+
+def run(n_visuals, path):
+    """ Measure the first frame in a new process.
+    """
+    out = subprocess.check_output([sys.executable, __file__, '--child',
+                                   str(n_visuals), path])
+    elapsed, supported, hits, misses = out.split()[-4:]
+    return float(elapsed), int(supported), int(hits), int(misses)
+
+
+def main(n_visuals=40, n_runs=3):
+    path = tempfile.mkdtemp()
+    try:
+        results = {'no cache': [], 'empty cache': [], 'warm cache': []}
+        for _ in range(n_runs):
+            results['no cache'].append(run(n_visuals, ''))
+            shutil.rmtree(path)
+            os.mkdir(path)
+            results['empty cache'].append(run(n_visuals, path))
+            results['warm cache'].append(run(n_visuals, path))
+    finally:
+        shutil.rmtree(path)
+
+    print('Time to first frame with %i visuals (best of %i runs)'
+          % (n_visuals, n_runs))
+    for name, times in results.items():
+        elapsed, supported, hits, misses = min(times)
+        print('%-12s %8.3f s  (binary cache: %i hits, %i misses)'
+              % (name, elapsed, hits, misses))
+    if not supported:
+        print('Program binaries are not supported by this context; all '
+              'runs compiled their shaders.')
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        first_frame(int(sys.argv[2]), sys.argv[3])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the time to lay out the glyphs of many text labels.
+
+All labels of a TextVisual are laid out in one pass by _text_to_vbo. The
+glyphs are loaded (and their SDFs rendered) before timing, so only the
+layout itself is measured.
+"""
+import sys
+import time
+
+from vispy.visuals.text.text import FontManager, _text_to_vbo
+
+
+def main(n_labels=100000, n_repeat=5):
+    font = FontManager(method='cpu').get_font('OpenSans')
+    labels = ['point %d\n(%0.1f)' % (i, i / 3.) for i in range(n_labels)]
+    n_chars = sum(len(label) for label in labels)
+    _text_to_vbo(labels[:100], font, 'center', 'center', font._lowres_size)
+
+    t0 = time.perf_counter()
+    for _ in range(n_repeat):
+        _text_to_vbo(labels, font, 'center', 'center', font._lowres_size)
+    elapsed = (time.perf_counter() - t0) / n_repeat
+    print('%i labels (%i characters) in %0.3f s: %0.0f labels/s'
+          % (n_labels, n_chars, elapsed, n_labels / elapsed))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -81,6 +81,37 @@ def _calculate_normals(rr, tris):
     return nn
 
 
+def _unique_rows(rows):
+    """Find the unique rows of a 2D array
+
+    This sorts the columns with np.lexsort, which is much faster than
+    np.unique(rows, axis=0) for large arrays.
+
+    Parameters
+    ----------
+    rows : array
+        Array (N, M) of rows.
+
+    Returns
+    -------
+    unique : array
+        The unique rows in lexicographic order.
+    first : array
+        Index of the first occurrence of each unique row.
+    inverse : array
+        Index into ``unique`` of each row.
+    """
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    new = np.ones(len(rows), bool)
+    new[1:] = (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)
+    # lexsort is stable, so the first row of each group comes first
+    first = order[new]
+    inverse = np.empty(len(rows), np.intp)
+    inverse[order] = np.cumsum(new) - 1
+    return sorted_rows[new], first, inverse
+
+
 def resize(image, shape, kind='linear'):
     """Resize an image
 
@@ -8,6 +8,235 @@ from __future__ import division
 
 import numpy as np
 
+# The corners of a cell as (i, j) offsets; corner k adds 2**k to the index
+# of the cell when it is below the level
+_corner_offsets = np.array([(0, 0), (1, 0), (0, 1), (1, 1)])
+
+# The two corners of each edge of a cell
+_edge_corners = np.array([(2, 0), (0, 1), (1, 3), (3, 2)])
+
+# The pairs of edges that the line segments of each type of cell connect
+_side_table = [
+    [],
+    [0, 1],
+    [1, 2],
+    [0, 2],
+    [0, 3],
+    [1, 3],
+    [0, 1, 2, 3],
+    [2, 3],
+    [2, 3],
+    [0, 1, 2, 3],
+    [1, 3],
+    [0, 3],
+    [0, 2],
+    [1, 2],
+    [0, 1],
+    []
+]
+
+
+def _oriented_segment_table():
+    """Return the (16, 2, 2) table of the edges that the segments of each
+    type of cell start and end at, and the number of segments per type.
+
+    The segments are oriented such that the corners below the level are on
+    their right, so that joined segments follow each other.
+    """
+    table = np.zeros((16, 2, 2), dtype=np.intp)
+    n_segments = np.zeros(16, dtype=np.intp)
+    middles = _corner_offsets[_edge_corners].mean(axis=1)
+    for index, sides in enumerate(_side_table):
+        n_segments[index] = len(sides) // 2
+        for k in range(len(sides) // 2):
+            a, b = sides[2 * k:2 * k + 2]
+            # Use the corner shared by both edges if there is one, else any
+            # corner is off the segment
+            shared = set(_edge_corners[a]) & set(_edge_corners[b])
+            corner = shared.pop() if shared else 0
+            d = middles[b] - middles[a]
+            r = _corner_offsets[corner] - middles[a]
+            right = d[0] * r[1] - d[1] * r[0] < 0
+            below = bool(index & (1 << corner))
+            table[index, k] = (a, b) if right == below else (b, a)
+    return table, n_segments
+
+
+_segment_table, _n_segments = _oriented_segment_table()
+
+
+def _pad_edges(data):
+    """Pad the data with a copy of its edges"""
+    d2 = np.empty((data.shape[0]+2, data.shape[1]+2), dtype=data.dtype)
+    d2[1:-1, 1:-1] = data
+    d2[0, 1:-1] = data[0]
+    d2[-1, 1:-1] = data[-1]
+    d2[1:-1, 0] = data[:, 0]
+    d2[1:-1, -1] = data[:, -1]
+    d2[0, 0] = d2[0, 1]
+    d2[0, -1] = d2[1, -1]
+    d2[-1, 0] = d2[-1, 1]
+    d2[-1, -1] = d2[-1, -2]
+    return d2
+
+
+def _marching_squares(data, levels, extend_to_edge):
+    """Find the line segments of the isocurves at all levels.
+
+    Returns the (N, 2, 2) start and end points of the segments, an (N, 2)
+    array of keys that identify the level and grid edge of these points,
+    and the index of the level of each segment.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if extend_to_edge:
+        data = _pad_edges(data)
+    levels = np.asarray(levels, dtype=np.float64).ravel()
+    nx, ny = data.shape
+
+    # A level crosses the cells that have corners both below and not below
+    # it, i.e. with min < level <= max. For sorted levels these are a range
+    # of levels per cell, so all levels are found in one pass over the grid.
+    corners = [data[:-1, :-1], data[1:, :-1], data[:-1, 1:], data[1:, 1:]]
+    order = np.argsort(levels, kind='stable')
+    sorted_levels = levels[order]
+    lo = np.minimum(np.minimum(corners[0], corners[1]),
+                    np.minimum(corners[2], corners[3]))
+    lo = np.searchsorted(sorted_levels, lo.ravel(), side='right')
+    hi = np.maximum(np.maximum(corners[0], corners[1]),
+                    np.maximum(corners[2], corners[3]))
+    hi = np.searchsorted(sorted_levels, hi.ravel(), side='right')
+    cells = np.flatnonzero(hi > lo)
+    first = lo[cells]
+    counts = hi[cells] - first
+    del lo, hi
+
+    # One item for each level that crosses each cell
+    starts = np.cumsum(counts) - counts
+    level_index = order[np.arange(counts.sum()) -
+                        np.repeat(starts - first, counts)]
+    i, j = np.divmod(np.repeat(cells, counts), ny - 1)
+    values = np.stack([c[i, j] for c in corners], axis=-1)
+    level = levels[level_index]
+    index = np.dot(values < level[:, np.newaxis], [1, 2, 4, 8])
+
+    # Saddle cells have two segments
+    item = np.repeat(np.arange(len(index)), _n_segments[index])
+    second = np.zeros(len(item), dtype=np.intp)
+    second[1:] = item[1:] == item[:-1]
+    edges = _segment_table[index[item], second]
+    i, j, level, level_index = i[item], j[item], level[item], \
+        level_index[item]
+
+    # Interpolate the points on the edges
+    edge_corners = _edge_corners[edges]
+    values = values[item]
+    v1 = np.take_along_axis(values, edge_corners[..., 0], axis=1)
+    v2 = np.take_along_axis(values, edge_corners[..., 1], axis=1)
+    f = ((level[:, np.newaxis] - v1) / (v2 - v1))[..., np.newaxis]
+    points = (_corner_offsets[edge_corners[..., 0]] * (1. - f) +
+              _corner_offsets[edge_corners[..., 1]] * f)
+    points[..., 0] += i[:, np.newaxis] + 0.5
+    points[..., 1] += j[:, np.newaxis] + 0.5
+    if extend_to_edge:
+        points -= 1
+        np.clip(points[..., 0], 0, nx - 2, out=points[..., 0])
+        np.clip(points[..., 1], 0, ny - 2, out=points[..., 1])
+
+    # Points on the same grid edge at the same level get the same key
+    gi = i[:, np.newaxis] + (edges == 2)
+    gj = j[:, np.newaxis] + (edges == 3)
+    keys = ((level_index[:, np.newaxis].astype(np.int64) * nx + gi) * ny +
+            gj) * 2 + edges % 2
+    return points, keys, level_index
+
+
+def _join_segments(points, keys, level_index):
+    """Join the oriented segments that share end points into polylines.
+
+    Returns the vertices of the polylines one after the other, whether each
+    vertex is connected to the next one, and the level index of each
+    vertex. The polylines are sorted by level.
+    """
+    if len(keys) == 0:
+        return (np.zeros((0, 2)), np.zeros(0, dtype=bool),
+                np.zeros(0, dtype=np.intp))
+    keys, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.reshape(-1, 2)
+    n = len(keys)
+    index = np.arange(n)
+    positions = np.empty((n, 2))
+    positions[inverse] = points
+    levels = np.empty(n, dtype=np.intp)
+    levels[inverse] = level_index[:, np.newaxis]
+
+    # As the segments are oriented, every point has at most one previous
+    # point, so that the lines are linked lists.
+    previous = np.full(n, -1, dtype=np.intp)
+    previous[inverse[:, 1]] = inverse[:, 0]
+
+    # Label the points of closed lines with their lowest point and those of
+    # open lines with -1, by pointer jumping. Once the labels no longer
+    # change, they are constant along each line.
+    label = np.where(previous < 0, -1, index)
+    jump = np.where(previous < 0, index, previous)
+    while True:
+        new_label = np.minimum(label, label[jump])
+        if np.array_equal(new_label, label):
+            break
+        label = new_label
+        jump = jump[jump]
+    closed = label == index
+    previous[closed] = -1
+
+    # Find the first point of each line and the distance to it
+    jump = np.where(previous < 0, index, previous)
+    distance = (previous >= 0).astype(np.intp)
+    while (previous[jump] >= 0).any():
+        distance += distance[jump]
+        jump = jump[jump]
+    order = np.lexsort((distance, jump))
+
+    # Close the closed lines with their first point
+    first = jump[order]
+    last = np.flatnonzero(np.append(first[1:] != first[:-1], True))
+    start = np.append(0, last[:-1] + 1)
+    loops = closed[first[start]]
+    order = np.insert(order, last[loops] + 1, order[start[loops]])
+    first = jump[order]
+    connect = np.append(first[1:] == first[:-1], False)
+    return positions[order], connect, levels[order]
+
+
+def isocurves(data, levels, extend_to_edge=False):
+    """
+    Generate the isocurves of 2D data at several levels at once, using a
+    vectorized marching squares algorithm.
+
+    Parameters
+    ----------
+    data : ndarray
+        2D numpy array of scalar values
+    levels : array-like
+        The levels at which to generate isocurves
+    extend_to_edge : bool
+        If True, extend the curves to reach the exact edges of
+        the data.
+
+    Returns
+    -------
+    curves : list
+        For each level, a tuple of the (N, 2) vertices of the lines of the
+        isocurve, one line after the other, and an (N,) boolean array that
+        is True where a vertex is connected to the next one. Closed lines
+        end with a copy of their first vertex.
+    """
+    n_levels = np.size(levels)
+    vertices, connect, level_index = _join_segments(
+        *_marching_squares(data, levels, extend_to_edge))
+    bounds = np.searchsorted(level_index, np.arange(n_levels + 1))
+    return [(vertices[a:b], connect[a:b])
+            for a, b in zip(bounds[:-1], bounds[1:])]
+
 
 def isocurve(data, level, connected=False, extend_to_edge=False):
     """
@@ -21,155 +250,18 @@ def isocurve(data, level, connected=False, extend_to_edge=False):
         The level at which to generate an isosurface
     connected : bool
         If False, return a single long list of point pairs
-        If True, return multiple long lists of connected point 
-        locations. (This is slower but better for drawing 
-        continuous lines)
+        If True, return a list of (N, 2) arrays of connected point
+        locations. (This is better for drawing continuous lines)
     extend_to_edge : bool
-        If True, extend the curves to reach the exact edges of 
-        the data. 
-    """    
-    # This function is SLOW; plenty of room for optimization here.
-    
-    if extend_to_edge:
-        d2 = np.empty((data.shape[0]+2, data.shape[1]+2), dtype=data.dtype)
-        d2[1:-1, 1:-1] = data
-        d2[0, 1:-1] = data[0]
-        d2[-1, 1:-1] = data[-1]
-        d2[1:-1, 0] = data[:, 0]
-        d2[1:-1, -1] = data[:, -1]
-        d2[0, 0] = d2[0, 1]
-        d2[0, -1] = d2[1, -1]
-        d2[-1, 0] = d2[-1, 1]
-        d2[-1, -1] = d2[-1, -2]
-        data = d2
-    
-    side_table = [
-        [],
-        [0, 1],
-        [1, 2],
-        [0, 2],
-        [0, 3],
-        [1, 3],
-        [0, 1, 2, 3],
-        [2, 3],
-        [2, 3],
-        [0, 1, 2, 3],
-        [1, 3],
-        [0, 3],
-        [0, 2],
-        [1, 2],
-        [0, 1],
-        []
-    ]
-    
-    edge_key = [
-        [(0, 1), (0, 0)],
-        [(0, 0), (1, 0)],
-        [(1, 0), (1, 1)],
-        [(1, 1), (0, 1)]
-    ]
-    
-    level = float(level)
-    lines = []
-    
-    # mark everything below the isosurface level
-    mask = data < level
-    
-    ## make four sub-fields and compute indexes for grid cells
-    index = np.zeros([x-1 for x in data.shape], dtype=np.ubyte)
-    fields = np.empty((2, 2), dtype=object)
-    slices = [slice(0, -1), slice(1, None)]
-    for i in [0, 1]:
-        for j in [0, 1]:
-            fields[i, j] = mask[slices[i], slices[j]]
-            vertIndex = i+2*j
-            index += (fields[i, j] * 2**vertIndex).astype(np.ubyte)
-    
-    # add lines
-    for i in range(index.shape[0]):                 # data x-axis
-        for j in range(index.shape[1]):             # data y-axis     
-            sides = side_table[index[i, j]]
-            for side_idx in range(0, len(sides), 2):  # faces for this grid cell
-                edges = sides[side_idx:side_idx+2]
-                pts = []
-                for m in [0, 1]:      # points in this face
-                    # p1, p2 are points at either side of an edge
-                    p1 = edge_key[edges[m]][0] 
-                    p2 = edge_key[edges[m]][1]
-                    # v1 and v2 are the values at p1 and p2
-                    v1 = data[i+p1[0], j+p1[1]] 
-                    v2 = data[i+p2[0], j+p2[1]]
-                    f = (level-v1) / (v2-v1)
-                    fi = 1.0 - f
-                    # interpolate between corners
-                    p = (p1[0]*fi + p2[0]*f + i + 0.5, 
-                         p1[1]*fi + p2[1]*f + j + 0.5)
-                    if extend_to_edge:
-                        # check bounds
-                        p = (min(data.shape[0]-2, max(0, p[0]-1)),
-                             min(data.shape[1]-2, max(0, p[1]-1)))
-                    if connected:
-                        gridKey = (i + (1 if edges[m] == 2 else 0), 
-                                   j + (1 if edges[m] == 3 else 0), 
-                                   edges[m] % 2)
-                        # give the actual position and a key identifying the 
-                        # grid location (for connecting segments)
-                        pts.append((p, gridKey))
-                    else:
-                        pts.append(p)
-                
-                lines.append(pts)
+        If True, extend the curves to reach the exact edges of
+        the data.
 
+    See Also
+    --------
+    isocurves : generate the isocurves at several levels at once
+    """
     if not connected:
-        return lines
-                
-    # turn disjoint list of segments into continuous lines
-
-    points = {}  # maps each point to its connections
-    for a, b in lines:
-        if a[1] not in points:
-            points[a[1]] = []
-        points[a[1]].append([a, b])
-        if b[1] not in points:
-            points[b[1]] = []
-        points[b[1]].append([b, a])
-
-    # rearrange into chains
-    for k in list(points.keys()):
-        try:
-            chains = points[k]
-        except KeyError:  # already used this point elsewhere
-            continue
-        for chain in chains:
-            x = None
-            while True:
-                if x == chain[-1][1]:
-                    break  # nothing left to do on this chain
-                    
-                x = chain[-1][1]
-                if x == k:
-                    # chain has looped; we're done and can ignore the opposite
-                    # chain
-                    break
-                y = chain[-2][1]
-                connects = points[x]
-                for conn in connects[:]:
-                    if conn[1][1] != y:
-                        chain.extend(conn[1:])
-                del points[x]
-            if chain[0][1] == chain[-1][1]:
-                # looped chain; no need to continue the other direction
-                chains.pop()
-                break
-                
-    # extract point locations 
-    lines = []
-    for chain in points.values():
-        if len(chain) == 2:
-            # join together ends of chain
-            chain = chain[1][1:][::-1] + chain[0]
-        else:
-            chain = chain[0]
-        lines.append([pt[0] for pt in chain])
-    
-    return lines  # a list of pairs of points
+        points = _marching_squares(data, [level], extend_to_edge)[0]
+        return [[tuple(a), tuple(b)] for a, b in points.tolist()]
+    vertices, connect = isocurves(data, [level], extend_to_edge)[0]
+    return np.split(vertices, np.flatnonzero(~connect[:-1]) + 1)
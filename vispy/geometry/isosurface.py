@@ -1,9 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
 _data_cache = None
 
 
-def isosurface(data, level):
+def isosurface(data, level, chunk_size=None, n_jobs=1, pool=None,
+               cache=None):
     """
     Generate isosurface from volumetric data using marching cubes algorithm.
     See Paul Bourke, "Polygonising a Scalar Field"  
@@ -11,10 +14,148 @@ def isosurface(data, level):
     
     *data*   3D numpy array of scalar values
     *level*  The level at which to generate an isosurface
+    *chunk_size*  Number of cells along the first axis that are processed
+             at once. The volume is split into slabs that overlap by one
+             sample, and the vertices on their shared planes are merged.
+             The temporary arrays are then bounded by the size of a slab.
+             By default the whole volume is processed at once.
+    *n_jobs*  Number of threads that process slabs in parallel
+    *pool*   An executor whose map() processes the slabs instead, e.g. a
+             concurrent.futures.ProcessPoolExecutor
+    *cache*  An IsosurfaceCache that keeps the results and value range of
+             each slab, so that only slabs that contain the isosurface at a
+             new level, or that were invalidated, are processed again
     
     Returns an array of vertex coordinates (Nv, 3) and an array of 
     per-face vertex indexes (Nf, 3)    
     """
+    if chunk_size is None and cache is None:
+        return _isosurface_block(data, level)[:2]
+
+    # Build the tables before starting threads
+    _get_data_cache()
+    data = np.asarray(data)
+    n_cells = max(data.shape[0] - 1, 1)
+    chunk_size = n_cells if chunk_size is None else int(chunk_size)
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1, not %s' % chunk_size)
+    chunks = [(start, min(start + chunk_size, n_cells))
+              for start in range(0, n_cells, chunk_size)]
+
+    results = [None] * len(chunks)
+    todo = []
+    for i, chunk in enumerate(chunks):
+        if cache is not None:
+            results[i] = cache._get(chunk, level)
+        if results[i] is None:
+            todo.append(i)
+    # A slab of cells [start, stop) has samples [start, stop]
+    jobs = [(data[chunks[i][0]:chunks[i][1] + 1], level,
+             None if cache is None else cache._ranges.get(chunks[i]))
+            for i in todo]
+    if pool is not None:
+        computed = list(pool.map(_isosurface_chunk, jobs))
+    elif n_jobs > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(n_jobs) as executor:
+            computed = list(executor.map(_isosurface_chunk, jobs))
+    else:
+        computed = [_isosurface_chunk(job) for job in jobs]
+    for i, (value_range, result) in zip(todo, computed):
+        results[i] = result
+        if cache is not None:
+            cache._ranges[chunks[i]] = value_range
+            cache._results[chunks[i]] = (level, result)
+
+    # Merge the vertices on the plane that each slab shares with the next.
+    # Slabs find the same vertices on that plane, unless the value range
+    # of one was wrong, in which case the volume is processed at once.
+    for i in range(len(chunks) - 1):
+        if len(results[i + 1][2]) != results[i][3]:
+            return _isosurface_block(data, level)[:2]
+    vertices = []
+    faces = []
+    offset = 0
+    for i, (start, stop) in enumerate(chunks):
+        verts, fcs, first, n_last = results[i]
+        lookup = np.arange(offset, offset + len(verts), dtype=np.uint32)
+        n_keep = len(verts)
+        if i < len(chunks) - 1:
+            n_keep -= n_last
+            next_first = results[i + 1][2]
+            lookup[n_keep:] = offset + n_keep + next_first
+        vertices.append(verts[:n_keep] + np.array([start, 0, 0], np.float32))
+        faces.append(lookup[fcs])
+        offset += n_keep
+    return (np.concatenate(vertices).astype(np.float32, copy=False),
+            np.concatenate(faces).astype(np.uint32, copy=False))
+
+
+class IsosurfaceCache(object):
+    """Results of `isosurface` for each slab of a volume
+
+    The results are only valid for the volume they were computed from;
+    call ``invalidate`` when the data is modified.
+    """
+
+    def __init__(self):
+        self._ranges = {}
+        self._results = {}
+
+    def __len__(self):
+        return len(self._results)
+
+    def clear(self):
+        """Remove all results"""
+        self._ranges.clear()
+        self._results.clear()
+
+    def invalidate(self, start=0, stop=None):
+        """Remove the results of the slabs that overlap samples
+        [start, stop) along the first axis
+        """
+        for chunk in list(self._ranges):
+            if chunk[1] >= start and (stop is None or chunk[0] < stop):
+                self._ranges.pop(chunk)
+                self._results.pop(chunk, None)
+
+    def _get(self, chunk, level):
+        if chunk in self._ranges:
+            vmin, vmax = self._ranges[chunk]
+            if not vmin < level <= vmax:
+                return _empty_block()
+        if chunk in self._results and self._results[chunk][0] == level:
+            return self._results[chunk][1]
+        return None
+
+
+def _isosurface_chunk(job):
+    """Process one slab; the value range is used to skip empty slabs"""
+    block, level, value_range = job
+    if value_range is None:
+        # NaN samples are never below the level, so they count as the
+        # largest values
+        vmax = block.max()
+        if np.isnan(vmax):
+            vmax = np.inf
+        value_range = (np.fmin.reduce(block, axis=None), vmax)
+    if value_range[0] < level <= value_range[1]:
+        return value_range, _isosurface_block(block, level)
+    return value_range, _empty_block()
+
+
+def _empty_block():
+    return (np.zeros((0, 3), np.float32), np.zeros((0, 3), np.uint32),
+            np.zeros(0, np.intp), 0)
+
+
+def _isosurface_block(data, level):
+    """Marching cubes on a block of data
+
+    Returns the vertices and faces, the indices of the vertices in the
+    first plane along the first axis (excluding vertices on edges along
+    that axis) and the number of vertices in the last plane; those are
+    the last vertices.
+    """
     # For improvement, see:
     # 
     # Efficient implementation of Marching Cubes' cases with topological 
@@ -131,8 +272,10 @@ def isosurface(data, level):
         nv = vert_inds.shape[0]
         faces[ptr:ptr+nv] = vert_inds  # .reshape((nv, 3))
         ptr += nv
-        
-    return vertexes, faces
+
+    first = np.flatnonzero((vertex_inds[:, 0] == 0) & (vertex_inds[:, 3] != 0))
+    n_last = int(np.count_nonzero(vertex_inds[:, 0] == data.shape[0] - 1))
+    return vertexes, faces, first, n_last
 
 
 def _get_data_cache():
@@ -4,6 +4,8 @@
 
 import numpy as np
 
+from .calculations import _unique_rows
+
 
 def _fix_colors(colors):
     colors = np.asarray(colors)
@@ -74,7 +76,7 @@ class MeshData(object):
         self._edges_indexed_by_faces = None  # (Ne, 3, 2) indices into
         # self._vertices, 3 edge / face and 2 verts/edge
         # inverse mappings
-        self._vertex_faces = None  # maps vertex ID to a list of face IDs
+        self._vertex_faces = None  # (indptr, indices) of face IDs per vertex
         self._vertex_edges = None  # maps vertex ID to a list of edge IDs
 
         # Per-vertex data
@@ -327,21 +329,17 @@ class MeshData(object):
             The normals.
         """
         if self._vertex_normals is None:
-            faceNorms = self.get_face_normals()
-            vertFaces = self.get_vertex_faces()
-            self._vertex_normals = np.empty(self._vertices.shape,
-                                            dtype=np.float32)
-            for vindex in range(self._vertices.shape[0]):
-                faces = vertFaces[vindex]
-                if len(faces) == 0:
-                    self._vertex_normals[vindex] = (0, 0, 0)
-                    continue
-                norms = faceNorms[faces]  # get all face normals
-                norm = norms.sum(axis=0)  # sum normals
-                renorm = (norm**2).sum()**0.5
-                if renorm > 0:
-                    norm /= renorm
-                self._vertex_normals[vindex] = norm
+            nv = len(self.get_vertices())
+            faces = self.get_faces()
+            # Sum the normals of the faces around each vertex
+            face_norms = np.repeat(self.get_face_normals(), 3, axis=0)
+            norms = np.empty((nv, 3), dtype=np.float32)
+            for axis in range(3):
+                norms[:, axis] = np.bincount(faces.ravel(),
+                                             face_norms[:, axis], minlength=nv)
+            renorm = np.sqrt((norms ** 2).sum(axis=1))
+            renorm[renorm == 0] = 1
+            self._vertex_normals = norms / renorm[:, np.newaxis]
 
         if indexed is None:
             return self._vertex_normals
@@ -544,40 +542,44 @@ class MeshData(object):
 
         # I think generally this should be discouraged..
         faces = self._vertices_indexed_by_faces
-        verts = {}  # used to remember the index of each vertex position
-        self._faces = np.empty(faces.shape[:2], dtype=np.uint32)
-        self._vertices = []
-        self._vertex_faces = []
+        points = faces.reshape(-1, faces.shape[-1])
+        # quantize to ensure nearly-identical points will be merged; adding
+        # zero turns -0 into 0
+        keys = np.round(points.astype(np.float64) * 1e14) + 0.
+        _, first, inverse = _unique_rows(keys)
+        # Keep the vertices in the order in which they first appear
+        order = np.argsort(first)
+        rank = np.empty(len(order), dtype=np.uint32)
+        rank[order] = np.arange(len(order))
+        self._faces = rank[inverse].reshape(faces.shape[:2])
+        self._vertices = points[first[order]].astype(np.float32)
+        self._vertex_faces = None
         self._face_normals = None
         self._vertex_normals = None
-        for i in range(faces.shape[0]):
-            face = faces[i]
-            for j in range(face.shape[0]):
-                pt = face[j]
-                # quantize to ensure nearly-identical points will be merged
-                pt2 = tuple([round(x*1e14) for x in pt])
-                index = verts.get(pt2, None)
-                if index is None:
-                    self._vertices.append(pt)
-                    self._vertex_faces.append([])
-                    index = len(self._vertices)-1
-                    verts[pt2] = index
-                # track which vertices belong to which faces
-                self._vertex_faces[index].append(i)
-                self._faces[i, j] = index
-        self._vertices = np.array(self._vertices, dtype=np.float32)
-
-    def get_vertex_faces(self):
+
+    def get_vertex_faces(self, csr=False):
         """
         List mapping each vertex index to a list of face indices that use it.
+
+        Parameters
+        ----------
+        csr : bool
+            If True, return the mapping as two arrays ``(indptr, indices)``
+            instead, where the faces of vertex ``i`` are
+            ``indices[indptr[i]:indptr[i + 1]]``.
         """
         if self._vertex_faces is None:
-            self._vertex_faces = [[] for i in range(len(self.get_vertices()))]
-            for i in range(self._faces.shape[0]):
-                face = self._faces[i]
-                for ind in face:
-                    self._vertex_faces[ind].append(i)
-        return self._vertex_faces
+            nv = len(self.get_vertices())
+            faces = self.get_faces().ravel()
+            order = np.argsort(faces, kind='stable')
+            indices = (order // 3).astype(np.uint32)
+            indptr = np.zeros(nv + 1, dtype=np.intp)
+            np.cumsum(np.bincount(faces, minlength=nv), out=indptr[1:])
+            self._vertex_faces = (indptr, indices)
+        if csr:
+            return self._vertex_faces
+        indptr, indices = self._vertex_faces
+        return [f.tolist() for f in np.split(indices, indptr[1:-1])]
 
     def _compute_edges(self, indexed=None):
         if indexed is None:
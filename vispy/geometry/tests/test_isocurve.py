@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+from vispy.geometry.isocurve import isocurve, isocurves
+from vispy.testing import run_tests_if_main
+
+
+def _distance(shape=(40, 30)):
+    x, y = np.ogrid[-1:1:shape[0] * 1j, -1:1:shape[1] * 1j]
+    return np.sqrt(x ** 2 + y ** 2)
+
+
+def test_isocurve_closed():
+    """Test that a circle is found as one closed line"""
+    data = _distance()
+    lines = isocurve(data, 0.5, connected=True)
+    assert len(lines) == 1
+    line = lines[0]
+    assert_array_equal(line[0], line[-1])
+    # Map the points from grid to data coordinates
+    x = (line[:, 0] - 0.5) * 2 / 39 - 1
+    y = (line[:, 1] - 0.5) * 2 / 29 - 1
+    assert_allclose(np.sqrt(x ** 2 + y ** 2), 0.5, atol=0.01)
+
+    # The points of the segments are the points of the line
+    segments = np.array(isocurve(data, 0.5))
+    assert segments.shape == (len(line) - 1, 2, 2)
+    assert_allclose(np.unique(segments.reshape(-1, 2), axis=0),
+                    np.unique(line, axis=0))
+
+
+def test_isocurves():
+    """Test that all levels at once give the same lines as each level"""
+    data = np.cumsum(np.cumsum(np.random.RandomState(0).randn(50, 40), 0), 1)
+    levels = np.percentile(data, [80, 20, 50]).tolist() + [data.max() + 1]
+    curves = isocurves(data, levels, extend_to_edge=True)
+    assert len(curves) == 4
+    for level, (vertices, connect) in zip(levels, curves):
+        expected = isocurves(data, [level], extend_to_edge=True)[0]
+        assert_array_equal(vertices, expected[0])
+        assert_array_equal(connect, expected[1])
+    assert curves[-1][0].shape == (0, 2)
+
+    # Each line is either closed or has both ends on the edge of the data
+    vertices, connect = curves[0]
+    assert connect.sum() > 0 and not connect[-1]
+    ends = np.flatnonzero(~connect)
+    starts = np.append(0, ends[:-1] + 1)
+    for start, end in zip(starts, ends):
+        if not np.array_equal(vertices[start], vertices[end]):
+            for v in vertices[start], vertices[end]:
+                assert v[0] in (0, 50) or v[1] in (0, 40)
+    assert vertices.min() >= 0 and vertices[:, 0].max() <= 50
+    assert vertices[:, 1].max() <= 40
+
+
+run_tests_if_main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from vispy.geometry.isosurface import isosurface, IsosurfaceCache
+from vispy.testing import run_tests_if_main
+
+
+def _triangles(vertices, faces):
+    """Set of the triangles of a mesh, independent of the vertex order"""
+    triangles = np.round(vertices[faces], 3)
+    return set(tuple(sorted(map(tuple, tri))) for tri in triangles)
+
+
+def _sphere(shape=(20, 17, 23)):
+    x, y, z = np.ogrid[-1:1:shape[0] * 1j, -1:1:shape[1] * 1j,
+                       -1:1:shape[2] * 1j]
+    return (x ** 2 + y ** 2 + z ** 2).astype(np.float32)
+
+
+def test_isosurface_chunks():
+    """Test that slabs give the same surface as the whole volume"""
+    data = _sphere()
+    vertices, faces = isosurface(data, 0.5)
+    assert len(vertices) > 0
+    expected = _triangles(vertices, faces)
+    for chunk_size in (1, 4, 18, 19, 100):
+        v, f = isosurface(data, 0.5, chunk_size=chunk_size)
+        # Vertices on the planes between slabs are merged
+        assert v.shape == vertices.shape and f.shape == faces.shape
+        assert v.dtype == np.float32 and f.dtype == np.uint32
+        assert _triangles(v, f) == expected
+    v, f = isosurface(data, 0.5, chunk_size=4, n_jobs=3)
+    assert _triangles(v, f) == expected
+    with ThreadPoolExecutor(2) as pool:
+        v, f = isosurface(data, 0.5, chunk_size=4, pool=pool)
+    assert _triangles(v, f) == expected
+
+
+def test_isosurface_chunks_nan():
+    """Test that slabs with NaN samples give the whole volume surface"""
+    data = _sphere((40, 40, 40))
+    data[5, 0, 0] = np.nan
+    # NaN samples are not below the level, even where all others are
+    data[10:14] = 0
+    data[12, 3, 3] = np.nan
+    data[30:] = np.nan
+    vertices, faces = isosurface(data, 0.5)
+    finite = np.isfinite(vertices[faces]).all(axis=(1, 2))
+    for chunk_size in (1, 4, 32):
+        v, f = isosurface(data, 0.5, chunk_size=chunk_size)
+        assert v.shape == vertices.shape and f.shape == faces.shape
+        assert np.isfinite(v[f]).all(axis=(1, 2)).sum() == finite.sum()
+        assert (_triangles(v, f[np.isfinite(v[f]).all(axis=(1, 2))]) ==
+                _triangles(vertices, faces[finite]))
+
+
+def test_isosurface_cache():
+    """Test reusing the results of slabs"""
+    data = _sphere()
+    cache = IsosurfaceCache()
+    v, f = isosurface(data, 0.5, chunk_size=4, cache=cache)
+    assert len(cache) == 5
+    v2, f2 = isosurface(data, 0.5, chunk_size=4, cache=cache)
+    assert_array_equal(v, v2)
+    assert_array_equal(f, f2)
+
+    # Modify the data of one slab
+    data[8:10] = 2
+    cache.invalidate(8, 10)
+    assert len(cache) == 3
+    v, f = isosurface(data, 0.5, chunk_size=4, cache=cache)
+    assert _triangles(v, f) == _triangles(*isosurface(data, 0.5))
+
+    # Slabs without the isosurface are not processed again
+    cache._results.clear()
+    v, f = isosurface(data, 0.2, chunk_size=4, cache=cache)
+    assert len(cache) == 3
+    assert _triangles(v, f) == _triangles(*isosurface(data, 0.2))
+
+
+run_tests_if_main()
@@ -3,10 +3,11 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 
 from vispy.testing import run_tests_if_main
 from vispy.geometry.meshdata import MeshData
+from vispy.geometry.normals import compact, normals
 
 
 def test_meshdata():
@@ -31,4 +32,51 @@ def test_meshdata():
     assert_array_equal(square_edges, mesh.get_edges())
 
 
+def test_meshdata_indexed_by_faces():
+    """Test merging the vertices of a mesh indexed by faces"""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                         [0, 0, 1]], dtype=np.float32)
+    faces = np.array([[0, 1, 2], [0, 2, 3], [0, 3, 4]], dtype=np.uint32)
+    mesh = MeshData(vertices=vertices[faces])
+    assert mesh.n_vertices == 5
+    # Vertices are kept in the order in which they first appear
+    assert_array_equal(mesh.get_vertices(), vertices)
+    assert_array_equal(mesh.get_faces(), faces)
+
+    # Vertex-face adjacency, as lists and as CSR arrays
+    vertex_faces = [[0, 1, 2], [0], [0, 1], [1, 2], [2]]
+    assert mesh.get_vertex_faces() == vertex_faces
+    indptr, indices = mesh.get_vertex_faces(csr=True)
+    assert_array_equal(indptr, [0, 3, 4, 6, 8, 9])
+    assert_array_equal(indices, sum(vertex_faces, []))
+
+    # Vertex normals are the normalized sum of the adjacent face normals
+    normals = mesh.get_vertex_normals()
+    assert_allclose(normals[1], [0, 0, 1])
+    assert_allclose(normals[4], [1, 0, 0])
+    assert_allclose(normals[0], np.array([1, 0, 2]) / np.sqrt(5),
+                    rtol=1e-6)
+
+
+def test_compact_normals():
+    """Test compacting vertices and computing their normals"""
+    # Two faces at a right angle that share the edge from 0 to 2
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 0, 0],
+                         [1, 1, 0], [0, 0, 1]], dtype=np.float32)
+    faces = np.array([[0, 1, 2], [3, 4, 5]], dtype=np.uint32)
+    compacted, indices, mapping = compact(vertices, faces)
+    assert len(compacted) == 4
+    assert_array_equal(compacted[mapping], vertices)
+    assert_array_equal(compacted[indices], vertices[faces])
+
+    # Both faces count for the shared vertices
+    up = np.array([0, 0, 1])
+    side = np.array([1, -1, 0]) / np.sqrt(2)
+    shared = (up + side) / np.linalg.norm(up + side)
+    result = normals(compacted, indices)
+    assert_allclose(result[indices[0]], [shared, up, shared], atol=1e-6)
+    assert_allclose(result[indices[1, 2]], side, atol=1e-6)
+    assert_allclose(normals(vertices, faces), result[mapping])
+
+
 run_tests_if_main()
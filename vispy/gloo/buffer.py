@@ -400,6 +400,11 @@ class DataBufferView(DataBuffer):
         """Buffer base if this buffer is a view on another buffer. """
         return self._base
 
+    @property
+    def divisor(self):
+        """ The divisor of the base buffer, if any """
+        return getattr(self._base, 'divisor', None)
+
     def resize_bytes(self, size):
         raise RuntimeError("Cannot resize buffer view.")
 
@@ -422,10 +427,27 @@ class VertexBuffer(DataBuffer):
     ----------
     data : ndarray
         Buffer data (optional)
+    divisor : int | None
+        If given, the buffer holds per-instance data: each element is used
+        for ``divisor`` consecutive instances in an instanced draw, rather
+        than for a single vertex. See ``Program.draw``.
     """
 
     _GLIR_TYPE = 'VertexBuffer'
 
+    def __init__(self, data=None, divisor=None):
+        if divisor is not None and int(divisor) < 1:
+            raise ValueError('divisor must be a positive integer, not %r'
+                             % divisor)
+        self._divisor = None if divisor is None else int(divisor)
+        DataBuffer.__init__(self, data)
+
+    @property
+    def divisor(self):
+        """ Number of instances that use each element, or None for
+        per-vertex data """
+        return self._divisor
+
     def _prepare_data(self, data, convert=False):
         # Build a structured view of the data if:
         #  -> it is not already a structured array
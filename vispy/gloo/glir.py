@@ -152,7 +152,7 @@ ATTRIBUTE
 
 ::
 
-   ('ATTRIBUTE', <program_id>, <name:str>, <type:str>, <vbo_id>, <stride:int>, <offset:int>)
+   ('ATTRIBUTE', <program_id>, <name:str>, <type:str>, <vbo_id>, <stride:int>, <offset:int>, [<divisor:int>])
    # Example: Buffer id 5, stride 4, offset 0
    ('ATTRIBUTE', 4, 'a_position', 'vec3', 5, 4, 0)
 
@@ -165,6 +165,9 @@ The type can be 'float', 'vec2', 'vec3', 'vec4'. If the first value
 element is zero, the remaining elements represent the data to pass to
 ``glVertexAttribNf``.
 
+The optional divisor makes the attribute advance once per ``divisor``
+instances rather than once per vertex (see ``glVertexAttribDivisor``).
+
 It is an error to provide this command before the shaders are set. After
 resetting shaders, all uniforms and attributes have to be re-submitted.
 
@@ -173,7 +176,7 @@ DRAW
 
 ::
 
-   ('DRAW', <program_id>, <mode:str>, <selection:tuple>)
+   ('DRAW', <program_id>, <mode:str>, <selection:tuple>, [<instances:int>])
    # Example: Draw 100 lines
    ('DRAW', 4, 'lines', (0, 100))
    # Example: Draw 100 lines using index buffer with id 5
@@ -191,6 +194,10 @@ If the ``selection`` argument has two elements, it contains two integers
 ``(<index-buffer-id>, gtype, count)``, where ``gtype`` is
 'unsigned_byte','unsigned_short', or 'unsigned_int'.
 
+If ``instances`` is given, the selection is drawn that many times in a
+single instanced draw call. This requires the 'instanced_arrays'
+capability.
+
 SIZE
 ~~~~
 
@@ -358,16 +365,19 @@ for details on program linking.
 """
 
 import os
+import os.path as op
 import sys
 import re
 import json
+import struct
+import hashlib
 import weakref
 from distutils.version import LooseVersion
 
 import numpy as np
 
 from . import gl
-from ..util import logger
+from ..util import config, logger
 
 # TODO: expose these via an extension space in .gl?
 _internalformats = [
@@ -403,6 +413,30 @@ _internalformats = dict([(enum.name, enum) for enum in _internalformats])
 JUST_DELETED = 'JUST_DELETED'
 
 
+# GLIR commands are translated to integer opcodes so that the parser can
+# dispatch through a jump table rather than a chain of string comparisons.
+# The first opcodes act on the parser itself, the others call a method
+# on the GLIR object with the given id. Order is by frequency of use.
+_PARSER_COMMANDS = ('CURRENT', 'FUNC', 'CREATE', 'DELETE')
+_OBJECT_COMMANDS = (
+    ('DRAW', 'draw'),  # Program
+    ('TEXTURE', 'set_texture'),  # Program
+    ('UNIFORM', 'set_uniform'),  # Program
+    ('ATTRIBUTE', 'set_attribute'),  # Program
+    ('DATA', 'set_data'),  # VertexBuffer, IndexBuffer, Texture, Shader
+    ('SIZE', 'set_size'),  # VertexBuffer, IndexBuffer, Texture, RenderBuffer
+    ('ATTACH', 'attach'),  # FrameBuffer, Program
+    ('FRAMEBUFFER', 'set_framebuffer'),  # FrameBuffer
+    ('LINK', 'link_program'),  # Program
+    ('WRAPPING', 'set_wrapping'),  # Texture1D, Texture2D, Texture3D
+    ('INTERPOLATION', 'set_interpolation'),  # Texture1D, Texture2D, Texture3D
+)
+_N_PARSER_OPCODES = len(_PARSER_COMMANDS)
+_OBJECT_METHODS = tuple(method for _, method in _OBJECT_COMMANDS)
+GLIR_OPCODES = dict((cmd, i) for i, cmd in enumerate(
+    _PARSER_COMMANDS + tuple(cmd for cmd, _ in _OBJECT_COMMANDS)))
+
+
 def as_enum(enum):
     """ Turn a possibly string enum into an integer enum.
     """
@@ -666,6 +700,12 @@ class BaseGlirParser(object):
         self.capabilities = dict(
             gl_version='Unknown',
             max_texture_size=None,
+            vertex_array_object=False,
+            instanced_arrays=False,
+            pixel_buffer_object=False,
+            program_binary=False,
+            gl_vendor='Unknown',
+            gl_renderer='Unknown',
         )
 
     def is_remote(self):
@@ -721,6 +761,19 @@ class GlirParser(BaseGlirParser):
         # when two Canvases share a context.
         self.env = {}
 
+        # Jump table for the commands that act on the parser itself,
+        # indexed by opcode. Resolved gl functions for FUNC commands.
+        self._jump_table = (self._current, self._func,
+                            self._create, self._delete)
+        self._gl_funcs = {}
+
+        # Shadow of the GL state of the current context
+        self.state = GlirState()
+
+        # Linked programs, shared by programs with the same shaders
+        self.programs = GlirProgramCache()
+        self._program_binaries = None
+
     @property
     def shader_compatibility(self):
         """Type of shader compatibility """
@@ -732,75 +785,86 @@ class GlirParser(BaseGlirParser):
     def is_remote(self):
         return False
 
+    @property
+    def program_binaries(self):
+        """ The on-disk cache of linked programs (see `GlirProgramBinaries`),
+        or None if the context does not support program binaries or the
+        ``program_cache_path`` config option is empty.
+        """
+        path = config['program_cache_path']
+        if not (path and self.capabilities['program_binary']):
+            return None
+        if self._program_binaries is None or \
+                self._program_binaries.path != path:
+            driver = ' | '.join([self.capabilities['gl_vendor'],
+                                 self.capabilities['gl_renderer'],
+                                 self.capabilities['gl_version']])
+            self._program_binaries = GlirProgramBinaries(path, driver)
+        return self._program_binaries
+
     def _parse(self, command):
         """ Parse a single command.
         """
         cmd, id_, args = command[0], command[1], command[2:]
+        opcode = GLIR_OPCODES.get(cmd, -1)
+
+        if 0 <= opcode < _N_PARSER_OPCODES:
+            # Command that acts on the parser itself
+            self._jump_table[opcode](id_, args)
+            return
 
-        if cmd == 'CURRENT':
-            # This context is made current
-            self.env.clear()
-            self._gl_initialize()
-            self.env['fbo'] = args[0]
-            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, args[0])
-        elif cmd == 'FUNC':
-            # GL function call
-            args = [as_enum(a) for a in args]
+        # Doing something to an object
+        ob = self._objects.get(id_, None)
+        if ob is JUST_DELETED:
+            return
+        if ob is None:
+            if id_ not in self._invalid_objects:
+                raise RuntimeError('Cannot %s object %i because it '
+                                   'does not exist' % (cmd, id_))
+            return
+        if opcode < 0:
+            logger.warning('Invalid GLIR command %r' % cmd)
+            return
+        getattr(ob, _OBJECT_METHODS[opcode - _N_PARSER_OPCODES])(*args)
+
+    def _current(self, id_, args):
+        # This context is made current
+        self.env.clear()
+        self.state.reset()
+        self._gl_funcs.clear()
+        self._gl_initialize()
+        self.env['fbo'] = args[0]
+        if self.capabilities['vertex_array_object']:
+            # VAOs are not shared between contexts, so programs need to
+            # know which context is current
+            self.env['context'] = _get_current_context()
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, args[0])
+
+    def _func(self, id_, args):
+        # GL function call; the function is looked up once per context
+        func = self._gl_funcs.get(id_, None)
+        if func is None:
             try:
-                getattr(gl, id_)(*args)
+                func = self._gl_funcs[id_] = getattr(gl, id_)
             except AttributeError:
                 logger.warning('Invalid gl command: %r' % id_)
-        elif cmd == 'CREATE':
-            # Creating an object
-            if args[0] is not None:
-                klass = self._classmap[args[0]]
-                self._objects[id_] = klass(self, id_)
-            else:
-                self._invalid_objects.add(id_)
-        elif cmd == 'DELETE':
-            # Deleting an object
-            ob = self._objects.get(id_, None)
-            if ob is not None:
-                self._objects[id_] = JUST_DELETED
-                ob.delete()
-        else:
-            # Doing somthing to an object
-            ob = self._objects.get(id_, None)
-            if ob == JUST_DELETED:
-                return
-            if ob is None:
-                if id_ not in self._invalid_objects:
-                    raise RuntimeError('Cannot %s object %i because it '
-                                       'does not exist' % (cmd, id_))
                 return
-            # Triage over command. Order of commands is set so most
-            # common ones occur first.
-            if cmd == 'DRAW':  # Program
-                ob.draw(*args)
-            elif cmd == 'TEXTURE':  # Program
-                ob.set_texture(*args)
-            elif cmd == 'UNIFORM':  # Program
-                ob.set_uniform(*args)
-            elif cmd == 'ATTRIBUTE':  # Program
-                ob.set_attribute(*args)
-            elif cmd == 'DATA':  # VertexBuffer, IndexBuffer, Texture, Shader
-                ob.set_data(*args)
-            elif cmd == 'SIZE':  # VertexBuffer, IndexBuffer,
-                ob.set_size(*args)  # Texture[1D, 2D, 3D], RenderBuffer
-            elif cmd == 'ATTACH':  # FrameBuffer, Program
-                ob.attach(*args)
-            elif cmd == 'FRAMEBUFFER':  # FrameBuffer
-                ob.set_framebuffer(*args)
-            # elif cmd == 'SHADERS':  # Program
-            #     ob.set_shaders(*args)
-            elif cmd == 'LINK':  # Program
-                ob.link_program(*args)
-            elif cmd == 'WRAPPING':  # Texture1D, Texture2D, Texture3D
-                ob.set_wrapping(*args)
-            elif cmd == 'INTERPOLATION':  # Texture1D, Texture2D, Texture3D
-                ob.set_interpolation(*args)
-            else:
-                logger.warning('Invalid GLIR command %r' % cmd)
+        self.state.func(id_, func, [as_enum(a) for a in args])
+
+    def _create(self, id_, args):
+        # Creating an object
+        if args[0] is not None:
+            klass = self._classmap[args[0]]
+            self._objects[id_] = klass(self, id_)
+        else:
+            self._invalid_objects.add(id_)
+
+    def _delete(self, id_, args):
+        # Deleting an object
+        ob = self._objects.get(id_, None)
+        if ob is not None:
+            self._objects[id_] = JUST_DELETED
+            ob.delete()
 
     def parse(self, commands):
         """ Parse a list of commands.
@@ -815,8 +879,9 @@ class GlirParser(BaseGlirParser):
         for id_ in to_delete:
             self._objects.pop(id_)
 
+        parse = self._parse
         for command in commands:
-            self._parse(command)
+            parse(command)
 
     def get_object(self, id_):
         """ Get the object with the given id or None if it does not exist.
@@ -837,6 +902,9 @@ class GlirParser(BaseGlirParser):
             gl.glEnable(GL_POINT_SPRITE)
         if self.capabilities['max_texture_size'] is None:  # only do once
             self.capabilities['gl_version'] = gl.glGetParameter(gl.GL_VERSION)
+            self.capabilities['gl_vendor'] = gl.glGetParameter(gl.GL_VENDOR)
+            self.capabilities['gl_renderer'] = \
+                gl.glGetParameter(gl.GL_RENDERER)
             self.capabilities['max_texture_size'] = \
                 gl.glGetParameter(gl.GL_MAX_TEXTURE_SIZE)
             this_version = self.capabilities['gl_version'].split(' ')
@@ -848,6 +916,32 @@ class GlirParser(BaseGlirParser):
                 this_version = this_version[0]
 
             this_version = LooseVersion(this_version)
+            # Vertex array objects need desktop GL 3.0 and a gl backend
+            # that exposes them (i.e. gl+)
+            self.capabilities['vertex_array_object'] = bool(
+                self.shader_compatibility == 'desktop' and
+                this_version >= '3.0' and
+                getattr(gl, 'glGenVertexArrays', False))
+            # Instanced drawing is core in 3.3; attribute divisors are
+            # recorded in the vertex array objects
+            self.capabilities['instanced_arrays'] = bool(
+                self.capabilities['vertex_array_object'] and
+                this_version >= '3.3' and
+                getattr(gl, 'glVertexAttribDivisor', False))
+            # Asynchronous pixel reads need fences, which are core in 3.2,
+            # and functions that are only exposed by gl+
+            self.capabilities['pixel_buffer_object'] = bool(
+                self.shader_compatibility == 'desktop' and
+                this_version >= '3.2' and
+                getattr(gl, 'glFenceSync', False) and
+                getattr(gl, 'glMapBufferRange', False))
+            # Linked programs can be saved as binaries with GL 4.1 and gl+,
+            # if the driver supports at least one binary format
+            self.capabilities['program_binary'] = bool(
+                self.shader_compatibility == 'desktop' and
+                this_version >= '4.1' and
+                getattr(gl, 'glProgramBinary', False) and
+                gl.glGetParameter(gl.GL_NUM_PROGRAM_BINARY_FORMATS) > 0)
             if this_version < '2.1':
                 if os.getenv('VISPY_IGNORE_OLD_VERSION', '').lower() != 'true':
                     logger.warning('OpenGL version 2.1 or higher recommended, '
@@ -855,6 +949,211 @@ class GlirParser(BaseGlirParser):
                                    % self.capabilities['gl_version'])
 
 
+# GL functions that set a piece of global state, mapped to the name of that
+# state. Functions that set the same state (e.g. glBlendFunc and
+# glBlendFuncSeparate) share a name, so that they invalidate each other.
+# glViewport is not included because some GUI toolkits (e.g. Qt) set the
+# viewport themselves before each draw.
+_STATE_FUNCS = {
+    'glBlendFunc': 'blend_func',
+    'glBlendFuncSeparate': 'blend_func',
+    'glBlendEquation': 'blend_equation',
+    'glBlendEquationSeparate': 'blend_equation',
+    'glBlendColor': 'blend_color',
+    'glClearColor': 'clear_color',
+    'glClearDepth': 'clear_depth',
+    'glClearStencil': 'clear_stencil',
+    'glColorMask': 'color_mask',
+    'glCullFace': 'cull_face',
+    'glDepthFunc': 'depth_func',
+    'glDepthMask': 'depth_mask',
+    'glDepthRange': 'depth_range',
+    'glFrontFace': 'front_face',
+    'glLineWidth': 'line_width',
+    'glPolygonOffset': 'polygon_offset',
+    'glSampleCoverage': 'sample_coverage',
+    'glScissor': 'scissor',
+}
+
+
+class GlirState(object):
+    """ Shadow of the GL state of a context, used by the GLIR parser to
+    drop GL calls that would not change the state.
+
+    This keeps track of the current program, buffer and texture bindings,
+    enabled vertex attribute arrays and attribute pointers, enabled
+    capabilities, and the state set by the functions in ``_STATE_FUNCS``
+    (blending, depth, scissor, etc.). The number of GL calls that were
+    dropped is counted in ``calls_saved``. Viewport calls are never
+    dropped, because GUI toolkits may set the viewport themselves.
+
+    The shadow is reset when the context is made current. If GL is used
+    directly (i.e. not via GLIR) while the context is current, the cache
+    should be disabled (or reset), because it cannot see those calls.
+    """
+
+    def __init__(self):
+        self._enabled = True
+        self.calls_saved = 0
+        self.reset()
+
+    @property
+    def enabled(self):
+        """ Whether redundant GL calls are dropped. When disabled, all
+        calls are passed through to GL.
+        """
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, enabled):
+        self._enabled = bool(enabled)
+        self.reset()
+
+    def reset(self):
+        """ Forget all shadowed state, e.g. because the context changed.
+        """
+        self._program = None
+        self._vertex_array = None
+        self._buffers = {}  # target -> buffer handle
+        self._active_texture = 0  # texture unit, GL_TEXTURE0 by default
+        self._textures = {}  # (unit, target) -> texture handle
+        self._attrib_arrays = {}  # location -> enabled
+        self._attrib_pointers = {}  # location -> (buffer handle, args)
+        self._funcs = {}  # state name or (enable, cap) -> (funcname, args)
+
+    def use_program(self, handle):
+        if self._enabled and handle == self._program:
+            self.calls_saved += 1
+            return
+        self._program = handle
+        gl.glUseProgram(handle)
+
+    def bind_vertex_array(self, handle):
+        if self._enabled and handle == self._vertex_array:
+            self.calls_saved += 1
+            return
+        self._vertex_array = handle
+        # The index buffer binding is part of the vertex array state
+        self._buffers.pop(gl.GL_ELEMENT_ARRAY_BUFFER, None)
+        gl.glBindVertexArray(handle)
+
+    def bind_buffer(self, target, handle):
+        if self._enabled and self._buffers.get(target, None) == handle:
+            self.calls_saved += 1
+            return
+        self._buffers[target] = handle
+        gl.glBindBuffer(target, handle)
+
+    def active_texture(self, unit):
+        if self._enabled and unit == self._active_texture:
+            self.calls_saved += 1
+            return
+        self._active_texture = unit
+        gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+
+    def bind_texture(self, target, handle, unit=None):
+        """ Bind a texture to the given unit, or to the active unit if
+        unit is None.
+        """
+        if unit is None:
+            unit = self._active_texture
+        elif self._enabled and self._textures.get((unit, target)) == handle:
+            self.calls_saved += 2  # glActiveTexture and glBindTexture
+            return
+        else:
+            self.active_texture(unit)
+        if self._enabled and self._textures.get((unit, target)) == handle:
+            self.calls_saved += 1
+            return
+        self._textures[(unit, target)] = handle
+        gl.glBindTexture(target, handle)
+
+    def enable_attrib_array(self, location, enable=True):
+        if self._enabled and \
+                self._attrib_arrays.get(location, None) == enable:
+            self.calls_saved += 1
+            return
+        self._attrib_arrays[location] = enable
+        if enable:
+            gl.glEnableVertexAttribArray(location)
+        else:
+            gl.glDisableVertexAttribArray(location)
+
+    def attrib_pointer(self, location, vbo_handle, args):
+        """ Point the attribute at the given location to a VBO. Binds the
+        VBO only if the pointer is not already set up this way.
+        """
+        pointer = vbo_handle, args
+        if self._enabled and \
+                self._attrib_pointers.get(location, None) == pointer:
+            self.calls_saved += 2  # glBindBuffer and glVertexAttribPointer
+            return
+        self.bind_buffer(gl.GL_ARRAY_BUFFER, vbo_handle)
+        self._attrib_pointers[location] = pointer
+        gl.glVertexAttribPointer(location, *args)
+
+    def func(self, funcname, func, args):
+        """ Call a gl function that was given via a FUNC command, unless
+        it is known to not change the state.
+        """
+        if funcname in ('glEnable', 'glDisable'):
+            key = 'enable', args[0]
+        else:
+            key = _STATE_FUNCS.get(funcname, None)
+        if key is not None:
+            call = funcname, tuple(args)
+            if self._enabled and self._funcs.get(key, None) == call:
+                self.calls_saved += 1
+                return
+            self._funcs[key] = call
+        func(*args)
+
+    def forget_program(self, handle):
+        """ Forget a program that is deleted, so that its handle can be
+        reused.
+        """
+        if self._program == handle:
+            self._program = None
+
+    def forget_vertex_array(self, handle):
+        """ Forget a vertex array that is deleted, so that its handle can
+        be reused. GL unbinds a deleted vertex array itself.
+        """
+        if self._vertex_array == handle:
+            self._vertex_array = 0
+            self._buffers.pop(gl.GL_ELEMENT_ARRAY_BUFFER, None)
+
+    def forget_buffer(self, handle):
+        """ Forget a buffer that is deleted, so that its handle can be
+        reused. GL unbinds deleted buffers itself.
+        """
+        for target, bound in list(self._buffers.items()):
+            if bound == handle:
+                self._buffers[target] = 0
+        for location, pointer in list(self._attrib_pointers.items()):
+            if pointer[0] == handle:
+                del self._attrib_pointers[location]
+
+    def forget_texture(self, handle):
+        """ Forget a texture that is deleted, so that its handle can be
+        reused. GL unbinds deleted textures itself.
+        """
+        for key, bound in list(self._textures.items()):
+            if bound == handle:
+                self._textures[key] = 0
+
+
+def _get_current_context():
+    """ Get an identifier for the native GL context that is current, or
+    None if it cannot be determined.
+    """
+    try:
+        from OpenGL import platform
+        return platform.GetCurrentContext()
+    except Exception:
+        return None
+
+
 def glir_logger(parser_cls, file_or_filename):
     from ..util.logs import NumPyJSONEncoder
 
@@ -887,6 +1186,161 @@ def glir_logger(parser_cls, file_or_filename):
 
 ## GLIR objects
 
+class GlirProgramCache(object):
+    """ The linked GL programs of a GLIR parser, keyed by the source code of
+    their shaders.
+
+    Programs with the same shaders share one GL program object, so that
+    their shaders are compiled and linked only once per context. As the
+    values of uniforms are part of the GL program object, each program sets
+    its uniforms again when the program object was last used by another
+    program (see ``GlirProgram._claim``).
+    """
+
+    def __init__(self):
+        self._entries = {}  # key -> [handle, refcount, owner, variables]
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Dict with the number of GL programs and the hit and miss counts"""
+        return dict(size=len(self), hits=self.hits, misses=self.misses)
+
+    def get(self, key):
+        """ Return the entry of the program linked from the shaders in
+        *key* and add a reference to it, or None if there is none.
+        """
+        entry = self._entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entry[1] += 1
+        return entry
+
+    def add(self, key, handle, variables):
+        """ Add a newly linked program with one reference to it, and return
+        its entry.
+        """
+        entry = self._entries[key] = [handle, 1, None, variables]
+        return entry
+
+    def release(self, entry, program):
+        """ Remove the reference of *program* to the entry. Return True if
+        the GL program is not used anymore and must be deleted.
+        """
+        if entry[2] is program:
+            entry[2] = None
+        entry[1] -= 1
+        if entry[1] > 0:
+            return False
+        for key, value in list(self._entries.items()):
+            if value is entry:
+                del self._entries[key]
+        return True
+
+
+class GlirProgramBinaries(object):
+    """ On-disk cache of linked program binaries
+
+    Linked programs are saved with ``glGetProgramBinary`` in the directory
+    *path*, keyed by a hash of the code of their shaders and of the driver.
+    When the same shaders are linked again, e.g. in a later run of the
+    application, the binary is loaded instead of compiling and linking the
+    shaders. Binaries that the driver rejects, e.g. after a driver update,
+    are replaced by those of a new compilation.
+
+    Parameters
+    ----------
+    path : str
+        The directory of the cache. It is created when needed.
+    driver : str
+        Description of the GL implementation (vendor, renderer and
+        version), as binaries can only be loaded by the same driver.
+    """
+
+    _magic = b'VISPYPB1'
+
+    def __init__(self, path, driver):
+        self.path = path
+        self.driver = driver
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """Dict with the path of the cache and the hit and miss counts"""
+        return dict(path=self.path, hits=self.hits, misses=self.misses)
+
+    def filename(self, key):
+        """ Return the file name of the binary of the shaders in *key*,
+        a tuple of (target, code) items.
+        """
+        sha = hashlib.sha256(self.driver.encode('utf-8'))
+        for target, code in key:
+            sha.update(b'\0%d\0' % int(target))
+            sha.update(code.encode('utf-8'))
+        return op.join(self.path, sha.hexdigest() + '.bin')
+
+    def load(self, key):
+        """ Create a GL program from the binary of the shaders in *key*.
+        Returns the handle of the linked program, or None if there is no
+        usable binary.
+        """
+        filename = self.filename(key)
+        try:
+            with open(filename, 'rb') as fh:
+                data = fh.read()
+        except (IOError, OSError):
+            self.misses += 1
+            return None
+        n = len(self._magic)
+        if data[:n] == self._magic and len(data) > n + 4:
+            binary_format = struct.unpack('<I', data[n:n + 4])[0]
+            binary = np.frombuffer(data[n + 4:], np.uint8)
+            handle = gl.glCreateProgram()
+            gl.glProgramBinary(handle, binary_format, binary, len(binary))
+            if gl.glGetProgramParameter(handle, gl.GL_LINK_STATUS):
+                self.hits += 1
+                return handle
+            gl.glDeleteProgram(handle)
+        logger.debug('Program binary %s does not match the driver; the '
+                     'shaders are compiled instead.' % filename)
+        self.misses += 1
+        return None
+
+    def save(self, handle, key):
+        """ Save the binary of the linked program *handle* for the shaders
+        in *key*. Errors are logged, since the cache is optional.
+        """
+        try:
+            length = gl.glGetProgramParameter(handle,
+                                              gl.GL_PROGRAM_BINARY_LENGTH)
+            if not length:
+                return
+            size = np.zeros(1, np.int32)
+            binary_format = np.zeros(1, np.uint32)
+            binary = np.zeros(length, np.uint8)
+            gl.glGetProgramBinary(handle, length, size, binary_format, binary)
+            data = (self._magic + struct.pack('<I', int(binary_format[0])) +
+                    binary[:int(size[0])].tobytes())
+            if not op.isdir(self.path):
+                os.makedirs(self.path)
+            # Write to a temporary file first, so that other processes never
+            # read a partial binary
+            filename = self.filename(key)
+            temp = '%s.%d.tmp' % (filename, os.getpid())
+            with open(temp, 'wb') as fh:
+                fh.write(data)
+            os.replace(temp, filename)
+        except Exception as err:
+            logger.warning('Could not save program binary: %s' % err)
+
+
 class GlirObject(object):
     def __init__(self, parser, id_):
         self._parser = parser
@@ -911,6 +1365,12 @@ class GlirShader(GlirObject):
 
     def create(self):
         self._handle = gl.glCreateShader(self._target)
+        self._code = None
+        self._compiled = False
+
+    @property
+    def code(self):
+        return self._code
 
     def set_data(self, offset, code):
         # NOTE: offset will always be 0 to match other DATA commands
@@ -919,7 +1379,16 @@ class GlirShader(GlirObject):
         convert = self._parser.shader_compatibility
         if convert:
             code = convert_shader(convert, code)
+        self._code = code
+        self._compiled = False
 
+    def compile(self):
+        """ Compile the code. This is done when the shader is linked into a
+        program, unless the program was linked from the same code before.
+        """
+        if self._compiled:
+            return
+        code = self._code
         gl.glShaderSource(self._handle, code)
         gl.glCompileShader(self._handle)
         status = gl.glGetShaderParameter(self._handle, gl.GL_COMPILE_STATUS)
@@ -928,6 +1397,7 @@ class GlirShader(GlirObject):
             errormsg = self._get_error(code, errors, 4)
             raise RuntimeError("Shader compilation error in %s:\n%s" %
                                (self._target, errormsg))
+        self._compiled = True
 
     def delete(self):
         gl.glDeleteShader(self._handle)
@@ -1046,7 +1516,10 @@ class GlirProgram(GlirObject):
     }
 
     def create(self):
-        self._handle = gl.glCreateProgram()
+        # The GL program is created (or shared) when the program is linked
+        self._handle = -1
+        self._shared = None  # entry in the program cache of the parser
+        self._uniform_calls = {}  # name -> (gl function, args)
         self._attached_shaders = []
         self._validated = False
         self._linked = False
@@ -1057,27 +1530,56 @@ class GlirProgram(GlirObject):
         self._samplers = {}  # name -> (tex-target, tex-handle, unit)
         self._attributes = {}  # name -> (vbo-handle, attr-handle, func, args)
         self._known_invalid = set()  # variables that we know are invalid
+        self._uniforms = {}  # name -> (handle, func, count, is_matrix)
+        self._gl_funcs = {}  # funcname -> gl function, resolved once
+        # Vertex array objects, one per context (they cannot be shared)
+        self._vaos = {}  # context -> [vao-handle, locations, needs-record]
+        self._constant_attributes = []  # (attr-handle, func, args)
+        self._divisors = {}  # attr-handle -> divisor
 
     def delete(self):
-        gl.glDeleteProgram(self._handle)
+        self._release()
+        # We can only delete the VAO of the current context, the others
+        # are released with their context
+        vao = self._vaos.pop(self._parser.env.get('context', None), None)
+        if vao is not None:
+            self._parser.state.forget_vertex_array(vao[0])
+            gl.glDeleteVertexArrays(1, [vao[0]])
 
     def activate(self):
         """ Avoid overhead in calling glUseProgram with same arg.
         Warning: this will break if glUseProgram is used somewhere else.
         Per context we keep track of one current program.
         """
-        if self._handle != self._parser.env.get('current_program', False):
-            self._parser.env['current_program'] = self._handle
-            gl.glUseProgram(self._handle)
+        self._parser.state.use_program(self._handle)
 
     def deactivate(self):
         """ Avoid overhead in calling glUseProgram with same arg.
         Warning: this will break if glUseProgram is used somewhere else.
         Per context we keep track of one current program.
         """
-        if self._parser.env.get('current_program', 0) != 0:
-            self._parser.env['current_program'] = 0
-            gl.glUseProgram(0)
+        self._parser.state.use_program(0)
+
+    def _claim(self):
+        """ Activate the program. If the GL program is shared with other
+        programs, and another program set its uniforms last, then set the
+        uniforms of this program again.
+        """
+        self.activate()
+        entry = self._shared
+        if entry[2] is not self:
+            entry[2] = self
+            for func, args in self._uniform_calls.values():
+                func(*args)
+
+    def _release(self):
+        """ Stop using the GL program, and delete it if no other program
+        uses it.
+        """
+        entry, self._shared = self._shared, None
+        if entry is not None and self._parser.programs.release(entry, self):
+            self._parser.state.forget_program(entry[0])
+            gl.glDeleteProgram(entry[0])
 
     def set_shaders(self, vert, frag):
         """ This function takes care of setting the shading code and
@@ -1097,31 +1599,80 @@ class GlirProgram(GlirObject):
         """ Attach a shader to this program.
         """
         shader = self._parser.get_object(id_)
-        gl.glAttachShader(self._handle, shader.handle)
         self._attached_shaders.append(shader)
 
     def link_program(self):
         """ Link the complete program and check.
 
-        All shaders are detached and deleted if the program was successfully
-        linked.
+        Programs with the same shader code share one GL program, see
+        `GlirProgramCache`; the shaders are only compiled and linked if
+        there is none yet. All shaders are detached and deleted if the
+        program was successfully linked.
         """
-        gl.glLinkProgram(self._handle)
-        if not gl.glGetProgramParameter(self._handle, gl.GL_LINK_STATUS):
-            raise RuntimeError('Program linking error:\n%s'
-                               % gl.glGetProgramInfoLog(self._handle))
-
-        # Detach all shaders to prepare them for deletion (they are no longer
-        # needed after linking is complete)
-        for shader in self._attached_shaders:
-            gl.glDetachShader(self._handle, shader.handle)
-        self._attached_shaders = []
-
-        # Now we know what variables will be used by the program
-        self._unset_variables = self._get_active_attributes_and_uniforms()
+        shaders, self._attached_shaders = self._attached_shaders, []
+        key = tuple((shader._target, shader.code) for shader in shaders)
+        self._release()
+        self._linked = False
+        entry = self._parser.programs.get(key)
+        if entry is None:
+            # Try the binary of an earlier run before compiling
+            binaries = self._parser.program_binaries
+            handle = None
+            if binaries is not None:
+                handle = binaries.load(key)
+            if handle is None:
+                handle = self._compile_and_link(shaders, binaries)
+                if binaries is not None:
+                    binaries.save(handle, key)
+
+            # Now we know what variables will be used by the program
+            self._handle = handle
+            variables = self._get_active_attributes_and_uniforms()
+            entry = self._parser.programs.add(key, handle, variables)
+        self._shared = entry
+        self._handle = entry[0]
+        self._unset_variables = set(entry[3])
+        self._uniform_calls = {}
         self._handles = {}
+        self._uniforms = {}
         self._known_invalid = set()
         self._linked = True
+        self._invalidate_vertex_arrays()
+
+    def _compile_and_link(self, shaders, binaries=None):
+        """ Compile the shaders and link them into a new GL program. Returns
+        the handle of the program.
+        """
+        for shader in shaders:
+            shader.compile()
+        handle = gl.glCreateProgram()
+        if binaries is not None:
+            gl.glProgramParameteri(handle,
+                                   gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT,
+                                   gl.GL_TRUE)
+        for shader in shaders:
+            gl.glAttachShader(handle, shader.handle)
+        gl.glLinkProgram(handle)
+        if not gl.glGetProgramParameter(handle, gl.GL_LINK_STATUS):
+            errors = gl.glGetProgramInfoLog(handle)
+            gl.glDeleteProgram(handle)
+            raise RuntimeError('Program linking error:\n%s' % errors)
+
+        # Detach all shaders to prepare them for deletion (they are no
+        # longer needed after linking is complete)
+        for shader in shaders:
+            gl.glDetachShader(handle, shader.handle)
+        return handle
+
+    def _get_gl_func(self, funcname):
+        """ Get the gl function with the given name. The lookup is done
+        only once per program, since the gl backend cannot change for
+        the context that the program lives in.
+        """
+        func = self._gl_funcs.get(funcname, None)
+        if func is None:
+            func = self._gl_funcs[funcname] = getattr(gl, funcname)
+        return func
 
     def _get_active_attributes_and_uniforms(self):
         """ Retrieve active attributes and uniforms to be able to check that
@@ -1169,7 +1720,7 @@ class GlirProgram(GlirObject):
                             'uniform is not active.' % name)
                 return
         # Program needs to be active in order to set uniforms
-        self.activate()
+        self._claim()
         if True:
             # Sampler: the value is the id of the texture
             tex = self._parser.get_object(value)
@@ -1181,6 +1732,7 @@ class GlirProgram(GlirObject):
             if name in self._samplers:
                 unit = self._samplers[name][-1]  # Use existing unit
             self._samplers[name] = tex._target, tex.handle, unit
+            self._uniform_calls[name] = gl.glUniform1i, (handle, unit)
             gl.glUniform1i(handle, unit)
 
     def set_uniform(self, name, type_, value):
@@ -1188,43 +1740,57 @@ class GlirProgram(GlirObject):
         """
         if not self._linked:
             raise RuntimeError('Cannot set uniform when program has no code')
-        # Get handle for the uniform, first try cache
-        handle = self._handles.get(name, -1)
-        count = 1
-        if handle < 0:
+        # Get handle, function and count for the uniform, first try cache
+        uniform = self._uniforms.get(name, None)
+        if uniform is None:
             if name in self._known_invalid:
                 return
-            handle = gl.glGetUniformLocation(self._handle, name)
-            self._unset_variables.discard(name)  # Mark as set
-            # if we set a uniform_array, mark all as set
-            if not type_.startswith('mat'):
-                count = value.nbytes // (4 * self.ATYPEINFO[type_][0])
-            if count > 1:
-                for ii in range(count):
-                    if '%s[%s]' % (name, ii) in self._unset_variables:
-                        self._unset_variables.discard('%s[%s]' % (name, ii))
-
-            self._handles[name] = handle  # Store in cache
-            if handle < 0:
-                self._known_invalid.add(name)
-                logger.info('Not setting value for variable %s %s; '
-                            'uniform is not active.' % (type_, name))
+            uniform = self._init_uniform(name, type_, value)
+            if uniform is None:
                 return
-        # Look up function to call
-        funcname = self.UTYPEMAP[type_]
-        func = getattr(gl, funcname)
+        handle, func, count, is_matrix = uniform
         # Program needs to be active in order to set uniforms
-        self.activate()
+        self._claim()
         # Triage depending on type
-        if type_.startswith('mat'):
+        if is_matrix:
             # Value is matrix, these gl funcs have alternative signature
             transpose = False  # OpenGL ES 2.0 does not support transpose
-            func(handle, 1, transpose, value)
+            args = handle, 1, transpose, value
         else:
             # Regular uniform
-            func(handle, count, value)
-
-    def set_attribute(self, name, type_, value):
+            args = handle, count, value
+        # Keep the call, to set the uniform again if the GL program is shared
+        self._uniform_calls[name] = func, args
+        func(*args)
+
+    def _init_uniform(self, name, type_, value):
+        """ Look up the handle of a uniform and the gl function to set it
+        with. The result is cached, so that this is done only once per
+        uniform (until the program is relinked).
+        """
+        handle = gl.glGetUniformLocation(self._handle, name)
+        self._unset_variables.discard(name)  # Mark as set
+        # if we set a uniform_array, mark all as set
+        count = 1
+        is_matrix = type_.startswith('mat')
+        if not is_matrix:
+            count = value.nbytes // (4 * self.ATYPEINFO[type_][0])
+        if count > 1:
+            for ii in range(count):
+                if '%s[%s]' % (name, ii) in self._unset_variables:
+                    self._unset_variables.discard('%s[%s]' % (name, ii))
+
+        self._handles[name] = handle  # Store in cache
+        if handle < 0:
+            self._known_invalid.add(name)
+            logger.info('Not setting value for variable %s %s; '
+                        'uniform is not active.' % (type_, name))
+            return None
+        func = self._get_gl_func(self.UTYPEMAP[type_])
+        uniform = self._uniforms[name] = handle, func, count, is_matrix
+        return uniform
+
+    def set_attribute(self, name, type_, value, divisor=None):
         """ Set an attribute value. Value is assumed to have been checked.
         """
         if not self._linked:
@@ -1249,8 +1815,7 @@ class GlirProgram(GlirObject):
         # Triage depending on VBO or tuple data
         if value[0] == 0:
             # Look up function call
-            funcname = self.ATYPEMAP[type_]
-            func = getattr(gl, funcname)
+            func = self._get_gl_func(self.ATYPEMAP[type_])
             # Set data
             self._attributes[name] = 0, handle, func, value[1:]
         else:
@@ -1267,23 +1832,70 @@ class GlirProgram(GlirObject):
             func = gl.glVertexAttribPointer
             args = size, gtype, gl.GL_FALSE, stride, offset
             self._attributes[name] = vbo.handle, handle, func, args
+        self._divisors[handle] = divisor or 0
+        self._invalidate_vertex_arrays()
+
+    def _invalidate_vertex_arrays(self):
+        """ Mark the attribute bindings recorded in the VAOs as outdated.
+        """
+        for vao in self._vaos.values():
+            vao[2] = True
+        self._constant_attributes = [
+            (attr_handle, func, args) for vbo_handle, attr_handle, func, args
+            in self._attributes.values() if not vbo_handle]
+
+    def _bind_vertex_array(self):
+        """ Bind the VAO of this program in the current context. The
+        attribute bindings are recorded into it on first use and after
+        they have changed, so that normally only the VAO needs to be bound.
+        """
+        state = self._parser.state
+        context = self._parser.env.get('context', None)
+        vao = self._vaos.get(context, None)
+        if vao is None:
+            vao = [gl.glGenVertexArrays(1), set(), True]
+            self._vaos[context] = vao
+        state.bind_vertex_array(vao[0])
+        if vao[2]:
+            # (Re)record the attribute bindings. Locations that are not
+            # used anymore (e.g. after relinking) are disabled.
+            locations = set()
+            instancing = self._parser.capabilities['instanced_arrays']
+            for vbo_handle, attr_handle, func, args in \
+                    self._attributes.values():
+                if vbo_handle:
+                    locations.add(attr_handle)
+                    gl.glEnableVertexAttribArray(attr_handle)
+                    state.bind_buffer(gl.GL_ARRAY_BUFFER, vbo_handle)
+                    func(attr_handle, *args)
+                    if instancing:
+                        gl.glVertexAttribDivisor(
+                            attr_handle, self._divisors.get(attr_handle, 0))
+            for attr_handle in vao[1] - locations:
+                gl.glDisableVertexAttribArray(attr_handle)
+            vao[1:] = [locations, False]
+        # Constant attribute values are not part of the VAO state
+        for attr_handle, func, args in self._constant_attributes:
+            func(attr_handle, *args)
 
     def _pre_draw(self):
-        self.activate()
-        # Activate textures
+        self._claim()
+        # Activate textures and attributes. The state shadow drops the
+        # binds that are already in effect (e.g. from a previous draw).
+        state = self._parser.state
         for tex_target, tex_handle, unit in self._samplers.values():
-            gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
-            gl.glBindTexture(tex_target, tex_handle)
-        # Activate attributes
-        for vbo_handle, attr_handle, func, args in self._attributes.values():
-            if vbo_handle:
-                gl.glBindBuffer(gl.GL_ARRAY_BUFFER, vbo_handle)
-                gl.glEnableVertexAttribArray(attr_handle)
-                func(attr_handle, *args)
-            else:
-                gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
-                gl.glDisableVertexAttribArray(attr_handle)
-                func(attr_handle, *args)
+            state.bind_texture(tex_target, tex_handle, unit)
+        if self._parser.capabilities['vertex_array_object']:
+            self._bind_vertex_array()
+        else:
+            for vbo_handle, attr_handle, func, args in \
+                    self._attributes.values():
+                if vbo_handle:
+                    state.enable_attrib_array(attr_handle)
+                    state.attrib_pointer(attr_handle, vbo_handle, args)
+                else:
+                    state.enable_attrib_array(attr_handle, False)
+                    func(attr_handle, *args)
         # Validate. We need to validate after textures units get assigned
         if not self._validated:
             self._validated = True
@@ -1302,7 +1914,13 @@ class GlirProgram(GlirObject):
                                % gl.glGetProgramInfoLog(self._handle))
 
     def _post_draw(self):
+        # When the state is shadowed, bindings are left in place, so that
+        # the next draw only needs to bind what is different.
+        if self._parser.state.enabled:
+            return
         # No need to deactivate each texture/buffer, just set to 0
+        if self._parser.capabilities['vertex_array_object']:
+            self._parser.state.bind_vertex_array(0)
         gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
         gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
         if USE_TEX_3D:
@@ -1313,12 +1931,17 @@ class GlirProgram(GlirObject):
         #apps it would not even make sense.
         #self.deactivate()
 
-    def draw(self, mode, selection):
+    def draw(self, mode, selection, instances=1):
         """ Draw program in given mode, with given selection (IndexBuffer or
-        first, count).
+        first, count), optionally for a number of instances.
         """
         if not self._linked:
             raise RuntimeError('Cannot draw program if code has not been set')
+        if instances != 1 and \
+                not self._parser.capabilities['instanced_arrays']:
+            raise RuntimeError('Instanced drawing is not supported by the '
+                               'current context; it needs OpenGL 3.3 and '
+                               'the gl+ backend.')
         # Init
         gl.check_error('Check before draw')
         try:
@@ -1339,14 +1962,20 @@ class GlirProgram(GlirObject):
                 self._pre_draw()
                 ibuf = self._parser.get_object(id_)
                 ibuf.activate()
-                gl.glDrawElements(mode, count, as_enum(gtype), None)
-                ibuf.deactivate()
+                if instances == 1:
+                    gl.glDrawElements(mode, count, as_enum(gtype), None)
+                else:
+                    gl.glDrawElementsInstanced(mode, count, as_enum(gtype),
+                                               None, instances)
         else:
             # Selection based on start and count
             first, count = selection
             if count:
                 self._pre_draw()
-                gl.glDrawArrays(mode, first, count)
+                if instances == 1:
+                    gl.glDrawArrays(mode, first, count)
+                else:
+                    gl.glDrawArraysInstanced(mode, first, count, instances)
         # Wrap up
         gl.check_error('Check after draw')
         self._post_draw()
@@ -1362,13 +1991,14 @@ class GlirBuffer(GlirObject):
         self._bufferSubDataOk = False
 
     def delete(self):
+        self._parser.state.forget_buffer(self._handle)
         gl.glDeleteBuffer(self._handle)
 
     def activate(self):
-        gl.glBindBuffer(self._target, self._handle)
+        self._parser.state.bind_buffer(self._target, self._handle)
 
     def deactivate(self):
-        gl.glBindBuffer(self._target, 0)
+        self._parser.state.bind_buffer(self._target, 0)
 
     def set_size(self, nbytes):  # in bytes
         if nbytes != self._buffer_size:
@@ -1413,6 +2043,9 @@ class GlirIndexBuffer(GlirBuffer):
     _target = gl.GL_ELEMENT_ARRAY_BUFFER
 
 
+GL_HALF_FLOAT = gl.Enum('GL_HALF_FLOAT', 5131)
+
+
 class GlirTexture(GlirObject):
     _target = None
 
@@ -1423,7 +2056,7 @@ class GlirTexture(GlirObject):
         np.dtype(np.uint16): gl.GL_UNSIGNED_SHORT,
         np.dtype(np.int32): gl.GL_INT,
         np.dtype(np.uint32): gl.GL_UNSIGNED_INT,
-        # np.dtype(np.float16) : gl.GL_HALF_FLOAT,
+        np.dtype(np.float16): GL_HALF_FLOAT,
         np.dtype(np.float32): gl.GL_FLOAT,
         # np.dtype(np.float64) : gl.GL_DOUBLE
     }
@@ -1433,13 +2066,14 @@ class GlirTexture(GlirObject):
         self._shape_formats = 0  # To make setting size cheap
 
     def delete(self):
+        self._parser.state.forget_texture(self._handle)
         gl.glDeleteTexture(self._handle)
 
     def activate(self):
-        gl.glBindTexture(self._target, self._handle)
+        self._parser.state.bind_texture(self._target, self._handle)
 
     def deactivate(self):
-        gl.glBindTexture(self._target, 0)
+        self._parser.state.bind_texture(self._target, 0)
 
     # Taken from pygly
     def _get_alignment(self, width):
@@ -4,11 +4,66 @@
 # Copyright (c) Vispy Development Team. All Rights Reserved.
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
+import os.path as op
 import re
-from .. import glsl
+
+from .. import config, glsl
 from ..util import logger
 
 
+class IncludeCache(object):
+    """ Cache of the GLSL files that are merged by ``#include`` directives
+
+    Files are looked up in the shader library only once per include path,
+    and read again only when they were modified.
+    """
+    def __init__(self):
+        self._paths = {}  # (filename, include_path) -> path
+        self._files = {}  # path -> (mtime, text)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def stats(self):
+        """Dict with the number of cached files and the hit and miss
+        counts"""
+        return dict(size=len(self._files), hits=self.hits,
+                    misses=self.misses)
+
+    def get(self, filename):
+        """ Return the text of an included file, or None if it does not
+        exist.
+        """
+        key = filename, tuple(config['include_path'])
+        path = self._paths.get(key, None)
+        if path is None:
+            path = glsl.find(filename)
+            if not path:
+                return None
+            self._paths[key] = path
+        mtime = op.getmtime(path)
+        entry = self._files.get(path, None)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        with open(path) as fh:
+            text = fh.read()
+        self._files[path] = mtime, text
+        return text
+
+    def clear(self):
+        """ Forget all files and reset the counters.
+        """
+        self._paths.clear()
+        self._files.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+include_cache = IncludeCache()
+
+
 def remove_comments(code):
     """Remove C-style comment from GLSL code string."""
 
@@ -40,13 +95,12 @@ def merge_includes(code):
 
         if filename not in includes:
             includes.append(filename)
-            path = glsl.find(filename)
-            if not path:
+            source = include_cache.get(filename)
+            if source is None:
                 logger.critical('"%s" not found' % filename)
                 raise RuntimeError("File not found", filename)
             text = '\n// --- start of "%s" ---\n' % filename
-            with open(path) as fh:
-                text += fh.read()
+            text += source
             text += '// --- end of "%s" ---\n' % filename
             return text
         return ''
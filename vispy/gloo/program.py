@@ -27,6 +27,7 @@ Done by GLIR:
 
 """
 
+import functools
 import re
 import numpy as np
 
@@ -39,6 +40,51 @@ from .context import get_current_canvas
 from .preprocessor import preprocess
 
 
+@functools.lru_cache(maxsize=256)
+def _parse_code_variables(code):
+    """ Parse uniforms, attributes and varyings from the source code.
+    Returns a tuple of (name, (kind, type_, name, size)) items.
+    """
+    # Remove comments
+    code = re.sub(r'(.*)(//.*)', r'\1', code, re.M)
+
+    # Regexp to look for variable names
+    var_regexp = (r"\s*VARIABLE\s+"  # kind of variable
+                  r"((highp|mediump|lowp)\s+)?"  # Precision (optional)
+                  r"(?P<type>\w+)\s+"  # type
+                  r"(?P<name>\w+)\s*"  # name
+                  r"(\[(?P<size>\d+)\])?"  # size (optional)
+                  r"(\s*\=\s*[0-9.]+)?"  # default value (optional)
+                  r"\s*;"  # end
+                  )
+
+    # Parse uniforms, attributes and varyings
+    variables = {}
+    for kind in ('uniform', 'attribute', 'varying', 'const', 'in', 'out'):
+        regex = re.compile(var_regexp.replace('VARIABLE', kind),
+                           flags=re.MULTILINE)
+
+        # treat *in* like attribute, *out* like varying
+        if kind == 'in':
+            kind = 'attribute'
+        elif kind == 'out':
+            kind = 'varying'
+
+        for m in re.finditer(regex, code):
+            gtype = m.group('type')
+            size = int(m.group('size')) if m.group('size') else -1
+            this_kind = kind
+            if size >= 1:
+                # uniform arrays get added both as individuals and full
+                for i in range(size):
+                    name = '%s[%d]' % (m.group('name'), i)
+                    variables[name] = kind, gtype, name, -1
+                this_kind = 'uniform_array'
+            name = m.group('name')
+            variables[name] = this_kind, gtype, name, size
+    return tuple(variables.items())
+
+
 # ------------------------------------------------------------ Shader class ---
 class Shader(GLObject):
     def __init__(self, code=None):
@@ -234,44 +280,10 @@ class Program(GLObject):
         """ Parse uniforms, attributes and varyings from the source code.
         """
 
-        # Get one string of code with comments removed
+        # Get one string of code; the parsing is shared by programs with
+        # the same code
         code = '\n\n'.join([sh.code for sh in self._shaders])
-        code = re.sub(r'(.*)(//.*)', r'\1', code, re.M)
-
-        # Regexp to look for variable names
-        var_regexp = (r"\s*VARIABLE\s+"  # kind of variable
-                      r"((highp|mediump|lowp)\s+)?"  # Precision (optional)
-                      r"(?P<type>\w+)\s+"  # type
-                      r"(?P<name>\w+)\s*"  # name
-                      r"(\[(?P<size>\d+)\])?"  # size (optional)
-                      r"(\s*\=\s*[0-9.]+)?"  # default value (optional)
-                      r"\s*;"  # end
-                      )
-
-        # Parse uniforms, attributes and varyings
-        self._code_variables = {}
-        for kind in ('uniform', 'attribute', 'varying', 'const', 'in', 'out'):
-            regex = re.compile(var_regexp.replace('VARIABLE', kind),
-                               flags=re.MULTILINE)
-
-            # treat *in* like attribute, *out* like varying
-            if kind == 'in':
-                kind = 'attribute'
-            elif kind == 'out':
-                kind = 'varying'
-
-            for m in re.finditer(regex, code):
-                gtype = m.group('type')
-                size = int(m.group('size')) if m.group('size') else -1
-                this_kind = kind
-                if size >= 1:
-                    # uniform arrays get added both as individuals and full
-                    for i in range(size):
-                        name = '%s[%d]' % (m.group('name'), i)
-                        self._code_variables[name] = kind, gtype, name, -1
-                    this_kind = 'uniform_array'
-                name = m.group('name')
-                self._code_variables[name] = this_kind, gtype, name, size
+        self._code_variables = dict(_parse_code_variables(code))
 
         # Now that our code variables are up-to date, we can process
         # the variables that were set but yet unknown.
@@ -425,8 +437,13 @@ class Program(GLObject):
                     self._user_variables[name] = data
                     value = (data.id, data.stride, data.offset)
                     self.glir.associate(data.glir)
-                    self._glir.command('ATTRIBUTE', self._id,
-                                       name, type_, value)
+                    divisor = getattr(data, 'divisor', None)
+                    if divisor is None:
+                        self._glir.command('ATTRIBUTE', self._id,
+                                           name, type_, value)
+                    else:
+                        self._glir.command('ATTRIBUTE', self._id,
+                                           name, type_, value, divisor)
                 else:
                     # Single-value attribute; convert to array and check size
                     dtype, numel = self._gtypes[type_]
@@ -462,7 +479,8 @@ class Program(GLObject):
         else:
             raise KeyError("Unknown uniform or attribute %s" % name)
 
-    def draw(self, mode='triangles', indices=None, check_error=True):
+    def draw(self, mode='triangles', indices=None, check_error=True,
+             count=None):
         """ Draw the attribute arrays in the specified mode.
 
         Parameters
@@ -475,7 +493,18 @@ class Program(GLObject):
             Array of indices to draw.
         check_error:
             Check error after draw.
-
+        count : int | None
+            Number of vertices to draw, or of indices if ``indices`` is
+            given, starting from the first one. By default all are drawn.
+            This allows buffers to be larger than the data they hold.
+
+        Notes
+        -----
+        If any attribute is set to a ``VertexBuffer`` with a ``divisor``,
+        the vertices are drawn once per instance in a single instanced draw
+        call. The number of instances is the size of such a buffer times
+        its divisor. Instanced drawing needs the 'instanced_arrays'
+        capability of the context (OpenGL 3.3 with the gl+ backend).
         """
 
         # Invalidate buffer (data has already been sent)
@@ -496,8 +525,14 @@ class Program(GLObject):
         self._pending_variables = {}
 
         # Check attribute sizes
-        attributes = [vbo for vbo in self._user_variables.values()
-                      if isinstance(vbo, DataBuffer)]
+        attributes = []
+        instance_attributes = []
+        for vbo in self._user_variables.values():
+            if isinstance(vbo, DataBuffer):
+                if getattr(vbo, 'divisor', None) is None:
+                    attributes.append(vbo)
+                else:
+                    instance_attributes.append(vbo)
         sizes = [a.size for a in attributes]
         if len(attributes) < 1:
             raise RuntimeError('Must have at least one attribute')
@@ -505,6 +540,14 @@ class Program(GLObject):
             msg = '\n'.join(['%s: %s' % (str(a), a.size) for a in attributes])
             raise RuntimeError('All attributes must have the same size, got:\n'
                                '%s' % msg)
+        instances = [a.size * a.divisor for a in instance_attributes]
+        if not all(n == instances[0] for n in instances[1:]):
+            msg = '\n'.join(['%s: %s x %s' % (str(a), a.size, a.divisor)
+                             for a in instance_attributes])
+            raise RuntimeError('All instance attributes must be for the same '
+                               'number of instances, got:\n%s' % msg)
+        # Extra argument for the DRAW command
+        instances = tuple(instances[:1])
 
         # Get the glir queue that we need now
         canvas = get_current_canvas()
@@ -520,12 +563,18 @@ class Program(GLObject):
             gltypes = {np.dtype(np.uint8): 'UNSIGNED_BYTE',
                        np.dtype(np.uint16): 'UNSIGNED_SHORT',
                        np.dtype(np.uint32): 'UNSIGNED_INT'}
-            selection = indices.id, gltypes[indices.dtype], indices.size
-            canvas.context.glir.command('DRAW', self._id, mode, selection)
+            if count is None:
+                count = indices.size
+            selection = indices.id, gltypes[indices.dtype], count
+            canvas.context.glir.command('DRAW', self._id, mode, selection,
+                                        *instances)
         elif indices is None:
-            selection = 0, attributes[0].size
+            if count is None:
+                count = attributes[0].size
+            selection = 0, count
             logger.debug("Program drawing %r with %r" % (mode, selection))
-            canvas.context.glir.command('DRAW', self._id, mode, selection)
+            canvas.context.glir.command('DRAW', self._id, mode, selection,
+                                        *instances)
         else:
             raise TypeError("Invalid index: %r (must be IndexBuffer)" %
                             indices)
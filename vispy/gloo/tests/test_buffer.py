@@ -512,6 +512,14 @@ class VertexBufferTest(unittest.TestCase):
         assert B.glsl_type == ('attribute', 'vec4')
         assert C.glsl_type == ('attribute', 'vec4')
 
+    def test_divisor(self):
+        B = VertexBuffer(np.zeros((10, 4), np.float32))
+        assert B.divisor is None
+        B = VertexBuffer(np.zeros((10, 4), np.float32), divisor=2)
+        assert B.divisor == 2
+        assert B[1:].divisor == 2
+        self.assertRaises(ValueError, VertexBuffer, divisor=0)
+
 
 # -----------------------------------------------------------------------------
 class IndexBufferTest(unittest.TestCase):
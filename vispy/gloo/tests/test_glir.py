@@ -1,13 +1,17 @@
 # -*- coding: utf-8 -*-
 
 import json
+import os
+import os.path as op
+import shutil
 import tempfile
 from unittest import mock
 
 from vispy import config
 from vispy.app import Canvas
 from vispy.gloo import glir
-from vispy.testing import requires_application, requires_pyopengl, run_tests_if_main
+from vispy.testing import (requires_application, requires_pyopengl,
+                           run_tests_if_main, assert_raises)
 
 import numpy as np
 
@@ -121,6 +125,320 @@ def test_capabilities():
         assert capabilities['gl_version'] != 'unknown'
 
 
+@mock.patch('vispy.gloo.glir.gl')
+def test_parser_dispatch(gl):
+    """Test that GLIR commands are dispatched to the right handlers"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: 1 if pname is gl.GL_LINK_STATUS else 0
+    gl.glGetUniformLocation.return_value = 3
+    parser = glir.GlirParser()
+
+    parser.parse([('CREATE', 1, 'Program'), ('LINK', 1)])
+    program = parser.get_object(1)
+    assert isinstance(program, glir.GlirProgram)
+    assert program._linked
+
+    # Uniforms resolve their handle and gl function only once
+    value = np.zeros(4, np.float32)
+    parser.parse([('UNIFORM', 1, 'u_foo', 'vec2', value),
+                  ('UNIFORM', 1, 'u_foo', 'vec2', value)])
+    assert gl.glGetUniformLocation.call_count == 1
+    gl.glUniform2fv.assert_has_calls([mock.call(3, 2, value),
+                                      mock.call(3, 2, value)])
+
+    # FUNC commands call into gl with enums converted
+    parser.parse([('FUNC', 'glClear', 'color_buffer_bit')])
+    gl.glClear.assert_called_once_with(gl.GL_COLOR_BUFFER_BIT)
+
+    # Unknown commands on existing objects are ignored with a warning
+    with mock.patch('vispy.gloo.glir.logger') as logger:
+        parser.parse([('FOO', 1)])
+        assert logger.warning.call_count == 1
+
+    # Commands on deleted objects are ignored, on unknown objects raise
+    parser.parse([('DELETE', 1), ('UNIFORM', 1, 'u_foo', 'vec2', value)])
+    gl.glDeleteProgram.assert_called_once_with(program.handle)
+    assert_raises(RuntimeError, parser.parse, [('DRAW', 2, 'points', (0, 1))])
+
+
+@mock.patch('vispy.gloo.glir.gl')
+def test_state_cache(gl):
+    """Test that redundant GL calls are dropped by the state shadow"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: pname in (gl.GL_LINK_STATUS,
+                                        gl.GL_VALIDATE_STATUS)
+    gl.glCreateProgram.return_value = 1
+    gl.glCreateBuffer.return_value = 5
+    gl.glCreateTexture.return_value = 7
+    gl.glGetUniformLocation.return_value = 2
+    gl.glGetAttribLocation.return_value = 3
+    parser = glir.GlirParser()
+    state = parser.state
+
+    parser.parse([('CREATE', 1, 'Program'), ('LINK', 1),
+                  ('CREATE', 2, 'VertexBuffer'), ('CREATE', 3, 'Texture2D'),
+                  ('TEXTURE', 1, 'u_tex', 3),
+                  ('ATTRIBUTE', 1, 'a_pos', 'vec3', (2, 12, 0))])
+    frame = [('FUNC', 'glEnable', 'blend'),
+             ('FUNC', 'glBlendFunc', 'src_alpha', 'one'),
+             ('DRAW', 1, 'triangles', (0, 3))]
+    parser.parse(frame)
+    for func in (gl.glEnable, gl.glBlendFunc, gl.glUseProgram,
+                 gl.glBindTexture, gl.glBindBuffer,
+                 gl.glEnableVertexAttribArray, gl.glVertexAttribPointer):
+        assert func.call_count == 1, func
+    # The texture uses unit 0, which is active by default
+    assert gl.glActiveTexture.call_count == 0
+    gl.glBindTexture.assert_called_once_with(glir.GlirTexture2D._target, 7)
+    gl.glBindBuffer.assert_called_once_with(gl.GL_ARRAY_BUFFER, 5)
+
+    # Drawing the same frame again only issues the draw call
+    calls_saved = state.calls_saved
+    gl.reset_mock()
+    parser.parse(frame)
+    assert gl.glDrawArrays.call_count == 1
+    for func in (gl.glEnable, gl.glBlendFunc, gl.glUseProgram,
+                 gl.glActiveTexture, gl.glBindTexture, gl.glBindBuffer,
+                 gl.glEnableVertexAttribArray, gl.glVertexAttribPointer):
+        assert func.call_count == 0, func
+    assert state.calls_saved > calls_saved
+
+    # Changing state is passed through, and aliases invalidate each other
+    parser.parse([('FUNC', 'glDisable', 'blend'),
+                  ('FUNC', 'glBlendFuncSeparate', 'src_alpha', 'one',
+                   'src_alpha', 'one'),
+                  ('FUNC', 'glBlendFunc', 'src_alpha', 'one')])
+    assert gl.glDisable.call_count == 1
+    assert gl.glBlendFuncSeparate.call_count == 1
+    assert gl.glBlendFunc.call_count == 1
+
+    # Deleted objects are forgotten, since their handles can be reused
+    parser.parse([('DELETE', 3), ('CREATE', 4, 'Texture2D'),
+                  ('TEXTURE', 1, 'u_tex', 4), ('DRAW', 1, 'triangles', (0, 3))])
+    gl.glBindTexture.assert_called_once_with(glir.GlirTexture2D._target, 7)
+
+    # Binding to the active unit and to unit 0 are the same by default
+    state.reset()
+    gl.reset_mock()
+    state.bind_texture(glir.GlirTexture2D._target, 8)
+    state.bind_texture(glir.GlirTexture2D._target, 8, 0)
+    assert gl.glBindTexture.call_count == 1
+    state.active_texture(1)
+    state.bind_texture(glir.GlirTexture2D._target, 8)
+    state.bind_texture(glir.GlirTexture2D._target, 9, 0)
+    assert gl.glBindTexture.call_count == 3
+    assert gl.glActiveTexture.call_count == 2
+
+    # Making the context current resets the shadow; disabling the cache
+    # passes all calls through
+    gl.reset_mock()
+    gl.glGetParameter.return_value = '2.1'
+    gl.current_backend.__name__ = 'vispy.gloo.gl.gl2'
+    parser.parse([('CURRENT', 0, 0)] + frame)
+    assert gl.glBindTexture.call_count == 1
+    state.enabled = False
+    parser.parse(frame + frame)
+    assert gl.glEnable.call_count == 1 + 2 + 2  # +2 for point sprites
+    assert gl.glBindTexture.call_count == 1 + 2 + 2  # bind and unbind
+
+
+@mock.patch('vispy.gloo.glir.gl')
+def test_vertex_array_object(gl):
+    """Test that attribute bindings are recorded into a VAO"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: pname in (gl.GL_LINK_STATUS,
+                                        gl.GL_VALIDATE_STATUS)
+    gl.glCreateProgram.return_value = 1
+    gl.glCreateBuffer.side_effect = [5, 6]
+    gl.glGenVertexArrays.return_value = 9
+    gl.glGetAttribLocation.side_effect = [3, 4]
+    parser = glir.GlirParser()
+    parser.capabilities['vertex_array_object'] = True
+
+    parser.parse([('CREATE', 1, 'Program'), ('LINK', 1),
+                  ('CREATE', 2, 'VertexBuffer'),
+                  ('CREATE', 3, 'IndexBuffer'),
+                  ('ATTRIBUTE', 1, 'a_pos', 'vec3', (2, 12, 0)),
+                  ('ATTRIBUTE', 1, 'a_size', 'float', (0, 1.0))])
+    draw = ('DRAW', 1, 'triangles', (3, 'unsigned_int', 3))
+    parser.parse([draw])
+    gl.glGenVertexArrays.assert_called_once_with(1)
+    gl.glBindVertexArray.assert_called_once_with(9)
+    gl.glEnableVertexAttribArray.assert_called_once_with(3)
+    assert gl.glVertexAttribPointer.call_count == 1
+    gl.glVertexAttrib1f.assert_called_once_with(4, 1.0)
+
+    # The next draw only sets the constant attribute; the VAO is still
+    # bound and holds the index buffer binding
+    gl.reset_mock()
+    parser.parse([draw])
+    for func in (gl.glBindVertexArray, gl.glBindBuffer,
+                 gl.glEnableVertexAttribArray, gl.glVertexAttribPointer):
+        assert func.call_count == 0, func
+    assert gl.glVertexAttrib1f.call_count == 1
+    assert gl.glDrawElements.call_count == 1
+
+    # An ATTRIBUTE command causes the bindings to be recorded again
+    parser.parse([('ATTRIBUTE', 1, 'a_pos', 'vec3', (2, 16, 4)), draw])
+    assert gl.glVertexAttribPointer.call_count == 1
+    assert gl.glGenVertexArrays.call_count == 0
+
+    # The VAO is deleted with the program
+    parser.parse([('DELETE', 1)])
+    gl.glDeleteVertexArrays.assert_called_once_with(1, [9])
+
+
+@mock.patch('vispy.gloo.glir.gl')
+def test_instanced_draw(gl):
+    """Test that attribute divisors and instance counts reach GL"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: pname in (gl.GL_LINK_STATUS,
+                                        gl.GL_VALIDATE_STATUS)
+    gl.glCreateProgram.return_value = 1
+    gl.glCreateBuffer.side_effect = [5, 6]
+    gl.glGenVertexArrays.return_value = 9
+    gl.glGetAttribLocation.side_effect = [3, 4]
+    parser = glir.GlirParser()
+    parser.capabilities['vertex_array_object'] = True
+
+    parser.parse([('CREATE', 1, 'Program'), ('LINK', 1),
+                  ('CREATE', 2, 'VertexBuffer'),
+                  ('CREATE', 3, 'VertexBuffer'),
+                  ('ATTRIBUTE', 1, 'a_pos', 'vec3', (2, 12, 0)),
+                  ('ATTRIBUTE', 1, 'a_offset', 'vec3', (3, 12, 0), 1)])
+    draw = ('DRAW', 1, 'triangles', (0, 3), 10)
+    # Without the capability, instanced draws are refused
+    assert_raises(RuntimeError, parser.parse, [draw])
+
+    parser.capabilities['instanced_arrays'] = True
+    parser.parse([draw])
+    assert sorted(gl.glVertexAttribDivisor.call_args_list) == \
+        [mock.call(3, 0), mock.call(4, 1)]
+    gl.glDrawArraysInstanced.assert_called_once_with(
+        gl.GL_TRIANGLES, 0, 3, 10)
+    assert gl.glDrawArrays.call_count == 0
+
+
+@mock.patch('vispy.gloo.glir.gl')
+def test_program_cache(gl):
+    """Test that programs with the same shaders share a linked GL program"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: pname in (gl.GL_LINK_STATUS,
+                                        gl.GL_VALIDATE_STATUS)
+    gl.glCreateProgram.side_effect = [1, 2]
+    gl.glGetUniformLocation.return_value = 3
+    gl.current_backend.__name__ = 'vispy.gloo.gl.gl2'
+    parser = glir.GlirParser()
+
+    def link(id_, vert, frag):
+        return [('CREATE', id_, 'Program'),
+                ('CREATE', id_ + 1, 'VertexShader'),
+                ('CREATE', id_ + 2, 'FragmentShader'),
+                ('DATA', id_ + 1, 0, vert), ('DATA', id_ + 2, 0, frag),
+                ('ATTACH', id_, id_ + 1), ('ATTACH', id_, id_ + 2),
+                ('LINK', id_)]
+
+    parser.parse(link(1, 'void main() {}', 'void main() {}') +
+                 link(4, 'void main() {}', 'void main() {}'))
+    assert gl.glCompileShader.call_count == 2
+    assert gl.glLinkProgram.call_count == 1
+    assert parser.get_object(4).handle == parser.get_object(1).handle == 1
+    assert parser.programs.stats == dict(size=1, hits=1, misses=1)
+
+    # Each program sets its own uniforms again when the other one used the
+    # GL program last
+    one, two = np.ones(1, np.float32), np.zeros(1, np.float32)
+    parser.parse([('UNIFORM', 1, 'u_foo', 'float', one),
+                  ('UNIFORM', 4, 'u_foo', 'float', two)])
+    gl.glUniform1fv.reset_mock()
+    parser.parse([('DRAW', 1, 'points', (0, 1))])
+    gl.glUniform1fv.assert_called_once_with(3, 1, one)
+    parser.parse([('DRAW', 1, 'points', (0, 1))])
+    assert gl.glUniform1fv.call_count == 1
+    parser.parse([('DRAW', 4, 'points', (0, 1))])
+    gl.glUniform1fv.assert_called_with(3, 1, two)
+
+    # Other code is linked separately; the GL program is deleted with the
+    # last program that uses it
+    parser.parse(link(7, 'void main() {}', 'void main() {;}'))
+    assert parser.get_object(7).handle == 2
+    parser.parse([('DELETE', 1)])
+    assert gl.glDeleteProgram.call_count == 0
+    parser.parse([('DELETE', 4)])
+    gl.glDeleteProgram.assert_called_once_with(1)
+    assert len(parser.programs) == 1
+
+
+@mock.patch('vispy.gloo.glir.gl')
+def test_program_binaries(gl):
+    """Test that linked programs are saved to and loaded from disk"""
+    gl.glGetProgramParameter.side_effect = \
+        lambda handle, pname: {gl.GL_LINK_STATUS: 1,
+                               gl.GL_PROGRAM_BINARY_LENGTH: 4}.get(pname, 0)
+
+    def get_binary(handle, length, size, binary_format, binary):
+        size[0] = 3
+        binary_format[0] = 7
+        binary[:3] = (1, 2, 3)
+    gl.glGetProgramBinary.side_effect = get_binary
+    gl.current_backend.__name__ = 'vispy.gloo.gl.glplus'
+    commands = [('CREATE', 1, 'Program'), ('CREATE', 2, 'VertexShader'),
+                ('DATA', 2, 0, 'void main() {}'), ('ATTACH', 1, 2),
+                ('LINK', 1)]
+
+    def new_parser():
+        parser = glir.GlirParser()
+        parser.capabilities.update(program_binary=True, gl_vendor='vendor',
+                                   gl_renderer='renderer', gl_version='4.6')
+        return parser
+
+    tempdir = tempfile.mkdtemp()
+    path = config['program_cache_path']
+    config.update(program_cache_path=tempdir)
+    try:
+        # The first run compiles and saves the program
+        parser = new_parser()
+        parser.parse(commands)
+        assert gl.glCompileShader.call_count == 1
+        gl.glProgramParameteri.assert_called_once_with(
+            mock.ANY, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+        assert parser.program_binaries.stats['misses'] == 1
+        filename, = os.listdir(tempdir)
+
+        # The next run loads the binary instead
+        gl.reset_mock()
+        parser = new_parser()
+        parser.parse(commands)
+        assert gl.glCompileShader.call_count == 0
+        assert gl.glLinkProgram.call_count == 0
+        args = gl.glProgramBinary.call_args[0]
+        assert args[1] == 7 and list(args[2]) == [1, 2, 3] and args[3] == 3
+        assert parser.program_binaries.stats['hits'] == 1
+        assert parser.get_object(1)._linked
+
+        # Binaries of other drivers are not used, nor are invalid ones
+        gl.reset_mock()
+        parser = new_parser()
+        parser.capabilities['gl_version'] = '4.6 (new driver)'
+        parser.parse(commands)
+        assert gl.glCompileShader.call_count == 1
+        assert len(os.listdir(tempdir)) == 2
+        with open(op.join(tempdir, filename), 'wb') as fh:
+            fh.write(b'foo')
+        parser = new_parser()
+        parser.parse(commands)
+        assert gl.glCompileShader.call_count == 2
+        assert parser.program_binaries.stats['misses'] == 1
+
+        # Without the config option, nothing is saved
+        config.update(program_cache_path=None)
+        parser = new_parser()
+        assert parser.program_binaries is None
+    finally:
+        config.update(program_cache_path=path)
+        shutil.rmtree(tempdir)
+
+
 @requires_pyopengl()
 @mock.patch('vispy.gloo.glir._check_pyopengl_3D')
 @mock.patch('vispy.gloo.glir.gl')
@@ -3,12 +3,17 @@
 # Copyright (c) 2014, Nicolas P. Rougier. All rights reserved.
 # Distributed under the terms of the new BSD License.
 # -----------------------------------------------------------------------------
+import os
+import os.path as op
+import shutil
+import tempfile
 import unittest
 
 import numpy as np
 
 from vispy import gloo, app
 from vispy.gloo.program import Program
+from vispy.gloo.preprocessor import include_cache, preprocess
 from vispy.testing import run_tests_if_main, requires_application
 from vispy.gloo.context import set_current_canvas, forget_canvas
 
@@ -292,4 +297,60 @@ class ProgramTest(unittest.TestCase):
         finally:
             forget_canvas(dummy_canvas)
 
+    def test_draw_instanced(self):
+        program = Program("attribute float A; attribute vec2 B;",
+                          "uniform float foo")
+        program['A'] = np.zeros((10,), np.float32)
+        program['B'] = gloo.VertexBuffer(np.zeros((3, 2), np.float32),
+                                         divisor=2)
+        cmd = [c for c in program._glir.clear() if c[0] == 'ATTRIBUTE']
+        assert len(cmd[0]) == 5 and cmd[1][-1] == 2  # no divisor for A
+
+        dummy_canvas = DummyCanvas()
+        glir = dummy_canvas.context.glir
+        set_current_canvas(dummy_canvas)
+        try:
+            # The number of instances is the buffer size times the divisor,
+            # instance attributes do not need to match the vertex count
+            program.draw('triangles')
+            glir_cmd = glir.clear()[-1]
+            assert glir_cmd[0] == 'DRAW'
+            assert glir_cmd[3:] == ((0, 10), 6)
+            # Instance attributes must agree on the number of instances
+            program = Program("attribute float A; attribute float B; "
+                              "attribute float C;", "foo")
+            program['A'] = np.zeros((10,), np.float32)
+            program['B'] = gloo.VertexBuffer(np.zeros(3, np.float32),
+                                             divisor=1)
+            program['C'] = gloo.VertexBuffer(np.zeros(4, np.float32),
+                                             divisor=1)
+            self.assertRaises(RuntimeError, program.draw, 'triangles')
+        finally:
+            forget_canvas(dummy_canvas)
+
+
+def test_include_cache():
+    """Test that included files are read again only when modified"""
+    tempdir = tempfile.mkdtemp()
+    try:
+        path = op.join(tempdir, 'foo.glsl')
+        with open(path, 'w') as fh:
+            fh.write('float foo;\n')
+        include_cache.clear()
+        code = '#include "%s"\nvoid main() {}' % path
+        assert 'float foo;' in preprocess(code)
+        assert 'float foo;' in preprocess(code)
+        assert include_cache.stats == dict(size=1, hits=1, misses=1)
+
+        with open(path, 'w') as fh:
+            fh.write('float bar;\n')
+        mtime = op.getmtime(path) + 10
+        os.utime(path, (mtime, mtime))
+        assert 'float bar;' in preprocess(code)
+        assert include_cache.misses == 2
+    finally:
+        include_cache.clear()
+        shutil.rmtree(tempdir)
+
+
 run_tests_if_main()
@@ -577,6 +577,17 @@ class TextureAtlasTest(unittest.TestCase):
         
         reg = T.get_free_region(129, 129)
         assert reg is None
+
+    def test_reset_atlas(self):
+        T = TextureAtlas((100, 100))
+        assert T.get_free_region(100, 100) is not None
+        assert T.get_free_region(100, 100) is None
+        T.reset()
+        assert T.shape == (128, 128, 3)
+        assert T.get_free_region(100, 100) is not None
+        T.reset((200, 200))
+        assert T.shape == (256, 256, 3)
+        assert T.get_free_region(200, 200) is not None
     
     
 # --------------------------------------------------------- Texture formats ---
@@ -913,10 +913,28 @@ class TextureAtlas(Texture2D):
         assert shape.ndim == 1 and shape.size == 2
         shape = tuple(2 ** (np.log2(shape) + 0.5).astype(int)) + (3,)
         self._atlas_nodes = [(0, 0, shape[1])]
+        self._atlas_dtype = np.dtype(dtype)
         data = np.zeros(shape, dtype)
         super(TextureAtlas, self).__init__(data, interpolation='linear',
                                            wrapping='clamp_to_edge')
 
+    def reset(self, shape=None):
+        """Free all regions and clear the texture
+
+        Parameters
+        ----------
+        shape : tuple of int | None
+            New shape of the texture (rounded to powers of two). If None,
+            the current shape is kept.
+        """
+        if shape is None:
+            shape = self._shape[:2]
+        shape = np.array(shape, int)
+        assert shape.ndim == 1 and shape.size == 2
+        shape = tuple(2 ** (np.log2(shape) + 0.5).astype(int)) + (3,)
+        self._atlas_nodes = [(0, 0, shape[1])]
+        self.set_data(np.zeros(shape, self._atlas_dtype))
+
     def get_free_region(self, width, height):
         """Get a free region of given size and allocate it
 
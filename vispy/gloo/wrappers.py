@@ -4,6 +4,7 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 
+import ctypes
 import numpy as np
 from copy import deepcopy
 
@@ -20,7 +21,7 @@ __all__ = ('set_viewport', 'set_depth_range', 'set_front_face',  # noqa
            'set_stencil_op', 'set_depth_func', 'set_depth_mask',  # noqa
            'set_color_mask', 'set_sample_coverage',  # noqa
            'get_state_presets', 'set_state', 'finish', 'flush',  # noqa
-           'read_pixels', 'set_hint',  # noqa
+           'read_pixels', 'read_pixels_async', 'PixelRead', 'set_hint',  # noqa
            'get_gl_configuration', '_check_valid',
            'GlooFunctions', 'global_gloo_functions', )
 
@@ -679,6 +680,122 @@ def read_pixels(viewport=None, alpha=True, mode='color', out_type='unsigned_byte
     return im
 
 
+def read_pixels_async(viewport=None, alpha=True):
+    """Start reading colors from the currently selected buffer.
+
+    When the GLIR parser supports pixel buffer objects, the pixels are
+    copied to a buffer on the GPU and this function returns without
+    waiting for the rendering to finish. Otherwise the pixels are read
+    with `read_pixels` right away.
+
+    Parameters
+    ----------
+    viewport : array-like | None
+        4-element list of x, y, w, h parameters. If None (default),
+        the current GL viewport will be queried and used.
+    alpha : bool
+        If True (default), the returned array has 4 elements (RGBA).
+        If False, it has 3 (RGB).
+
+    Returns
+    -------
+    read : instance of PixelRead
+        The pending read. Use ``read.get()`` to obtain the pixels, as
+        returned by `read_pixels`, while the same context is current.
+    """
+    context = get_current_canvas().context
+    parser = context.shared.parser
+    if parser.is_remote() or \
+            not parser.capabilities.get('pixel_buffer_object', False):
+        return PixelRead(read_pixels(viewport, alpha=alpha))
+
+    context.flush_commands()
+    if viewport is None:
+        viewport = gl.glGetParameter(gl.GL_VIEWPORT)
+    viewport = np.array(viewport, int)
+    if viewport.ndim != 1 or viewport.size != 4:
+        raise ValueError('viewport should be 1D 4-element array-like, not %s'
+                         % (viewport,))
+    x, y, w, h = viewport
+    shape = (h, w, 4 if alpha else 3)
+    buffer = gl.glCreateBuffer()
+    gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, buffer)
+    gl.glBufferData(gl.GL_PIXEL_PACK_BUFFER, int(np.prod(shape)),
+                    gl.GL_STREAM_READ)
+    gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+    # With a pack buffer bound, the last argument is an offset in it
+    gl.glReadPixels(x, y, w, h, gl.GL_RGBA if alpha else gl.GL_RGB,
+                    gl.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+    gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 4)
+    gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+    sync = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+    gl.glFlush()
+    return PixelRead(buffer=buffer, sync=sync, shape=shape)
+
+
+class PixelRead(object):
+    """Pixels that are read from a framebuffer, see `read_pixels_async`.
+
+    Parameters
+    ----------
+    pixels : array | None
+        The pixels, if they were read already.
+    buffer : int | None
+        The pixel buffer object the pixels are copied to.
+    sync : object | None
+        The fence that is signaled when the copy is complete.
+    shape : tuple | None
+        The shape of the pixel array in the buffer.
+    """
+
+    def __init__(self, pixels=None, buffer=None, sync=None, shape=None):
+        self._pixels = pixels
+        self._buffer = buffer
+        self._sync = sync
+        self._shape = shape
+
+    @property
+    def ready(self):
+        """Whether the pixels can be obtained without waiting for the GPU
+        """
+        if self._buffer is None:
+            return True
+        status = gl.glClientWaitSync(self._sync, 0, 0)
+        return status in (gl.GL_ALREADY_SIGNALED, gl.GL_CONDITION_SATISFIED)
+
+    def get(self):
+        """Return the pixels, waiting for them if needed
+
+        Returns
+        -------
+        pixels : array
+            The array of np.uint8 pixels, as returned by `read_pixels`.
+        """
+        if self._buffer is not None:
+            nbytes = int(np.prod(self._shape))
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self._buffer)
+            pointer = gl.glMapBufferRange(gl.GL_PIXEL_PACK_BUFFER, 0, nbytes,
+                                          gl.GL_MAP_READ_BIT)
+            try:
+                data = ctypes.cast(pointer,
+                                   ctypes.POINTER(ctypes.c_ubyte * nbytes))
+                im = np.frombuffer(data.contents, np.uint8).copy()
+            finally:
+                gl.glUnmapBuffer(gl.GL_PIXEL_PACK_BUFFER)
+                gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+            self.release()
+            self._pixels = im.reshape(self._shape)[::-1]
+        return self._pixels
+
+    def release(self):
+        """Free the GPU resources of a read whose pixels are not needed
+        """
+        if self._buffer is not None:
+            gl.glDeleteSync(self._sync)
+            gl.glDeleteBuffer(self._buffer)
+            self._buffer = self._sync = None
+
+
 def get_gl_configuration():
     """Read the current gl configuration
 
@@ -12,7 +12,7 @@ from .wavefront import WavefrontReader, WavefrontWriter
 from .stl import load_stl
 
 
-def read_mesh(fname):
+def read_mesh(fname, cache=False, weld=False):
     """Read mesh data from file.
 
     Parameters
@@ -20,6 +20,12 @@ def read_mesh(fname):
     fname : str
         File name to read. Format will be inferred from the filename.
         Currently only '.obj' and '.obj.gz' are supported.
+    cache : bool
+        For '.obj' files, keep the mesh in a ``.npz`` file next to the
+        file, which is read instead while the file is unchanged.
+    weld : bool
+        For '.stl' files, merge the vertices that the triangles have in
+        common, instead of returning three vertices for each triangle.
 
     Returns
     -------
@@ -38,10 +44,10 @@ def read_mesh(fname):
         fmt = op.splitext(op.splitext(fname)[0])[1].lower()
 
     if fmt in ('.obj'):
-        return WavefrontReader.read(fname)
+        return WavefrontReader.read(fname, cache=cache)
     elif fmt in ('.stl'):
-        file_obj = open(fname, mode='rb')
-        mesh = load_stl(file_obj)
+        with open(fname, mode='rb') as file_obj:
+            mesh = load_stl(file_obj, weld=weld)
         vertices = mesh['vertices']
         faces = mesh['faces']
         normals = mesh['face_normals']
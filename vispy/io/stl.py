@@ -6,8 +6,12 @@
 # See https://github.com/mikedh/trimesh/blob/master/LICENSE.md for
 # the license.
 
+import io
+
 import numpy as np
 
+from ..geometry.calculations import _unique_rows
+
 
 class HeaderError(Exception):
     # the exception raised if an STL file object doesn't match its header
@@ -23,7 +27,7 @@ _stl_dtype_header = np.dtype([('header', np.void, 80),
                               ('face_count', np.int32)])
 
 
-def load_stl(file_obj, file_type=None):
+def load_stl(file_obj, file_type=None, weld=False):
     '''
     Load an STL file from a file object.
 
@@ -31,6 +35,7 @@ def load_stl(file_obj, file_type=None):
     ----------
     file_obj: open file- like object
     file_type: not used
+    weld: bool, merge the vertices that the faces have in common
 
     Returns
     ----------
@@ -46,23 +51,27 @@ def load_stl(file_obj, file_type=None):
         # if that is true, it is almost certainly a binary STL file
         # if the header doesn't match the file length a HeaderError will be
         # raised
-        return load_stl_binary(file_obj)
+        return load_stl_binary(file_obj, weld=weld)
     except HeaderError:
         # move the file back to where it was initially
         file_obj.seek(file_pos)
         # try to load the file as an ASCII STL
         # if the header doesn't match the file length a HeaderError will be
         # raised
-        return load_stl_ascii(file_obj)
+        return load_stl_ascii(file_obj, weld=weld)
 
 
-def load_stl_binary(file_obj):
+def load_stl_binary(file_obj, weld=False):
     '''
     Load a binary STL file from a file object.
 
+    Regular files are memory mapped rather than read, so only the
+    vertices are copied out of the file.
+
     Parameters
     ----------
     file_obj: open file- like object
+    weld: bool, merge the vertices that the faces have in common
 
     Returns
     ----------
@@ -78,7 +87,7 @@ def load_stl_binary(file_obj):
     if len(header_data) < header_length:
         raise HeaderError('Binary STL file not long enough to contain header!')
 
-    header = np.fromstring(header_data, dtype=_stl_dtype_header)
+    header = np.frombuffer(header_data, dtype=_stl_dtype_header)
 
     # now we check the length from the header versus the length of the file
     # data_start should always be position 84, but hard coding that felt ugly
@@ -104,24 +113,34 @@ def load_stl_binary(file_obj):
     if len_data != len_expected:
         raise HeaderError('Binary STL has incorrect length in header!')
 
-    # all of our vertices will be loaded in order due to the STL format,
-    # so faces are just sequential indices reshaped.
-    faces = np.arange(header['face_count'] * 3).reshape((-1, 3))
-    blob = np.fromstring(file_obj.read(), dtype=_stl_dtype)
+    face_count = int(header['face_count'][0])
+    if face_count == 0:
+        blob = np.zeros(0, dtype=_stl_dtype)
+    elif isinstance(file_obj, (io.BufferedReader, io.FileIO)):
+        # map the file instead of reading it; a compressed stream also
+        # has a fileno, so only plain files are mapped. Copy-on-write
+        # keeps the arrays writable without touching the file.
+        blob = np.memmap(file_obj, dtype=_stl_dtype, mode='c',
+                         offset=data_start, shape=(face_count,))
+    else:
+        blob = np.frombuffer(file_obj.read(), dtype=_stl_dtype)
 
-    result = {'vertices': blob['vertices'].reshape((-1, 3)),
-              'face_normals': blob['normals'].reshape((-1, 3)),
-              'faces': faces}
-    return result
+    return _stl_result(blob['vertices'].reshape((-1, 3)),
+                       blob['normals'], weld)
 
 
-def load_stl_ascii(file_obj):
+def load_stl_ascii(file_obj, weld=False, chunk_size=2**24):
     '''
     Load an ASCII STL file from a file object.
 
+    The file is parsed in chunks of lines, so that the memory used on
+    top of the result does not depend on the size of the file.
+
     Parameters
     ----------
     file_obj: open file- like object
+    weld: bool, merge the vertices that the faces have in common
+    chunk_size: int, number of bytes to parse at a time
 
     Returns
     ----------
@@ -133,31 +152,86 @@ def load_stl_ascii(file_obj):
     # header (not used by this function)
     file_obj.readline()
 
-    text = file_obj.read()
-    if hasattr(text, 'decode'):
-        text = text.decode('utf-8')
-    text = text.lower().split('endsolid')[0]
-    blob = np.array(text.split())
-
-    # there are 21 'words' in each face
-    face_len = 21
-    face_count = len(blob) / face_len
-    if (len(blob) % face_len) != 0:
+    vertices = []
+    face_normals = []
+    rest = b''
+    while True:
+        data = file_obj.read(chunk_size)
+        if hasattr(data, 'encode'):
+            data = data.encode('utf-8')
+        if not data:
+            chunk = rest
+        else:
+            # only parse whole lines, keep the last one for the next chunk
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                rest += data
+                continue
+            chunk, rest = rest + data[:end], data[end:]
+        if chunk:
+            v, n = _parse_stl_ascii(chunk)
+            vertices.append(v)
+            face_normals.append(n)
+        if not data:
+            break
+
+    vertices = np.concatenate(vertices) if vertices else np.zeros((0, 3))
+    face_normals = (np.concatenate(face_normals) if face_normals
+                    else np.zeros((0, 3)))
+    if len(vertices) != 3 * len(face_normals):
         raise HeaderError('Incorrect number of values in STL file!')
+    return _stl_result(vertices, face_normals, weld)
 
-    face_count = int(face_count)
-    # this offset is to be added to a fixed set of indices that is tiled
-    offset = face_len * np.arange(face_count).reshape((-1, 1))
-    normal_index = np.tile([2, 3, 4], (face_count, 1)) + offset
-    vertex_index = np.tile(
-        [8, 9, 10, 12, 13, 14, 16, 17, 18], (face_count, 1)) + offset
 
-    # faces are groups of three sequential vertices, as vertices are not
-    # references
-    faces = np.arange(face_count * 3).reshape((-1, 3))
-    face_normals = blob[normal_index].astype(np.float64)
-    vertices = blob[vertex_index.reshape((-1, 3))].astype(np.float64)
+def _parse_stl_ascii(chunk):
+    '''
+    Parse the vertices and facet normals in a chunk of whole lines of an
+    ASCII STL file.
 
+    Returns
+    ----------
+    vertices:     (n,3) float, vertices
+    face_normals: (m,3) float, facet normals
+    '''
+    words = np.array(chunk.lower().split())
+    # every value follows the 'normal' or 'vertex' keyword
+    values = []
+    for keyword in (b'vertex', b'normal'):
+        index = np.nonzero(words == keyword)[0]
+        index = index[:, np.newaxis] + np.arange(1, 4)
+        if len(index) and index[-1, -1] >= len(words):
+            raise HeaderError('Incorrect number of values in STL file!')
+        try:
+            values.append(words[index].astype(np.float64))
+        except ValueError:
+            raise HeaderError('Incorrect values in STL file!')
+    return values
+
+
+def _stl_result(vertices, face_normals, weld):
+    '''
+    Build the result of the loaders from the three vertices of each face,
+    optionally merging equal vertices into an indexed mesh.
+    '''
+    if weld and len(vertices):
+        # compare the bits of the float32 coordinates, packed into two
+        # integer keys, which sort much faster than three float columns
+        bits = (np.asarray(vertices, np.float32) + np.float32(0))
+        bits = bits.view(np.uint32).astype(np.uint64)
+        keys = np.empty((len(bits), 2), np.uint64)
+        keys[:, 0] = (bits[:, 0] << np.uint64(32)) | bits[:, 1]
+        keys[:, 1] = bits[:, 2]
+        # number the distinct vertices in the order they first appear
+        _, first, inverse = _unique_rows(keys)
+        order = np.argsort(first)
+        rank = np.empty(len(order), np.intp)
+        rank[order] = np.arange(len(order))
+        vertices = vertices[first[order]]
+        faces = rank[inverse].reshape((-1, 3))
+    else:
+        # all of our vertices will be loaded in order due to the STL
+        # format, so faces are just sequential indices reshaped.
+        faces = np.arange(len(vertices)).reshape((-1, 3))
     return {'vertices': vertices,
             'faces': faces,
             'face_normals': face_normals}
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) Vispy Development Team. All Rights Reserved.
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import io
 import numpy as np
 from os import path as op
 from numpy.testing import assert_allclose, assert_array_equal
@@ -64,6 +65,92 @@ def test_wavefront_non_triangular():
     assert lines[-2].startswith('f 2 1 8 7 6 4')
 
 
+def test_wavefront_read():
+    """Test reading index sets, relative indices and the cache"""
+    fname = op.join(temp_dir, 'square.obj')
+    with open(fname, 'w') as f:
+        f.write('# square\no square\nv 0 0 0\nv 1 0 0\nv 1 1 0 1\n'
+                'v 0 1 0\nvt 0 0\nvt 1 1\nvn 0 0 1\nvn 0 0 -1\n'
+                'f 1/1/1 2/1/1 3/2/1\nf 1/1/1 3/2/1 4/1/1\n'
+                'f 1/1/2 3/2/2 2/1/2\n')
+    vertices, faces, normals, texcoords = read_mesh(fname)
+    # A vertex for each distinct set of indices, in order of appearance
+    assert_array_equal(vertices, [[0, 0, 0], [1, 0, 0], [1, 1, 0],
+                                  [0, 1, 0], [0, 0, 0], [1, 1, 0],
+                                  [1, 0, 0]])
+    assert_array_equal(faces, [[0, 1, 2], [0, 2, 3], [4, 5, 6]])
+    assert_array_equal(normals[[0, 4]], [[0, 0, 1], [0, 0, -1]])
+    assert_array_equal(texcoords[:3], [[0, 0], [0, 0], [1, 1]])
+    assert faces.dtype == np.uint32 and vertices.dtype == np.float32
+
+    # Relative indices are read line by line
+    fname_relative = op.join(temp_dir, 'relative.obj')
+    with open(fname_relative, 'w') as f:
+        f.write('v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf -4 -3 -2\n'
+                'f 1 3 4\n')
+    vertices, faces, normals, texcoords = read_mesh(fname_relative)
+    assert_array_equal(vertices[faces], [[[0, 0, 0], [1, 0, 0], [1, 1, 0]],
+                                         [[0, 0, 0], [1, 1, 0], [0, 1, 0]]])
+    assert texcoords is None
+
+    # The cache is used while the file is unchanged
+    mesh = read_mesh(fname, cache=True)
+    assert op.isfile(fname + '.npz')
+    with np.load(fname + '.npz') as cache:
+        assert_array_equal(cache['faces'], mesh[1])
+    cached = read_mesh(fname, cache=True)
+    for m1, m2 in zip(mesh, cached):
+        assert_array_equal(m1, m2)
+    with open(fname, 'a') as f:
+        f.write('f 2/1/1 3/2/1 4/1/1\n')
+    assert len(read_mesh(fname, cache=True)[1]) == 4
+
+
+def test_stl():
+    """Test binary and ASCII STL readers"""
+    from vispy.io.stl import (load_stl, load_stl_ascii, HeaderError,
+                              _stl_dtype)
+    # two triangles of a square
+    vertices = np.array([[[0, 0, 0], [1, 0, 0], [1, 1, 0]],
+                         [[0, 0, 0], [1, 1, 0], [0, 1, 0]]], np.float32)
+    blob = np.zeros(2, _stl_dtype)
+    blob['vertices'] = vertices
+    blob['normals'] = [0, 0, 1]
+    fname_binary = op.join(temp_dir, 'square.stl')
+    with open(fname_binary, 'wb') as f:
+        f.write(b'\0' * 80 + np.array(2, '<i4').tobytes() + blob.tobytes())
+    lines = ['solid square']
+    for triangle in vertices:
+        lines += ['facet normal 0 0 1', ' outer loop']
+        lines += ['  vertex %g %g %g' % tuple(v) for v in triangle]
+        lines += [' endloop', 'endfacet']
+    lines.append('endsolid square')
+    fname_ascii = op.join(temp_dir, 'square_ascii.stl')
+    with open(fname_ascii, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    for fname in (fname_binary, fname_ascii):
+        v, faces, normals, texcoords = read_mesh(fname)
+        assert_array_equal(v, vertices.reshape(-1, 3))
+        assert_array_equal(faces, np.arange(6).reshape(2, 3))
+        assert_array_equal(normals, [[0, 0, 1]] * 2)
+        assert texcoords is None
+        v, faces, normals, texcoords = read_mesh(fname, weld=True)
+        assert_array_equal(v, [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]])
+        assert_array_equal(faces, [[0, 1, 2], [0, 2, 3]])
+
+    # file objects that cannot be mapped, and tiny chunks
+    with open(fname_binary, 'rb') as f:
+        mesh = load_stl(io.BytesIO(f.read()))
+    assert_array_equal(mesh['vertices'], vertices.reshape(-1, 3))
+    with open(fname_ascii, 'rb') as f:
+        mesh = load_stl_ascii(f, chunk_size=7)
+    assert_array_equal(mesh['vertices'], vertices.reshape(-1, 3))
+    broken = io.BytesIO(b'solid broken\nfacet normal 0 0 1\n'
+                        b'vertex 0 0\nendsolid broken\n')
+    assert_raises(HeaderError, load_stl, broken)
+
+
 def test_meshio():
     '''Test meshio i/o'''
     vertices = np.array([[0.0, 0.0, 0.0],
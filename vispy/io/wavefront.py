@@ -18,12 +18,16 @@ The classes are written with compatibility of Python3 in mind.
 
 """
 
-import numpy as np
+import os
 import time
+import warnings
 from os import path as op
 
+import numpy as np
+
 from ..ext.gzip_open import gzip_open
 from ..geometry import _calculate_normals
+from ..geometry.calculations import _unique_rows
 from ..util import logger
 
 
@@ -52,7 +56,7 @@ class WavefrontReader(object):
         self._facemap = {}
 
     @classmethod
-    def read(cls, fname):
+    def read(cls, fname, cache=False):
         """ read(fname, fmt)
 
         This classmethod is the entry point for reading OBJ files.
@@ -63,27 +67,122 @@ class WavefrontReader(object):
             The name of the file to read.
         fmt : str
             Can be "obj" or "gz" to specify the file format.
+        cache : bool
+            If True, the mesh is also written to a ``.npz`` file next to
+            the OBJ file, which is read instead as long as the modification
+            time and size of the OBJ file are unchanged.
         """
+        cache_fname = fname + '.npz'
+        if cache:
+            mesh = _read_cache(fname, cache_fname)
+            if mesh is not None:
+                return mesh
+
         # Open file
         fmt = op.splitext(fname)[1].lower()
         assert fmt in ('.obj', '.gz')
         opener = open if fmt == '.obj' else gzip_open
+        t0 = time.time()
         with opener(fname, 'rb') as f:
-            try:
-                reader = WavefrontReader(f)
-                while True:
-                    reader.readLine()
-            except EOFError:
-                pass
+            mesh = cls._read_bulk(f)
+        if mesh is None:
+            # Use the line-by-line reader for files with relative indices,
+            # comments after values, or faces that are not all alike
+            with opener(fname, 'rb') as f:
+                try:
+                    reader = WavefrontReader(f)
+                    while True:
+                        reader.readLine()
+                except EOFError:
+                    pass
+            mesh = reader.finish()
 
         # Done
-        t0 = time.time()
-        mesh = reader.finish()
         logger.debug('reading mesh took ' +
                      str(time.time() - t0) +
                      ' seconds')
+        if cache:
+            _write_cache(fname, cache_fname, mesh)
         return mesh
 
+    @classmethod
+    def _read_bulk(cls, f):
+        """ Read a file in chunks, parsing all lines of a kind at once.
+
+        Returns None if the file needs to be read line by line.
+        """
+        blocks = dict(v=[], vt=[], vn=[], f=[])
+        face_format = None
+        for chunk in _iter_chunks(f):
+            split = _split_chunk(chunk)
+            if split is None:
+                return None
+            lines, other = split
+            for command in other:
+                if command == b'mtllib':
+                    logger.warning('Notice reading .OBJ: material properties '
+                                   'are ignored.')
+                else:
+                    logger.warning('Notice reading .OBJ: ignoring %s command.'
+                                   % command.decode('ascii', 'ignore'))
+            for kind, (block, offsets) in lines.items():
+                if kind == 'f':
+                    if face_format is None:
+                        corner = block[:200].tobytes().split()[0]
+                        face_format = corner.count(b'/'), b'//' in corner
+                    values = _parse_faces(block, offsets, *face_format)
+                else:
+                    values = _parse_rows(block, offsets, np.float64)
+                if values is None:
+                    return None
+                blocks[kind].append(values)
+        arrays = {}
+        for kind, block in blocks.items():
+            if len(set(values.shape[1] for values in block)) > 1:
+                return None
+            arrays[kind] = np.concatenate(block) if block else None
+
+        self = cls(f)
+        if arrays['v'] is None:
+            return None
+        v = arrays['v'][:, :3]
+        if arrays['f'] is None:
+            # Use vertices only
+            self._vertices = v.astype('float32')
+            self._faces = None
+            return self._vertices, None, self._calculate_normals(), None
+
+        # Check that the indices refer to the vertices, texcoords and
+        # normals that are there
+        n_slashes, no_texcoords = face_format
+        has_texcoords = n_slashes > 0 and not no_texcoords
+        has_normals = n_slashes == 2
+        n_fields = 1 + has_texcoords + has_normals
+        faces = arrays['f']
+        if (faces <= 0).any() or \
+                has_texcoords and arrays['vt'] is None or \
+                has_normals and arrays['vn'] is None:
+            return None
+
+        # Each distinct set of vertex/texcoord/normal indices is a vertex;
+        # keep them in the order in which they first appear
+        corners = faces.reshape(-1, n_fields) - 1
+        sets, first, inverse = _unique_rows(corners)
+        order = np.argsort(first)
+        rank = np.empty(len(order), np.uint32)
+        rank[order] = np.arange(len(order))
+        sets = sets[order]
+        self._vertices = v[sets[:, 0]].astype('float32')
+        self._faces = rank[inverse].reshape(len(faces), -1)
+        texcoords = None
+        if has_texcoords:
+            texcoords = arrays['vt'][sets[:, 1], :3].astype('float32')
+        if has_normals:
+            normals = arrays['vn'][sets[:, -1], :3].astype('float32')
+        else:
+            normals = self._calculate_normals()
+        return self._vertices, self._faces, normals, texcoords
+
     def readLine(self):
         """ The method that reads a line and processes it.
         """
@@ -220,6 +319,139 @@ class WavefrontReader(object):
         return self._vertices, self._faces, self._normals, self._texcords
 
 
+_CACHE_NAMES = ('vertices', 'faces', 'normals', 'texcoords')
+
+
+def _read_cache(fname, cache_fname):
+    """Read the mesh from the cache of an OBJ file, if it is up to date"""
+    stat = os.stat(fname)
+    if not op.isfile(cache_fname):
+        return None
+    try:
+        with np.load(cache_fname) as cache:
+            if cache['mtime'] != stat.st_mtime or \
+                    cache['size'] != stat.st_size:
+                return None
+            return tuple(cache[name] if name in cache else None
+                         for name in _CACHE_NAMES)
+    except (IOError, ValueError, KeyError):
+        logger.warning('Ignoring invalid mesh cache %s' % cache_fname)
+        return None
+
+
+def _write_cache(fname, cache_fname, mesh):
+    """Write the mesh of an OBJ file to its cache"""
+    stat = os.stat(fname)
+    arrays = dict((name, value) for name, value in zip(_CACHE_NAMES, mesh)
+                  if value is not None)
+    temp_fname = cache_fname + '.tmp.npz'
+    try:
+        np.savez(temp_fname, mtime=stat.st_mtime, size=stat.st_size,
+                 **arrays)
+        os.replace(temp_fname, cache_fname)
+    except (IOError, OSError) as err:
+        logger.warning('Could not write mesh cache %s: %s'
+                       % (cache_fname, err))
+
+
+def _iter_chunks(f, size=2 ** 26):
+    """Read a file in chunks of whole lines"""
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk + f.readline()
+
+
+# Commands that are read in bulk, by the bytes at the start of the line
+_BULK_COMMANDS = {'v': b'v', 'vt': b'vt', 'vn': b'vn', 'f': b'f'}
+_IGNORED_COMMANDS = (b'g', b's', b'o', b'usemtl')
+_WHITESPACE = np.zeros(256, bool)
+_WHITESPACE[[9, 10, 13, 32]] = True
+
+
+def _split_chunk(chunk):
+    """Sort the lines of a chunk by command
+
+    Returns a dict with, for each command of _BULK_COMMANDS, the bytes of
+    its lines (with the command replaced by spaces) and the offsets of
+    the lines in those bytes, and the set of other commands. Returns None
+    if lines are indented.
+    """
+    data = np.frombuffer(chunk + b'\n  ', np.uint8)
+    ends = np.flatnonzero(data[:len(chunk) + 1] == ord('\n'))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    first = data[starts]
+    if (first == ord(' ')).any() or (first == ord('\t')).any():
+        return None
+    # The command is followed by whitespace
+    kinds = np.zeros(len(starts), np.uint8)
+    for kind, command in enumerate(_BULK_COMMANDS.values(), 1):
+        match = _WHITESPACE[data[starts + len(command)]]
+        for i, char in enumerate(command):
+            match &= data[starts + i] == char
+        kinds[match] = kind
+    lengths = ends - starts + 1
+    byte_kinds = np.repeat(kinds, lengths)
+    lines = {}
+    for kind, (name, command) in enumerate(_BULK_COMMANDS.items(), 1):
+        selected = kinds == kind
+        if not selected.any():
+            continue
+        block = data[:len(byte_kinds)][byte_kinds == kind].copy()
+        offsets = np.cumsum(lengths[selected]) - lengths[selected]
+        for i in range(len(command)):
+            block[offsets + i] = ord(' ')
+        lines[name] = block, offsets
+    other = set()
+    for start, end in zip(starts[kinds == 0], ends[kinds == 0]):
+        words = chunk[start:end].split()
+        if words and words[0] not in _IGNORED_COMMANDS and \
+                not words[0].startswith(b'#'):
+            other.add(words[0])
+    return lines, other
+
+
+def _parse_rows(block, offsets, dtype):
+    """Parse lines with the same number of values into a 2D array, or
+    return None
+    """
+    token = ~_WHITESPACE[block]
+    token[1:] &= _WHITESPACE[block[:-1]]
+    counts = np.add.reduceat(token, offsets)
+    if counts.min() != counts.max() or counts[0] == 0:
+        return None
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        values = np.fromstring(block.tobytes(), dtype, sep=' ')
+    if len(values) != counts.sum():
+        return None  # not all numbers
+    return values.reshape(len(offsets), counts[0])
+
+
+def _parse_faces(block, offsets, n_slashes, no_texcoords):
+    """Parse face lines whose index sets are like ``(n_slashes,
+    no_texcoords)``, or return None
+
+    Each row of the result has the indices of all corners of a face.
+    """
+    slash = block == ord('/')
+    double = np.zeros(len(block), np.intp)
+    double[:-1] = slash[:-1] & slash[1:]
+    n_slash = np.add.reduceat(slash, offsets)
+    n_double = np.add.reduceat(double, offsets)
+    block[slash] = ord(' ')
+    values = _parse_rows(block, offsets, np.int64)
+    if values is None:
+        return None
+    n_corners = values.shape[1] // (1 + n_slashes - no_texcoords)
+    if (n_slash != n_slashes * n_corners).any() or \
+            (n_double != no_texcoords * n_corners).any() or \
+            values.shape[1] != n_corners * (1 + n_slashes - no_texcoords):
+        return None
+    return values
+
+
 class WavefrontWriter(object):
 
     def __init__(self, f):
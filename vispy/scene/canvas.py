@@ -123,6 +123,18 @@ class SceneCanvas(app.Canvas, Frozen):
         self._fb_stack = []
         self._vp_stack = []
         self._mouse_handler = None
+        self._culling = False
+        self._cull_margin = 0
+        self._culled_nodes = 0
+        self._state_sorting = False
+        # Picking: the framebuffer is kept between picks, and the IDs read
+        # from it are kept for each mode until the scene changes
+        self._picking_fbo = None
+        self._picking_ids = {}
+        self._picking_reads = {}
+        self._picking_outdated = []
+        self._picking_prefetch = False
+        self._picking_active = False
         self.transforms = TransformSystem(canvas=self)
         self._bgcolor = Color(bgcolor).rgba
         
@@ -180,6 +192,80 @@ class SceneCanvas(app.Canvas, Frozen):
         if hasattr(self, '_backend'):
             self.update()
 
+    @property
+    def culling(self):
+        """Whether to skip drawing visuals that are outside of the view.
+
+        When enabled, the bounds of each visual are mapped to the render
+        coordinate system, and visuals whose bounding box lies entirely
+        outside of the view volume are not drawn. Their children are still
+        considered. Visuals without bounds, with a nonlinear transform, or
+        with ``cullable=False`` are always drawn.
+        """
+        return self._culling
+
+    @culling.setter
+    def culling(self, culling):
+        self._culling = bool(culling)
+        self.update()
+
+    @property
+    def cull_margin(self):
+        """Margin in logical pixels by which the bounds of a visual are
+        grown before testing them against the view.
+
+        Visuals such as markers and text are drawn beyond their bounds,
+        which only contain the anchor positions; use a margin of at least
+        the marker or text size to avoid culling them while still partly
+        visible.
+        """
+        return self._cull_margin
+
+    @cull_margin.setter
+    def cull_margin(self, margin):
+        self._cull_margin = float(margin)
+        self.update()
+
+    @property
+    def state_sorting(self):
+        """Whether to reorder visuals to reduce GL state changes.
+
+        When enabled, opaque visuals that use depth testing are drawn
+        first, grouped by shader program source, GL state and bound
+        textures. All other visuals are drawn afterwards in scene order.
+        Because opaque visuals rely on the depth buffer rather than on
+        their drawing order, this does not change the rendered image for
+        3D scenes, but it may for 2D scenes that rely on drawing order.
+        """
+        return self._state_sorting
+
+    @state_sorting.setter
+    def state_sorting(self, sorting):
+        self._state_sorting = bool(sorting)
+        self.update()
+
+    @property
+    def culled_nodes(self):
+        """The number of nodes that were culled in the last draw.
+        """
+        return self._culled_nodes
+
+    @property
+    def picking_prefetch(self):
+        """Whether to render the picking IDs after each draw of a changed
+        scene.
+
+        The IDs are read back asynchronously when the OpenGL backend
+        supports pixel buffer objects, so that picking right after a draw,
+        e.g. at each mouse move, does not wait for the GPU. This doubles
+        the cost of drawing the scene.
+        """
+        return self._picking_prefetch
+
+    @picking_prefetch.setter
+    def picking_prefetch(self, prefetch):
+        self._picking_prefetch = bool(prefetch)
+
     def update(self, node=None):
         """Update the scene
 
@@ -188,6 +274,11 @@ class SceneCanvas(app.Canvas, Frozen):
         node : instance of Node
             Not used.
         """
+        # Switching the scene to picking mode and back changes nothing
+        if self._picking_active:
+            return
+        self._invalidate_picking()
+
         # TODO: use node bounds to keep track of minimum drawable area
         if self._drawing:
             return
@@ -215,6 +306,12 @@ class SceneCanvas(app.Canvas, Frozen):
         # scheduling of further updates
         self._update_pending = False
         self._draw_scene()
+        if self._picking_prefetch and True not in self._picking_ids and \
+                True not in self._picking_reads:
+            try:
+                self._picking_reads[True] = self._start_picking_read(True)
+            except RuntimeError:
+                pass  # reading pixels is not supported
 
     def render(self, region=None, size=None, bgcolor=None, crop=None):
         """Render the scene to an offscreen buffer and return the image array.
@@ -292,6 +389,8 @@ class SceneCanvas(app.Canvas, Frozen):
             # draw (while avoiding branches with visible=False)
             stack = []
             invisible_node = None
+            culled = 0
+            batch = [] if self._state_sorting else None
             for node, start in order:
                 if start:
                     stack.append(node)
@@ -301,15 +400,72 @@ class SceneCanvas(app.Canvas, Frozen):
                             invisible_node = node
                         else:
                             if hasattr(node, 'draw'):
+                                if self._culling and self._is_culled(node):
+                                    culled += 1
+                                    continue
+                                if batch is not None:
+                                    batch.append(node)
+                                    continue
                                 node.draw()
                                 prof.mark(str(node))
                 else:
                     if node is invisible_node:
                         invisible_node = None
                     stack.pop()
+            self._culled_nodes = culled
+            if batch:
+                for node in self._sort_by_state(batch):
+                    node.draw()
+                    prof.mark(str(node))
         finally:
             self._drawing = False
 
+    @staticmethod
+    def _sort_by_state(nodes):
+        """Return *nodes* with the opaque ones first, grouped by their draw
+        state, followed by all others in their original order.
+        """
+        opaque = []
+        ordered = []
+        for node in nodes:
+            key = getattr(node, '_draw_sort_key', lambda: None)()
+            if key is None:
+                ordered.append(node)
+            else:
+                opaque.append((key, len(opaque), node))
+        opaque.sort(key=lambda item: item[:2])
+        return [node for _, _, node in opaque] + ordered
+
+    def _is_culled(self, node):
+        """Return True if the bounding box of *node* is entirely outside of
+        the view volume.
+        """
+        if not getattr(node, 'cullable', False):
+            return False
+        bounds = [node.bounds(axis) for axis in range(3)]
+        if None in bounds:
+            return False
+        tr = node.transforms.get_transform('visual', 'render')
+        if not tr.Linear:
+            # The mapped corners would not enclose the mapped box
+            return False
+        # Corners of the bounding box in clip coordinates
+        corners = np.array(np.meshgrid(*bounds)).reshape(3, -1).T
+        clip = tr.map(corners)
+        w = clip[:, 3]
+        limit = np.ones(3)
+        if self._cull_margin:
+            scale = node.transforms.get_transform('canvas', 'render').map(
+                [[0, 0], [self._cull_margin, self._cull_margin]])
+            limit[:2] += np.abs(scale[1, :2] - scale[0, :2])
+        # The box is outside if all its corners are on the outer side of
+        # one of the clip planes -w <= x, y, z <= w
+        for axis in range(3):
+            if ((clip[:, axis] > limit[axis] * w).all() or
+                    (clip[:, axis] < -limit[axis] * w).all()):
+                return True
+        return False
+
     def _generate_draw_order(self, node=None):
         """Return a list giving the order to draw visuals.
         
@@ -466,26 +622,109 @@ class SceneCanvas(app.Canvas, Frozen):
         visuals = [VisualNode._visual_ids.get(x, None) for x in ids]
         return [v for v in visuals if v is not None]
 
-    def _render_picking(self, crop):
-        """Render the scene in picking mode, returning a 2D array of visual 
-        IDs in the area specified by crop.
-        
+    def element_at(self, pos):
+        """Return the visual and the index of its element at a given position
+
+        Elements are only known for visuals whose picking filter has
+        element IDs, see ``PickingFilter.element_ids``.
+
+        Parameters
+        ----------
+        pos : tuple
+            The position in logical coordinates to query.
+
+        Returns
+        -------
+        visual : instance of Visual | None
+            The visual at the position, if it exists.
+        index : int | None
+            The index of the element of the visual at the position, or None
+            if there is no visual or it has no element IDs.
+        """
+        tr = self.transforms.get_transform('canvas', 'framebuffer')
+        fbpos = tr.map(pos)[:2]
+        crop = (fbpos[0], fbpos[1], 1, 1)
+
+        try:
+            id_ = self._render_picking(crop)
+            vis = VisualNode._visual_ids.get(id_[0, 0], None)
+            if vis is None or vis.picking_filter.element_ids is None:
+                return vis, None
+            element = self._render_picking(crop, mode='elements')[0, 0]
+        except RuntimeError:
+            return None, None
+        return vis, (int(element) - 1 if element > 0 else None)
+
+    def _render_picking(self, crop, mode=True):
+        """Return a 2D array of picking IDs in the area specified by crop.
+
+        The full canvas is rendered in picking mode to a framebuffer that is
+        kept between calls, as it is much faster than triggering transform
+        updates across the scene with every click. The IDs are kept until
+        the scene changes, so that repeated queries do not render again.
+
         Parameters
         ----------
         crop : array-like
-            The crop (x, y, w, h) of the framebuffer to read. For picking the
-            full canvas is rendered and cropped on read as it is much faster
-            than triggering transform updates across the scene with every
-            click.
+            The crop (x, y, w, h) of the framebuffer to read.
+        mode : True | 'elements'
+            Whether to read the IDs of the visuals or of their elements.
         """
+        ids = self._picking_ids.get(mode)
+        if ids is None:
+            read = self._picking_reads.pop(mode, None)
+            if read is None:
+                read = self._start_picking_read(mode)
+            else:
+                self.set_current()
+            ids = np.ascontiguousarray(read.get()).view('<i4')[..., 0]
+            self._picking_ids[mode] = ids
+
+        # Crop, in framebuffer coordinates with the origin at the bottom,
+        # filling the part outside of the framebuffer with 0
+        x, y, w, h = [int(v) for v in crop]
+        height, width = ids.shape
+        out = np.zeros((h, w), ids.dtype)
+        x0, x1 = max(x, 0), min(x + w, width)
+        y0, y1 = max(y, 0), min(y + h, height)
+        if x0 < x1 and y0 < y1:
+            out[y + h - y1:y + h - y0, x0 - x:x1 - x] = \
+                ids[height - y1:height - y0, x0:x1]
+        return out
+
+    def _invalidate_picking(self):
+        """Forget the picking IDs, after the scene changed."""
+        self._picking_ids.clear()
+        # The context may not be current here, release the reads later
+        self._picking_outdated.extend(self._picking_reads.values())
+        self._picking_reads.clear()
+
+    def _start_picking_read(self, mode):
+        """Render the scene in picking mode and start reading it back."""
+        self.set_current()
+        for read in self._picking_outdated:
+            read.release()
+        del self._picking_outdated[:]
+
+        size = tuple(int(x * self.pixel_scale) for x in self.size)[::-1]
+        fbo = self._picking_fbo
+        if fbo is None:
+            fbo = gloo.FrameBuffer(color=gloo.RenderBuffer(size),
+                                   depth=gloo.RenderBuffer(size))
+            self._picking_fbo = fbo
+        elif tuple(fbo.shape) != size:
+            fbo.resize(size)
+
+        self.push_fbo(fbo, (0, 0), self.size)
+        self._picking_active = True
         try:
-            self._scene.picking = True
-            img = self.render(bgcolor=(0, 0, 0, 0), crop=crop)
+            self._scene.picking = mode
+            self._draw_scene(bgcolor=(0, 0, 0, 0))
+            return gloo.read_pixels_async((0, 0) + size[::-1])
         finally:
             self._scene.picking = False
-        img = img.astype('int32') * [2**0, 2**8, 2**16, 2**24]
-        id_ = img.sum(axis=2).astype('int32')
-        return id_
+            self._picking_active = False
+            self.pop_fbo()
 
     def on_resize(self, event):
         """Resize handler
@@ -496,6 +735,7 @@ class SceneCanvas(app.Canvas, Frozen):
             The resize event.
         """
         self._update_transforms()
+        self._invalidate_picking()
         
         if self._central_widget is not None:
             self._central_widget.size = self.size
@@ -40,6 +40,10 @@ class Node(object):
     # Needed to allow subclasses to repr() themselves before Node.__init__()
     _name = None
 
+    # Incremented whenever a node changes parent or transform, which
+    # invalidates the transforms cached by node_transform()
+    _scenegraph_version = 0
+
     def __init__(self, parent=None, name=None, transforms=None):
         self.name = name
         self._visible = True
@@ -56,6 +60,9 @@ class Node(object):
         # whether this widget should clip its children
         self._clip_children = False
         self._clipper = None
+
+        # {node: (scenegraph version, transform)}
+        self._node_transforms = weakref.WeakKeyDictionary()
         
         self.transforms = (TransformSystem() if transforms is None else 
                            transforms)
@@ -205,6 +212,7 @@ class Node(object):
                     self._set_clipper(p, p.clipper)
                 p = p.parent
         
+        Node._scenegraph_version += 1
         self.events.parent_change(new=parent, old=prev)
         self._update_trsys(None)
         self.update()
@@ -366,6 +374,7 @@ class Node(object):
         assert isinstance(tr, BaseTransform)
         if tr is not self._transform:
             self._transform = tr
+            Node._scenegraph_version += 1
             self._update_trsys(None)
 
     def set_transform(self, type_, *args, **kwargs):
@@ -598,6 +607,10 @@ class Node(object):
         Note that there must be a _single_ path in the scenegraph that connects
         the two entities; otherwise an exception will be raised.
 
+        The transform is cached until the scenegraph or the transform of a
+        node changes, so the same instance may be returned again. It
+        follows changes to the parameters of the transforms in the path.
+
         Parameters
         ----------
         node : instance of Node
@@ -608,7 +621,13 @@ class Node(object):
         transform : instance of ChainTransform
             The transform.
         """
-        return ChainTransform(self.node_path_transforms(node))
+        version = Node._scenegraph_version
+        cached = self._node_transforms.get(node)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        tr = ChainTransform(self.node_path_transforms(node))
+        self._node_transforms[node] = (version, tr)
+        return tr
 
     def __repr__(self):
         name = "" if self.name is None else " name="+self.name
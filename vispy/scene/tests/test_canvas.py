@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from vispy import scene
+from vispy.scene.canvas import SceneCanvas
+from vispy.testing import (TestingCanvas, requires_application,
+                           run_tests_if_main)
+
+
+@requires_application()
+def test_culling():
+    """Test that visuals outside of the view are culled"""
+    data = np.random.RandomState(0).rand(8, 8).astype(np.float32)
+    with TestingCanvas(size=(80, 80)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.PanZoomCamera(rect=(0, 0, 25, 25))
+        tiles = []
+        for i in range(10):
+            for j in range(10):
+                tile = scene.visuals.Image(data, parent=view.scene)
+                tile.transform = scene.STTransform(translate=(10 * i, 10 * j))
+                tiles.append(tile)
+
+        c.culling = False
+        expected = c.render()
+        assert c.culled_nodes == 0
+
+        c.culling = True
+        assert_array_equal(c.render(), expected)
+        # Only the 3x3 tiles that overlap with the view are drawn
+        assert c.culled_nodes == 100 - 9
+
+        tiles[-1].cullable = False
+        c.render()
+        assert c.culled_nodes == 100 - 10
+
+
+def test_state_sorting():
+    """Test that opaque visuals are grouped by their draw state"""
+    data = np.arange(16, dtype=np.float32).reshape(4, 4)
+    images = [scene.visuals.Image(data, cmap=cmap)
+              for cmap in ('grays', 'viridis', 'grays', 'viridis')]
+    for image in images:
+        image.set_gl_state('opaque')
+    markers = scene.visuals.Markers()
+    markers.set_data(np.zeros((3, 2)))
+    mesh = scene.visuals.Mesh(np.zeros((3, 3)), np.array([[0, 1, 2]]))
+    mesh.set_gl_state('opaque', depth_test=False)
+
+    nodes = [images[0], markers, images[1], mesh, images[2], images[3]]
+    for node in nodes:
+        node._prepare_draw(node)
+        node.view_program.build_if_needed()
+    order = SceneCanvas._sort_by_state(nodes)
+    # Translucent visuals and visuals without depth test keep their order
+    # and are drawn last
+    assert order[4:] == [markers, mesh]
+    # Opaque visuals with the same shaders are drawn in a row, keeping
+    # their relative order
+    opaque = order[:4]
+    assert opaque.index(images[2]) == opaque.index(images[0]) + 1
+    assert opaque.index(images[3]) == opaque.index(images[1]) + 1
+
+
+@requires_application()
+def test_picking():
+    """Test that picking reuses the IDs until the scene changes"""
+    with TestingCanvas(size=(80, 80)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.PanZoomCamera(rect=(0, 0, 80, 80))
+        pos = np.array([[20, 20], [60, 60]])
+        markers = scene.visuals.Markers(pos=pos, size=20, edge_width=0,
+                                        parent=view.scene)
+        markers.interactive = True
+        c.render()
+
+        renders = []
+        draw_scene = c._draw_scene
+        c.unfreeze()
+        c._draw_scene = lambda **kwargs: (renders.append(kwargs),
+                                          draw_scene(**kwargs))
+        c.freeze()
+        assert c.visual_at((20, 60)) is markers
+        assert c.visual_at((60, 20)) is markers
+        assert c.visual_at((20, 20)) is not markers
+        assert len(renders) == 1
+        assert markers in c.visuals_at((40, 40), radius=30)
+        assert len(renders) == 1
+
+        # No element IDs
+        assert c.element_at((20, 60)) == (markers, None)
+        markers.picking_filter.element_ids = np.arange(2)
+        assert c.element_at((20, 60)) == (markers, 0)
+        assert c.element_at((60, 20)) == (markers, 1)
+        assert c.element_at((20, 20))[1] is None
+
+        # The IDs are rendered again once the scene changed
+        n_renders = len(renders)
+        markers.set_data(pos[::-1], size=20, edge_width=0)
+        assert c.element_at((20, 60)) == (markers, 1)
+        assert len(renders) > n_renders
+
+        # Prefetched IDs are used by the next pick
+        c.picking_prefetch = True
+        markers.set_data(pos, size=20, edge_width=0)
+        c.on_draw(None)
+        n_renders = len(renders)
+        assert c.visual_at((20, 60)) is markers
+        assert len(renders) == n_renders
+
+
+run_tests_if_main()
@@ -138,5 +138,32 @@ def test_transforms():
     assert np.all(n2.node_transform(n4).map(pts) == 
                   n2.node_transform(n4).simplified.map(pts))    
 
-    
+
+def test_node_transform_cache():
+    # Check that node_transform is cached until the scenegraph changes
+    root = Node()
+    n1 = Node(parent=root)
+    n2 = Node(parent=n1)
+    n3 = Node(parent=root)
+    n1.transform = STTransform(scale=(2, 2), translate=(1, 0))
+    n2.transform = STTransform(translate=(0, 3))
+    tr = n2.node_transform(root)
+    assert n2.node_transform(root) is tr
+    assert np.allclose(tr.map((1, 1))[:2], (3, 8))
+
+    # changes of a transform are followed by the cached chain
+    n2.transform.translate = (0, 4)
+    assert n2.node_transform(root) is tr
+    assert np.allclose(tr.map((1, 1))[:2], (3, 10))
+
+    # replacing a transform or reparenting invalidates the cache
+    n1.transform = STTransform(translate=(5, 5))
+    tr2 = n2.node_transform(root)
+    assert tr2 is not tr
+    assert np.allclose(tr2.map((1, 1))[:2], (6, 10))
+    n2.parent = n3
+    assert np.allclose(n2.node_transform(root).map((1, 1))[:2], (1, 5))
+    assert n2.node_transform(n3) is not n2.node_transform(root)
+
+
 run_tests_if_main()
@@ -1,3 +1,6 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
 from vispy.scene import visuals, Node
 from vispy.scene.visuals import VisualNode
 import vispy.visuals
@@ -26,3 +29,28 @@ def test_visual_node_generation():
             vis_node = getattr(visuals, name[:-6])
             assert issubclass(vis_node, Node)
             assert issubclass(vis_node, obj)
+
+
+def test_picking_filter():
+    # element IDs add a vertex attribute with the colors encoding them
+    markers = visuals.Markers(pos=np.zeros((3, 2)))
+    filt = markers.picking_filter
+    assert filt.element_ids is None
+    assert 'picking_element' not in markers.view_program.vert.compile()
+
+    filt.element_ids = [0, 1, 255]
+    assert 'picking_element' in markers.view_program.vert.compile()
+    assert 'varying vec4 v_element_color' in \
+        markers.view_program.frag.compile()
+    data = [cmd[3] for cmd in filt._element_buffer._glir.clear()
+            if cmd[0] == 'DATA']
+    # Index + 1, little endian
+    colors = np.round(data[-1]['f0'].reshape(3, 4) * 255)
+    assert_array_equal(colors, [[1, 0, 0, 0], [2, 0, 0, 0], [0, 1, 0, 0]])
+    filt.enabled = 'elements'
+    assert filt.fshader['enabled'].value == 2
+
+    filt.element_ids = None
+    assert 'picking_element' not in markers.view_program.vert.compile()
+    filt.enabled = False
+    assert filt.fshader['enabled'].value == 0
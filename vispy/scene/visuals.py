@@ -28,6 +28,7 @@ class VisualNode(Node):
         Node.__init__(self, parent=parent, name=name,
                       transforms=self.transforms)
         self.interactive = False
+        self._cullable = True
         self._opacity_filter = Alpha()
         self.attach(self._opacity_filter)
 
@@ -93,6 +94,26 @@ class VisualNode(Node):
     def interactive(self, i):
         self._interactive = i
 
+    @property
+    def picking_filter(self):
+        """The PickingFilter that draws this visual in picking mode. Set
+        its ``element_ids`` to make the elements of the visual pickable
+        with ``SceneCanvas.element_at``.
+        """
+        return self._picking_filter
+
+    @property
+    def cullable(self):
+        """Whether this visual may be skipped when it is outside of the view
+        and culling is enabled on the canvas (see ``SceneCanvas.culling``).
+        """
+        return self._cullable
+
+    @cullable.setter
+    def cullable(self, c):
+        self._cullable = bool(c)
+        self.update()
+
     def draw(self):
         if self.picking and not self.interactive:
             return
@@ -239,6 +260,7 @@ GridMesh = create_visual_node(visuals.GridMeshVisual)
 Histogram = create_visual_node(visuals.HistogramVisual)
 Image = create_visual_node(visuals.ImageVisual)
 InfiniteLine = create_visual_node(visuals.InfiniteLineVisual)
+InstancedMesh = create_visual_node(visuals.InstancedMeshVisual)
 Isocurve = create_visual_node(visuals.IsocurveVisual)
 Isoline = create_visual_node(visuals.IsolineVisual)
 Isosurface = create_visual_node(visuals.IsosurfaceVisual)
@@ -256,6 +278,7 @@ Spectrogram = create_visual_node(visuals.SpectrogramVisual)
 Sphere = create_visual_node(visuals.SphereVisual)
 SurfacePlot = create_visual_node(visuals.SurfacePlotVisual)
 Text = create_visual_node(visuals.TextVisual)
+TiledImage = create_visual_node(visuals.TiledImageVisual)
 Tube = create_visual_node(visuals.TubeVisual)
 # Visual = create_visual_node(visuals.Visual)  # Should not be created
 Volume = create_visual_node(visuals.VolumeVisual)
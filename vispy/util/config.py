@@ -44,8 +44,9 @@ def _init():
     if app_dir is not None:
         _data_path = op.join(app_dir, 'data')
         _test_data_path = op.join(app_dir, 'test_data')
+        _program_cache_path = op.join(app_dir, 'program_cache')
     else:
-        _data_path = _test_data_path = None
+        _data_path = _test_data_path = _program_cache_path = None
 
     # All allowed config keys and the types they may have
     _allowed_config_keys = {
@@ -61,6 +62,7 @@ def _init():
         'profile': (str, type(None),),
         'audit_tests': (bool,),
         'test_data_path': (str, type(None),),
+        'program_cache_path': (str, type(None),),
     }
 
     # Default values for all config options
@@ -77,6 +79,7 @@ def _init():
         'profile': None,
         'audit_tests': False,
         'test_data_path': _test_data_path,
+        'program_cache_path': _program_cache_path,
     }
 
     config = Config(**default_config_options)
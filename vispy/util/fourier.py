@@ -48,12 +48,12 @@ def stft(x, n_fft=1024, step=512, fs=2*np.pi, window='hann'):
     zero_pad = n_fft - len(x)
     if zero_pad > 0:
         x = np.concatenate((x, np.zeros(zero_pad, float)))
-    n_freqs = n_fft // 2 + 1
     n_estimates = (len(x) - n_fft) // step + 1
-    result = np.empty((n_freqs, n_estimates), np.complex128)
-    for ii in range(n_estimates):
-        result[:, ii] = np.fft.rfft(w * x[ii * step:ii * step + n_fft]) / n_fft
-    return result
+    # All windows at once, as a strided view of x
+    frames = np.lib.stride_tricks.as_strided(
+        x, (n_estimates, n_fft), (step * x.strides[0], x.strides[0]),
+        writeable=False)
+    return (np.fft.rfft(frames * w, axis=1) / n_fft).T
 
 
 def fft_freqs(n_fft, fs):
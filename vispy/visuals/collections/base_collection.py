@@ -72,6 +72,7 @@ class Item(object):
     @vertices.setter
     def vertices(self, data):
         self._vertices[...] = np.array(data)
+        self._parent._item_changed(self._key, 'vertices')
 
     @property
     def indices(self):
@@ -81,8 +82,9 @@ class Item(object):
     def indices(self, data):
         if self._indices is None:
             raise ValueError("Item has no indices")
-        start = self._parent.vertices._items[self._key][0]
+        start = self._parent._vertices_list._items[self._key][0]
         self._indices[...] = np.array(data) + start
+        self._parent._item_changed(self._key, 'indices')
 
     @property
     def uniforms(self):
@@ -93,6 +95,7 @@ class Item(object):
         if self._uniforms is None:
             raise ValueError("Item has no associated uniform")
         self._uniforms[...] = data
+        self._parent._item_changed(self._key, 'uniforms')
 
     def __getitem__(self, key):
         """ Get a specific uniforms value """
@@ -109,8 +112,10 @@ class Item(object):
 
         if key in self._vertices.dtype.names:
             self._vertices[key] = value
+            self._parent._item_changed(self._key, 'vertices')
         elif key in self._uniforms.dtype.names:
             self._uniforms[key] = value
+            self._parent._item_changed(self._key, 'uniforms')
         else:
             raise IndexError("Unknown key")
 
@@ -159,6 +164,12 @@ class BaseCollection(object):
         # Need to update buffers & texture
         self._need_update = True
 
+        # Range (start, stop) of the elements of each list that changed
+        # since the last upload, or None. The buffers and the texture have
+        # the capacity of the lists, so only these ranges are uploaded,
+        # unless the lists grew.
+        self._dirty = {'vertices': None, 'indices': None, 'uniforms': None}
+
         # Uniforms type (optional)
         # -------------------------
         if utype is not None:
@@ -256,6 +267,8 @@ class BaseCollection(object):
         # -----------------------------
         vertices = np.array(vertices).astype(self.vtype).ravel()
         vsize = self._vertices_list.size
+        isize = self._indices_list.size if self.itype is not None else 0
+        usize = self._uniforms_list.size if self.utype else 0
 
         # No itemsize given
         # -----------------
@@ -266,7 +279,7 @@ class BaseCollection(object):
         # Uniform itemsize (int)
         # ----------------------
         elif isinstance(itemsize, int):
-            count = len(vertices) / itemsize
+            count = len(vertices) // itemsize
             index = np.repeat(np.arange(count), itemsize)
 
         # Individual itemsize (array)
@@ -310,7 +323,12 @@ class BaseCollection(object):
                 uniforms = np.array(uniforms).astype(self.utype).ravel()
             self._uniforms_list.append(uniforms, itemsize=1)
 
-        self._need_update = True
+        # Only the new elements need to be uploaded
+        self._mark_dirty('vertices', vsize, self._vertices_list.size)
+        if self.itype is not None:
+            self._mark_dirty('indices', isize, self._indices_list.size)
+        if self.utype:
+            self._mark_dirty('uniforms', usize, self._uniforms_list.size)
 
     def __delitem__(self, index):
         """ x.__delitem__(y) <==> del x[y] """
@@ -336,63 +354,55 @@ class BaseCollection(object):
         else:
             raise TypeError("Collection deletion indices must be integers")
 
+        # The elements after the deleted ones move, the buffers are only
+        # updated on the next draw
         vsize = len(self._vertices_list[index])
         if self.itype is not None:
+            start = self._indices_list._items[istart][0]
             del self._indices_list[index]
-            self._indices_list[index:] -= vsize
+            self._indices_list[istart:] -= vsize
+            self._mark_dirty('indices', start, self._indices_list.size)
 
+        start = self._vertices_list._items[istart][0]
         if self.utype:
-            self._vertices_list[index:]["collection_index"] -= istop - istart
+            self._vertices_list[istart:]["collection_index"] -= istop - istart
         del self._vertices_list[index]
+        self._mark_dirty('vertices', start, self._vertices_list.size)
 
         if self.utype is not None:
+            start = self._uniforms_list._items[istart][0]
             del self._uniforms_list[index]
+            self._mark_dirty('uniforms', start, self._uniforms_list.size)
 
         self._need_update = True
 
     def __getitem__(self, key):
         """ """
 
-        # WARNING
-        # Here we want to make sure to use buffers and texture (instead of
-        # lists) since only them are aware of any external modification.
-        if self._need_update:
-            self._update()
-
-        V = self._vertices_buffer
-        idxs = None
-        U = None
-        if self._indices_list is not None:
-            idxs = self._indices_buffer
-        if self._uniforms_list is not None:
-            U = self._uniforms_texture.data.ravel().view(self.utype)
+        # The lists hold the data; items and fields are views on them
+        V = self._vertices_list
+        U = self._uniforms_list
 
         # Getting a whole field
         if isinstance(key, str):
             # Getting a named field from vertices
-            if key in V.dtype.names:
+            if key in self.vtype.names:
                 return V[key]
             # Getting a named field from uniforms
-            elif U is not None and key in U.dtype.names:
-                # Careful, U is the whole texture that can be bigger than list
-                # return U[key]
-                return U[key][:len(self._uniforms_list)]
+            elif U is not None and key in self.utype.names:
+                return U[key]
             else:
                 raise IndexError("Unknown field name ('%s')" % key)
 
         # Getting individual item
         elif isinstance(key, int):
-            vstart, vend = self._vertices_list._items[key]
-            vertices = V[vstart:vend]
+            vertices = V[key]
             indices = None
             uniforms = None
-            if idxs is not None:
-                istart, iend = self._indices_list._items[key]
-                indices = idxs[istart:iend]
-
+            if self._indices_list is not None:
+                indices = self._indices_list[key]
             if U is not None:
-                ustart, uend = self._uniforms_list._items[key]
-                uniforms = U[ustart:uend]
+                uniforms = U[key]
 
             return Item(self, key, vertices, indices, uniforms)
 
@@ -403,53 +413,41 @@ class BaseCollection(object):
     def __setitem__(self, key, data):
         """ x.__setitem__(i, y) <==> x[i]=y """
 
-        # if len(self._programs):
-        # found = False
-        # for program in self._programs:
-        #     if key in program.hooks:
-        #         program[key] = data
-        #         found = True
-        # if found: return
-
-        # WARNING
-        # Here we want to make sure to use buffers and texture (instead of
-        # lists) since only them are aware of any external modification.
-        if self._need_update:
-            self._update()
-
-        V = self._vertices_buffer
-        # I = None
-        U = None
-        # if self._indices_list is not None:
-        #     I = self._indices_buffer  # noqa
-        if self._uniforms_list is not None:
-            U = self._uniforms_texture.data.ravel().view(self.utype)
-
         # Setting a whole field
         if isinstance(key, str):
             # Setting a named field in vertices
             if key in self.vtype.names:
-                V[key] = data
+                self._vertices_list[key] = data
+                self._mark_dirty('vertices', 0, self._vertices_list.size)
             # Setting a named field in uniforms
             elif self.utype and key in self.utype.names:
-                # Careful, U is the whole texture that can be bigger than list
-                # U[key] = data
-                U[key][:len(self._uniforms_list)] = data
+                self._uniforms_list[key] = data
+                self._mark_dirty('uniforms', 0, self._uniforms_list.size)
             else:
                 raise IndexError("Unknown field name ('%s')" % key)
 
-        # # Setting individual item
-        # elif isinstance(key, int):
-        #     #vstart, vend = self._vertices_list._items[key]
-        #     #istart, iend = self._indices_list._items[key]
-        #     #ustart, uend = self._uniforms_list._items[key]
-        #     vertices, indices, uniforms = data
-        #     del self[key]
-        #     self.insert(key, vertices, indices, uniforms)
-
         else:
             raise IndexError("Cannot set more than one item")
 
+    def _mark_dirty(self, name, start, stop):
+        """ Add the elements start to stop of a list to those to upload """
+
+        if stop > start:
+            dirty = self._dirty[name]
+            if dirty is not None:
+                start, stop = min(start, dirty[0]), max(stop, dirty[1])
+            self._dirty[name] = start, stop
+        self._need_update = True
+
+    def _item_changed(self, key, name):
+        """ Mark the elements of an item in the given list as changed """
+
+        data = {'vertices': self._vertices_list,
+                'indices': self._indices_list,
+                'uniforms': self._uniforms_list}[name]
+        start, stop = data._items[key]
+        self._mark_dirty(name, start, stop)
+
     def _compute_texture_shape(self, size=1):
         """ Compute uniform texture shape """
 
@@ -464,35 +462,77 @@ class BaseCollection(object):
         return shape
 
     def _update(self):
-        """ Update vertex buffers & texture """
+        """ Update vertex buffers & texture
+
+        Buffers have the capacity of the lists, and only the elements that
+        changed are uploaded. They are only allocated again when the lists
+        grew, which happens a logarithmic number of times.
+        """
 
-        if self._vertices_buffer is not None:
-            self._vertices_buffer.delete()
-        self._vertices_buffer = VertexBuffer(self._vertices_list.data)
+        if self._vertices_buffer is None:
+            self._vertices_buffer = VertexBuffer()
+        rebind = self._upload(self._vertices_buffer, self._vertices_list,
+                              'vertices')
 
         if self.itype is not None:
-            if self._indices_buffer is not None:
-                self._indices_buffer.delete()
-            self._indices_buffer = IndexBuffer(self._indices_list.data)
+            if self._indices_buffer is None:
+                self._indices_buffer = IndexBuffer()
+            self._upload(self._indices_buffer, self._indices_list, 'indices')
 
         if self.utype is not None:
-            if self._uniforms_texture is not None:
-                self._uniforms_texture.delete()
-
             # We take the whole array (_data), not the data one
             texture = self._uniforms_list._data.view(np.float32)
-            size = len(texture) / self._uniforms_float_count
+            size = len(texture) // self._uniforms_float_count
             shape = self._compute_texture_shape(size)
-
             # shape[2] = float count is only used in vertex shader code
             texture = texture.reshape(shape[0], shape[1], 4)
-            self._uniforms_texture = Texture2D(texture)
+
+            dirty = self._dirty['uniforms']
+            self._dirty['uniforms'] = None
+            if self._uniforms_texture is None or \
+                    self._uniforms_texture.shape[:2] != shape[:2]:
+                if self._uniforms_texture is None:
+                    self._uniforms_texture = Texture2D(
+                        texture, interpolation='nearest')
+                else:
+                    self._uniforms_texture.set_data(texture)
+                rebind = True
+            elif dirty is not None:
+                # Upload the whole rows of texels of the changed items
+                items_per_row = shape[1] // (shape[2] // 4)
+                start = dirty[0] // items_per_row
+                stop = (dirty[1] - 1) // items_per_row + 1
+                self._uniforms_texture.set_data(texture[start:stop],
+                                                offset=(start, 0))
             self._uniforms_texture.data = texture
-            self._uniforms_texture.interpolation = 'nearest'
 
-        if len(self._programs):
+        if rebind:
             for program in self._programs:
                 program.bind(self._vertices_buffer)
                 if self._uniforms_list is not None:
                     program["uniforms"] = self._uniforms_texture
                     program["uniforms_shape"] = self._ushape
+
+        self._need_update = False
+
+    def _upload(self, buffer, data, name):
+        """ Upload the changed elements of a list to its buffer. Return
+        whether the buffer was allocated again. """
+
+        dirty = self._dirty[name]
+        self._dirty[name] = None
+        data = data._data
+        if buffer.size != len(data):
+            buffer.set_data(data)
+            return True
+        if dirty is not None:
+            start, stop = dirty
+            buffer.set_subdata(data[start:stop], offset=start)
+        return False
+
+    def _draw_count(self):
+        """ Number of indices or vertices to draw """
+
+        if self._indices_list is not None:
+            return self._indices_list.size
+        return self._vertices_list.size
@@ -204,11 +204,13 @@ class Collection(BaseCollection):
 
         program = self._programs[0]
 
+        # Buffers may be larger than the data they hold
         mode = mode or self._mode
+        count = self._draw_count()
         if self._indices_list is not None:
-            program.draw(mode, self._indices_buffer)
+            program.draw(mode, self._indices_buffer, count=count)
         else:
-            program.draw(mode)
+            program.draw(mode, count=count)
 
 
 class CollectionView(object):
@@ -225,6 +227,11 @@ class CollectionView(object):
 #            program["viewport"] = viewport
 
         program.bind(collection._vertices_buffer)
+        # Updates of the collection only bind its texture again when it is
+        # reallocated
+        if collection._uniforms_texture is not None:
+            program["uniforms"] = collection._uniforms_texture
+            program["uniforms_shape"] = collection._ushape
         for name in collection._uniforms.keys():
             program[name] = collection._uniforms[name]
 
@@ -244,14 +251,12 @@ class CollectionView(object):
         collection = self._collection
         mode = collection._mode
 
+        # The collection binds its buffers and texture to all its programs
         if collection._need_update:
             collection._update()
-            # self._program.bind(self._vertices_buffer)
-            if collection._uniforms_list is not None:
-                program["uniforms"] = collection._uniforms_texture
-                program["uniforms_shape"] = collection._ushape
 
+        count = collection._draw_count()
         if collection._indices_list is not None:
-            program.draw(mode, collection._indices_buffer)
+            program.draw(mode, collection._indices_buffer, count=count)
         else:
-            program.draw(mode)
+            program.draw(mode, count=count)
@@ -4,30 +4,67 @@
 
 import struct
 
+import numpy as np
+
 from .base_filter import Filter
+from ..shaders import Function, Varying
+from ...gloo import VertexBuffer
+
+
+def _id_colors(ids):
+    """Return the RGBA colors that encode an array of IDs, as drawn by
+    the picking filter.
+    """
+    ids = np.ascontiguousarray(ids, dtype='<u4')
+    return ids.view(np.uint8).reshape(ids.shape + (4,)) / np.float32(255)
 
 
 class PickingFilter(Filter):
     """Filter used to color visuals by a picking ID.
 
+    Besides the ID of the visual, the filter can draw the ID of the element
+    (e.g. the marker or the mesh face) that each fragment belongs to, see
+    `element_ids`. Setting ``enabled = 'elements'`` draws these instead of
+    the ID of the visual.
+
     Note that the ID color uses the alpha channel, so this may not be used
     with blending enabled.
     """
+    VERT_SHADER = """
+        void picking_element() {
+            $v_element_color = $element_color;
+        }
+    """
+
     FRAG_SHADER = """
         void picking_filter() {
             if( $enabled == 0 )
                 return;
             if( gl_FragColor.a == 0.0 )
                 discard;
-            gl_FragColor = $id_color;
+            if( $enabled == 2 )
+                gl_FragColor = $element_color;
+            else
+                gl_FragColor = $id_color;
         }
     """
 
     def __init__(self, id_=None):
         super(PickingFilter, self).__init__(fcode=self.FRAG_SHADER, fpos=10)
 
+        # The vertex code is only added to the visuals when there are
+        # element IDs, as it needs an attribute for them
+        self._element_vshader = Function(self.VERT_SHADER)
+        self._element_vexpr = self._element_vshader()
+        self._element_varying = Varying('v_element_color', 'vec4')
+        self._element_vshader['v_element_color'] = self._element_varying
+        self._element_buffer = None
+        self._element_ids = None
+        self._visuals = []
+
         self.id = id_
         self.enabled = False
+        self.element_ids = None
 
     @property
     def id(self):
@@ -44,12 +81,59 @@ class PickingFilter(Filter):
 
     @property
     def enabled(self):
+        """ False, True to draw the ID of the visual, or 'elements' to draw
+        the IDs of its elements.
+        """
         return self._enabled
 
     @enabled.setter
     def enabled(self, e):
+        if e not in (False, True, 'elements'):
+            raise ValueError("enabled must be a bool or 'elements', not %r"
+                             % (e,))
         self._enabled = e
-        self.fshader['enabled'] = 1 if e is True else 0
+        self.fshader['enabled'] = 2 if e == 'elements' else int(e is True)
+
+    @property
+    def element_ids(self):
+        """ Array with the index of the element that each vertex of the
+        visual belongs to, in the order in which the vertices are drawn, or
+        None. For example ``np.arange(n)`` for the markers of a
+        ``MarkersVisual``, or ``np.repeat(np.arange(n), 3)`` for the faces
+        of a ``MeshVisual``, which draws three vertices per face.
+
+        In the 'elements' picking mode, fragments are drawn with the color
+        that encodes the index plus one, so that 0 means no element.
+        """
+        return self._element_ids
+
+    @element_ids.setter
+    def element_ids(self, ids):
+        if ids is None:
+            if self._element_ids is not None:
+                for visual in self._visuals:
+                    self._unhook_elements(visual)
+            self._element_ids = None
+            self._element_buffer = None
+            # Replace the varying by a uniform, not just its value
+            self.fshader['element_color'] = None
+            self.fshader['element_color'] = (0., 0., 0., 0.)
+            return
+
+        ids = np.asarray(ids)
+        if ids.ndim != 1 or (ids.size and ids.min() < 0):
+            raise ValueError('element IDs must be a 1D array of indices '
+                             '>= 0')
+        colors = _id_colors(ids + 1).astype(np.float32)
+        if self._element_buffer is None:
+            self._element_buffer = VertexBuffer(colors)
+            self._element_vshader['element_color'] = self._element_buffer
+            self.fshader['element_color'] = self._element_varying
+            for visual in self._visuals:
+                self._hook_elements(visual)
+        else:
+            self._element_buffer.set_data(colors)
+        self._element_ids = ids
 
     @property
     def color(self):
@@ -57,3 +141,23 @@ class PickingFilter(Filter):
         that use this filter.
         """
         return self._id_color
+
+    def _hook_elements(self, visual):
+        hook = visual._get_hook('vert', 'post')
+        hook.add(self._element_vexpr, position=10)
+
+    def _unhook_elements(self, visual):
+        hook = visual._get_hook('vert', 'post')
+        hook.remove(self._element_vexpr)
+
+    def _attach(self, visual):
+        super(PickingFilter, self)._attach(visual)
+        self._visuals.append(visual)
+        if self._element_ids is not None:
+            self._hook_elements(visual)
+
+    def _detach(self, visual):
+        super(PickingFilter, self)._detach(visual)
+        self._visuals.remove(visual)
+        if self._element_ids is not None:
+            self._unhook_elements(visual)
@@ -9,6 +9,12 @@ This module contains implementations for a force-directed layout, where the
 graph is modelled like a collection of springs or as a collection of
 particles attracting and repelling each other. The whole graph tries to
 reach a state which requires the minimum energy.
+
+The repulsion between all pairs of nodes is computed exactly for small
+graphs. For larger graphs it is approximated on a hierarchy of grids, in
+the manner of the Barnes-Hut algorithm: nodes in neighbouring cells repel
+each other directly, while cells further away act as a single particle at
+their center of mass. This takes O(N log N) time and O(N) memory.
 """
 
 import numpy as np
@@ -19,7 +25,8 @@ except ImportError:
     def issparse(*args, **kwargs):
         return False
 
-from ..util import _straight_line_vertices, _rescale_layout
+from ..util import (_straight_line_indices, _index_line_vertices,
+                    _rescale_layout)
 
 
 class fruchterman_reingold(object):
@@ -39,6 +46,12 @@ class fruchterman_reingold(object):
         Number of iterations to perform for layout calculation.
     pos : array
         Initial positions of the nodes
+    solver : str
+        How to compute the repulsion between the nodes. 'exact' considers
+        all pairs of nodes, which takes O(N^2) time and memory. 'grid'
+        approximates the repulsion of distant nodes on a hierarchy of
+        grids, which takes O(N log N) time. 'auto' (default) uses 'exact'
+        for graphs of up to 500 nodes.
 
     Notes
     -----
@@ -49,12 +62,16 @@ class fruchterman_reingold(object):
        1129-1164.
     """
 
-    def __init__(self, optimal=None, iterations=50, pos=None):
+    def __init__(self, optimal=None, iterations=50, pos=None, solver='auto'):
+        if solver not in ('auto', 'exact', 'grid'):
+            raise ValueError("solver must be 'auto', 'exact' or 'grid', "
+                             "not %r" % (solver,))
         self.dim = 2
         self.optimal = optimal
         self.iterations = iterations
         self.num_nodes = None
         self.pos = pos
+        self.solver = solver
 
     def __call__(self, adjacency_mat, directed=False):
         """
@@ -64,8 +81,9 @@ class fruchterman_reingold(object):
         positions for the nodes, together with the vertices for the edges
         and the arrows.
 
-        There are two solvers here: one specially adapted for SciPy sparse
-        matrices, and the other for larger networks.
+        Both dense arrays and SciPy sparse matrices are accepted; only the
+        edges of the graph are used to compute the attraction between
+        nodes, so a sparse matrix is never made dense.
 
         Parameters
         ----------
@@ -88,18 +106,29 @@ class fruchterman_reingold(object):
         self.num_nodes = adjacency_mat.shape[0]
 
         if issparse(adjacency_mat):
-            # Use the sparse solver
-            solver = self._sparse_fruchterman_reingold
+            adjacency_mat = adjacency_mat.tocoo()
+            edges = np.stack((adjacency_mat.row, adjacency_mat.col), -1)
+            weights = adjacency_mat.data.astype(np.float64)
         else:
-            solver = self._fruchterman_reingold
+            adjacency_mat = np.asarray(adjacency_mat)
+            edges = np.stack(np.nonzero(adjacency_mat), -1)
+            weights = adjacency_mat[edges[:, 0], edges[:, 1]].astype(
+                np.float64)
 
-        for result in solver(adjacency_mat, directed):
+        for result in self._fruchterman_reingold(adjacency_mat, edges,
+                                                 weights, directed):
             yield result
 
-    def _fruchterman_reingold(self, adjacency_mat, directed=False):
+    def _fruchterman_reingold(self, adjacency_mat, edges, weights,
+                              directed=False):
+        # Optimal distance between nodes
         if self.optimal is None:
             self.optimal = 1 / np.sqrt(self.num_nodes)
 
+        solver = self.solver
+        if solver == 'auto':
+            solver = 'exact' if self.num_nodes <= 500 else 'grid'
+
         if self.pos is None:
             # Random initial positions
             pos = np.asarray(
@@ -109,9 +138,11 @@ class fruchterman_reingold(object):
         else:
             pos = self.pos.astype(np.float32)
 
+        # The edges do not change, only the positions of their end points
+        line_indices = _straight_line_indices(adjacency_mat, directed)
+
         # Yield initial positions
-        line_vertices, arrows = _straight_line_vertices(adjacency_mat, pos,
-                                                        directed)
+        line_vertices, arrows = _index_line_vertices(line_indices, pos)
         yield pos, line_vertices, arrows
 
         # The initial "temperature"  is about .1 of domain area (=1x1)
@@ -122,12 +153,9 @@ class fruchterman_reingold(object):
         # Linearly step down by dt on each iteration so last iteration is
         # size dt.
         dt = t / float(self.iterations+1)
-        # The inscrutable (but fast) version
-        # This is still O(V^2)
-        # Could use multilevel methods to speed this up significantly
         for iteration in range(self.iterations):
-            delta_pos = _calculate_delta_pos(adjacency_mat, pos, t,
-                                             self.optimal)
+            delta_pos = _calculate_delta_pos(edges, weights, pos, t,
+                                             self.optimal, solver)
             pos += delta_pos
             _rescale_layout(pos)
 
@@ -135,78 +163,167 @@ class fruchterman_reingold(object):
             t -= dt
 
             # Calculate edge vertices and arrows
-            line_vertices, arrows = _straight_line_vertices(adjacency_mat,
-                                                            pos, directed)
+            line_vertices, arrows = _index_line_vertices(line_indices, pos)
 
             yield pos, line_vertices, arrows
 
-    def _sparse_fruchterman_reingold(self, adjacency_mat, directed=False):
-        # Optimal distance between nodes
-        if self.optimal is None:
-            self.optimal = 1 / np.sqrt(self.num_nodes)
 
-        # Change to list of list format
-        # Also construct the matrix in COO format for easy edge construction
-        adjacency_arr = adjacency_mat.toarray()
-        adjacency_coo = adjacency_mat.tocoo()
+def _calculate_delta_pos(edges, weights, pos, t, optimal, solver='exact'):
+    """Helper to calculate the delta position
 
-        if self.pos is None:
-            # Random initial positions
-            pos = np.asarray(
-                np.random.random((self.num_nodes, self.dim)),
-                dtype=np.float32
-            )
-        else:
-            pos = self.pos.astype(np.float32)
+    Parameters
+    ----------
+    edges : array
+        Array (M, 2) with the nodes of each edge.
+    weights : array
+        Array (M,) with the weight of each edge.
+    pos : array
+        Array (N, 2) with the positions of the nodes.
+    t : float
+        The largest step a node can take.
+    optimal : float
+        Optimal distance between nodes.
+    solver : str
+        Either 'exact' or 'grid', see `fruchterman_reingold`.
+    """
+    if solver == 'exact':
+        displacement = _exact_repulsion(pos, optimal)
+    else:
+        displacement = _grid_repulsion(pos, optimal)
+    displacement += _attraction(edges, weights, pos, optimal)
 
-        # Yield initial positions
-        line_vertices, arrows = _straight_line_vertices(adjacency_coo, pos,
-                                                        directed)
-        yield pos, line_vertices, arrows
+    length = np.sqrt((displacement**2).sum(axis=1))
+    length = np.where(length < 0.01, 0.1, length)
+    delta_pos = displacement * t / length[:, np.newaxis]
+    return delta_pos
 
-        # The initial "temperature"  is about .1 of domain area (=1x1)
-        # This is the largest step allowed in the dynamics.
-        t = 0.1
-        # Simple cooling scheme.
-        # Linearly step down by dt on each iteration so last iteration is
-        # size dt.
-        dt = t / float(self.iterations+1)
-        for iteration in range(self.iterations):
-            delta_pos = _calculate_delta_pos(adjacency_arr, pos, t,
-                                             self.optimal)
-            pos += delta_pos
-            _rescale_layout(pos)
 
-            # Cool temperature
-            t -= dt
+def _repulsion(delta, optimal, mass=1):
+    """The repulsion of particles with the given mass at offsets delta"""
+    distance2 = (delta*delta).sum(axis=-1)
+    # Enforce minimum distance of 0.01
+    distance2 = np.maximum(distance2, 0.0001)
+    return delta * ((optimal * optimal) * mass / distance2)[..., np.newaxis]
 
-            # Calculate line vertices
-            line_vertices, arrows = _straight_line_vertices(adjacency_coo,
-                                                            pos, directed)
 
-            yield pos, line_vertices, arrows
+def _attraction(edges, weights, pos, optimal):
+    """Helper to calculate the attraction along the edges of the graph"""
+    start, end = edges[:, 0], edges[:, 1]
+    delta = pos[start].astype(np.float64) - pos[end]
+    distance = np.sqrt(np.maximum((delta*delta).sum(axis=1), 0.0001))
+    force = delta * (-weights * distance / optimal)[:, np.newaxis]
+    return _sum_forces(start, force, len(pos))
 
 
-def _calculate_delta_pos(adjacency_arr, pos, t, optimal):
-    """Helper to calculate the delta position"""
-    # XXX eventually this should be refactored for the sparse case to only
-    # do the necessary pairwise distances
-    delta = pos[:, np.newaxis, :] - pos
+def _sum_forces(index, force, n):
+    """Sum the forces on each of n nodes"""
+    return np.stack([np.bincount(index, force[:, ii], minlength=n)
+                     for ii in range(force.shape[1])], -1)
 
-    # Distance between points
-    distance2 = (delta*delta).sum(axis=-1)
-    # Enforce minimum distance of 0.01
-    distance2 = np.where(distance2 < 0.0001, 0.0001, distance2)
-    distance = np.sqrt(distance2)
-    # Displacement "force"
-    displacement = np.zeros((len(delta), 2))
-    for ii in range(2):
-        displacement[:, ii] = (
-            delta[:, :, ii] *
-            ((optimal * optimal) / (distance*distance) -
-             (adjacency_arr * distance) / optimal)).sum(axis=1)
 
-    length = np.sqrt((displacement**2).sum(axis=1))
-    length = np.where(length < 0.01, 0.1, length)
-    delta_pos = displacement * t / length[:, np.newaxis]
-    return delta_pos
+def _exact_repulsion(pos, optimal):
+    """Helper to calculate the repulsion between all pairs of nodes"""
+    delta = pos[:, np.newaxis, :].astype(np.float64) - pos
+    return _repulsion(delta, optimal).sum(axis=1)
+
+
+def _grid_repulsion(pos, optimal, leaf_size=4, chunk_size=2**15,
+                    max_pairs=2**22):
+    """Helper to approximate the repulsion between all pairs of nodes
+
+    The nodes are binned on a hierarchy of square grids, each with twice
+    the resolution of the previous one. On each level, a node is repelled
+    by the cells that are not adjacent to its own cell, but whose parents
+    are adjacent to the parent of its cell. Each of these cells acts as a
+    single particle at the center of mass of its nodes. On the finest
+    level, which holds about ``leaf_size`` nodes per cell, the nodes in
+    adjacent cells repel each other directly.
+
+    The far field is computed for ``chunk_size`` nodes at a time, and the
+    pairs of nodes in adjacent cells in batches of at most ``max_pairs``,
+    to bound the memory used for large graphs and dense clusters.
+    """
+    n = len(pos)
+    pos = pos.astype(np.float64)
+    depth = max(int(np.ceil(np.log2(np.sqrt(n / leaf_size)))), 1)
+    side = 2 ** depth
+    origin = pos.min(axis=0)
+    extent = max((pos.max(axis=0) - origin).max(), 1e-12)
+    cell = ((pos - origin) * (side / extent)).astype(np.intp)
+    np.minimum(cell, side - 1, out=cell)
+
+    displacement = np.zeros_like(pos)
+
+    # The children of the neighbours of the parent cell are at offsets
+    # 0 to 5 from the first of them. Of these, the cells that are not
+    # adjacent to the cell of a node depend on which child of its parent
+    # that cell is.
+    offsets = np.mgrid[:6, :6].reshape(2, -1).T
+    far_offsets = {}
+    for child in np.ndindex(2, 2):
+        far = (np.abs(offsets - 2 - np.array(child)) > 1).any(axis=1)
+        far_offsets[child] = offsets[far].T
+
+    # Far field, from the coarsest level with cells that are not adjacent
+    for level in range(2, depth + 1):
+        size = 2 ** level
+        level_cell = cell >> (depth - level)
+        # pad the grid by two empty cells on each side, so that offsets
+        # past the edges need no special treatment
+        flat = (level_cell[:, 0] + 2) * (size + 4) + level_cell[:, 1] + 2
+        mass = np.bincount(flat, minlength=(size + 4) ** 2)
+        center = _sum_forces(flat, pos, (size + 4) ** 2)
+        center /= np.maximum(mass, 1)[:, np.newaxis]
+        mass = mass * (optimal * optimal)
+        center_x, center_y = center.T
+        # in the padded grid, the offsets start at the parent cell
+        first = level_cell >> 1 << 1
+        child = level_cell & 1
+        for (cx, cy), (dx, dy) in far_offsets.items():
+            nodes = np.nonzero((child[:, 0] == cx) & (child[:, 1] == cy))[0]
+            for batch in range(0, len(nodes), chunk_size):
+                index = nodes[batch:batch + chunk_size]
+                other = ((first[index, 0, np.newaxis] + dx) * (size + 4) +
+                         first[index, 1, np.newaxis] + dy)
+                # same as _repulsion, but per component, which is faster
+                # for these large arrays
+                delta_x = pos[index, 0, np.newaxis] - center_x[other]
+                delta_y = pos[index, 1, np.newaxis] - center_y[other]
+                distance2 = delta_x * delta_x
+                distance2 += delta_y * delta_y
+                np.maximum(distance2, 0.0001, out=distance2)
+                weight = mass[other] / distance2
+                displacement[index, 0] += (delta_x * weight).sum(axis=1)
+                displacement[index, 1] += (delta_y * weight).sum(axis=1)
+
+    # Near field, between the nodes in adjacent cells of the finest level
+    flat = cell[:, 0] * side + cell[:, 1]
+    order = np.argsort(flat, kind='stable')
+    counts = np.bincount(flat, minlength=side * side)
+    starts = np.cumsum(counts) - counts
+    for dx in (-1, 0, 1):
+        x = cell[:, 0] + dx
+        for dy in (-1, 0, 1):
+            y = cell[:, 1] + dy
+            index = np.nonzero((x >= 0) & (x < side) &
+                               (y >= 0) & (y < side))[0]
+            other = x[index] * side + y[index]
+            # split the nodes in batches with a bounded number of pairs
+            n_pairs = np.cumsum(counts[other])
+            bounds = np.searchsorted(
+                n_pairs, np.arange(max_pairs, n_pairs[-1] if len(n_pairs)
+                                   else 0, max_pairs), side='right')
+            for batch in np.split(np.arange(len(index)), bounds):
+                if len(batch) == 0:
+                    continue
+                count = counts[other[batch]]
+                node = np.repeat(index[batch], count)
+                # position of each pair within its group of pairs
+                offset = np.arange(len(node)) - np.repeat(
+                    np.cumsum(count) - count, count)
+                neighbor = order[np.repeat(starts[other[batch]], count) +
+                                 offset]
+                force = _repulsion(pos[node] - pos[neighbor], optimal)
+                displacement += _sum_forces(node, force, n)
+
+    return displacement
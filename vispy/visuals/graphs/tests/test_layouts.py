@@ -6,7 +6,8 @@ import numpy as np
 from numpy.testing import assert_allclose, assert_equal
 
 from vispy.visuals.graphs.layouts import get_layout
-from vispy.testing import (run_tests_if_main, assert_raises)
+from vispy.testing import (run_tests_if_main, assert_raises,
+                           requires_scipy)
 
 
 adjacency_mat = np.array([
@@ -136,4 +137,57 @@ def test_circular_layout():
     assert_allclose(line_vertices, expected_vertices, atol=1e-4)
 
 
+def _last_layout(solver, mat):
+    """Return the final node positions of a force directed layout"""
+    pos = np.arange(20.).reshape(10, 2) ** 2
+    layout = get_layout('force_directed', iterations=5, solver=solver,
+                        pos=pos)
+    return list(layout(mat))[-1][0].copy()
+
+
+def test_force_directed_layout():
+    from vispy.visuals.graphs.layouts.force_directed import (
+        _exact_repulsion, _grid_repulsion)
+
+    assert_raises(ValueError, get_layout, 'force_directed', solver='foo')
+
+    # The edges follow the nodes on every iteration
+    for solver in ('exact', 'grid'):
+        layout = get_layout('force_directed', iterations=5, solver=solver)
+        n_results = 0
+        for pos, line_vertices, arrows in layout(adjacency_mat,
+                                                 directed=True):
+            assert_equal(pos.shape, (10, 2))
+            assert_allclose(line_vertices[::2], pos[[0, 1, 1, 1, 1, 3, 4, 6,
+                                                     7, 8, 8, 9]])
+            assert_equal(arrows.shape, (12, 4))
+            n_results += 1
+        assert_equal(n_results, 6)
+
+        # Boolean adjacency matrices give the same layout
+        assert_allclose(_last_layout(solver, adjacency_mat > 0),
+                        _last_layout(solver, adjacency_mat))
+
+    # The grid approximates the repulsion between all nodes, and is
+    # exact for nodes which are all in adjacent cells
+    rng = np.random.RandomState(0)
+    pos = rng.rand(1000, 2)
+    pos[:500] *= 0.1
+    exact = _exact_repulsion(pos, 0.03)
+    grid = _grid_repulsion(pos, 0.03)
+    error = np.linalg.norm(grid - exact, axis=1)
+    assert np.median(error / np.linalg.norm(exact, axis=1)) < 0.01
+    assert_allclose(_grid_repulsion(pos[:10], 0.03),
+                    _exact_repulsion(pos[:10], 0.03))
+
+
+@requires_scipy()
+def test_force_directed_layout_sparse():
+    from scipy.sparse import coo_matrix
+
+    for solver in ('exact', 'grid'):
+        assert_allclose(_last_layout(solver, coo_matrix(adjacency_mat > 0)),
+                        _last_layout(solver, adjacency_mat))
+
+
 run_tests_if_main()
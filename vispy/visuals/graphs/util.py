@@ -74,7 +74,32 @@ def _straight_line_vertices(adjacency_mat, node_coords, directed=False):
         Returns a tuple containing containing (`line_vertices`,
         `arrow_vertices`)
     """
+    indices = _straight_line_indices(adjacency_mat, directed)
+    return _index_line_vertices(indices, node_coords)
 
+
+def _straight_line_indices(adjacency_mat, directed=False):
+    """
+    Get the node indices of the vertices of straight lines between nodes.
+
+    These only depend on the graph, so layouts which move the nodes
+    repeatedly can compute them once and pass them to
+    `_index_line_vertices` for each new set of node coordinates.
+
+    Parameters
+    ----------
+    adjacency_mat : array
+        The adjacency matrix of the graph
+    directed : bool
+        Wether the graph is directed. If this is true it will also get
+        the indices for the arrows.
+
+    Returns
+    -------
+    indices : tuple
+        Returns a tuple containing (`line_indices`, `arrow_indices`), where
+        `arrow_indices` is None if the graph is not directed.
+    """
     if not issparse(adjacency_mat):
         adjacency_mat = np.asarray(adjacency_mat, float)
 
@@ -82,15 +107,25 @@ def _straight_line_vertices(adjacency_mat, node_coords, directed=False):
             adjacency_mat.shape[1]):
         raise ValueError("Adjacency matrix should be square.")
 
-    arrow_vertices = np.array([])
+    line_indices = _get_edges(adjacency_mat).ravel()
+    arrow_indices = None
+    if directed:
+        arrow_indices = _get_directed_edges(adjacency_mat).ravel()
 
-    edges = _get_edges(adjacency_mat)
-    line_vertices = node_coords[edges.ravel()]
+    return line_indices, arrow_indices
 
-    if directed:
-        arrows = np.array(list(_get_directed_edges(adjacency_mat)))
-        arrow_vertices = node_coords[arrows.ravel()]
-        arrow_vertices = arrow_vertices.reshape((len(arrow_vertices)/2, 4))
+
+def _index_line_vertices(indices, node_coords):
+    """
+    Generate the vertices for straight lines from the indices returned by
+    `_straight_line_indices`.
+    """
+    line_indices, arrow_indices = indices
+    line_vertices = node_coords[line_indices]
+
+    arrow_vertices = np.array([])
+    if arrow_indices is not None:
+        arrow_vertices = node_coords[arrow_indices].reshape((-1, 4))
 
     return line_vertices, arrow_vertices
 
@@ -272,6 +272,7 @@ class ImageVisual(Visual):
         data = np.asarray(image)
         if self._data is None or self._data.shape != data.shape:
             self._need_vertex_update = True
+            self._bounds_changed()
         self._data = data
         self._need_texture_upload = True
 
@@ -306,7 +307,7 @@ class ImageVisual(Visual):
             ):
                 self._need_texture_upload = True
         self._clim = clim
-        if self._texture_limits is not None:
+        if self._texture_limits is not None and not isinstance(clim, str):
             self.shared_program.frag['color_transform'][1]['clim'] = self.clim_normalized
         self.update()
 
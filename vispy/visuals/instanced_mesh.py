@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""A mesh that is drawn many times with a different transform and color."""
+
+from __future__ import division
+
+import numpy as np
+
+from .mesh import MeshVisual, vec3to4, _null_color_transform
+from .shaders import Function, Variable
+from ..gloo import VertexBuffer
+from ..gloo.context import get_current_canvas
+
+
+# Map a vertex with the (row-vector) matrix of its instance; see
+# MatrixTransform for the convention
+_instance_position = """
+vec4 instance_position(vec3 xyz) {
+    return xyz.x * $row0 + xyz.y * $row1 + xyz.z * $row2 + $row3;
+}
+"""
+
+# Map a normal with the inverse transpose of the upper 3x3 matrix of its
+# instance, so that it stays normal under non-uniform scaling and shear
+_instance_normal = """
+vec3 instance_normal(vec3 normal) {
+    return normalize(normal.x * $row0 + normal.y * $row1 + normal.z * $row2);
+}
+"""
+
+
+def _normal_matrices(transforms):
+    """Return the (N, 3, 3) matrices that map the normals of instances with
+    the given (N, 4, 4) transforms
+    """
+    # pinv also gives a result for instances that are scaled to zero
+    return np.linalg.pinv(transforms[:, :3, :3]).transpose(0, 2, 1).astype(
+        np.float32)
+
+
+def _instancing_supported():
+    """Whether the GLIR parser of the current canvas can draw instances"""
+    canvas = get_current_canvas()
+    if canvas is None:
+        return False
+    parser = canvas.context.shared.parser
+    return parser is not None and \
+        bool(parser.capabilities.get('instanced_arrays', False))
+
+
+class InstancedMeshVisual(MeshVisual):
+    """Mesh visual that is drawn once for each of a number of transforms
+
+    All instances are drawn in a single instanced draw call. When the
+    OpenGL context does not support instancing (e.g. on ES 2.0 and with
+    the default gl2 backend), the instances are expanded into one mesh
+    on the CPU instead.
+
+    Parameters
+    ----------
+    vertices : array-like | None
+        The vertices.
+    faces : array-like | None
+        The faces.
+    instance_transforms : array-like | None
+        Array of shape (N, 4, 4) with the matrix that maps the mesh for
+        each instance, using the same convention as ``MatrixTransform``.
+        Default is a single instance with the identity transform.
+    instance_colors : array-like | None
+        Array of shape (N, 4) with the color of each instance. If given,
+        it is used instead of the colors of the mesh.
+    **kwargs : dict
+        Keyword arguments to pass to `MeshVisual`.
+    """
+    def __init__(self, vertices=None, faces=None, instance_transforms=None,
+                 instance_colors=None, **kwargs):
+        self._instance_transforms = np.eye(4, dtype=np.float32)[np.newaxis]
+        self._instance_colors = None
+        self._instance_rows = [VertexBuffer(divisor=1) for _ in range(4)]
+        self._instance_normal_rows = [VertexBuffer(divisor=1)
+                                      for _ in range(3)]
+        self._instance_color_vbo = VertexBuffer(divisor=1)
+        self._instanced = None  # whether the GPU path is used
+        self._instances_changed = True
+
+        # Positions and normals are mapped with per-instance attributes
+        rows = [Variable('attribute vec4 instance_row%d' % i)
+                for i in range(4)]
+        normal_rows = [Variable('attribute vec3 instance_normal_row%d' % i)
+                       for i in range(3)]
+        self._position_fun = Function(_instance_position)
+        self._normal_fun = Function(_instance_normal)
+        for i, row in enumerate(rows):
+            self._position_fun['row%d' % i] = row
+        for i, row in enumerate(normal_rows):
+            self._normal_fun['row%d' % i] = row
+        self._row_vars = rows
+        self._normal_row_vars = normal_rows
+
+        MeshVisual.__init__(self, vertices=vertices, faces=faces, **kwargs)
+        self.unfreeze()
+        self.set_instances(instance_transforms, instance_colors)
+        self.freeze()
+
+    def set_instances(self, transforms=None, colors=None):
+        """Set the transforms and colors of the instances
+
+        Parameters
+        ----------
+        transforms : array-like | None
+            Array of shape (N, 4, 4) with the matrix of each instance.
+            If None, the current transforms are kept.
+        colors : array-like | None
+            Array of shape (N, 4) with the color of each instance. If None,
+            the current colors are kept if their number still matches.
+        """
+        if transforms is not None:
+            transforms = np.array(transforms, dtype=np.float32)
+            if transforms.ndim != 3 or transforms.shape[1:] != (4, 4):
+                raise ValueError('instance transforms must have shape '
+                                 '(N, 4, 4), not %s' % (transforms.shape,))
+            self._instance_transforms = transforms
+        n = len(self._instance_transforms)
+        if colors is not None:
+            colors = np.array(colors, dtype=np.float32)
+            if colors.shape != (n, 4):
+                raise ValueError('instance colors must have shape (%d, 4), '
+                                 'not %s' % (n, colors.shape))
+            if self._instance_colors is None:
+                # Switch from the colors of the mesh
+                self._data_changed = True
+            self._instance_colors = colors
+        elif self._instance_colors is not None and \
+                len(self._instance_colors) != n:
+            self._instance_colors = None
+            # Go back to the colors of the mesh
+            self._data_changed = True
+        self._instances_changed = True
+        self._bounds_changed()
+        self.update()
+
+    @property
+    def instance_transforms(self):
+        """The (N, 4, 4) array of instance transforms"""
+        return self._instance_transforms
+
+    @instance_transforms.setter
+    def instance_transforms(self, transforms):
+        self.set_instances(transforms=transforms)
+
+    @property
+    def instance_colors(self):
+        """The (N, 4) array of instance colors, or None"""
+        return self._instance_colors
+
+    @instance_colors.setter
+    def instance_colors(self, colors):
+        self.set_instances(colors=colors)
+
+    def mesh_data_changed(self):
+        self._instances_changed = True
+        MeshVisual.mesh_data_changed(self)
+
+    def _prepare_draw(self, view):
+        if len(self._instance_transforms) == 0:
+            return False
+        instanced = _instancing_supported()
+        if instanced != self._instanced:
+            self._instanced = instanced
+            self._data_changed = True
+        rebind = self._data_changed
+        if rebind:
+            if MeshVisual._update_data(self) is False:
+                return False
+            self._data_changed = False
+            self._instances_changed = True
+        if self._instances_changed:
+            if self._instanced:
+                self._update_instances(rebind)
+            else:
+                self._expand_instances()
+            self._instances_changed = False
+
+    def _update_instances(self, rebind):
+        """Upload the per-instance data for instanced drawing. The shader
+        only needs to be modified after the mesh data was set again.
+        """
+        transforms = self._instance_transforms
+        for i, (row, var) in enumerate(zip(self._instance_rows,
+                                           self._row_vars)):
+            row.set_data(np.ascontiguousarray(transforms[:, i]))
+            var.value = row
+        if self.shading is not None and self._normals.size > 0:
+            matrices = _normal_matrices(transforms)
+            for i, (row, var) in enumerate(zip(self._instance_normal_rows,
+                                               self._normal_row_vars)):
+                row.set_data(np.ascontiguousarray(matrices[:, i]))
+                var.value = row
+        if self._instance_colors is not None:
+            self._instance_color_vbo.set_data(self._instance_colors)
+        if not rebind:
+            return
+        vert = self.shared_program.vert
+        vert['to_vec4'] = self._position_fun
+        if self.shading is not None and self._normals.size > 0:
+            # Replace the attribute by an expression, not just its value
+            vert['normal'] = None
+            vert['normal'] = self._normal_fun(self._normals)
+        if self._instance_colors is not None:
+            vert['color_transform'] = Function(_null_color_transform)
+            vert['base_color'] = None
+            vert['base_color'] = self._instance_color_vbo
+
+    def _expand_instances(self):
+        """Replace the mesh buffers with all instances merged into one"""
+        md = self.mesh_data
+        transforms = self._instance_transforms
+        n = len(transforms)
+        v = md.get_vertices(indexed='faces').astype(np.float32)
+        v = v.reshape(-1, v.shape[-1])
+        if v.shape[-1] == 2:
+            v = np.concatenate((v, np.zeros((len(v), 1), np.float32)), -1)
+        v = np.concatenate((v, np.ones((len(v), 1), np.float32)), -1)
+        pos = np.matmul(v, transforms)
+        pos = pos[..., :3] / pos[..., 3:]
+        self._vertices.set_data(pos.reshape(-1, 3))
+        vert = self.shared_program.vert
+        vert['to_vec4'] = vec3to4
+        if self.shading is not None and self._normals.size > 0:
+            if self.shading == 'smooth':
+                normals = md.get_vertex_normals(indexed='faces')
+            else:
+                normals = md.get_face_normals(indexed='faces')
+            normals = np.matmul(normals.reshape(-1, 3).astype(np.float32),
+                                _normal_matrices(transforms))
+            length = np.sqrt((normals ** 2).sum(axis=-1, keepdims=True))
+            normals /= np.maximum(length, 1e-20)
+            self._normals.set_data(normals.reshape(-1, 3))
+        if self._instance_colors is not None:
+            colors = np.repeat(self._instance_colors, len(v), axis=0)
+            vert['color_transform'] = Function(_null_color_transform)
+            vert['base_color'] = VertexBuffer(colors)
+        else:
+            colors = self._get_colors(md)
+            if colors.ndim > 1:
+                colors = colors.reshape(-1, colors.shape[-1])
+                vert['base_color'] = VertexBuffer(np.tile(colors, (n, 1)))
+
+    def _compute_bounds(self, axis, view):
+        if self._bounds is None or axis > 2:
+            return None
+        bounds = list(self._bounds) + [(0, 0)] * (3 - len(self._bounds))
+        # Map the corners of the mesh bounds with all transforms
+        corners = np.array(np.meshgrid(*bounds)).reshape(3, -1).T
+        corners = np.concatenate((corners, np.ones((8, 1))), axis=1)
+        mapped = np.matmul(corners, self._instance_transforms)
+        mapped = mapped[..., axis] / mapped[..., 3]
+        return mapped.min(), mapped.max()
@@ -9,7 +9,7 @@ import numpy as np
 from .line import LineVisual
 from ..color import ColorArray
 from ..color.colormap import _normalize, get_colormap
-from ..geometry.isocurve import isocurve
+from ..geometry.isocurve import isocurves
 
 
 class IsocurveVisual(LineVisual):
@@ -33,6 +33,8 @@ class IsocurveVisual(LineVisual):
 
     Notes
     -----
+    The isocurve of each level is kept until the data is set again, so that
+    changing the levels only computes the isocurves at the new levels.
     """
     def __init__(self, data=None, levels=None, color_lev=None, clim=None,
                  **kwargs):
@@ -50,6 +52,7 @@ class IsocurveVisual(LineVisual):
         self._li = None
         self._connect = None
         self._verts = None
+        self._level_cache = {}
         kwargs['method'] = 'gl'
         kwargs['antialias'] = False
         LineVisual.__init__(self, **kwargs)
@@ -103,6 +106,7 @@ class IsocurveVisual(LineVisual):
         else:
             self._data_is_uniform = True
 
+        self._level_cache = {}
         self._need_recompute = True
         self.update()
 
@@ -137,24 +141,31 @@ class IsocurveVisual(LineVisual):
         except ImportError:
             find_contours = None
 
-        for level in levels_to_calc:
-            # if we use skimage isoline algorithm we need to add half a
-            # pixel in both (x,y) dimensions because isolines are aligned to
-            # pixel centers
-            if find_contours is not None:
+        # only compute the levels that are not cached yet
+        cache = self._level_cache
+        new_levels = [level for level in levels_to_calc if level not in cache]
+        if find_contours is not None:
+            for level in new_levels:
+                # if we use skimage isoline algorithm we need to add half a
+                # pixel in both (x,y) dimensions because isolines are aligned
+                # to pixel centers
                 contours = find_contours(self._data, level,
                                          positive_orientation='high')
                 v, c = self._get_verts_and_connect(contours)
                 # swap row, column to column, row (x, y)
                 v[:, [0, 1]] = v[:, [1, 0]]
                 v += np.array([0.5, 0.5])
-            else:
-                paths = isocurve(self._data.astype(float).T, level,
-                                 extend_to_edge=True, connected=True)
-                v, c = self._get_verts_and_connect(paths)
+                cache[level] = (v, np.hstack((c, [False])))
+        elif new_levels:
+            curves = isocurves(self._data.T, new_levels, extend_to_edge=True)
+            cache.update(zip(new_levels, curves))
+        # forget the levels that were removed
+        self._level_cache = {level: cache[level] for level in levels_to_calc}
 
+        for level in levels_to_calc:
+            v, c = cache[level]
             level_index.append(v.shape[0])
-            connects.append(np.hstack((c, [False])))
+            connects.append(c)
             verts.append(v)
 
         self._li = np.hstack(level_index)
@@ -5,7 +5,7 @@
 from __future__ import division
 
 from .mesh import MeshVisual
-from ..geometry.isosurface import isosurface
+from ..geometry.isosurface import isosurface, IsosurfaceCache
 from ..color import Color
 
 
@@ -24,12 +24,24 @@ class IsosurfaceVisual(MeshVisual):
         The face colors to use.
     color : ndarray | None
         The color to use.
+    chunk_size : int | None
+        Number of cells along the first axis of *data* that are processed
+        at once (see `vispy.geometry.isosurface.isosurface`). The results
+        are cached per chunk, so that changing the level or modifying part
+        of the data only processes the chunks that are affected. If None,
+        the whole volume is processed at once.
+    n_jobs : int
+        Number of threads that process chunks in parallel.
     **kwargs : dict
         Keyword arguments to pass to the mesh construction.
     """
     def __init__(self, data=None, level=None, vertex_colors=None,
-                 face_colors=None, color=(0.5, 0.5, 1, 1), **kwargs):
+                 face_colors=None, color=(0.5, 0.5, 1, 1), chunk_size=32,
+                 n_jobs=1, **kwargs):
         self._data = None
+        self._chunk_size = chunk_size
+        self._n_jobs = n_jobs
+        self._cache = IsosurfaceCache()
         self._level = level
         self._vertex_colors = vertex_colors
         self._face_colors = face_colors
@@ -79,6 +91,7 @@ class IsosurfaceVisual(MeshVisual):
         # We only change the internal variables if they are provided
         if data is not None:
             self._data = data
+            self._cache.clear()
             self._recompute = True
         if vertex_colors is not None:
             self._vertex_colors = vertex_colors
@@ -91,14 +104,32 @@ class IsosurfaceVisual(MeshVisual):
             self._update_meshvisual = True
         self.update()
 
+    def data_changed(self, region=None):
+        """Notify that the data was modified in place
+
+        Parameters
+        ----------
+        region : tuple of slice | None
+            The part of the data that was modified. If None, all data is
+            processed again.
+        """
+        if region is None:
+            self._cache.clear()
+        else:
+            start, stop, _ = region[0].indices(self._data.shape[0])
+            self._cache.invalidate(start, stop)
+        self._recompute = True
+        self.update()
+
     def _prepare_draw(self, view):
 
         if self._data is None or self._level is None:
             return False
 
         if self._recompute:
-            self._vertices_cache, self._faces_cache = isosurface(self._data,
-                                                                 self._level)
+            self._vertices_cache, self._faces_cache = isosurface(
+                self._data, self._level, chunk_size=self._chunk_size,
+                n_jobs=self._n_jobs, cache=self._cache)
             self._recompute = False
             self._update_meshvisual = True
 
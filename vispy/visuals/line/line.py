@@ -94,6 +94,13 @@ class LineVisual(CompoundVisual):
 
         self._changed = {'pos': False, 'color': False, 'width': False,
                          'connect': False}
+        # Row ranges that changed since the last draw, for partial uploads
+        self._dirty_ranges = {'pos': [], 'color': []}
+        # Write position when the data is used as a ring buffer
+        self._ring_head = None
+        # Whether _pos and _color are copies that we can write into
+        self._pos_owned = False
+        self._color_owned = False
 
         self._pos = None
         self._color = None
@@ -173,12 +180,16 @@ class LineVisual(CompoundVisual):
         """
         if pos is not None:
             self._bounds = None
+            self._bounds_changed()
             self._pos = pos
             self._changed['pos'] = True
+            self._pos_owned = False
+            self._ring_head = None
 
         if color is not None:
             self._color = color
             self._changed['color'] = True
+            self._color_owned = False
 
         if width is not None:
             self._width = width
@@ -190,6 +201,108 @@ class LineVisual(CompoundVisual):
 
         self.update()
 
+    def update_range(self, offset, pos=None, color=None):
+        """Replace a range of vertices, uploading only the changed rows.
+
+        Parameters
+        ----------
+        offset : int
+            Index of the first vertex to replace.
+        pos : array | None
+            Array of shape (n, 2) or (n, 3) with the new vertex coordinates.
+            The last dimension must match that of the current data.
+        color : array | None
+            Array of shape (n, 4) with the new vertex colors. Only allowed
+            if the line was given one color per vertex.
+
+        Notes
+        -----
+        The number of vertices cannot change; use ``set_data`` for that.
+        With ``method='agg'`` the line geometry is derived from all
+        vertices, so the whole line is rebuilt.
+        """
+        lengths = set(len(x) for x in (pos, color) if x is not None)
+        if len(lengths) != 1:
+            raise ValueError('pos and/or color must be given with the same '
+                             'number of vertices')
+        n = lengths.pop()
+        size = len(self._own_pos())
+        if offset < 0 or offset + n > size:
+            raise ValueError('Range [%d, %d) is out of bounds for %d vertices'
+                             % (offset, offset + n, size))
+        self._write_range(offset, pos, color)
+        self.update()
+
+    def append(self, pos, color=None):
+        """Append vertices, replacing the oldest ones.
+
+        The current data is used as a ring buffer with a fixed number of
+        vertices (as given to ``set_data``). New vertices are written after
+        the most recently appended vertex, wrapping around at the end, and
+        only the written rows are uploaded. For lines with ``connect='strip'``
+        the newest and oldest vertex are not connected.
+
+        Parameters
+        ----------
+        pos : array
+            Array of shape (n, 2) or (n, 3) with the vertex coordinates.
+        color : array | None
+            Array of shape (n, 4) with the vertex colors. Only allowed if
+            the line was given one color per vertex.
+        """
+        pos = np.asarray(pos)
+        color = None if color is None else np.asarray(color)
+        size = len(self._own_pos())
+        if len(pos) > size:
+            pos = pos[-size:]
+            color = None if color is None else color[-size:]
+        head = self._ring_head or 0
+        # Write in at most two parts: up to the end, then from the start
+        first = min(len(pos), size - head)
+        for start, stop, offset in ((0, first, head),
+                                    (first, len(pos), 0)):
+            if stop > start:
+                self._write_range(
+                    offset, pos[start:stop],
+                    None if color is None else color[start:stop])
+        self._ring_head = (head + len(pos)) % size
+        self.update()
+
+    def _own_pos(self):
+        # Make sure that we can write into the position array without
+        # modifying the array given by the user.
+        if self._pos is None:
+            raise ValueError('No vertex data has been set')
+        if not self._pos_owned:
+            self._pos = np.array(self._pos, dtype=np.float32)
+            self._pos_owned = True
+        return self._pos
+
+    def _own_color(self):
+        # Same for the color array; it must have one color per vertex
+        if not self._color_owned:
+            color = self._color
+            if isinstance(color, (str, Function)) or \
+                    ColorArray(color).rgba.shape[0] != len(self._own_pos()):
+                raise ValueError('Can only update the colors of a line '
+                                 'that has one color per vertex')
+            self._color = ColorArray(color).rgba
+            self._color_owned = True
+        return self._color
+
+    def _write_range(self, offset, pos=None, color=None):
+        # Write rows into the CPU-side arrays and mark them for upload
+        if pos is not None:
+            rows = self._own_pos()[offset:offset + len(pos)]
+            rows[:, :] = pos
+            self._dirty_ranges['pos'].append((offset, offset + len(pos)))
+            self._bounds = None
+            self._bounds_changed()
+        if color is not None:
+            rows = self._own_color()[offset:offset + len(color)]
+            rows[:, :] = ColorArray(color).rgba
+            self._dirty_ranges['color'].append((offset, offset + len(color)))
+
     @property
     def color(self):
         return self._color
@@ -295,6 +408,10 @@ class _GLLineVisual(Visual):
         self._color_vbo = gloo.VertexBuffer()
         self._connect_ibo = gloo.IndexBuffer()
         self._connect = None
+        # Segments of a 'strip' line used as ring buffer; the segment that
+        # connects the newest to the oldest vertex is made degenerate
+        self._ring_ibo = gloo.IndexBuffer()
+        self._ring_seam = None
 
         Visual.__init__(self, vcode=self.VERTEX_SHADER,
                         fcode=self.FRAGMENT_SHADER)
@@ -306,12 +423,13 @@ class _GLLineVisual(Visual):
 
     def _prepare_draw(self, view):
         prof = Profiler()
+        changed = self._parent._changed
+        dirty_ranges = self._parent._dirty_ranges
 
-        if self._parent._changed['pos']:
+        if changed['pos']:
             if self._parent._pos is None:
                 return False
-            # todo: does this result in unnecessary copies?
-            pos = np.ascontiguousarray(self._parent._pos.astype(np.float32))
+            pos = np.ascontiguousarray(self._parent._pos, dtype=np.float32)
             self._pos_vbo.set_data(pos)
             self._program.vert['position'] = self._pos_vbo
             if pos.shape[-1] == 2:
@@ -321,8 +439,14 @@ class _GLLineVisual(Visual):
             else:
                 raise TypeError("Got bad position array shape: %r"
                                 % (pos.shape,))
-
-        if self._parent._changed['color']:
+            changed['pos'] = False
+        elif dirty_ranges['pos']:
+            pos = self._parent._pos
+            for start, stop in dirty_ranges['pos']:
+                self._pos_vbo.set_subdata(pos[start:stop], offset=start)
+        del dirty_ranges['pos'][:]
+
+        if changed['color']:
             color, cmap = self._parent._interpret_color()
             # If color is not visible, just quit now
             if isinstance(color, Color) and color.is_blank:
@@ -340,6 +464,12 @@ class _GLLineVisual(Visual):
 
             self.shared_program['texture2D_LUT'] = cmap.texture_lut() \
                 if (hasattr(cmap, 'texture_lut')) else None
+            changed['color'] = False
+        elif dirty_ranges['color']:
+            color = self._parent._color
+            for start, stop in dirty_ranges['color']:
+                self._color_vbo.set_subdata(color[start:stop], offset=start)
+        del dirty_ranges['color'][:]
 
         # Do we want to use OpenGL, and can we?
         GL = None
@@ -361,10 +491,11 @@ class _GLLineVisual(Visual):
             width = px_scale * self._parent._width
             GL.glLineWidth(max(width, 1.))
 
-        if self._parent._changed['connect']:
+        if changed['connect']:
             self._connect = self._parent._interpret_connect()
             if isinstance(self._connect, np.ndarray):
                 self._connect_ibo.set_data(self._connect)
+            changed['connect'] = False
         if self._connect is None:
             return False
 
@@ -372,6 +503,11 @@ class _GLLineVisual(Visual):
 
         # Draw
         if isinstance(self._connect, str) and \
+                self._connect == 'strip' and \
+                self._parent._ring_head is not None:
+            self._draw_mode = 'lines'
+            self._index_buffer = self._update_ring_ibo()
+        elif isinstance(self._connect, str) and \
                 self._connect == 'strip':
             self._draw_mode = 'line_strip'
             self._index_buffer = None
@@ -387,6 +523,27 @@ class _GLLineVisual(Visual):
 
         prof('draw')
 
+    def _update_ring_ibo(self):
+        """Index buffer with the segments of a strip used as ring buffer.
+        Moving the seam only requires updating two segments.
+        """
+        n = len(self._parent._pos)
+        seam = (self._parent._ring_head - 1) % n
+        if self._ring_seam is None or self._ring_ibo.size != 2 * n:
+            index = np.empty((n, 2), np.uint32)
+            index[:, 0] = np.arange(n)
+            index[:, 1] = np.roll(index[:, 0], -1)
+            index[seam, 1] = seam
+            self._ring_ibo.set_data(index)
+        elif seam != self._ring_seam:
+            old = self._ring_seam
+            self._ring_ibo.set_subdata(
+                np.array([old, (old + 1) % n], np.uint32), offset=2 * old)
+            self._ring_ibo.set_subdata(
+                np.array([seam, seam], np.uint32), offset=2 * seam)
+        self._ring_seam = seam
+        return self._ring_ibo
+
 
 class _AggLineVisual(Visual):
     _agg_vtype = np.dtype([('a_position', np.float32, (2,)),
@@ -434,16 +591,23 @@ class _AggLineVisual(Visual):
 
     def _prepare_draw(self, view):
         bake = False
-        if self._parent._changed['pos']:
+        changed = self._parent._changed
+        dirty_ranges = self._parent._dirty_ranges
+        if changed['pos'] or dirty_ranges['pos']:
             if self._parent._pos is None:
                 return False
-            # todo: does this result in unnecessary copies?
-            self._pos = np.ascontiguousarray(
-                self._parent._pos.astype(np.float32))
+            self._pos = np.ascontiguousarray(self._parent._pos,
+                                             dtype=np.float32)
+            if self._parent._ring_head:
+                # Put the oldest vertex first
+                self._pos = np.roll(self._pos, -self._parent._ring_head, 0)
             bake = True
 
-        if self._parent._changed['color']:
+        if changed['color'] or dirty_ranges['color']:
             color, cmap = self._parent._interpret_color()
+            if self._parent._ring_head and \
+                    isinstance(color, np.ndarray) and color.ndim == 2:
+                color = np.roll(color, -self._parent._ring_head, 0)
             self._color = color
             bake = True
 
@@ -456,6 +620,9 @@ class _AggLineVisual(Visual):
             V, idxs = self._agg_bake(self._pos, self._color)
             self._vbo.set_data(V)
             self._index_buffer.set_data(idxs)
+            changed['pos'] = changed['color'] = False
+            del dirty_ranges['pos'][:]
+            del dirty_ranges['color'][:]
 
         # self._program.prepare()
         self.shared_program.bind(self._vbo)
@@ -491,6 +491,7 @@ class MarkersVisual(Visual):
         self._symbol = None
         self._marker_fun = None
         self._data = None
+        self._ring_head = None  # write position for append()
         self.antialias = 1
         self.scaling = False
         Visual.__init__(self, vcode=vert, fcode=frag)
@@ -574,6 +575,8 @@ class MarkersVisual(Visual):
             data['a_size'] = size
             self.shared_program['u_antialias'] = self.antialias  # XXX make prop
             self._data = data
+            self._ring_head = None
+            self._bounds_changed()
             if self._symbol is not None:
                 # If we have no symbol set, we skip drawing (_prepare_draw
                 # returns False). This causes the GLIR queue to not flush,
@@ -585,6 +588,125 @@ class MarkersVisual(Visual):
 
         self.update()
 
+    def update_range(self, offset, pos=None, size=None, edge_width=None,
+                     edge_color=None, face_color=None):
+        """ Replace the data of a range of markers, uploading only the
+        changed rows.
+
+        Parameters
+        ----------
+        offset : int
+            Index of the first marker to replace.
+        pos : array | None
+            Array of shape (n, 2) or (n, 3) with the new marker locations.
+        size : float | array | None
+            The symbol size in px.
+        edge_width : float | array | None
+            The width of the symbol outline in pixels.
+        edge_color : Color | ColorArray | None
+            The color used to draw each symbol outline.
+        face_color : Color | ColorArray | None
+            The color used to draw each symbol interior.
+
+        Notes
+        -----
+        The number of markers cannot change; use ``set_data`` for that.
+        Scalar values and single colors are applied to all markers in the
+        range, in which case ``pos`` must be given to determine its length.
+        """
+        if self._data is None:
+            raise ValueError('No marker data has been set')
+        if pos is not None:
+            pos = np.asarray(pos, dtype=np.float32)
+            n = len(pos)
+        else:
+            n = None
+            for value in (size, edge_width):
+                if value is not None and np.ndim(value) > 0:
+                    n = len(value)
+        if n is None:
+            raise ValueError('Cannot determine the number of markers to '
+                             'update')
+        if offset < 0 or offset + n > len(self._data):
+            raise ValueError('Range [%d, %d) is out of bounds for %d markers'
+                             % (offset, offset + n, len(self._data)))
+        self._write_range(offset, n, pos, size, edge_width, edge_color,
+                          face_color)
+        self.update()
+
+    def append(self, pos, size=None, edge_width=None, edge_color=None,
+               face_color=None):
+        """ Append markers, replacing the oldest ones.
+
+        The current data is used as a ring buffer with a fixed number of
+        markers (as given to ``set_data``). New markers are written after
+        the most recently appended marker, wrapping around at the end, and
+        only the written rows are uploaded. Properties that are not given
+        keep the value of the marker that is replaced.
+
+        Parameters
+        ----------
+        pos : array
+            Array of shape (n, 2) or (n, 3) with the marker locations.
+        size : float | array | None
+            The symbol size in px.
+        edge_width : float | array | None
+            The width of the symbol outline in pixels.
+        edge_color : Color | ColorArray | None
+            The color used to draw each symbol outline.
+        face_color : Color | ColorArray | None
+            The color used to draw each symbol interior.
+        """
+        if self._data is None:
+            raise ValueError('No marker data has been set')
+        capacity = len(self._data)
+        pos = np.asarray(pos, dtype=np.float32)
+        values = [pos, size, edge_width]
+        for color in (edge_color, face_color):
+            if color is not None:
+                color = ColorArray(color).rgba
+                color = color[0] if len(color) == 1 else color
+            values.append(color)
+        # Only the last `capacity` markers survive
+        for i, value in enumerate(values):
+            if value is not None and np.ndim(value) > 0 and \
+                    len(value) == len(pos):
+                values[i] = np.asarray(value)[-capacity:]
+        n = len(values[0])
+        head = self._ring_head or 0
+        # Write in at most two parts: up to the end, then from the start
+        first = min(n, capacity - head)
+        for start, stop, offset in ((0, first, head), (first, n, 0)):
+            if stop > start:
+                part = [v[start:stop] if np.ndim(v) > 0 and len(v) == n
+                        else v for v in values]
+                self._write_range(offset, stop - start, *part)
+        self._ring_head = (head + n) % capacity
+        self.update()
+
+    def _write_range(self, offset, n, pos, size, edge_width, edge_color,
+                     face_color):
+        # Write rows into the CPU-side array and upload them
+        rows = self._data[offset:offset + n]
+        if pos is not None:
+            rows['a_position'][:, :pos.shape[1]] = pos
+            self._bounds_changed()
+        if size is not None:
+            rows['a_size'] = size
+        if edge_width is not None:
+            if edge_width < 0 if np.ndim(edge_width) == 0 else \
+                    (np.asarray(edge_width) < 0).any():
+                raise ValueError('edge_width cannot be negative')
+            rows['a_edgewidth'] = edge_width
+        for name, color in (('a_fg_color', edge_color),
+                            ('a_bg_color', face_color)):
+            if color is not None:
+                color = ColorArray(color).rgba
+                rows[name] = color[0] if len(color) == 1 else color
+        if self._symbol is not None:
+            # See set_data() for why we only upload when we can draw
+            self._vbo.set_subdata(rows, offset=offset)
+
     @property
     def symbol(self):
         return self._symbol
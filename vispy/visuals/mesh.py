@@ -250,6 +250,7 @@ class MeshVisual(Visual):
                                       face_colors=face_colors,
                                       vertex_values=vertex_values)
         self._bounds = self._meshdata.get_bounds()
+        self._bounds_changed()
         if color is not None:
             self._color = Color(color)
         self.mesh_data_changed()
@@ -361,18 +362,7 @@ class MeshVisual(Visual):
             self._normals.set_data(normals, convert=True)
         else:
             self._normals.set_data(np.zeros((0, 3), dtype=np.float32))
-        if md.has_vertex_color():
-            colors = md.get_vertex_colors(indexed='faces')
-            colors = colors.astype(np.float32)
-        elif md.has_face_color():
-            colors = md.get_face_colors(indexed='faces')
-            colors = colors.astype(np.float32)
-        elif md.has_vertex_value():
-            colors = md.get_vertex_values(indexed='faces')
-            colors = colors.ravel()[:, np.newaxis]
-            colors = colors.astype(np.float32)
-        else:
-            colors = self._color.rgba
+        colors = self._get_colors(md)
 
         self.shared_program.vert['position'] = self._vertices
 
@@ -406,16 +396,36 @@ class MeshVisual(Visual):
                 normals = (1., 0., 0.)
 
             self.shared_program.vert['normal'] = normals
-
-            # Additional phong properties
-            self.shared_program.vert['light_dir'] = self._light_dir
-            self.shared_program.vert['light_color'] = (1.0, 1.0, 1.0, 1.0)
-            self.shared_program.vert['ambientk'] = \
-                self._ambient_light_color.rgba
-            self.shared_program.frag['shininess'] = self._shininess
+            self._update_lighting()
 
         self._data_changed = False
 
+    def _update_lighting(self):
+        """Set the phong properties of the shading program"""
+        self.shared_program.vert['light_dir'] = self._light_dir
+        self.shared_program.vert['light_color'] = (1.0, 1.0, 1.0, 1.0)
+        self.shared_program.vert['ambientk'] = \
+            self._ambient_light_color.rgba
+        self.shared_program.frag['shininess'] = self._shininess
+
+    def _get_colors(self, md):
+        """Return the per-vertex colors or values (indexed by faces), or
+        the uniform color if the mesh data has none.
+        """
+        if md.has_vertex_color():
+            colors = md.get_vertex_colors(indexed='faces')
+            colors = colors.astype(np.float32)
+        elif md.has_face_color():
+            colors = md.get_face_colors(indexed='faces')
+            colors = colors.astype(np.float32)
+        elif md.has_vertex_value():
+            colors = md.get_vertex_values(indexed='faces')
+            colors = colors.ravel()[:, np.newaxis]
+            colors = colors.astype(np.float32)
+        else:
+            colors = self._color.rgba
+        return colors
+
     @property
     def shininess(self):
         """The shininess"""
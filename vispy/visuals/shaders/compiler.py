@@ -3,9 +3,72 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 
 from __future__ import division
+from collections import OrderedDict
+
 from ... import gloo
 
 
+class _Uncacheable(Exception):
+    """ Raised when a shader object cannot describe its structure.
+    """
+
+
+class CompilerCache(object):
+    """ Process-wide cache of compiled shader code
+
+    `Compiler.compile` looks up the structure of the objects that it
+    compiles (their code, replacements, and which variables and functions
+    are bound where) in this cache. Programs that are built from equal
+    graphs of shader objects, e.g. those of many visuals of the same type,
+    are then only compiled once. The cache holds the code and the names of
+    the objects, but no references to the objects themselves.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of compilations to keep; the least recently used
+        ones are dropped first.
+    """
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # {key: (code, names)}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Dict with the size of the cache and the hit and miss counts"""
+        return dict(size=len(self), hits=self.hits, misses=self.misses)
+
+    def get(self, key):
+        """ Return the (code, names) entry for *key*, or None.
+        """
+        entry = self._entries.get(key, None)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def add(self, key, entry):
+        """ Store a (code, names) entry for *key*.
+        """
+        self._entries[key] = entry
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """ Drop all entries and reset the counters.
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class Compiler(object):
     """
     Compiler is used to convert Function and Variable instances into
@@ -29,7 +92,13 @@ class Compiler(object):
         # look up name of some object
         name = compiler[obj]
 
+    The results are shared with other compilers through `Compiler.cache`,
+    see `CompilerCache`.
     """
+
+    #: Process-wide `CompilerCache`
+    cache = CompilerCache()
+
     def __init__(self, namespace=None, **shaders):
         # cache of compilation results for each function and variable
         if namespace is None:
@@ -43,7 +112,7 @@ class Compiler(object):
         """
         return self._object_names[item]
 
-    def compile(self, pretty=True):
+    def compile(self, pretty=True, use_cache=True):
         """ Compile all code and return a dict {name: code} where the keys
         are determined by the keyword arguments passed to __init__().
 
@@ -54,6 +123,9 @@ class Compiler(object):
             GLSL that is more readable.
             If False, then the output is mostly unreadable GLSL, but is about
             10x faster to compile.
+        use_cache : bool
+            If True, reuse the code and names of an earlier compilation of
+            objects with the same structure from `Compiler.cache`.
 
         """
         # Authoritative mapping of {obj: name}
@@ -78,6 +150,16 @@ class Compiler(object):
                 this_shader_deps.append(dep)
                 dep_set.add(dep)
 
+        # Objects with the same structure compile to the same code
+        key = self._structure_key(pretty) if use_cache else None
+        if key is not None:
+            entry = self.cache.get(key[0])
+            if entry is not None:
+                code, names = entry
+                self._object_names = dict(zip(key[1], names))
+                self.code = dict(code)
+                return self.code
+
         #
         # 2. Assign names to all objects.
         #
@@ -106,9 +188,52 @@ class Compiler(object):
             
             compiled[shader_name] = '\n'.join(code)
 
+        if key is not None:
+            names = tuple(obj_names[obj] for obj in key[1])
+            self.cache.add(key[0], (dict(compiled), names))
+
         self.code = compiled
         return compiled
 
+    def _structure_key(self, pretty):
+        """ Return a hashable key that describes the structure of the objects
+        to compile and the list of these objects in the order used by the
+        key, or None if some object does not support caching.
+
+        Objects that get a name are referred to by their position in this
+        list; inline expressions are described in place.
+        """
+        objects = []
+        index = {}
+        shader_deps = []
+        for shader_name, deps in self._shader_deps.items():
+            for dep in deps:
+                if dep not in index:
+                    index[dep] = len(objects)
+                    objects.append(dep)
+            shader_deps.append((shader_name,
+                                tuple(index[dep] for dep in deps)))
+
+        def ref(obj):
+            i = index.get(obj, None)
+            if i is not None:
+                return i
+            key = obj._structure_key(ref)
+            if key is None:
+                raise _Uncacheable()
+            return key
+
+        structure = []
+        try:
+            for obj in objects:
+                key = obj._structure_key(ref)
+                if key is None:
+                    return None
+                structure.append(key)
+        except _Uncacheable:
+            return None
+        return (pretty, tuple(shader_deps), tuple(structure)), objects
+
     def _rename_objects_fast(self):
         """ Rename all objects quickly to guaranteed-unique names using the
         id() of each object.
@@ -30,6 +30,9 @@ class TextExpression(Expression):
     def expression(self, names=None):
         return self._text
 
+    def _structure_key(self, ref):
+        return (type(self), self._text)
+
     @property
     def text(self):
         return self._text
@@ -97,3 +100,7 @@ class FunctionCall(Expression):
         args = ', '.join(str_args)
         fname = self.function.expression(names)
         return '%s(%s)' % (fname, args)
+
+    def _structure_key(self, ref):
+        return (type(self), ref(self._function),
+                tuple(ref(arg) for arg in self._args))
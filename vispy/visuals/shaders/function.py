@@ -477,6 +477,16 @@ class Function(ShaderObject):
     def expression(self, names):
         return names[self]
 
+    def _structure_key(self, ref):
+        def key_or_ref(obj):
+            return ref(obj) if isinstance(obj, ShaderObject) else obj
+        expressions = tuple((key, ref(val))
+                            for key, val in self._expressions.items())
+        assignments = tuple((key_or_ref(key), key_or_ref(val))
+                            for key, val in self._assignments.items())
+        return (type(self), self._code, tuple(self._replacements.items()),
+                expressions, assignments)
+
     def _clean_code(self, code):
         """ Return *code* with indentation and leading/trailing blank lines
         removed.
@@ -749,6 +759,10 @@ class FunctionChain(Function):
     def static_names(self):
         return []
 
+    def _structure_key(self, ref):
+        return (type(self), self._name, tuple(map(tuple, self._args)),
+                self._rtype, tuple(ref(fn) for fn in self._funcs))
+
     def __repr__(self):
         fn = ",\n                ".join(map(repr, self.functions))
         return "<FunctionChain [%s] at 0x%x>" % (fn, id(self))
@@ -792,3 +806,7 @@ class StatementList(ShaderObject):
         for item, pos in self.order:
             code += item.expression(obj_names) + ';\n'
         return code
+
+    def _structure_key(self, ref):
+        items = sorted(self.items.items(), key=lambda x: x[1])
+        return (type(self), tuple((ref(item), pos) for item, pos in items))
@@ -102,6 +102,17 @@ class ShaderObject(object):
         alldeps.append(self)
         return alldeps
 
+    def _structure_key(self, ref):
+        """ Return a hashable description of everything that the definition
+        and expression of this object depend on, with other shader objects
+        described by ``ref(obj)``. The Compiler uses it to share the
+        compiled code between objects with the same structure.
+
+        Objects that return None are not cached. Subclasses that generate
+        code from other state must override this.
+        """
+        return None
+
     def static_names(self):
         """ Return a list of names that are declared in this object's
         definition (not including the name of the object itself).
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+from numpy.testing import assert_array_equal
+
+from vispy.visuals.shaders import (Compiler, Function, ModularProgram,
+                                   Variable, Varying)
+from vispy.testing import run_tests_if_main
+
+
+vert = """
+void main() {
+    gl_Position = $transform($position);
+}
+"""
+
+frag = """
+void main() {
+    gl_FragColor = $v_color;
+}
+"""
+
+scale = """
+vec4 scale_pos(vec4 pos) {
+    return pos * $scale;
+}
+"""
+
+
+def _program(scale_value, color=(1., 0., 0., 1.)):
+    program = ModularProgram(vert, frag)
+    transform = Function(scale)
+    transform['scale'] = scale_value
+    program.vert['transform'] = transform
+    program.vert['position'] = Variable('attribute vec4 a_position')
+    v_color = Varying('v_color')
+    program.vert[v_color] = color
+    program.frag['v_color'] = v_color
+    program.build_if_needed()
+    return program
+
+
+def test_compiler_cache():
+    """Test that programs with the same structure share their compilation"""
+    Compiler.cache.clear()
+    p1 = _program(2.)
+    assert Compiler.cache.stats == dict(size=1, hits=0, misses=1)
+
+    # Other values of the variables do not change the code
+    p2 = _program(3., color=(0., 1., 0., 1.))
+    assert Compiler.cache.stats == dict(size=1, hits=1, misses=1)
+    assert p2.compiler.code == p1.compiler.code
+    assert p2.compiler.code is not p1.compiler.code
+
+    # The names refer to the variables of each program
+    names1 = sorted(p1.compiler[var] for var in p1._variables)
+    names2 = sorted(p2.compiler[var] for var in p2._variables)
+    assert names1 == names2
+    for var in p2._variables:
+        assert var not in p1._variables
+        assert p2.compiler[var] in p2.compiler.code['vert']
+    p2.update_variables()
+    assert_array_equal(p2['u_v_color'], (0., 1., 0., 1.))
+
+    # Replacing a variable by a constant changes the structure
+    p3 = _program('3.0')
+    assert Compiler.cache.misses == 2
+    assert '* 3.0' in p3.compiler.code['vert']
+
+    # Uncached compilation gives the same code
+    code = Compiler(vert=p2.vert, frag=p2.frag).compile(use_cache=False)
+    assert code['vert'] == p2.compiler.code['vert']
+    assert code['frag'] == p2.compiler.code['frag']
+    assert Compiler.cache.stats == dict(size=2, hits=1, misses=2)
+
+    # The least recently used compilations are dropped
+    Compiler.cache.max_size = 1
+    try:
+        _program('4.0')
+        assert len(Compiler.cache) == 1
+        _program('4.0')
+        assert Compiler.cache.hits == 2
+        _program(2.)
+        assert Compiler.cache.misses == 4
+    finally:
+        Compiler.cache.max_size = 256
+        Compiler.cache.clear()
+
+
+run_tests_if_main()
@@ -164,6 +164,11 @@ class Variable(ShaderObject):
     def expression(self, names):
         return names[self]
 
+    def _structure_key(self, ref):
+        # The values of const variables are part of the code
+        value = str(self.value) if self.vtype == 'const' else None
+        return (type(self), self.name, self.vtype, self.dtype, value)
+
     def _vtype_for_version(self, version):
         """Return the vtype for this variable, converted based on the GLSL
         version.
@@ -276,3 +281,7 @@ class InVar(Variable):
 
     def expression(self, names):
         return names[self._var]
+
+    def _structure_key(self, ref):
+        return (type(self), self.name, ref(self._var), self.dtype,
+                self._array)
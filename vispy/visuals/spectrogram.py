@@ -7,9 +7,21 @@
 import numpy as np
 
 from .image import ImageVisual
+from .shaders import Function
 from ..util.fourier import stft, fft_freqs
 
 
+# Shift the columns of the image so that the ring buffer of frames used by
+# append() is shown from the oldest to the newest frame
+_scroll_lookup = """
+    vec4 scroll_lookup(vec2 texcoord) {
+        if (texcoord.x >= 0.0 && texcoord.x < 1.0) {
+            texcoord.x = fract(texcoord.x + $offset);
+        }
+        return $lookup(texcoord);
+    }"""
+
+
 class SpectrogramVisual(ImageVisual):
     """Calculate and show a spectrogram
 
@@ -38,17 +50,36 @@ class SpectrogramVisual(ImageVisual):
     clim : str | tuple
         Colormap limits. Should be ``'auto'`` or a two-element tuple of
         min and max values.
+    max_frames : int | None
+        Number of frames to show when samples are added with `append`.
+        The frames are kept in a ring buffer and the image scrolls as new
+        frames arrive, so the cost of adding samples does not depend on
+        the length of the signal. The added samples are not kept, so
+        changing the STFT parameters recomputes the spectrogram from `x`
+        only. If None, all frames are shown and the image is uploaded
+        again on each call to `append`.
     """
     def __init__(self, x=None, n_fft=256, step=None, fs=1., window='hann',
                  normalize=False, color_scale='log', cmap='cubehelix',
-                 clim='auto'):
-        self._x = np.asarray(x)
+                 clim='auto', max_frames=None):
+        self._x = None if x is None else np.asarray(x)
         self._n_fft = int(n_fft)
         self._step = step
         self._fs = float(fs)
         self._window = window
         self._normalize = normalize
         self._color_scale = color_scale
+        self._max_frames = None if max_frames is None else int(max_frames)
+
+        # State of the STFT for append(): the samples from the start of the
+        # next frame on, the number of frames computed so far, and the
+        # count, mean and sum of squared deviations of all frames for
+        # normalization
+        self._tail = np.zeros(0)
+        self._n_frames = 0
+        self._norm_stats = None
+        self._scroll = Function(_scroll_lookup)
+        self._scroll['offset'] = 0.
 
         if clim == 'auto':
             self._clim_auto = True
@@ -143,26 +174,168 @@ class SpectrogramVisual(ImageVisual):
         self._normalize = normalize
         self._update_image()
 
-    def _calculate_spectrogram(self):
-        if self._x is not None:
-            x = self._x
-            nan_mean = np.nanmean(x)
-            idx = np.isnan(x)
-            x[idx] = nan_mean
-            data = stft(x, self._n_fft, self._step, self._fs, self._window)
-            data = np.abs(data)
-            data = 20 * np.log10(data) if self._color_scale == 'log' else data
-            if self._normalize:
-                for i in range(data.shape[0]):
-                    data[i, :] -= np.mean(data[i, :])
-                    data[i, :] /= np.std(data[i, :])
-            return data
+    def append(self, x):
+        """Add samples to the end of the signal
+
+        Only the frames which are completed by the new samples are
+        computed. If ``max_frames`` is set, these replace the oldest
+        columns of the image texture, and only those columns are uploaded.
+        With ``normalize``, the new frames are normalized with the
+        statistics of all frames so far; the frames shown before are not
+        changed.
+
+        Parameters
+        ----------
+        x : array-like
+            1D array of new samples.
+        """
+        x = self._clean(x)
+        if self._max_frames is None:
+            self._x = x if self._x is None else np.concatenate((self._x, x))
+            if self._n_frames == 0:
+                # no whole frame yet, the signal is short
+                self._update_image()
+                return
+        tail = np.concatenate((self._tail, x))
+        if len(tail) < self._n_fft:
+            self._tail = tail
+            return
+        result = stft(tail, self._n_fft, self.step, self._fs, self._window)
+        n_new = result.shape[1]
+        self._tail = tail[n_new * self.step:]
+        frames = self._to_data(result, update=self._n_frames > 0)
+        self._n_frames += n_new
+
+        if self._max_frames is None:
+            self.set_data(np.concatenate((self._data, frames), axis=1))
+        elif self._data is None:
+            self.set_data(self._make_ring(frames))
+        else:
+            self._write_frames(frames)
+            return
+        self._update_scroll()
+        self.update()
+        if self._clim_auto:
+            self.clim = 'auto'
+
+    @staticmethod
+    def _clean(x):
+        """Return x as a 1D array of floats with NaNs replaced by the mean"""
+        x = np.array(x, float)
+        if x.ndim != 1:
+            raise ValueError('x must be 1D')
+        idx = np.isnan(x)
+        if idx.any():
+            x[idx] = np.nanmean(x)
+        return x
+
+    def _to_data(self, result, update=False):
+        """Turn STFT frames into the values of the image"""
+        data = np.abs(result)
+        data = 20 * np.log10(data) if self._color_scale == 'log' else data
+        if self._normalize:
+            # Combine the statistics of the frames with those so far
+            count = data.shape[1]
+            mean = data.mean(axis=1)
+            m2 = ((data - mean[:, np.newaxis]) ** 2).sum(axis=1)
+            if update and self._norm_stats is not None:
+                old_count, old_mean, old_m2 = self._norm_stats
+                delta = mean - old_mean
+                total = old_count + count
+                mean = old_mean + delta * (count / total)
+                m2 = old_m2 + m2 + delta ** 2 * (old_count * count / total)
+                count = total
+            self._norm_stats = count, mean, m2
+            std = np.sqrt(m2 / count)
+            std[std == 0] = 1  # e.g. a single frame
+            data = data - mean[:, np.newaxis]
+            data /= std[:, np.newaxis]
+        return data
+
+    def _make_ring(self, frames):
+        """Put the last frames in a ring buffer of max_frames columns"""
+        n_cols = self._max_frames
+        frames = frames[:, -n_cols:]
+        ring = np.empty((frames.shape[0], n_cols), np.float32)
+        # columns without a frame yet show the lowest value
+        ring[:] = frames.min()
+        ring[:, self._ring_columns(frames.shape[1])] = frames
+        return ring
+
+    def _ring_columns(self, n):
+        """The columns of the ring buffer of the last n frames"""
+        return np.arange(self._n_frames - n, self._n_frames) % \
+            self._max_frames
+
+    def _write_frames(self, frames):
+        """Write the last frames into the ring buffer and upload them"""
+        frames = frames[:, -self._max_frames:].astype(np.float32)
+        columns = self._ring_columns(frames.shape[1])
+        self._data[:, columns] = frames
+        self._update_scroll()
+        self.update()
+
+        if self._need_texture_upload or self._texture_limits is None:
+            return  # the whole texture is uploaded anyway
+        lo, hi = self._texture_limits
+        if hi <= lo or (self._clim_auto and (frames.min() < lo or
+                                             frames.max() > hi)):
+            # the frames do not fit the scale of the texture
+            if self._clim_auto:
+                self.clim = 'auto'
+            self._need_texture_upload = True
+            return
+        # normalize like ImageVisual._build_texture, and upload the columns
+        # in at most two parts when they wrap around
+        frames -= lo
+        frames /= hi - lo
+        split = self._max_frames - columns[0]
+        self._texture.set_data(frames[:, :split], offset=(0, columns[0]))
+        if split < frames.shape[1]:
+            self._texture.set_data(frames[:, split:], offset=(0, 0))
+
+    def _update_scroll(self):
+        if self._max_frames is None:
+            self._scroll['offset'] = 0.
         else:
+            head = self._n_frames % self._max_frames
+            self._scroll['offset'] = head / float(self._max_frames)
+
+    def _build_interpolation(self):
+        super(SpectrogramVisual, self)._build_interpolation()
+        self._scroll['lookup'] = self._data_lookup_fn
+        self.shared_program.frag['get_data'] = self._scroll
+
+    def _calculate_spectrogram(self):
+        self._tail = np.zeros(0)
+        self._n_frames = 0
+        self._norm_stats = None
+        self._update_scroll()
+        if self._x is None:
             return None
+        x = self._clean(self._x)
+        if len(x) < self._n_fft:
+            # wait for a whole frame, or show a single zero-padded one
+            self._tail = x
+            if self._max_frames is not None:
+                return None
+            return self._to_data(stft(x, self._n_fft, self._step, self._fs,
+                                      self._window))
+        data = stft(x, self._n_fft, self._step, self._fs, self._window)
+        self._n_frames = data.shape[1]
+        self._tail = x[self._n_frames * self.step:]
+        data = self._to_data(data)
+        self._update_scroll()
+        if self._max_frames is not None:
+            data = self._make_ring(data)
+        return data
 
     def _update_image(self):
         data = self._calculate_spectrogram()
-        self.set_data(data)
+        if data is None:
+            self._data = None
+        else:
+            self.set_data(data)
         self.update()
         if self._clim_auto:
             self.clim = 'auto'
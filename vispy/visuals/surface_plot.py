@@ -6,8 +6,38 @@ from __future__ import division
 
 import numpy as np
 
-from .mesh import MeshVisual
+from .mesh import MeshVisual, _null_color_transform
+from .shaders import Function, Variable
 from ..geometry import MeshData
+from ..gloo import IndexBuffer, Texture2D, VertexBuffer
+
+# In heightfield mode, the position attribute holds x, y and the texture
+# coordinates of the height of each grid vertex
+_heightfield_position = """
+vec4 heightfield_position(vec4 xy_texcoord) {
+    float z = texture2D($z, xy_texcoord.zw).r;
+    return vec4(xy_texcoord.xy, z, 1.0);
+}
+"""
+
+# The normal is the cross product of the tangents along the grid, from the
+# heights of the neighbouring vertices. The x, y differences of these
+# neighbours are a static attribute; like them, the heights are clamped at
+# the edges of the grid.
+_heightfield_normal = """
+vec3 heightfield_normal(vec4 xy_texcoord) {
+    vec2 texcoord = xy_texcoord.zw;
+    vec2 di = vec2(0.0, $texel.y);
+    vec2 dj = vec2($texel.x, 0.0);
+    float dz_i = texture2D($z, texcoord + di).r -
+                 texture2D($z, texcoord - di).r;
+    float dz_j = texture2D($z, texcoord + dj).r -
+                 texture2D($z, texcoord - dj).r;
+    vec3 t_i = vec3($tangents.xy, dz_i);
+    vec3 t_j = vec3($tangents.zw, dz_j);
+    return normalize(cross(t_j, t_i));
+}
+"""
 
 
 class SurfacePlotVisual(MeshVisual):
@@ -29,6 +59,13 @@ class SurfacePlotVisual(MeshVisual):
         2D array of height values for each grid vertex.
     colors : ndarray
         (width, height, 4) array of vertex colors.
+    heightfield : bool
+        If True, the heights are stored in a float texture and the
+        positions and normals of the vertices are computed in the vertex
+        shader, so that updating z is a single texture upload. The x and y
+        positions are uploaded once. Only the 'smooth' shading (or None)
+        is supported, and `mesh_data` is not updated. This needs vertex
+        texture fetches, which some OpenGL ES 2.0 implementations lack.
 
     Notes
     -----
@@ -38,10 +75,12 @@ class SurfacePlotVisual(MeshVisual):
     triangle must be recomputed. This is somewhat expensive if the surface
     was initialized with smooth=False and very expensive if smooth=True.
     For faster performance, initialize with compute_normals=False and use
-    per-vertex colors or a material that does not require normals.
+    per-vertex colors or a material that does not require normals, or use
+    the heightfield mode.
     """
 
-    def __init__(self, x=None, y=None, z=None, colors=None, **kwargs):
+    def __init__(self, x=None, y=None, z=None, colors=None,
+                 heightfield=False, **kwargs):
         # The x, y, z, and colors arguments are passed to set_data().
         # All other keyword arguments are passed to MeshVisual.__init__().
         self._x = None
@@ -51,9 +90,32 @@ class SurfacePlotVisual(MeshVisual):
         self.__faces = None
         self.__meshdata = MeshData()
         kwargs.setdefault('shading', 'smooth')
+        self._heightfield = bool(heightfield)
+        if self._heightfield and kwargs['shading'] not in (None, 'smooth'):
+            raise ValueError("Only 'smooth' shading or None is supported "
+                             "in heightfield mode")
+        # Heightfield mode
+        self._z_texture = None
+        self._grid = VertexBuffer(np.zeros((0, 4), dtype=np.float32))
+        # Both the position and the normal read this attribute
+        self._grid_var = Variable('attribute vec4 a_grid', self._grid)
+        self._tangents = VertexBuffer(np.zeros((0, 4), dtype=np.float32))
+        self._grid_changed = True
+        self._grid_shape = None
+        self._colors = None
+        self._position_fun = Function(_heightfield_position)
+        self._normal_fun = Function(_heightfield_normal)
+        self._normal_fun['tangents'] = self._tangents
         MeshVisual.__init__(self, **kwargs)
         self.set_data(x, y, z, colors)
 
+    @property
+    def heightfield(self):
+        """Whether the heights are stored in a texture, see the class
+        documentation.
+        """
+        return self._heightfield
+
     def set_data(self, x=None, y=None, z=None, colors=None):
         """Update the data in this surface plot.
 
@@ -97,6 +159,10 @@ class SurfacePlotVisual(MeshVisual):
         if self._z is None:
             return
 
+        if self._heightfield:
+            self._set_heightfield_data(x, y, z, colors)
+            return
+
         update_mesh = False
         new_vertices = False
 
@@ -151,6 +217,134 @@ class SurfacePlotVisual(MeshVisual):
                                         self.__vertices.shape[1], 3))
             MeshVisual.set_data(self, meshdata=self.__meshdata)
 
+    def set_z(self, z, offset=(0, 0)):
+        """Update a rectangle of the heights
+
+        In heightfield mode, only this rectangle is uploaded to the
+        texture.
+
+        Parameters
+        ----------
+        z : ndarray
+            2D array of the new height values.
+        offset : tuple
+            The (x, y) grid index of the first value of ``z``.
+        """
+        z = np.asarray(z)
+        i, j = offset
+        if self._z is None or z.ndim != 2 or i < 0 or j < 0 or \
+                i + z.shape[0] > self._z.shape[0] or \
+                j + z.shape[1] > self._z.shape[1]:
+            raise ValueError('Z values must fit in the grid at the offset')
+        if not self._heightfield:
+            heights = np.array(self._z)
+            heights[i:i + z.shape[0], j:j + z.shape[1]] = z
+            self.set_data(z=heights)
+            return
+        z = z.astype(np.float32)
+        self._z[i:i + z.shape[0], j:j + z.shape[1]] = z
+        self._z_texture.set_data(z, offset=(i, j))
+        self._update_bounds()
+        self.update()
+
+    def _set_heightfield_data(self, x, y, z, colors):
+        """Update the heightfield from the arguments of set_data"""
+        if z is not None:
+            # Keep a copy that set_z can modify
+            self._z = np.array(z, dtype=np.float32)
+        if x is not None or y is not None or \
+                self._z.shape != self._grid_shape:
+            self._grid_changed = True
+            self._data_changed = True
+        if z is not None or self._z_texture is None:
+            if self._z_texture is None:
+                self._z_texture = Texture2D(self._z, internalformat='r32f',
+                                            interpolation='nearest',
+                                            wrapping='clamp_to_edge')
+                self._position_fun['z'] = self._z_texture
+                # Share the sampler
+                self._normal_fun['z'] = self._position_fun['z']
+            else:
+                self._z_texture.set_data(self._z)
+        if colors is not None:
+            colors = np.asarray(colors, dtype=np.float32)
+            self._colors = colors.reshape(-1, colors.shape[-1])
+            self._data_changed = True
+        self._update_bounds()
+        self.update()
+
+    def _update_bounds(self):
+        """Set the bounds from x, y and z, in heightfield mode"""
+        x, y = self._grid_xy()
+        z = self._z
+        self._bounds = [(np.nanmin(x), np.nanmax(x)),
+                        (np.nanmin(y), np.nanmax(y)),
+                        (np.nanmin(z), np.nanmax(z))]
+        self._bounds_changed()
+
+    def _grid_xy(self):
+        """Return the x and y positions of the grid vertices, broadcast to
+        the shape of z."""
+        shape = self._z.shape
+        x = np.arange(shape[0]) if self._x is None else np.asarray(self._x)
+        y = np.arange(shape[1]) if self._y is None else np.asarray(self._y)
+        if x.ndim == 1:
+            x = x.reshape(len(x), 1)
+        if y.ndim == 1:
+            y = y.reshape(1, len(y))
+        return np.broadcast_to(x, shape), np.broadcast_to(y, shape)
+
+    def _update_grid(self):
+        """Upload the static x, y positions, texture coordinates and faces
+        of the grid."""
+        nx, ny = self._z.shape
+        grid = np.empty((nx, ny, 4), dtype=np.float32)
+        grid[..., 0], grid[..., 1] = self._grid_xy()
+        grid[..., 2] = (np.arange(ny) + 0.5) / ny
+        grid[..., 3] = (np.arange(nx)[:, np.newaxis] + 0.5) / nx
+        self._grid.set_data(grid.reshape(-1, 4))
+
+        # x, y differences between the neighbours along each axis of the
+        # grid, clamped at the edges
+        xy = grid[..., :2]
+        after = np.minimum(np.arange(nx) + 1, nx - 1)
+        before = np.maximum(np.arange(nx) - 1, 0)
+        tangents = np.empty((nx, ny, 4), dtype=np.float32)
+        tangents[..., :2] = xy[after] - xy[before]
+        after = np.minimum(np.arange(ny) + 1, ny - 1)
+        before = np.maximum(np.arange(ny) - 1, 0)
+        tangents[..., 2:] = xy[:, after] - xy[:, before]
+        self._tangents.set_data(tangents.reshape(-1, 4))
+        self._normal_fun['texel'] = (1. / ny, 1. / nx)
+
+        self.generate_faces()
+        self._index_buffer = IndexBuffer(self.__faces.astype(np.uint32))
+        self._grid_shape = (nx, ny)
+        self._grid_changed = False
+
+    def _update_data(self):
+        if not self._heightfield:
+            return MeshVisual._update_data(self)
+        if self._z is None:
+            return False
+        if self._grid_changed:
+            self._update_grid()
+
+        vert = self.shared_program.vert
+        vert['position'] = self._grid_var
+        vert['to_vec4'] = self._position_fun
+        vert['color_transform'] = Function(_null_color_transform)
+        if self._colors is None:
+            vert['base_color'] = self._color.rgba
+        else:
+            vert['base_color'] = VertexBuffer(self._colors)
+        if self.shading is not None:
+            # Replace the attribute by an expression, not just its value
+            vert['normal'] = None
+            vert['normal'] = self._normal_fun(self._grid_var)
+            self._update_lighting()
+        self._data_changed = False
+
     def generate_faces(self):
         cols = self._z.shape[1] - 1
         rows = self._z.shape[0] - 1
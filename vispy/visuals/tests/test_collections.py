@@ -1,8 +1,12 @@
 # *Very* basic collections tests
 
+import numpy as np
+from numpy.testing import assert_array_equal
+
 from vispy.visuals.collections import (PathCollection, PointCollection,
                                        PolygonCollection, SegmentCollection,
                                        TriangleCollection)
+from vispy.visuals.collections.base_collection import BaseCollection
 from vispy.testing import requires_application, TestingCanvas
 
 
@@ -14,3 +18,90 @@ def test_init():
         for coll in (PathCollection, PointCollection, PolygonCollection,
                      SegmentCollection, TriangleCollection):
             coll()
+
+
+def test_incremental_upload():
+    """Test that collections only upload the data that changed
+    """
+    coll = BaseCollection(vtype=[('a_position', np.float32, 2)],
+                          utype=[('color', np.float32, 4)],
+                          itype=np.uint32)
+
+    def uploads(obj):
+        return [cmd for cmd in obj._glir.clear() if cmd[0] == 'DATA']
+
+    def vertices(n, value):
+        vertices = np.zeros(n, coll.vtype)
+        vertices['a_position'] = value
+        return vertices
+
+    for i in range(3):
+        coll.append(vertices(2, i), indices=[0, 1])
+    coll._update()
+    vbo = coll._vertices_buffer
+    ibo = coll._indices_buffer
+    tex = coll._uniforms_texture
+    capacity = len(coll._vertices_list._data)
+    assert vbo.size == capacity
+    assert not coll._need_update
+
+    # Appending within the capacity only uploads the new item
+    coll.append(vertices(2, 3), indices=[0, 1])
+    assert len(coll._vertices_list._data) == capacity
+    uploads(vbo), uploads(ibo), uploads(tex)
+    coll._update()
+    assert coll._vertices_buffer is vbo
+    cmds = uploads(vbo)
+    assert len(cmds) == 1
+    assert cmds[0][2] == 6 * vbo.itemsize
+    assert_array_equal(cmds[0][3]['a_position'], 3)
+    assert_array_equal(cmds[0][3]['collection_index'], 3)
+    cmds = uploads(ibo)
+    assert len(cmds) == 1
+    assert_array_equal(cmds[0][3], [6, 7])
+    assert len(uploads(tex)) == 1
+
+    # Nothing changed, nothing uploaded
+    coll._update()
+    assert uploads(vbo) == [] and uploads(ibo) == []
+
+    # Changing an item uploads its vertices only
+    coll[1]['a_position'] = 5
+    coll[1]['color'] = (1, 0, 0, 1)
+    coll._update()
+    cmds = uploads(vbo)
+    assert len(cmds) == 1 and cmds[0][2] == 2 * vbo.itemsize
+    assert_array_equal(cmds[0][3]['a_position'], 5)
+    assert_array_equal(coll['color'][1], (1, 0, 0, 1))
+
+    # Deleting an item moves the following ones
+    del coll[0]
+    coll._update()
+    cmds = uploads(vbo)
+    assert len(cmds) == 1 and cmds[0][2] == 0
+    assert_array_equal(cmds[0][3]['a_position'][:, 0], [5, 5, 2, 2, 3, 3])
+    assert_array_equal(cmds[0][3]['collection_index'], [0, 0, 1, 1, 2, 2])
+    assert_array_equal(uploads(ibo)[0][3], np.arange(6))
+    assert coll._draw_count() == 6
+
+    # Growing beyond the capacity reallocates
+    coll.append(vertices(2 * capacity, 0), itemsize=2)
+    coll._update()
+    assert vbo.size == len(coll._vertices_list._data) > capacity
+
+
+def test_view_after_update():
+    """Test that views made after an update use the uniforms texture
+    """
+    coll = PointCollection('raw', color='shared')
+    coll.append(np.zeros((2, 3)))
+    coll._update()
+    view = coll.view(None)
+    program = view._program
+    assert program['uniforms'] is coll._uniforms_texture
+    assert_array_equal(program['uniforms_shape'], coll._ushape)
+
+    # Updates that do not reallocate keep the binding
+    coll.append(np.ones((1, 3)))
+    coll._update()
+    assert program['uniforms'] is coll._uniforms_texture
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+from unittest import mock
+
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+from vispy import scene
+from vispy.visuals import InstancedMeshVisual
+from vispy.visuals.transforms import STTransform
+from vispy.testing import (TestingCanvas, requires_application,
+                           run_tests_if_main, assert_raises)
+
+vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], np.float32)
+faces = np.array([[0, 1, 2]], np.uint32)
+
+
+def _transforms(offsets):
+    return np.array([STTransform(translate=offset).as_matrix().matrix
+                     for offset in offsets])
+
+
+def _uploaded(vbo):
+    """Return the data most recently set on a buffer"""
+    data = [cmd[3] for cmd in vbo._glir.clear() if cmd[0] == 'DATA'][-1]
+    return data.ravel()['f0'] if data.dtype.names else data
+
+
+def test_instanced_mesh_cpu():
+    """Test the CPU fallback of the instanced mesh"""
+    transforms = _transforms([(0, 0, 0), (10, 0, 0), (0, 5, 1)])
+    colors = np.eye(4)[:3]
+    mesh = InstancedMeshVisual(vertices, faces,
+                               instance_transforms=transforms,
+                               instance_colors=colors)
+    assert mesh.bounds(0) == (0, 11)
+    assert mesh.bounds(1) == (0, 6)
+    assert mesh.bounds(2) == (0, 1)
+
+    mesh._prepare_draw(mesh)
+    assert mesh._instanced is False
+    pos = _uploaded(mesh._vertices)
+    assert_allclose(pos[:3], vertices)
+    assert_allclose(pos[3:6], vertices + (10, 0, 0))
+    assert_allclose(pos[6:], vertices + (0, 5, 1))
+    base_color = mesh.shared_program.vert['base_color']
+    assert_array_equal(_uploaded(base_color)[3:6], [colors[1]] * 3)
+
+    # Updating the transforms only expands the instances again
+    mesh.instance_transforms = transforms[:2]
+    assert mesh.instance_colors is None
+    mesh._prepare_draw(mesh)
+    assert len(_uploaded(mesh._vertices)) == 6
+
+    assert_raises(ValueError, mesh.set_instances, np.eye(4))
+    assert_raises(ValueError, mesh.set_instances, colors=np.ones((3, 4)))
+
+
+def test_instanced_mesh_gpu():
+    """Test that instances are bound as per-instance attributes"""
+    transforms = _transforms([(0, 0, 0), (10, 0, 0)])
+    mesh = InstancedMeshVisual(vertices, faces,
+                               instance_transforms=transforms,
+                               instance_colors=[(1, 0, 0, 1)] * 2,
+                               shading='flat')
+    with mock.patch('vispy.visuals.instanced_mesh._instancing_supported',
+                    return_value=True):
+        mesh._prepare_draw(mesh)
+    assert mesh._instanced is True
+    # The mesh itself is not expanded
+    assert mesh._vertices.size == 3
+    rows = mesh._instance_rows
+    assert all(row.divisor == 1 and row.size == 2 for row in rows)
+    assert_array_equal(_uploaded(rows[3]), [(0, 0, 0, 1), (10, 0, 0, 1)])
+    assert mesh.shared_program.vert['base_color'] is mesh._instance_color_vbo
+    mesh._program.build_if_needed()
+    code = mesh._program.shaders[0].code
+    assert 'instance_position(' in code and 'instance_normal(' in code
+    assert code.count('attribute vec4 instance_row') == 4
+    assert code.count('attribute vec3 instance_normal_row') == 3
+
+
+def test_instanced_mesh_normals():
+    """Test the normals of non-uniformly scaled instances"""
+    slanted = np.array([[0, 0, 0], [1, 0, 1], [0, 1, 0]], np.float32)
+    transforms = np.array([np.eye(4), np.diag([2., 1., 1., 1.])])
+    # The normal of the scaled face
+    expected = np.array([-1, 0, 2]) / np.sqrt(5)
+
+    mesh = InstancedMeshVisual(slanted, faces, shading='flat',
+                               instance_transforms=transforms)
+    mesh._prepare_draw(mesh)
+    normals = _uploaded(mesh._normals).reshape(-1, 3)
+    assert_allclose(normals[:3], [np.array([-1, 0, 1]) / np.sqrt(2)] * 3,
+                    rtol=1e-6)
+    assert_allclose(normals[3:], [expected] * 3, rtol=1e-6)
+
+    mesh = InstancedMeshVisual(slanted, faces, shading='flat',
+                               instance_transforms=transforms)
+    with mock.patch('vispy.visuals.instanced_mesh._instancing_supported',
+                    return_value=True):
+        mesh._prepare_draw(mesh)
+    rows = np.array([_uploaded(row).reshape(2, 3)
+                     for row in mesh._instance_normal_rows])
+    assert_allclose(rows[:, 1], np.diag([0.5, 1, 1]))
+    normal = np.array([-1, 0, 1]).dot(rows[:, 1])
+    assert_allclose(normal / np.linalg.norm(normal), expected)
+
+
+@requires_application()
+def test_instanced_mesh_draw():
+    """Test that instances are drawn like separate meshes"""
+    offsets = [(-0.5, -0.5, 0), (0.1, -0.2, 0), (-0.3, 0.2, 0)]
+    with TestingCanvas(size=(40, 40)) as c:
+        meshes = []
+        for offset in offsets:
+            mesh = scene.visuals.Mesh(vertices / 2, faces, color='red',
+                                      parent=c.scene)
+            mesh.transform = STTransform(scale=(20, 20, 1)) * \
+                STTransform(translate=offset)
+            meshes.append(mesh)
+        expected = c.render()
+        for mesh in meshes:
+            mesh.parent = None
+
+        mesh = scene.visuals.InstancedMesh(
+            vertices / 2, faces, color='red', parent=c.scene,
+            instance_transforms=_transforms(offsets))
+        mesh.transform = STTransform(scale=(20, 20, 1))
+        assert_array_equal(c.render(), expected)
+
+
+run_tests_if_main()
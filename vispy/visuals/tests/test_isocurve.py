@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from vispy.visuals import IsocurveVisual
+from vispy.testing import run_tests_if_main
+
+
+def test_isocurve_level_cache():
+    """Test that changing the levels only computes the new levels"""
+    x, y = np.ogrid[-1:1:40j, -1:1:30j]
+    data = x ** 2 + y ** 2
+    iso = IsocurveVisual(data=data, levels=[0.2, 0.5], color_lev='k')
+    iso._compute_iso_line()
+    cached = iso._level_cache[0.5]
+    n_02 = len(iso._level_cache[0.2][0])
+
+    iso.levels = [0.5, 0.8]
+    iso._compute_iso_line()
+    assert sorted(iso._level_cache) == [0.5, 0.8]
+    assert iso._level_cache[0.5] is cached
+    assert_array_equal(iso._li, [len(cached[0]),
+                                 len(iso._level_cache[0.8][0])])
+    assert len(iso._verts) == len(iso._connect) == sum(iso._li)
+
+    # New data drops the cache
+    iso.set_data(data * 2)
+    assert iso._level_cache == {}
+    iso.levels = [0.4, 1.]
+    iso._compute_iso_line()
+    assert len(iso._level_cache[0.4][0]) == n_02
+
+
+run_tests_if_main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Tests for LineVisual partial updates
+"""
+import numpy as np
+
+from vispy.visuals import LineVisual
+from vispy.testing import run_tests_if_main, assert_raises
+
+
+def _data_commands(buffer):
+    """Return (offset, n) for the DATA commands queued for a buffer"""
+    return [(cmd[2] // buffer.itemsize, len(cmd[3]))
+            for cmd in buffer._glir.clear() if cmd[0] == 'DATA']
+
+
+def test_line_update_range():
+    """Test updating a range of vertices of a line"""
+    pos = np.zeros((10, 2))
+    color = np.ones((10, 4))
+    line = LineVisual(pos=pos, color=color)
+    gl_line = line._line_visual
+    gl_line._prepare_draw(None)
+    pos_vbo, color_vbo = gl_line._pos_vbo, gl_line._color_vbo
+    pos_vbo._glir.clear()
+    color_vbo._glir.clear()
+
+    # Nothing changed: nothing is uploaded
+    gl_line._prepare_draw(None)
+    assert _data_commands(pos_vbo) == []
+    assert _data_commands(color_vbo) == []
+
+    assert line.bounds(0) == (0, 0)
+    line.update_range(2, pos=np.ones((3, 2)))
+    assert line.bounds(0) == (0, 1)
+    line.update_range(7, pos=np.ones((1, 2)), color=np.zeros((1, 4)))
+    gl_line._prepare_draw(None)
+    assert _data_commands(pos_vbo) == [(2, 3), (7, 1)]
+    assert _data_commands(color_vbo) == [(7, 1)]
+    assert line.pos[2:5].sum() == 6
+    assert (line.color[7] == 0).all()
+    # The arrays given by the user are not modified
+    assert pos.sum() == 0 and color.sum() == 40
+
+    assert_raises(ValueError, line.update_range, 8, pos=np.ones((3, 2)))
+    assert_raises(ValueError, line.update_range, 0, pos=np.ones((3, 2)),
+                  color=np.ones((2, 4)))
+    line.set_data(color='red')
+    assert_raises(ValueError, line.update_range, 0, color=np.ones((1, 4)))
+
+
+def test_line_append():
+    """Test using a line as ring buffer"""
+    line = LineVisual(pos=np.zeros((10, 2)))
+    gl_line = line._line_visual
+    gl_line._prepare_draw(None)
+    pos_vbo = gl_line._pos_vbo
+    pos_vbo._glir.clear()
+
+    line.append(np.ones((8, 2)))
+    gl_line._prepare_draw(None)
+    assert _data_commands(pos_vbo) == [(0, 8)]
+    assert gl_line._draw_mode == 'lines'
+    index = gl_line._ring_ibo._glir.clear()[-1][3].reshape(-1, 2)
+    assert tuple(index[7]) == (7, 7)  # newest and oldest are not connected
+    assert tuple(index[9]) == (9, 0)
+
+    line.append(np.full((4, 2), 2.))
+    gl_line._prepare_draw(None)
+    assert _data_commands(pos_vbo) == [(8, 2), (0, 2)]
+    assert (line.pos[[8, 9, 0, 1]] == 2).all()
+    # Only the two segments around the old and new seam are updated
+    assert _data_commands(gl_line._ring_ibo) == [(14, 2), (2, 2)]
+
+    # Appending more than fits keeps only the last vertices
+    line.append(np.arange(24.).reshape(12, 2))
+    assert line.pos[1, 0] == 22
+
+    line.set_data(pos=np.zeros((5, 2)))
+    gl_line._prepare_draw(None)
+    assert gl_line._draw_mode == 'line_strip'
+
+
+run_tests_if_main()
@@ -2,7 +2,7 @@
 import numpy as np
 from vispy.scene.visuals import Markers
 from vispy.testing import (requires_application, TestingCanvas,
-                           run_tests_if_main)
+                           run_tests_if_main, assert_raises)
 from vispy.testing.image_tester import assert_image_approved
 
 
@@ -26,4 +26,48 @@ def test_markers():
         assert_image_approved(c.render(), "visuals/markers.png")
 
 
+def _data_commands(vbo):
+    """Return (offset, n) for the DATA commands queued for a buffer"""
+    return [(cmd[2] // vbo.itemsize, len(cmd[3]))
+            for cmd in vbo._glir.clear() if cmd[0] == 'DATA']
+
+
+def test_markers_update_range():
+    """Test updating and appending markers without a full upload"""
+    marker = Markers()
+    marker.set_data(np.zeros((10, 2)), face_color='red')
+    vbo = marker._vbo
+    vbo._glir.clear()
+
+    assert marker.bounds(0) == (0, 0)
+    marker.update_range(3, pos=np.ones((2, 2)), size=5.)
+    assert marker.bounds(0) == (0, 1)
+    assert _data_commands(vbo) == [(3, 2)]
+    assert (marker._data['a_position'][3:5, :2] == 1).all()
+    assert (marker._data['a_size'][3:5] == 5).all()
+    assert (marker._data['a_size'][:3] == 10).all()
+
+    marker.update_range(0, size=np.arange(3.), face_color='blue')
+    assert _data_commands(vbo) == [(0, 3)]
+    assert (marker._data['a_bg_color'][:3] == (0, 0, 1, 1)).all()
+    assert (marker._data['a_bg_color'][3] == (1, 0, 0, 1)).all()
+
+    assert_raises(ValueError, marker.update_range, 9, pos=np.ones((2, 2)))
+    assert_raises(ValueError, marker.update_range, 0, size=1.)
+
+    # Appending wraps around and uploads at most two ranges
+    marker.append(np.full((8, 2), 2.))
+    assert _data_commands(vbo) == [(0, 8)]
+    marker.append(np.full((4, 2), 3.), size=4.)
+    assert _data_commands(vbo) == [(8, 2), (0, 2)]
+    assert (marker._data['a_position'][[8, 9, 0, 1], 0] == 3).all()
+    assert (marker._data['a_size'][[8, 9, 0, 1]] == 4).all()
+    assert (marker._data['a_position'][2:8, 0] == 2).all()
+
+    # Appending more than fits keeps only the last markers
+    marker.append(np.arange(24.).reshape(12, 2))
+    assert _data_commands(vbo) == [(2, 8), (0, 2)]
+    assert marker._data['a_position'][1, 0] == 22
+
+
 run_tests_if_main()
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import numpy as np
+from numpy.testing import assert_allclose
 
 from vispy.scene.visuals import Spectrogram
 from vispy.testing import (requires_application, TestingCanvas,
@@ -39,4 +40,48 @@ def test_spectrogram():
         with raises(ValueError):
             spec.color_scale = 'line_log'
 
+
+def test_spectrogram_append():
+    """Test adding samples to a spectrogram"""
+    from vispy.visuals import SpectrogramVisual
+    np.random.seed(0)
+    x = np.random.normal(size=64 * 40)
+    full = SpectrogramVisual(x, n_fft=64, step=32, color_scale='linear')
+
+    # Without max_frames, all frames are kept
+    spec = SpectrogramVisual(x[:100], n_fft=64, step=32,
+                             color_scale='linear')
+    for i in range(100, len(x), 50):
+        spec.append(x[i:i + 50])
+    assert_allclose(spec._data, full._data)
+
+    # With max_frames, the last frames are kept in a ring buffer
+    spec = SpectrogramVisual(n_fft=64, step=32, color_scale='linear',
+                             max_frames=20, clim=(0, 1))
+    assert spec._data is None
+    for i in range(0, len(x), 70):
+        spec.append(x[i:i + 70])
+    head = spec._n_frames % 20
+    assert_allclose(np.roll(spec._data, -head, axis=1), full._data[:, -20:],
+                    rtol=1e-5, atol=1e-6)
+    assert spec._scroll['offset'].value == head / 20.
+
+    # Only the new columns are uploaded, in two parts when they wrap
+    spec._build_texture()
+    spec._texture._glir.clear()
+    spec.append(x[:32 * (20 - head + 2)])
+    commands = [(cmd[2], cmd[3].shape[1])
+                for cmd in spec._texture._glir.clear() if cmd[0] == 'DATA']
+    assert commands == [((0, head), 20 - head), ((0, 0), 2)]
+    assert spec._scroll['offset'].value == 2 / 20.
+    assert not spec._need_texture_upload
+
+    # Frames outside of the automatic color limits need a new texture
+    spec = SpectrogramVisual(x, n_fft=64, step=32, max_frames=20)
+    spec._build_texture()
+    spec.append(100 * x[:64])
+    assert spec._need_texture_upload
+    assert spec.clim == 'auto'
+
+
 run_tests_if_main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+
+from vispy.visuals import SurfacePlotVisual
+from vispy.testing import run_tests_if_main, assert_raises
+
+
+def _uploads(obj):
+    """Return the GLIR DATA commands of a buffer or texture"""
+    return [cmd for cmd in obj._glir.clear() if cmd[0] == 'DATA']
+
+
+def test_surface_plot_heightfield():
+    """Test that heightfield updates only upload the heights"""
+    x = np.linspace(0, 2, 4) ** 2
+    y = np.linspace(-1, 1, 3)
+    z = np.random.RandomState(0).rand(4, 3)
+    surface = SurfacePlotVisual(x=x, y=y, z=z, heightfield=True)
+    surface._prepare_draw(surface)
+    assert surface.heightfield
+    assert_allclose(surface.bounds(0), (0, 4))
+    assert_allclose(surface.bounds(2), (z.min(), z.max()), rtol=1e-6)
+
+    # x, y and the texture coordinates of the heights
+    grid = _uploads(surface._grid)[-1][3]['f0'].reshape(4, 3, 4)
+    assert_allclose(grid[..., 0], np.broadcast_to(x[:, None], (4, 3)))
+    assert_allclose(grid[2, 1, 2:], (0.5, 0.625))
+    tangents = _uploads(surface._tangents)[-1][3]['f0'].reshape(4, 3, 4)
+    assert_allclose(tangents[0, 0, :2], (x[1] - x[0], 0))
+    assert_allclose(tangents[1, 1, 2:], (0, 2))
+    assert surface._index_buffer.size == 3 * 2 * 2 * 3
+
+    # Updating z uploads the texture, not the vertices
+    _uploads(surface._z_texture)
+    surface.set_data(z=z + 1)
+    surface._prepare_draw(surface)
+    assert len(_uploads(surface._z_texture)) == 1
+    assert _uploads(surface._grid) == []
+    assert_allclose(surface.bounds(2), (z.min() + 1, z.max() + 1),
+                    rtol=1e-6)
+
+    # A rectangle of z is uploaded at its offset
+    surface.set_z(np.full((2, 2), 10.), offset=(1, 1))
+    cmds = _uploads(surface._z_texture)
+    assert len(cmds) == 1
+    assert cmds[0][2] == (1, 1)
+    assert_array_equal(cmds[0][3], 10)
+    assert surface.bounds(2)[1] == 10
+    assert_raises(ValueError, surface.set_z, np.zeros((2, 2)), (3, 0))
+
+    # A new grid shape rebuilds the vertices
+    surface.set_data(x=np.arange(5), z=np.zeros((5, 3)))
+    surface._prepare_draw(surface)
+    assert len(_uploads(surface._grid)) == 1
+
+    assert_raises(ValueError, SurfacePlotVisual, z=z, heightfield=True,
+                  shading='flat')
+
+
+def test_surface_plot_set_z():
+    """Test updating a rectangle of z without heightfield"""
+    z = np.zeros((4, 3))
+    surface = SurfacePlotVisual(z=z)
+    surface.set_z(np.ones((1, 2)), offset=(2, 1))
+    vertices = surface.mesh_data.get_vertices().reshape(4, 3, 3)
+    assert_array_equal(vertices[..., 2], [[0, 0, 0], [0, 0, 0], [0, 1, 1],
+                                          [0, 0, 0]])
+    assert_array_equal(z, 0)
+
+
+run_tests_if_main()
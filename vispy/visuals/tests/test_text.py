@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import threading
+
 import numpy as np
+import pytest
 from numpy.testing import assert_allclose
 
 from vispy.scene.visuals import Text
 from vispy.testing import (requires_application, TestingCanvas,
                            run_tests_if_main)
 from vispy.testing.image_tester import assert_image_approved
+from vispy.visuals.text.text import (GlyphAtlas, SDFRendererCPU,
+                                     TextureFont, _text_to_vbo)
 
 
 @requires_application()
@@ -82,4 +87,137 @@ def test_face_bold_italic():
         assert font1 is font4
 
 
+class _FakeFont(TextureFont):
+    """Font with made-up glyph metrics, so that no font library is needed.
+    Each glyph is 4 pixels wider than its advance and kerning is -1.
+    """
+
+    def __init__(self, atlas=None):
+        TextureFont.__init__(self, dict(face='fake', bold=False,
+                                        italic=False), SDFRendererCPU(), atlas)
+
+    def _load_glyph(self, char, glyphs):
+        # Metrics are at the high-res size, like those of the font files
+        advance = 8. * self.ratio if char == ' ' else 12. * self.ratio
+        glyph = dict(advance=advance, offset=(0., 10. * self.ratio),
+                     bitmap=np.zeros((10 * self.ratio, 12 * self.ratio),
+                                     np.uint8), kerning={})
+        glyphs[char] = glyph
+        for other, other_glyph in glyphs.items():
+            glyph['kerning'][other] = -self.ratio
+            other_glyph['kerning'][char] = -self.ratio
+
+
+def test_text_to_vbo():
+    """Test the layout of glyphs"""
+    font = _FakeFont()
+    slop = font.slop
+    vertices = _text_to_vbo(['ab', 'c\nd\te', ''], font, 'left', 'baseline',
+                            1.)
+    assert len(vertices) == 4 * 7
+    pos = vertices['a_position'].reshape(-1, 4, 2)
+    # Glyphs advance 12 pixels minus 1 for kerning; the SDF border extends
+    # them by slop on each side
+    assert_allclose(pos[:2, 0], [[-slop, 10 + slop], [11 - slop, 10 + slop]])
+    assert_allclose(pos[1, 2], [11 + 12 + slop, -slop])
+    # Each string starts again at the origin
+    assert_allclose(pos[2, 0], [-slop, 10 + slop])
+    # The escape characters have no glyph
+    assert (np.ptp(pos[[3, 5]], axis=1) == 0).all()
+    assert (vertices['a_texcoord'].reshape(-1, 4, 2)[[3, 5]] == 0).all()
+    # A new line is lower by 1.5 times the line height; kerning continues
+    line = 1.5 * 10
+    assert_allclose(pos[4, 0], [-slop - 1, 10 + slop - line])
+    # A tab is 4 spaces
+    assert_allclose(pos[6, 0], [-slop + 11 + 4 * 8 - 1, 10 + slop - line])
+
+    # Horizontal anchors apply per line, vertical anchors per string
+    right = _text_to_vbo('c\nde', font, 'right', 'bottom', 1.)
+    right = right['a_position'].reshape(-1, 4, 2)
+    left = _text_to_vbo('c\nde', font, 'left', 'bottom', 1.)
+    left = left['a_position'].reshape(-1, 4, 2)
+    assert_allclose(right[0, :, 0] - left[0, :, 0], -12)
+    assert_allclose(right[2:, :, 0] - left[2:, :, 0], -11 - 11)
+    assert_allclose(right[..., 1], left[..., 1])
+    # anchor_y='bottom' moves the ascender of the glyphs to the anchor
+    assert_allclose(left[0, 0, 1], slop)
+
+    # Font sizes are relative to lowres_size
+    half = _text_to_vbo('ab', font, 'left', 'baseline', 2.)
+    assert_allclose(half['a_position'] * 2, vertices['a_position'][:8])
+
+
+def test_glyph_atlas():
+    """Test growing the glyph atlas and evicting glyphs"""
+    # Glyphs take 30x28 pixels with the border, so 4 fit in 64x64
+    atlas = GlyphAtlas(size=32, max_size=64)
+    font = _FakeFont(atlas)
+    other = _FakeFont(atlas)
+    font.glyph_indices('ab')
+    assert atlas.texture.shape[:2] == (64, 64)
+    assert atlas.generation == 1  # the glyphs moved
+    other.glyph_indices('ab')
+    assert len(atlas) == 4
+    assert atlas.stats['occupancy'] == 4 * 30 * 28 / 64. ** 2
+    assert atlas.misses == 4 and atlas.evictions == 0
+
+    # The least recently used half is evicted to make room
+    font.glyph_indices('a')
+    font.glyph_indices('c')
+    assert atlas.evictions == 2 and atlas.generation == 2
+    assert len(atlas) == 3
+    assert (font, 'a') in atlas and (other, 'b') in atlas
+    assert (font, 'b') not in atlas and (other, 'a') not in atlas
+    # Evicted glyphs have no texcoords until they are used again
+    texcoords = font.metrics['texcoords']
+    assert (texcoords[font._glyph_index['b']] == 0).all()
+    assert (texcoords[font.glyph_indices('ac')] > 0).all()
+    index = other.glyph_indices('a')
+    assert (other.metrics['texcoords'][index] > 0).all()
+    assert atlas.misses == 6
+
+    # Glyphs that are used together are never evicted for each other
+    with pytest.raises(RuntimeError):
+        font.glyph_indices('abcde')
+
+
+def test_prewarm():
+    """Test loading glyphs in a background thread"""
+    font = _FakeFont()
+    font.prewarm('abcab').join()
+    assert sorted(font._prerendered) == ['a', 'b', 'c']
+    font.glyph_indices('ab')
+    assert sorted(font._prerendered) == ['c']
+    assert font.atlas.misses == 2
+
+
+def test_prewarm_glyphs_complete():
+    """Test that glyphs being loaded in a thread are not seen unfinished"""
+    loading = threading.Event()
+    resume = threading.Event()
+
+    class _SlowFont(_FakeFont):
+        def _load_glyph(self, char, glyphs):
+            _FakeFont._load_glyph(self, char, glyphs)
+            if char == 'b':
+                loading.set()
+                resume.wait(10.)
+
+    font = _SlowFont()
+    font.glyph_indices('a')
+    thread = font.prewarm('b')
+    assert loading.wait(10.)
+    try:
+        # The glyphs in use are not modified while 'b' is loaded
+        assert 'b' not in font._glyphs
+        assert 'b' not in font['a']['kerning']
+    finally:
+        resume.set()
+    thread.join()
+    assert font._glyphs['b']['size'] == font._glyphs['a']['size']
+    assert font['a']['kerning']['b'] == -font.ratio
+    assert_allclose(font.kerning([0], [font.glyph_indices('b')[0]]),
+                    [-font.ratio])
+
+
 run_tests_if_main()
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import os.path as op
+
+import numpy as np
+
+from vispy.gloo import Texture2D
+from vispy.util import _TempDir
+from vispy.testing import run_tests_if_main, raises
+from vispy.visuals.tiled_image import (build_pyramid, _TileCache,
+                                       TiledImageVisual)
+from vispy.visuals.transforms import STTransform
+
+temp_dir = _TempDir()
+
+
+class _Transforms(object):
+    """Transforms of a view that shows the image with a linear transform"""
+
+    def __init__(self, render, framebuffer):
+        self._transforms = dict(render=render, framebuffer=framebuffer)
+
+    def get_transform(self, map_from='visual', map_to='render'):
+        return self._transforms[map_to]
+
+
+class _View(object):
+    def __init__(self, render, framebuffer):
+        self.transforms = _Transforms(render, framebuffer)
+
+
+def test_build_pyramid():
+    image = np.arange(7 * 5, dtype=np.uint8).reshape(7, 5)
+    levels = build_pyramid(image, min_size=2, chunk_rows=3)
+    assert [level.shape for level in levels] == [(7, 5), (4, 3), (2, 2)]
+    assert levels[0] is image
+    assert levels[1].dtype == np.uint8
+    assert levels[1][0, 0] == np.round(image[:2, :2].mean())
+    # Odd sizes repeat the last row and column
+    assert levels[1][3, 2] == image[6, 4]
+
+    rgb = np.random.rand(8, 8, 3).astype(np.float32)
+    levels = build_pyramid(rgb, min_size=4)
+    assert levels[1].shape == (4, 4, 3)
+    assert np.allclose(levels[1][1, 2], rgb[2:4, 4:6].mean(axis=(0, 1)))
+    assert not isinstance(levels[1], np.memmap)
+
+    # Levels of images that are not in memory are stored on disk
+    fname = op.join(temp_dir, 'image.npy')
+    np.save(fname, rgb)
+    levels = build_pyramid(np.load(fname, mmap_mode='r'), min_size=2)
+    assert all(isinstance(level, np.memmap) for level in levels[1:])
+    assert np.allclose(levels[1][1, 2], rgb[2:4, 4:6].mean(axis=(0, 1)))
+    levels = build_pyramid(rgb, min_size=2, on_disk=temp_dir)
+    assert np.allclose(np.load(op.join(temp_dir, 'level2.npy')),
+                       levels[2])
+    assert np.allclose(levels[2][0, 0], rgb[:4, :4].mean(axis=(0, 1)))
+
+
+def test_tile_cache():
+    cache = _TileCache(Texture2D((1, 1)), 4, 3 * 6 ** 2)
+    cache.reset(1)
+    assert cache.n_slots == 3
+    assert cache.atlas.shape == (6, 18, 1)
+
+    def load(key):
+        return np.zeros((6, 6), np.float32)
+
+    assert not cache.update([(0, 0, 0), (0, 0, 1)], load)
+    assert cache.slot_rect((0, 0, 1)) == (7 / 18, 1 / 6, 4 / 18, 4 / 6)
+    assert cache.slot_rect((0, 1, 1)) is None
+    # The least recently used tile that is not wanted is evicted
+    assert not cache.update([(0, 1, 1), (0, 2, 2), (0, 0, 0)], load)
+    assert cache.resident == [(0, 0, 0), (0, 1, 1), (0, 2, 2)]
+    cache.clear()
+    cache.max_uploads = 2
+    assert cache.update([(0, 0, 0), (0, 1, 1), (0, 2, 2)], load)
+
+    with raises(ValueError):
+        _TileCache(Texture2D((1, 1)), 4, 10).reset(1)
+
+
+def test_tiled_image():
+    image = (np.arange(1000 * 700) % 251).astype(np.uint8).reshape(1000, 700)
+    tiled = TiledImageVisual(image, tile_size=64, gpu_budget=128 * 66 ** 2)
+    assert [level.shape for level in tiled.levels] == \
+        [(1000, 700), (500, 350), (250, 175), (125, 88), (63, 44)]
+    assert tiled.size == (700, 1000)
+    tiled._build_texture()
+    assert tuple(tiled.clim) == (0, 250)
+
+    # Tiles are read with a border and normalized with the clims
+    tile = tiled._load_tile((0, 1, 2))
+    assert tile.shape == (66, 66)
+    assert np.allclose(tile[1:-1, 1:-1] * 250, image[64:128, 128:192])
+
+    # Whole image on 350 framebuffer pixels wide: level 1
+    view = _View(STTransform(scale=(2 / 700, 2 / 1000), translate=(-1, -1)),
+                 STTransform(scale=(0.5, 0.5)))
+    level, tiles = tiled._visible_tiles(view)
+    assert level == 1
+    assert len(tiles) == 8 * 6
+    # Until they are loaded, the coarsest tile is drawn in place of others
+    tiled._cache.max_uploads = 8
+    assert tiled._update_tiles(view)
+    assert tiled._tile_key[0] == (4, 0, 0)
+    for _ in range(10):
+        tiled._update_tiles(view)
+    # Once loaded, only the tiles of the level are drawn
+    assert tiled._tile_key == sorted(tiles)
+    assert tiled._subdiv_position.size == 6 * len(tiles)
+
+    # Zoomed in on the bottom-left corner: level 0, few tiles
+    view = _View(STTransform(scale=(2 / 100, 2 / 100), translate=(-1, -1)),
+                 STTransform(scale=(4, 4)))
+    level, tiles = tiled._visible_tiles(view)
+    assert level == 0
+    assert sorted(tiles) == [(0, r, c) for r in range(2) for c in range(2)]
+
+    with raises(ValueError):
+        TiledImageVisual(image, interpolation='bicubic')
+
+
+run_tests_if_main()
@@ -2,6 +2,9 @@
 
 import numpy as np
 from vispy import scene
+from vispy.gloo import Texture3D
+from vispy.visuals.transforms import STTransform
+from vispy.visuals.volume import _BrickCache
 
 from vispy.testing import (TestingCanvas, requires_application,
                            run_tests_if_main, requires_pyopengl,
@@ -132,4 +135,106 @@ def test_set_data_does_not_change_input():
     assert not np.allclose(vol, vol2)
 
 
+def test_brick_cache():
+    vol = np.arange(10 * 10 * 10, dtype='float32').reshape(10, 10, 10)
+    # Room for three bricks of 4 voxels with their border
+    cache = _BrickCache(Texture3D((1, 1, 1)), 4, 3 * 6 ** 3)
+    cache.reset(vol.shape)
+    assert cache.grid_shape == (3, 3, 3)
+    assert cache.n_slots == 3
+    assert cache.atlas.shape[:3] == (6, 6, 18)
+
+    # Bricks include the neighbouring voxels, or repeat the edge ones
+    brick = cache.read_brick(vol, (0, 1, 2))
+    assert brick.shape == (6, 6, 6)
+    assert np.array_equal(brick[1:5, 1:5, 1:3], vol[0:4, 4:8, 8:10])
+    assert np.array_equal(brick[0], brick[1])
+    assert np.array_equal(brick[1:5, 0, 1:3], vol[0:4, 3, 8:10])
+
+    loaded = []
+
+    def load(index):
+        loaded.append(index)
+        return cache.read_brick(vol, index)
+
+    assert not cache.update([(0, 0, 0), (0, 0, 1)], load)
+    assert loaded == [(0, 0, 0), (0, 0, 1)]
+    assert cache._table[0, 0, 0, 3] == cache._table[0, 0, 1, 3] == 255
+    assert tuple(cache._table[0, 0, 1, :3]) == (1, 0, 0)
+
+    # The least recently used brick that is not visible is evicted
+    assert not cache.update([(1, 1, 1), (2, 2, 2), (0, 0, 0)], load)
+    assert loaded[2:] == [(1, 1, 1), (2, 2, 2)]
+    assert cache.resident == [(0, 0, 0), (1, 1, 1), (2, 2, 2)]
+    assert cache._table[0, 0, 1, 3] == 0
+    # Visible bricks that do not fit are skipped
+    assert not cache.update([(0, 0, 0), (1, 1, 1), (2, 2, 2), (0, 1, 0)],
+                            load)
+    assert (0, 1, 0) not in cache.resident
+
+    # Uploads per update are limited
+    cache.clear()
+    cache.max_uploads = 2
+    assert cache.update([(0, 0, 0), (1, 1, 1), (2, 2, 2)], load)
+    assert len(cache.resident) == 2
+
+
+def test_brick_cache_visible_bricks():
+    cache = _BrickCache(Texture3D((1, 1, 1)), 8, 2 ** 20)
+    cache.reset((40, 30, 20))
+    assert len(cache.visible_bricks(STTransform(scale=(0.01,) * 3))) == 60
+    # Voxels 15-35 along each axis are in view, nearest first
+    tr = STTransform(scale=(0.1,) * 3, translate=(-2.5,) * 3)
+    bricks = cache.visible_bricks(tr)
+    assert sorted(bricks) == [(z, y, x) for z in range(1, 5)
+                              for y in range(1, 4) for x in range(1, 3)]
+    assert [b[0] for b in bricks] == sorted(b[0] for b in bricks)
+
+
+def test_volume_bricked(tmpdir):
+    fname = str(tmpdir.join('volume.dat'))
+    vol = np.memmap(fname, dtype='uint16', mode='w+', shape=(20, 30, 40))
+    vol[:] = np.arange(vol.size).reshape(vol.shape) % 1000
+    V = scene.visuals.Volume(vol, brick_size=16, gpu_budget=4 * 18 ** 3)
+    assert V.bricked
+    assert V.clim == (0, 999)
+    assert V._bricks.n_slots == 4
+    # Bricks are read and normalized on demand
+    brick = V._load_brick((1, 1, 2))
+    assert brick.shape == (18, 18, 18)
+    assert np.allclose(brick[1:5, 1:15, 1:9] * 999, vol[16:, 16:30, 32:])
+
+    with raises(ValueError):
+        scene.visuals.Volume(vol, brick_size=16, gpu_budget=100)
+    with raises(ValueError):
+        scene.visuals.Volume(vol, brick_size=16, emulate_texture=True)
+    with raises(ValueError):
+        V.set_data(np.zeros((20, 20), 'float32'))
+
+
+def test_volume_gpu_clim():
+    vol = np.random.randint(0, 4000, (10, 12, 14)).astype(np.uint16)
+    V = scene.visuals.Volume(vol, clim=(0, 2000), texture_format='auto')
+    # Uploaded unchanged, into a 16-bit texture
+    assert V._tex._internalformat == 'r16'
+    data = [cmd[3] for cmd in V._tex._glir.clear() if cmd[0] == 'DATA']
+    assert data[-1].dtype == np.uint16
+    assert np.array_equal(data[-1].reshape(vol.shape), vol)
+    assert np.allclose(V.clim_normalized, (0, 2000 / 65535.))
+
+    # Changing the contrast limits does not upload the data again
+    V.clim = (100, 4000)
+    assert not any(cmd[0] == 'DATA' for cmd in V._tex._glir.clear())
+    assert np.allclose(V.clim_normalized, (100 / 65535., 4000 / 65535.))
+
+    V.set_data(vol.astype(np.float64))
+    assert V._tex._internalformat == 'r32f'
+    data = [cmd[3] for cmd in V._tex._glir.clear() if cmd[0] == 'DATA']
+    assert data[-1].dtype == np.float32
+    assert np.allclose(V.clim_normalized, (100, 4000))
+
+    with raises(ValueError):
+        scene.visuals.Volume(vol, texture_format='r16')
+
+
 run_tests_if_main()
@@ -10,9 +10,12 @@
 from __future__ import division
 
 
-import numpy as np
+import threading
+import weakref
+from collections import OrderedDict
 from copy import deepcopy
-import sys
+
+import numpy as np
 
 from ._sdf_gpu import SDFRendererGPU
 from ._sdf_cpu import _calc_distance_field
@@ -26,6 +29,141 @@ from ..visual import Visual
 from ...io import load_spatial_filters
 
 
+class GlyphAtlas(object):
+    """Texture with the SDFs of glyphs, which can be shared by several fonts
+
+    Glyphs are packed in a `TextureAtlas`. When it is full, its size is
+    doubled up to ``max_size``; after that, the least recently used glyphs
+    are evicted and rendered again when they are needed. Both cases
+    repack the glyphs, which moves them in the texture, so ``generation``
+    is incremented and text that was laid out before must be laid out
+    again.
+
+    Parameters
+    ----------
+    size : int
+        Initial width and height of the texture.
+    max_size : int
+        Maximum width and height of the texture.
+    """
+    def __init__(self, size=1024, max_size=4096):
+        self.texture = TextureAtlas((size, size), dtype=np.uint8)
+        self.texture.wrapping = 'clamp_to_edge'
+        self._max_size = max_size
+        # Regions of the glyphs, least recently used first
+        self._regions = OrderedDict()
+        self._renders = {}
+        self.generation = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._regions
+
+    def __len__(self):
+        return len(self._regions)
+
+    @property
+    def occupancy(self):
+        """Fraction of the texture that is used by glyphs"""
+        area = sum((w + 2) * (h + 2) for _, _, w, h in self._regions.values())
+        return area / float(self.texture.shape[0] * self.texture.shape[1])
+
+    @property
+    def stats(self):
+        """Dict with the size, number of glyphs, occupancy and counters"""
+        return dict(shape=self.texture.shape[:2], glyphs=len(self),
+                    occupancy=self.occupancy, misses=self.misses,
+                    evictions=self.evictions, generation=self.generation)
+
+    def add(self, key, size, render, keep=()):
+        """Allocate a region for a glyph and render it
+
+        Parameters
+        ----------
+        key : hashable
+            Key of the glyph.
+        size : tuple of int
+            Size (w, h) of the glyph.
+        render : callable
+            Function ``render(texture, offset)`` that renders the glyph into
+            the texture. It is called again when the glyph is moved.
+        keep : container
+            Keys of glyphs that must not be evicted to make room.
+        """
+        self.misses += 1
+        self._regions.pop(key, None)
+        region = self._allocate(size)
+        if region is None:
+            region = self._make_room(size, keep)
+        self._regions[key] = region
+        self._renders[key] = render
+        render(self.texture, region[:2])
+
+    def touch(self, keys):
+        """Mark glyphs as recently used"""
+        for key in keys:
+            if key in self._regions:
+                self._regions.move_to_end(key)
+
+    def texcoords(self, keys):
+        """Return the (u0, v0, u1, v1) texture coordinates of glyphs, which
+        are zero for glyphs that are not in the atlas
+        """
+        height, width = self.texture.shape[:2]
+        texcoords = np.zeros((len(keys), 4), np.float32)
+        for i, key in enumerate(keys):
+            if key in self._regions:
+                x, y, w, h = self._regions[key]
+                texcoords[i] = (x / width, y / height,
+                                (x + w) / width, (y + h) / height)
+        return texcoords
+
+    def _allocate(self, size):
+        # Keep a border of 1 pixel around each glyph
+        region = self.texture.get_free_region(size[0] + 2, size[1] + 2)
+        if region is None:
+            return None
+        x, y, w, h = region
+        return x + 1, y + 1, w - 2, h - 2
+
+    def _make_room(self, size, keep):
+        while True:
+            shape = self.texture.shape[0]
+            if shape < self._max_size:
+                self._repack(min(2 * shape, self._max_size))
+            else:
+                evictable = [key for key in self._regions if key not in keep]
+                if not evictable:
+                    raise RuntimeError('Cannot store glyph')
+                # Evict the least recently used half
+                for key in evictable[:max(len(evictable) // 2, 1)]:
+                    del self._regions[key]
+                    del self._renders[key]
+                    self.evictions += 1
+                self._repack(shape)
+            region = self._allocate(size)
+            if region is not None:
+                return region
+
+    def _repack(self, size):
+        """Clear the texture and render the glyphs again, tallest first"""
+        self.texture.reset((size, size))
+        regions = self._regions
+        moved = {}
+        for key in sorted(regions, key=lambda key: -regions[key][3]):
+            moved[key] = self._allocate(regions[key][2:])
+        for key in regions:
+            if moved[key] is None:
+                del self._renders[key]
+                self.evictions += 1
+        self._regions = OrderedDict((key, moved[key]) for key in regions
+                                    if moved[key] is not None)
+        for key, region in self._regions.items():
+            self._renders[key](self.texture, region[:2])
+        self.generation += 1
+
+
 class TextureFont(object):
     """Gather a set of glyphs relative to a given font name and size
 
@@ -43,11 +181,12 @@ class TextureFont(object):
         Dict with entries "face", "size", "bold", "italic".
     renderer : instance of SDFRenderer
         SDF renderer to use.
+    atlas : instance of GlyphAtlas | None
+        The atlas to store the glyphs in. If None, the font gets its own.
 
     """
-    def __init__(self, font, renderer):
-        self._atlas = TextureAtlas(dtype=np.uint8)
-        self._atlas.wrapping = 'clamp_to_edge'
+    def __init__(self, font, renderer, atlas=None):
+        self._atlas = GlyphAtlas() if atlas is None else atlas
         self._kernel, _ = load_spatial_filters()
         self._renderer = renderer
         self._font = deepcopy(font)
@@ -62,6 +201,16 @@ class TextureFont(object):
         self._spread = 32
         assert self._spread % self.ratio == 0
         self._glyphs = {}
+        # Metrics of the loaded glyphs as arrays, for vectorized layout
+        self._glyph_index = {}
+        self._glyph_chars = []
+        self._metrics = None
+        self._metrics_generation = None
+        # Glyphs that must stay in the atlas while loading others
+        self._keep = ()
+        # SDFs computed by prewarm(), which only need to be uploaded
+        self._prerendered = {}
+        self._lock = threading.Lock()
 
     @property
     def ratio(self):
@@ -73,13 +222,135 @@ class TextureFont(object):
         """Extra space along each glyph edge due to SDF borders"""
         return self._spread // self.ratio
 
+    @property
+    def atlas(self):
+        """The GlyphAtlas that stores the glyphs"""
+        return self._atlas
+
     def __getitem__(self, char):
         if not (isinstance(char, str) and len(char) == 1):
             raise TypeError('index must be a 1-character string')
-        if char not in self._glyphs:
+        if char not in self._glyphs or (self, char) not in self._atlas:
             self._load_char(char)
+        if char not in self._glyph_index:
+            self._glyph_index[char] = len(self._glyph_chars)
+            self._glyph_chars.append(char)
+            self._metrics = None
         return self._glyphs[char]
 
+    def has_glyphs(self, chars):
+        """Whether all of *chars* are loaded and stored in the atlas"""
+        return all(char in self._glyph_index and (self, char) in self._atlas
+                   for char in chars)
+
+    def glyph_indices(self, chars):
+        """Return the index of each of *chars* in the ``metrics`` arrays,
+        loading glyphs as needed
+        """
+        chars = list(chars)
+        keys = [(self, char) for char in chars]
+        if not self.has_glyphs(chars):
+            self._keep = set(keys)
+            try:
+                for char in chars:
+                    if not self.has_glyphs(char):
+                        self[char]
+            finally:
+                self._keep = ()
+        self._atlas.touch(keys)
+        return np.array([self._glyph_index[char] for char in chars], int)
+
+    @property
+    def metrics(self):
+        """Dict of arrays with the advance, offset, size and texcoords of
+        the loaded glyphs, in the order of ``glyph_indices``
+        """
+        if self._metrics is None or \
+                self._metrics_generation != self._atlas.generation:
+            chars = self._glyph_chars
+            glyphs = [self._glyphs[char] for char in chars]
+            texcoords = self._atlas.texcoords([(self, c) for c in chars])
+            self._metrics = dict(
+                advance=np.array([g['advance'] for g in glyphs], float),
+                offset=np.array([g['offset'] for g in glyphs],
+                                float).reshape(-1, 2),
+                size=np.array([g['size'] for g in glyphs],
+                              float).reshape(-1, 2),
+                texcoords=texcoords)
+            self._metrics_generation = self._atlas.generation
+        return self._metrics
+
+    def kerning(self, prev, index):
+        """Return the kerning between pairs of glyphs given by indices"""
+        chars = self._glyph_chars
+        return np.array([self._glyphs[chars[i]]['kerning'].get(chars[p], 0.)
+                         for p, i in zip(prev, index)], float)
+
+    def prewarm(self, chars):
+        """Load glyphs in a background thread
+
+        The glyphs are read from the font file and, with the CPU renderer,
+        their SDFs are computed, so that using them later only requires an
+        upload to the atlas.
+
+        Parameters
+        ----------
+        chars : str
+            The characters to load.
+
+        Returns
+        -------
+        thread : instance of threading.Thread
+            The started thread.
+        """
+        chars = [char for char in dict.fromkeys(chars)
+                 if char not in self._glyphs]
+        thread = threading.Thread(target=self._prewarm, args=(chars,))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _prewarm(self, chars):
+        for char in chars:
+            self._read_glyph(char)
+            if isinstance(self._renderer, SDFRendererCPU):
+                sdf = self._renderer.render(self._padded_bitmap(char),
+                                            self._glyphs[char]['size'])
+                with self._lock:
+                    if (self, char) not in self._atlas:
+                        self._prerendered[char] = sdf
+
+    def _read_glyph(self, char):
+        """Read the bitmap and metrics of a glyph from the font file
+
+        The glyph is loaded into a copy of the glyphs, which then replaces
+        them, so that other threads never see a glyph without its size or
+        kerning.
+        """
+        with self._lock:
+            if char in self._glyphs:
+                return
+            # Loading a glyph adds its kerning to the other glyphs too
+            glyphs = dict((other, dict(glyph, kerning=dict(glyph['kerning'])))
+                          for other, glyph in self._glyphs.items())
+            self._load_glyph(char, glyphs)
+            # Size of the stored glyph, scaled down with the SDF border
+            height, width = glyphs[char]['bitmap'].shape
+            glyphs[char]['size'] = ((width + 2 * self._spread) // self.ratio,
+                                    (height + 2 * self._spread) // self.ratio)
+            self._glyphs = glyphs
+
+    def _load_glyph(self, char, glyphs):
+        """Load a glyph and its kerning with the other *glyphs* into them"""
+        _load_glyph(self._font, char, glyphs)
+
+    def _padded_bitmap(self, char):
+        bitmap = self._glyphs[char]['bitmap']
+        data = np.zeros((bitmap.shape[0] + 2*self._spread,
+                         bitmap.shape[1] + 2*self._spread), np.uint8)
+        data[self._spread:-self._spread, self._spread:-self._spread] = bitmap
+        return data
+
     def _load_char(self, char):
         """Build and store a glyph corresponding to an individual character
 
@@ -89,40 +360,34 @@ class TextureFont(object):
             A single character to be represented.
         """
         assert isinstance(char, str) and len(char) == 1
-        assert char not in self._glyphs
-        # load new glyph data from font
-        _load_glyph(self._font, char, self._glyphs)
-        # put new glyph into the texture
-        glyph = self._glyphs[char]
-        bitmap = glyph['bitmap']
-
-        # convert to padded array
-        data = np.zeros((bitmap.shape[0] + 2*self._spread,
-                         bitmap.shape[1] + 2*self._spread), np.uint8)
-        data[self._spread:-self._spread, self._spread:-self._spread] = bitmap
+        self._read_glyph(char)
+        size = self._glyphs[char]['size']
+        renderer = self._renderer
+        if isinstance(renderer, SDFRendererCPU):
+            # Keep the SDF, so that it does not need to be computed again
+            # when the glyph is moved in the atlas
+            with self._lock:
+                sdf = self._prerendered.pop(char, None)
+            if sdf is None:
+                sdf = renderer.render(self._padded_bitmap(char), size)
+
+            def render(texture, offset):
+                texture[offset[1]:offset[1] + size[1],
+                        offset[0]:offset[0] + size[0], :] = sdf
+        else:
+            def render(texture, offset):
+                renderer.render_to_texture(self._padded_bitmap(char),
+                                           texture, offset, size)
+        self._atlas.add((self, char), size, render, self._keep)
+        self._metrics = None
 
-        # Store, while scaling down to proper size
-        height = data.shape[0] // self.ratio
-        width = data.shape[1] // self.ratio
-        region = self._atlas.get_free_region(width + 2, height + 2)
-        if region is None:
-            raise RuntimeError('Cannot store glyph')
-        x, y, w, h = region
-        x, y, w, h = x + 1, y + 1, w - 2, h - 2
 
-        self._renderer.render_to_texture(data, self._atlas, (x, y), (w, h))
-        u0 = x / float(self._atlas.shape[1])
-        v0 = y / float(self._atlas.shape[0])
-        u1 = (x+w) / float(self._atlas.shape[1])
-        v1 = (y+h) / float(self._atlas.shape[0])
-        texcoords = (u0, v0, u1, v1)
-        glyph.update(dict(size=(w, h), texcoords=texcoords))
+class FontManager(object):
+    """Helper to create TextureFont instances and reuse them when possible
 
+    All fonts of a manager store their glyphs in the same `GlyphAtlas`.
+    """
 
-class FontManager(object):
-    """Helper to create TextureFont instances and reuse them when possible"""
-    # XXX: should store a font-manager on each context,
-    # or let TextureFont use a TextureAtlas for each context
     def __init__(self, method='cpu'):
         self._fonts = {}
         if not isinstance(method, str) or \
@@ -133,146 +398,214 @@ class FontManager(object):
             self._renderer = SDFRendererCPU()
         else:  # method == 'gpu':
             self._renderer = SDFRendererGPU()
+        self._atlas = GlyphAtlas()
+
+    @property
+    def atlas(self):
+        """The GlyphAtlas that is shared by the fonts"""
+        return self._atlas
 
     def get_font(self, face, bold=False, italic=False):
         """Get a font described by face and size"""
         key = '%s-%s-%s' % (face, bold, italic)
         if key not in self._fonts:
             font = dict(face=face, bold=bold, italic=italic)
-            self._fonts[key] = TextureFont(font, self._renderer)
+            self._fonts[key] = TextureFont(font, self._renderer, self._atlas)
         return self._fonts[key]
 
 
+# Font managers of the GLShared objects, so that canvases that share a
+# context also share the glyph atlas
+_font_managers = weakref.WeakKeyDictionary()
+
+
+def _get_font_manager(method):
+    """Get the font manager for the current canvas, or a new one if there is
+    no current canvas
+    """
+    canvas = context.get_current_canvas()
+    if canvas is None:
+        return FontManager(method=method)
+    managers = _font_managers.setdefault(canvas.context.shared, {})
+    if method not in managers:
+        managers[method] = FontManager(method=method)
+    return managers[method]
+
+
 ##############################################################################
 # The visual
 
 
+# Escape sequences characters: {unicode: offset, ...}
+#   ord('\a') = 7
+#   ord('\b') = 8
+#   ord('\f') = 12
+#   ord('\n') = 10  => linebreak
+#   ord('\r') = 13
+#   ord('\t') = 9   => tab, set equal 4 whitespaces?
+#   ord('\v') = 11  => vertical tab, set equal 4 linebreaks?
+# If text coordinate offset > 0 -> it applies to y-direction (lines)
+# If text coordinate offset < 0 -> it applies to x-direction (spaces)
+_esc_seq = {7: 0, 8: 0, 9: -4, 10: 1, 11: 4, 12: 0, 13: 0}
+_esc_mask = np.zeros(14, bool)
+_esc_x = np.zeros(14)
+_esc_y = np.zeros(14)
+for _code, _offset in _esc_seq.items():
+    _esc_mask[_code] = True
+    _esc_x[_code] = max(-_offset, 0)
+    _esc_y[_code] = max(_offset, 0)
+
+_text_vtype = np.dtype([('a_position', np.float32, 2),
+                        ('a_texcoord', np.float32, 2)])
+
+
 def _text_to_vbo(text, font, anchor_x, anchor_y, lowres_size):
-    """Convert text characters to VBO"""
-    # Necessary to flush commands before requesting current viewport because
-    # There may be a set_viewport command waiting in the queue.
-    # TODO: would be nicer if each canvas just remembers and manages its own
-    # viewport, rather than relying on the context for this.
-    canvas = context.get_current_canvas()
-    canvas.context.flush_commands()
+    """Convert text characters to VBO
 
-    text_vtype = np.dtype([('a_position', np.float32, 2),
-                           ('a_texcoord', np.float32, 2)])
-    vertices = np.zeros(len(text) * 4, dtype=text_vtype)
-    prev = None
-    width = height = ascender = descender = 0
-    ratio, slop = 1. / font.ratio, font.slop
-    x_off = -slop
-    # Need to make sure we have a unicode string here (Py2.7 mis-interprets
-    # characters like "•" otherwise)
-    if sys.version[0] == '2' and isinstance(text, str):
-        text = text.decode('utf-8')
-    # Need to store the original viewport, because the font[char] will
-    # trigger SDF rendering, which changes our viewport
-    # todo: get rid of call to glGetParameter!
+    The layout of all strings is computed at once with arrays of glyph
+    metrics. Each character gets four vertices; those of escape characters
+    form empty quads.
 
+    Parameters
+    ----------
+    text : str | list of str
+        The text to lay out. Each string is anchored separately.
+    font : TextureFont
+        The font.
+    anchor_x : str
+        Horizontal anchor of each line.
+    anchor_y : str
+        Vertical anchor of each string.
+    lowres_size : float
+        The point size that glyph sizes are relative to.
+    """
+    texts = [text] if isinstance(text, str) else list(text)
+    lengths = np.array([len(t) for t in texts], int)
+    n = int(lengths.sum())
+    vertices = np.zeros(n * 4, dtype=_text_vtype)
+    if n == 0:
+        return vertices
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), np.uint32)
+    unique, inverse = np.unique(codes, return_inverse=True)
+    inverse = inverse.ravel()
+    is_esc = _esc_mask[np.minimum(unique, 13)] & (unique < 14)
     # Also analyse chars with large ascender and descender, otherwise the
     # vertical alignment can be very inconsistent
-    for char in 'hy':
-        glyph = font[char]
-        y0 = glyph['offset'][1] * ratio + slop
-        y1 = y0 - glyph['size'][1]
-        ascender = max(ascender, y0 - slop)
-        descender = min(descender, y1 + slop)
-        height = max(height, glyph['size'][1] - 2*slop)
-
-    # Get/set the fonts whitespace length and line height (size of this ok?)
-    glyph = font[' ']
-    spacewidth = glyph['advance'] * ratio
-    lineheight = height * 1.5
+    chars = ['h', 'y', ' '] + [chr(c) for c in unique[~is_esc]]
+
+    if not font.has_glyphs(chars):
+        # Necessary to flush commands before requesting current viewport
+        # because there may be a set_viewport command waiting in the queue.
+        # Need to store the original viewport, because loading glyphs will
+        # trigger SDF rendering, which changes our viewport
+        # TODO: would be nicer if each canvas just remembers and manages its
+        # own viewport, rather than relying on the context for this.
+        canvas = context.get_current_canvas()
+        orig_viewport = None
+        if canvas is not None:
+            canvas.context.flush_commands()
+            orig_viewport = canvas.context.get_viewport()
+        font.glyph_indices(chars)
+        if orig_viewport is not None:
+            canvas.context.set_viewport(*orig_viewport)
+    seed_index = font.glyph_indices(chars[:3])
+    index = np.zeros(len(unique), int)
+    index[~is_esc] = font.glyph_indices(chars[3:])
+    metrics = font.metrics
+    ratio, slop = 1. / font.ratio, font.slop
 
-    # Added escape sequences characters: {unicode:offset,...}
-    #   ord('\a') = 7
-    #   ord('\b') = 8
-    #   ord('\f') = 12
-    #   ord('\n') = 10  => linebreak
-    #   ord('\r') = 13
-    #   ord('\t') = 9   => tab, set equal 4 whitespaces?
-    #   ord('\v') = 11  => vertical tab, set equal 4 linebreaks?
-    # If text coordinate offset > 0 -> it applies to x-direction
-    # If text coordinate offset < 0 -> it applies to y-direction
-    esc_seq = {7: 0, 8: 0, 9: -4, 10: 1, 11: 4, 12: 0, 13: 0}
-
-    # Keep track of y_offset to set lines at right position
-    y_offset = 0
-
-    # When a line break occur, record the vertices index value
-    vi_marker = 0
-    ii_offset = 0  # Offset since certain characters won't be drawn
-
-    # The running tracker of characters vertex index
-    vi = 0
-
-    orig_viewport = canvas.context.get_viewport()
-    for ii, char in enumerate(text):
-        if ord(char) in esc_seq:
-            if esc_seq[ord(char)] < 0:
-                # Add offset in x-direction
-                x_off += abs(esc_seq[ord(char)]) * spacewidth
-                width += abs(esc_seq[ord(char)]) * spacewidth
-            elif esc_seq[ord(char)] > 0:
-                # Add offset in y-direction and reset things in x-direction
-                dx = dy = 0
-                if anchor_x == 'right':
-                    dx = -width
-                elif anchor_x == 'center':
-                    dx = -width / 2.
-                vertices['a_position'][vi_marker:vi+4] += (dx, dy)
-                vi_marker = vi+4
-                ii_offset -= 1
-                # Reset variables that affects x-direction positioning
-                x_off = -slop
-                width = 0
-                # Add offset in y-direction
-                y_offset += esc_seq[ord(char)] * lineheight
-        else:
-            # For ordinary characters, normal procedure
-            glyph = font[char]
-            kerning = glyph['kerning'].get(prev, 0.) * ratio
-            x0 = x_off + glyph['offset'][0] * ratio + kerning
-            y0 = glyph['offset'][1] * ratio + slop - y_offset
-            x1 = x0 + glyph['size'][0]
-            y1 = y0 - glyph['size'][1]
-            u0, v0, u1, v1 = glyph['texcoords']
-            position = [[x0, y0], [x0, y1], [x1, y1], [x1, y0]]
-            texcoords = [[u0, v0], [u0, v1], [u1, v1], [u1, v0]]
-            vi = (ii + ii_offset) * 4
-            vertices['a_position'][vi:vi+4] = position
-            vertices['a_texcoord'][vi:vi+4] = texcoords
-            x_move = glyph['advance'] * ratio + kerning
-            x_off += x_move
-            ascender = max(ascender, y0 - slop)
-            descender = min(descender, y1 + slop)
-            width += x_move
-            height = max(height, glyph['size'][1] - 2*slop)
-            prev = char
-
-    if orig_viewport is not None:
-        canvas.context.set_viewport(*orig_viewport)
-
-    dx = dy = 0
+    # Per-font values: the line height and the extent of 'h' and 'y'
+    seed_y0 = metrics['offset'][seed_index[:2], 1] * ratio + slop
+    seed_y1 = seed_y0 - metrics['size'][seed_index[:2], 1]
+    height = (metrics['size'][seed_index[:2], 1] - 2 * slop).max()
+    lineheight = height * 1.5
+    spacewidth = metrics['advance'][seed_index[2]] * ratio
+
+    # Per-character values
+    esc = is_esc[inverse]
+    ordinary = ~esc
+    glyph = index[inverse]
+    small = np.where(esc, unique[inverse], 0)
+    starts = np.cumsum(lengths) - lengths
+    string = np.repeat(np.arange(len(texts)), lengths)
+
+    # Kerning with the previous ordinary character of the same string
+    last = np.maximum.accumulate(np.where(ordinary, np.arange(n), -1))
+    prev = np.concatenate(([-1], last[:-1]))
+    kerned = ordinary & (prev >= starts[string])
+    kerning = np.zeros(n)
+    if kerned.any():
+        n_glyphs = len(metrics['advance'])
+        pairs = glyph[prev[kerned]] * n_glyphs + glyph[kerned]
+        pairs, pair_inverse = np.unique(pairs, return_inverse=True)
+        values = font.kerning(pairs // n_glyphs, pairs % n_glyphs)
+        kerning[kerned] = values[pair_inverse.ravel()] * ratio
+
+    # Horizontal position along each line; lines start at the beginning of
+    # each string and after each line break
+    move = np.where(ordinary, metrics['advance'][glyph] * ratio + kerning,
+                    _esc_x[small] * spacewidth)
+    breaks = np.zeros(n, bool)
+    breaks[starts[lengths > 0]] = True
+    breaks[1:] |= _esc_y[small[:-1]] > 0
+    line_starts = np.flatnonzero(breaks)
+    line = np.cumsum(breaks) - 1
+    before = np.cumsum(move) - move
+    x_off = before - before[line_starts][line] - slop
+    width = np.add.reduceat(move, line_starts)
+
+    # Vertical offset of the lines of each string
+    lines = np.cumsum(_esc_y[small])
+    lines -= _esc_y[small]
+    y_offset = (lines - lines[starts[string]]) * lineheight
+
+    offset = metrics['offset'][glyph] * ratio
+    size = metrics['size'][glyph]
+    x0 = np.where(ordinary, x_off + offset[:, 0] + kerning, x_off)
+    y0 = np.where(ordinary, offset[:, 1] + slop, 0) - y_offset
+    x1 = np.where(ordinary, x0 + size[:, 0], x0)
+    y1 = np.where(ordinary, y0 - size[:, 1], y0)
+
+    # Anchors: vertically per string, horizontally per line
+    nonempty = lengths > 0
+    ascender = np.full(len(texts), max(seed_y0.max() - slop, 0))
+    descender = np.full(len(texts), min(seed_y1.min() + slop, 0))
+    top = np.maximum.reduceat(np.where(ordinary, y0 - slop, -np.inf),
+                              starts[nonempty])
+    bottom = np.minimum.reduceat(np.where(ordinary, y1 + slop, np.inf),
+                                 starts[nonempty])
+    ascender[nonempty] = np.maximum(ascender[nonempty], top)
+    descender[nonempty] = np.minimum(descender[nonempty], bottom)
+    dy = np.zeros(len(texts))
     if anchor_y == 'top':
         dy = -descender
     elif anchor_y in ('center', 'middle'):
         dy = (-descender - ascender) / 2
     elif anchor_y == 'bottom':
         dy = -ascender
+    dx = np.zeros(len(width))
     if anchor_x == 'right':
         dx = -width
     elif anchor_x == 'center':
         dx = -width / 2.
-
-    # If any linebreaks occured in text, we only want to translate characters
-    # in the last line in text (those after the vi_marker)
-    vertices['a_position'][0:vi_marker] += (0, dy)
-    vertices['a_position'][vi_marker:] += (dx, dy)
-    vertices['a_position'] /= lowres_size
-
+    x0 += dx[line]
+    x1 += dx[line]
+    y0 += dy[string]
+    y1 += dy[string]
+
+    # Quads are (x0, y0), (x0, y1), (x1, y1), (x1, y0)
+    position = np.empty((n, 4, 2), np.float32)
+    texcoord = np.empty((n, 4, 2), np.float32)
+    u0, v0, u1, v1 = metrics['texcoords'][glyph].T
+    for i, (x, y, u, v) in enumerate([(x0, y0, u0, v0), (x0, y1, u0, v1),
+                                      (x1, y1, u1, v1), (x1, y0, u1, v0)]):
+        position[:, i, 0] = x
+        position[:, i, 1] = y
+        texcoord[:, i, 0] = u
+        texcoord[:, i, 1] = v
+    texcoord[esc] = 0
+    vertices['a_position'] = position.reshape(-1, 2) / lowres_size
+    vertices['a_texcoord'] = texcoord.reshape(-1, 2)
     return vertices
 
 
@@ -410,14 +743,15 @@ class TextVisual(Visual):
         _check_valid('anchor_y', anchor_y, valid_keys)
         valid_keys = ('left', 'center', 'right')
         _check_valid('anchor_x', anchor_x, valid_keys)
-        # Init font handling stuff
-        # _font_manager is a temporary solution to use global mananger
-        self._font_manager = font_manager or FontManager(method=method)
+        # Init font handling stuff; visuals on canvases that share a context
+        # also share the font manager and its glyph atlas
+        self._font_manager = font_manager or _get_font_manager(method)
         self._face = face
         self._bold = bold
         self._italic = italic
         self._update_font()
         self._vertices = None
+        self._atlas_generation = None
         self._color_vbo = None
         self._anchors = (anchor_x, anchor_y)
         # Init text properties
@@ -513,12 +847,16 @@ class TextVisual(Visual):
             raise ValueError('at least one position must be given')
         self._pos = pos
         self._pos_changed = True
+        self._bounds_changed()
         self.update()
 
     def _prepare_draw(self, view):
         # attributes / uniforms are not available until program is built
         if len(self.text) == 0:
             return False
+        if self._atlas_generation != self._font.atlas.generation:
+            # The glyphs were moved in the atlas
+            self._vertices = None
         if self._vertices is None:
             text = self.text
             if isinstance(text, str):
@@ -526,9 +864,10 @@ class TextVisual(Visual):
             n_char = sum(len(t) for t in text)
             # we delay creating vertices because it requires a context,
             # which may or may not exist when the object is initialized
-            self._vertices = np.concatenate([
-                _text_to_vbo(t, self._font, self._anchors[0], self._anchors[1],
-                             self._font._lowres_size) for t in text])
+            self._vertices = _text_to_vbo(text, self._font, self._anchors[0],
+                                          self._anchors[1],
+                                          self._font._lowres_size)
+            self._atlas_generation = self._font.atlas.generation
             self._vertices = VertexBuffer(self._vertices)
             idx = (np.array([0, 1, 2, 0, 2, 3], np.uint32) +
                    np.arange(0, 4*n_char, 4, dtype=np.uint32)[:, np.newaxis])
@@ -595,8 +934,9 @@ class TextVisual(Visual):
         self.shared_program['u_npix'] = n_pix
         self.shared_program['u_kernel'] = self._font._kernel
         self.shared_program['u_color'] = self._color.rgba
-        self.shared_program['u_font_atlas'] = self._font._atlas
-        self.shared_program['u_font_atlas_shape'] = self._font._atlas.shape[:2]
+        atlas = self._font.atlas.texture
+        self.shared_program['u_font_atlas'] = atlas
+        self.shared_program['u_font_atlas_shape'] = atlas.shape[:2]
 
     def _prepare_transforms(self, view):
         self._pos_changed = True
@@ -645,6 +985,14 @@ class SDFRendererCPU(object):
     # This should probably live in _sdf_cpu.pyx, but doing so makes
     # debugging substantially more annoying
     def render_to_texture(self, data, texture, offset, size):
+        texture[offset[1]:offset[1] + size[1],
+                offset[0]:offset[0] + size[0], :] = self.render(data, size)
+
+    def render(self, data, size):
+        """Return the SDF of a bitmap as an RGB array of the given size
+
+        This does not use OpenGL, so it can be called from any thread.
+        """
         sdf = (data / 255).astype(np.float32)  # from ubyte -> float
         h, w = sdf.shape
         tex_w, tex_h = size
@@ -664,7 +1012,4 @@ class SDFRendererCPU(object):
         # convert to uint8
         bitmap = (bitmap * 255).astype(np.uint8)
         # convert single channel to RGB by repeating
-        bitmap = np.tile(bitmap[..., np.newaxis],
-                         (1, 1, 3))
-        texture[offset[1]:offset[1] + size[1],
-                offset[0]:offset[0] + size[0], :] = bitmap
+        return np.tile(bitmap[..., np.newaxis], (1, 1, 3))
@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""An image that is too large for a single texture, drawn from tiles of a
+multi-resolution pyramid.
+"""
+
+from __future__ import division
+
+import os.path as op
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from .image import ImageVisual
+
+# Size limit per dimension of the tile atlas. Textures of this size are
+# supported by practically all hardware.
+_MAX_ATLAS_SIZE = 4096
+
+
+def build_pyramid(image, min_size=256, chunk_rows=1024, on_disk=None):
+    """Build a multi-resolution pyramid by repeatedly averaging 2x2 pixels
+
+    Parameters
+    ----------
+    image : array-like
+        The full resolution image, of shape (M, N) or (M, N, C). This can be
+        any array-like that supports slicing, such as a ``np.memmap``. It is
+        read in chunks of rows, so it does not have to fit in memory.
+    min_size : int
+        Levels are added until both sides of the image are at most this
+        size.
+    chunk_rows : int
+        Number of rows of a level that are read at once.
+    on_disk : bool | str | None
+        Where to store the downsampled levels. The first one is a quarter
+        of the size of the image. If a str, the levels are written to
+        ``level1.npy``, ``level2.npy``, etc. in that directory, so that
+        they can be loaded again with ``np.load(..., mmap_mode='r')``. If
+        True, they are written to temporary files that are removed when
+        the levels are no longer used. If False, they are kept in memory.
+        By default, they are stored on disk unless the image is an
+        in-memory ndarray.
+
+    Returns
+    -------
+    levels : list
+        The image followed by the downsampled levels, as ndarrays (or
+        ``np.memmap`` when stored on disk) with the same dtype as the
+        image.
+    """
+    if on_disk is None:
+        on_disk = isinstance(image, np.memmap) or \
+            not isinstance(image, np.ndarray)
+    levels = [image]
+    while max(levels[-1].shape[:2]) > min_size:
+        image = levels[-1]
+        shape = ((image.shape[0] + 1) // 2, (image.shape[1] + 1) // 2) + \
+            tuple(image.shape[2:])
+        if isinstance(on_disk, str):
+            fname = op.join(on_disk, 'level%i.npy' % len(levels))
+            out = np.lib.format.open_memmap(fname, 'w+', image.dtype, shape)
+        elif on_disk:
+            out = np.memmap(tempfile.TemporaryFile(), image.dtype, 'w+',
+                            shape=shape)
+        else:
+            out = np.empty(shape, image.dtype)
+        _downsample(image, out, chunk_rows)
+        if isinstance(out, np.memmap):
+            out.flush()
+        levels.append(out)
+    return levels
+
+
+def _downsample(image, out, chunk_rows):
+    """Halve the size of *image* into *out*; odd sizes repeat the last row
+    or column
+    """
+    h, w = image.shape[:2]
+    chunk_rows += chunk_rows % 2
+    for r0 in range(0, h, chunk_rows):
+        chunk = np.asarray(image[r0:r0 + chunk_rows], dtype=np.float32)
+        pad = [(0, chunk.shape[0] % 2), (0, w % 2)] + \
+            [(0, 0)] * (chunk.ndim - 2)
+        chunk = np.pad(chunk, pad, mode='edge')
+        chunk = chunk.reshape((chunk.shape[0] // 2, 2, chunk.shape[1] // 2, 2)
+                              + chunk.shape[2:]).mean(axis=(1, 3))
+        if np.issubdtype(image.dtype, np.integer):
+            chunk = np.round(chunk)
+        out[r0 // 2:r0 // 2 + len(chunk)] = chunk
+
+
+class _TileCache(object):
+    """Cache of image tiles in a texture atlas with LRU eviction
+
+    Each tile occupies a slot of the atlas, including a border of one pixel
+    so that linear interpolation does not bleed between tiles.
+
+    Parameters
+    ----------
+    atlas : Texture2D
+        The texture to store the tiles in. It is resized by ``reset()``.
+    tile_size : int
+        Number of pixels along each side of a tile.
+    budget : int
+        Maximum number of bytes of the atlas, assuming one byte per channel.
+    """
+
+    # Maximum number of tiles that are uploaded in one draw, so that
+    # panning to a new region does not stall rendering
+    max_uploads = 8
+
+    def __init__(self, atlas, tile_size, budget):
+        self.atlas = atlas
+        self.tile_size = int(tile_size)
+        if self.tile_size < 1:
+            raise ValueError('tile_size must be at least 1')
+        self.budget = int(budget)
+
+    def reset(self, channels):
+        """Lay out the atlas for tiles with the given number of channels"""
+        padded = self.tile_size + 2
+        n = self.budget // (padded ** 2 * channels)
+        if n < 1:
+            raise ValueError('gpu_budget of %d bytes is too small for a '
+                             'tile of %d pixels'
+                             % (self.budget, padded ** 2))
+        per_axis = max(_MAX_ATLAS_SIZE // padded, 1)
+        nx = min(n, per_axis)
+        ny = min(n // nx, per_axis)
+        self.slots_shape = (ny, nx)
+        self.n_slots = nx * ny
+        self.atlas.resize((ny * padded, nx * padded, channels))
+        self.clear()
+
+    def clear(self):
+        """Evict all tiles, e.g. because the data has changed"""
+        self._resident = OrderedDict()
+        self._free = list(range(self.n_slots - 1, -1, -1))
+
+    @property
+    def resident(self):
+        """The keys of the loaded tiles, least recently used first"""
+        return list(self._resident)
+
+    def slot_rect(self, key):
+        """Return the rect (x, y, w, h) of the interior of the slot that
+        holds tile *key*, in normalized atlas coordinates, or None if the
+        tile is not loaded.
+        """
+        slot = self._resident.get(key)
+        if slot is None:
+            return None
+        padded = self.tile_size + 2
+        ny, nx = self.slots_shape
+        y, x = divmod(slot, nx)
+        return ((x * padded + 1) / (nx * padded),
+                (y * padded + 1) / (ny * padded),
+                self.tile_size / (nx * padded),
+                self.tile_size / (ny * padded))
+
+    def update(self, keys, load):
+        """Make sure that the tiles in *keys* are loaded, in order of
+        priority
+
+        Tiles that are not yet loaded are obtained by calling *load* with
+        the tile key. Returns True if tiles remain to be uploaded because
+        at most ``max_uploads`` are uploaded per call.
+        """
+        for key in keys:
+            if key in self._resident:
+                self._resident.move_to_end(key)
+        wanted = set(keys)
+        padded = self.tile_size + 2
+        uploads = 0
+        for key in keys:
+            if key in self._resident:
+                continue
+            if uploads == self.max_uploads:
+                return True
+            slot = self._acquire(wanted)
+            if slot is None:
+                break  # the atlas is full of wanted tiles
+            y, x = divmod(slot, self.slots_shape[1])
+            self.atlas.set_data(load(key), offset=(y * padded, x * padded))
+            self._resident[key] = slot
+            uploads += 1
+        return False
+
+    def _acquire(self, wanted):
+        """Return a free slot, evicting the least recently used tile if
+        needed. Returns None if all loaded tiles are wanted.
+        """
+        if self._free:
+            return self._free.pop()
+        key = next(iter(self._resident))
+        if key in wanted:
+            return None
+        return self._resident.pop(key)
+
+
+class TiledImageVisual(ImageVisual):
+    """Image visual for very large images, drawn from a tiled pyramid
+
+    The image is stored as a pyramid of levels that each halve the
+    resolution of the previous one. Only the tiles of the part of the image
+    that is in view are uploaded, from the level that matches the number
+    of screen pixels per image pixel, e.g. as set by a ``PanZoomCamera``.
+    Tiles are kept in a texture cache of bounded size, and the least
+    recently used tiles are evicted when it is full. Until the tiles of a
+    level are loaded, the tiles of coarser levels are drawn in their
+    place.
+
+    Parameters
+    ----------
+    data : array-like | list of array-like
+        The image, of shape (M, N), (M, N, 3), or (M, N, 4). This can be
+        any array-like that supports slicing, such as a ``np.memmap``. The
+        pyramid is built from it with `build_pyramid`. Alternatively, a
+        list of levels that each halve the size of the previous one, e.g.
+        read from disk.
+    tile_size : int
+        Number of pixels along each side of a tile.
+    gpu_budget : int
+        The size in bytes of the tile cache on the GPU. Default 64 MB.
+    **kwargs : dict
+        Keyword arguments to pass to `ImageVisual`. Only the 'nearest' and
+        'bilinear' interpolation methods are supported.
+
+    Notes
+    -----
+    For luminance images, ``clim='auto'`` uses the range of a regularly
+    strided subset of the full resolution image. The image is always drawn
+    with the 'subdivide' method, so the transform should be linear.
+
+    Unless the image is an in-memory ndarray, the levels of the pyramid
+    are stored in temporary files; pass a list of levels to store them
+    elsewhere (see `build_pyramid`).
+    """
+
+    def __init__(self, data=None, tile_size=256, gpu_budget=64 * 1024 ** 2,
+                 **kwargs):
+        self._levels = None
+        self._tile_key = None
+        self._cache = None
+        super(TiledImageVisual, self).__init__(method='subdivide', **kwargs)
+        self.unfreeze()
+        self._interpolation_names = ('bilinear', 'nearest')
+        if self._interpolation not in self._interpolation_names:
+            raise ValueError("interpolation must be one of %s" %
+                             ', '.join(self._interpolation_names))
+        self._cache = _TileCache(self._texture, tile_size, gpu_budget)
+        if data is not None:
+            self.set_data(data)
+        self.freeze()
+
+    def set_data(self, image):
+        """Set the data
+
+        Parameters
+        ----------
+        image : array-like | list of array-like
+            The image, or the levels of its pyramid.
+        """
+        if isinstance(image, (list, tuple)):
+            levels = list(image)
+        else:
+            levels = build_pyramid(image, self._cache.tile_size)
+        for level in levels:
+            if len(level.shape) not in (2, 3):
+                raise ValueError('Image levels must be 2D or 3D arrays')
+        if self._data is None or self._data.shape != levels[0].shape:
+            self._need_vertex_update = True
+            self._bounds_changed()
+        self._levels = levels
+        self._data = levels[0]
+        channels = levels[0].shape[2] if len(levels[0].shape) == 3 else 1
+        self._cache.reset(channels)
+        self._tile_key = None
+        self._need_texture_upload = True
+        self.update()
+
+    @property
+    def levels(self):
+        """The levels of the image pyramid, from full resolution down"""
+        return self._levels
+
+    def _build_texture(self):
+        # Tiles are normalized when they are loaded; only the clims are
+        # determined here
+        if self._data.ndim == 2 or self._data.shape[2] == 1:
+            clim = self._clim
+            if isinstance(clim, str) and clim == 'auto':
+                # Averaged levels have a smaller range; use a strided
+                # subset of the full resolution instead
+                h, w = self._data.shape[:2]
+                step = max(int(np.ceil(np.sqrt(h * w / 2 ** 20))), 1)
+                sample = np.asarray(self._data[::step, ::step])
+                clim = np.min(sample), np.max(sample)
+            self._clim = np.array(clim, dtype=np.float32)
+        elif isinstance(self._clim, str) and self._clim == 'auto':
+            # assume that RGB data is already scaled (0, 1)
+            self._clim = (0, 1)
+        self._texture_limits = np.array(self._clim)
+        self._need_colortransform_update = True
+        self._cache.clear()
+        self._tile_key = None
+        self._need_texture_upload = False
+
+    def _load_tile(self, key):
+        """Read a tile with a border of one pixel and normalize it"""
+        level, ty, tx = key
+        image = self._levels[level]
+        t = self._cache.tile_size
+        lo = [ty * t - 1, tx * t - 1]
+        hi = [start + t + 2 for start in lo]
+        start = [max(x, 0) for x in lo]
+        stop = [min(x, s) for x, s in zip(hi, image.shape[:2])]
+        data = np.asarray(image[start[0]:stop[0], start[1]:stop[1]])
+        pad = [(s - lo_, hi_ - e) for lo_, s, e, hi_
+               in zip(lo, start, stop, hi)] + [(0, 0)] * (data.ndim - 2)
+        data = np.pad(data, pad, mode='edge')
+        if data.ndim == 2 or data.shape[2] == 1:
+            clim = self._texture_limits
+            data = data.astype(np.float32) - clim[0]
+            if clim[1] - clim[0] > 0:
+                data /= clim[1] - clim[0]
+            else:
+                data[:] = 1 if data[0, 0] != 0 else 0
+        elif data.dtype == np.float64:
+            data = data.astype(np.float32)
+        return data
+
+    def _build_vertex_data(self):
+        # Vertices are built per frame from the tiles that are drawn
+        self._need_vertex_update = False
+
+    def _visible_tiles(self, view):
+        """Return the pyramid level to draw and the tiles of that level
+        that are in view, as lists of (level, row, col) keys.
+        """
+        w, h = self.size
+        n_levels = len(self._levels)
+        tr = view.transforms.get_transform('visual', 'render')
+        if tr.Linear:
+            # Map the corners of the view volume to image pixels
+            corners = tr.inverse.map([[-1, -1], [1, -1], [-1, 1], [1, 1]])
+            corners = corners[:, :2] / corners[:, 3:]
+            x0, y0 = np.maximum(corners.min(axis=0), 0)
+            x1, y1 = np.minimum(corners.max(axis=0), (w, h))
+            # Number of framebuffer pixels per image pixel
+            fb = view.transforms.get_transform('visual', 'framebuffer')
+            p = fb.map([[0, 0], [1, 0], [0, 1]])
+            p = p[:, :2] / p[:, 3:]
+            scale = max(np.linalg.norm(p[1] - p[0]),
+                        np.linalg.norm(p[2] - p[0]))
+            level = int(np.floor(-np.log2(scale))) if scale > 0 else 0
+            level = min(max(level, 0), n_levels - 1)
+        else:
+            x0, y0, x1, y1 = 0, 0, w, h
+            level = n_levels - 1
+        if x1 <= x0 or y1 <= y0:
+            return level, []
+        while True:
+            t = self._cache.tile_size * 2 ** level
+            rows = np.arange(int(y0 // t), int(np.ceil(y1 / t)))
+            cols = np.arange(int(x0 // t), int(np.ceil(x1 / t)))
+            # Use a coarser level if the tiles do not fit in the cache,
+            # next to those of the coarsest level
+            if len(rows) * len(cols) < self._cache.n_slots // 2 or \
+                    level == n_levels - 1:
+                break
+            level += 1
+        # Load tiles from the center of the view outwards
+        cy, cx = (y0 + y1) / (2 * t), (x0 + x1) / (2 * t)
+        rr, cc = np.meshgrid(rows, cols, indexing='ij')
+        dist = (rr + 0.5 - cy) ** 2 + (cc + 0.5 - cx) ** 2
+        order = np.argsort(dist.ravel(), kind='stable')
+        tiles = [(level, r, c) for r, c in
+                 zip(rr.ravel()[order].tolist(), cc.ravel()[order].tolist())]
+        return level, tiles
+
+    def _update_tiles(self, view):
+        """Load the tiles in view and build the quads to draw them"""
+        level, tiles = self._visible_tiles(view)
+        top = len(self._levels) - 1
+        # The tiles of the coarsest level are loaded first, so that there
+        # is always something to show
+        coarse = sorted(set((top, r >> (top - level), c >> (top - level))
+                            for _, r, c in tiles))
+        keys = coarse + [key for key in tiles if key[0] != top]
+        if self._cache.update(keys, self._load_tile):
+            # Continue loading in the next frame
+            self.update()
+
+        # Draw fallback tiles of coarser levels first, the finest on top
+        drawn = set()
+        for lev, r, c in tiles:
+            while self._cache.slot_rect((lev, r, c)) is None and lev < top:
+                lev, r, c = lev + 1, r >> 1, c >> 1
+            drawn.add((lev, r, c))
+        drawn = sorted(drawn, key=lambda key: (-key[0], key[1:]))
+        if drawn == self._tile_key:
+            return len(drawn) > 0
+        self._tile_key = drawn
+
+        w, h = self.size
+        quad = np.array([[0, 0], [1, 0], [1, 1], [0, 0], [1, 1], [0, 1]],
+                        dtype=np.float32)
+        pos = np.empty((len(drawn), 6, 2), np.float32)
+        tex = np.empty((len(drawn), 6, 2), np.float32)
+        t = self._cache.tile_size
+        for i, key in enumerate(drawn):
+            lev, r, c = key
+            scale = 2 ** lev
+            rect = self._cache.slot_rect(key)
+            if rect is None:
+                pos[i] = tex[i] = 0  # nothing loaded yet
+                continue
+            # Clip partial tiles at the edges of the image
+            x0, y0 = c * t * scale, r * t * scale
+            tw = min(t * scale, w - x0)
+            th = min(t * scale, h - y0)
+            pos[i] = quad * (tw, th) + (x0, y0)
+            tex[i] = quad * (rect[2] * tw / (t * scale),
+                             rect[3] * th / (t * scale)) + rect[:2]
+        self._subdiv_position.set_data(pos.reshape(-1, 2))
+        self._subdiv_texcoord.set_data(tex.reshape(-1, 2))
+        return len(drawn) > 0
+
+    def _prepare_draw(self, view):
+        if ImageVisual._prepare_draw(self, view) is False:
+            return False
+        if not self._update_tiles(view):
+            return False
@@ -41,7 +41,7 @@ def arg_to_array(func):
         value : object
             The return value of the function.
         """
-        return func(self, np.array(arg), *args, **kwargs)
+        return func(self, np.asarray(arg), *args, **kwargs)
     return fn
 
 
@@ -109,7 +109,7 @@ def arg_to_vec4(func):
     @functools.wraps(func)
     def wrapper(self_, arg, *args, **kwargs):
         if isinstance(arg, (tuple, list, np.ndarray)):
-            arg = np.array(arg)
+            arg = np.asarray(arg)
             flatten = arg.ndim == 1
             arg = as_vec4(arg)
 
@@ -4,9 +4,33 @@
 
 from __future__ import division
 
+import numpy as np
+
 from ..shaders import FunctionChain
+from ._util import arg_to_vec4
 from .base_transform import BaseTransform
-from .linear import NullTransform
+from .linear import NullTransform, STTransform, MatrixTransform
+
+
+def _affine_matrix(tr, inverse=False):
+    """Return the 4x4 matrix with which an affine transform maps row vectors,
+    or None if *tr* is not one of the affine transform classes.
+    """
+    if isinstance(tr, MatrixTransform):
+        return np.asarray(tr.inv_matrix if inverse else tr.matrix)
+    elif isinstance(tr, STTransform):
+        scale = tr._scale.astype(np.float64)
+        translate = tr._translate.astype(np.float64)
+        if inverse:
+            scale = 1. / scale
+            translate = -translate * scale
+        matrix = np.diag(scale)
+        matrix[3, :3] = translate[:3]
+        matrix[3, 3] = 1.
+        return matrix
+    elif isinstance(tr, NullTransform):
+        return np.eye(4)
+    return None
 
 
 class ChainTransform(BaseTransform):
@@ -32,6 +56,8 @@ class ChainTransform(BaseTransform):
         super(ChainTransform, self).__init__()
         self._transforms = []
         self._simplified = None
+        self._map_stages = None
+        self._imap_stages = None
         self._null_transform = NullTransform()
         nmap = self._null_transform.shader_map()
         
@@ -131,40 +157,97 @@ class ChainTransform(BaseTransform):
             b &= tr.Isometric
         return b
 
-    def map(self, coords):
+    def map(self, coords, out=None):
         """Map coordinates
 
+        Consecutive STTransform, MatrixTransform and NullTransform instances
+        are applied as one matrix, which is kept until one of the transforms
+        changes.
+
         Parameters
         ----------
         coords : array-like
             Coordinates to map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
         coords : ndarray
             Coordinates.
         """
-        for tr in reversed(self.transforms):
-            coords = tr.map(coords)
-        return coords
+        if self._map_stages is None:
+            self._map_stages = self._get_stages(inverse=False)
+        return self._apply_stages(self._map_stages, coords, out)
 
-    def imap(self, coords):
+    def imap(self, coords, out=None):
         """Inverse map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to inverse map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
         coords : ndarray
             Coordinates.
         """
-        for tr in self.transforms:
-            coords = tr.imap(coords)
+        if self._imap_stages is None:
+            self._imap_stages = self._get_stages(inverse=True)
+        return self._apply_stages(self._imap_stages, coords, out)
+
+    def _flat_transforms(self):
+        """The transforms of this chain with nested chains expanded"""
+        transforms = []
+        for tr in self._transforms:
+            if isinstance(tr, ChainTransform):
+                transforms.extend(tr._flat_transforms())
+            else:
+                transforms.append(tr)
+        return transforms
+
+    def _get_stages(self, inverse):
+        """Return the list of mapping functions and 4x4 matrices that map
+        coordinates through this chain, in the order in which they are
+        applied.
+        """
+        transforms = self._flat_transforms()
+        if not inverse:
+            transforms = transforms[::-1]
+        stages = []
+        for tr in transforms:
+            matrix = _affine_matrix(tr, inverse)
+            if matrix is None:
+                stages.append(tr.imap if inverse else tr.map)
+            elif stages and isinstance(stages[-1], np.ndarray):
+                stages[-1] = np.dot(stages[-1], matrix)
+            else:
+                stages.append(matrix)
+        return stages
+
+    def _apply_stages(self, stages, coords, out):
+        if len(stages) == 0:
+            return coords
+        for stage in stages[:-1]:
+            if isinstance(stage, np.ndarray):
+                coords = self._map_matrix(coords, stage)
+            else:
+                coords = stage(coords)
+        if isinstance(stages[-1], np.ndarray):
+            return self._map_matrix(coords, stages[-1], out=out)
+        coords = stages[-1](coords)
+        if out is not None:
+            out[...] = coords
+            coords = out
         return coords
 
+    @arg_to_vec4
+    def _map_matrix(self, coords, matrix, out=None):
+        return np.matmul(coords, matrix, out=out)
+
     def shader_map(self):
         return self._shader_map
 
@@ -211,10 +294,16 @@ class ChainTransform(BaseTransform):
         """
         self.update(ev)
 
+    def update(self, *args):
+        # The transforms or their parameters changed
+        self._map_stages = None
+        self._imap_stages = None
+        super(ChainTransform, self).update(*args)
+
     def __setitem__(self, index, tr):
         self._transforms[index].changed.disconnect(self._subtr_changed)
         self._transforms[index] = tr
-        tr.changed.connect(self.subtr_changed)
+        tr.changed.connect(self._subtr_changed)
         self._rebuild_shaders()
         self.update()
 
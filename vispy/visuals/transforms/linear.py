@@ -24,15 +24,20 @@ class NullTransform(BaseTransform):
     Isometric = True
 
     @arg_to_vec4
-    def map(self, coords):
+    def map(self, coords, out=None):
         """Map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
         """
-        return coords
+        if out is None:
+            return coords.copy()
+        out[...] = coords
+        return out
 
     def imap(self, coords):
         """Inverse map coordinates
@@ -93,40 +98,44 @@ class STTransform(BaseTransform):
         self._update_shaders()
 
     @arg_to_vec4
-    def map(self, coords):
+    def map(self, coords, out=None):
         """Map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
         coords : ndarray
             Coordinates.
         """
-        m = np.empty(coords.shape)
+        m = np.empty(coords.shape) if out is None else out
         m[:, :3] = (coords[:, :3] * self.scale[np.newaxis, :3] +
                     coords[:, 3:] * self.translate[np.newaxis, :3])
         m[:, 3] = coords[:, 3]
         return m
 
     @arg_to_vec4
-    def imap(self, coords):
+    def imap(self, coords, out=None):
         """Invert map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to inverse map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
         coords : ndarray
             Coordinates.
         """
-        m = np.empty(coords.shape)
+        m = np.empty(coords.shape) if out is None else out
         m[:, :3] = ((coords[:, :3] -
                      coords[:, 3:] * self.translate[np.newaxis, :3]) /
                     self.scale[np.newaxis, :3])
@@ -346,13 +355,15 @@ class MatrixTransform(BaseTransform):
             self.reset()
 
     @arg_to_vec4
-    def map(self, coords):
+    def map(self, coords, out=None):
         """Map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
@@ -360,23 +371,25 @@ class MatrixTransform(BaseTransform):
             Coordinates.
         """
         # looks backwards, but both matrices are transposed.
-        return np.dot(coords, self.matrix)
+        return np.matmul(coords, self.matrix, out=out)
 
     @arg_to_vec4
-    def imap(self, coords):
+    def imap(self, coords, out=None):
         """Inverse map coordinates
 
         Parameters
         ----------
         coords : array-like
             Coordinates to inverse map.
+        out : ndarray | None
+            Array of shape (..., 4) in which to store the result.
 
         Returns
         -------
         coords : ndarray
             Coordinates.
         """
-        return np.dot(coords, self.inv_matrix)
+        return np.matmul(coords, self.inv_matrix, out=out)
 
     def shader_map(self):
         fn = super(MatrixTransform, self).shader_map()
@@ -215,6 +215,56 @@ def test_affine_mapping():
     assert np.allclose(t.map(p1)[:, :p2.shape[1]], p2)
 
 
+def test_chain_matrix():
+    """Test that affine runs of a chain are mapped with one cached matrix"""
+    rng = np.random.RandomState(0)
+    m = np.eye(4)
+    m[:3, :3] = rng.normal(size=(3, 3))
+    s1 = ST(scale=(2, 3, 4), translate=(1, -2, 3))
+    a = AT(m)
+    p = PT()
+    s2 = ST(scale=(0.5, 2), translate=(0.1, 0))
+    chain = CT([s1, a, NT(), CT([p, s2, ST(translate=(1, 1))])])
+    pts = rng.normal(size=(100, 3))
+    expected = pts
+    for t in reversed([s1, a, p, s2, ST(translate=(1, 1))]):
+        expected = t.map(expected)
+    assert_allclose(chain.map(pts), expected)
+    inverse = expected
+    for t in [s1, a, p, s2, ST(translate=(1, 1))]:
+        inverse = t.imap(inverse)
+    assert_allclose(chain.imap(expected), inverse)
+    assert_allclose(chain.map(pts[0]), expected[0])
+
+    # Two matrices around the polar transform
+    stages = chain._map_stages
+    assert len(stages) == 3
+    assert isinstance(stages[0], np.ndarray)
+    assert stages[1] == p.map
+
+    # Changes of the transforms, also in nested chains, are followed
+    s2.scale = (3, 3)
+    assert chain._map_stages is None
+    expected = s1.map(a.map(p.map(s2.map(pts + (1, 1, 0)))))
+    assert_allclose(chain.map(pts), expected)
+    a.matrix = np.eye(4)
+    assert_allclose(chain.map(pts), s1.map(p.map(s2.map(pts + (1, 1, 0)))))
+
+    # A chain of affine transforms is one matrix product
+    chain = CT([s1, a, s2])
+    chain.map(pts[:1])
+    assert len(chain._map_stages) == 1
+    out = np.empty((100, 4), dtype=np.float32)
+    assert chain.map(pts, out=out) is out
+    assert_allclose(out, s1.map(a.map(s2.map(pts))), rtol=1e-5)
+    assert_allclose(chain.imap(out)[:, :3], pts, atol=1e-5)
+
+    # Input with 4 columns is not returned as the result
+    pts = rng.normal(size=(10, 4))
+    for t in (chain, NT(), s1, a, CT([NT()])):
+        assert t.map(pts) is not pts
+
+
 m = np.random.RandomState(0).normal(size=(4, 4))
 transforms = [
     NT(),
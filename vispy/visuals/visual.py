@@ -89,6 +89,8 @@ import weakref
 import numpy as np
 
 from .. import gloo
+from ..gloo.texture import BaseTexture
+from ..gloo.wrappers import _gl_presets
 from ..util.event import EmitterGroup, Event
 from ..util import logger, Frozen
 from .shaders import StatementList, MultiProgram
@@ -210,6 +212,13 @@ class BaseVisual(Frozen):
     def draw(self):
         raise NotImplementedError(self)
 
+    def _draw_sort_key(self):
+        """Return a key that groups visuals which can be drawn with few GL
+        state changes between them, or None if this visual must be drawn
+        in scene order (see ``SceneCanvas.state_sorting``).
+        """
+        return None
+
     def attach(self, filt, view=None):
         """Attach a Filter to this visual.
 
@@ -449,6 +458,25 @@ class Visual(BaseVisual):
     def _configure_gl_state(self):
         gloo.set_state(**self._vshare.gl_state)
 
+    def _draw_sort_key(self):
+        # Only opaque, depth-tested visuals can be drawn out of order
+        gl_state = self._vshare.gl_state
+        state = dict(_gl_presets.get(gl_state.get('preset'), {}))
+        state.update(gl_state)
+        if state.get('blend', True) or not state.get('depth_test', False):
+            return None
+        shaders = self._program._shaders
+        if shaders[0] is None:
+            # Not built yet; use the templates shared by this visual type
+            vert, frag = self.shared_program._vcode, self.shared_program._fcode
+        else:
+            vert, frag = shaders[0].code, shaders[1].code
+        textures = sorted(id(value) for value in
+                          self._program._user_variables.values()
+                          if isinstance(value, BaseTexture))
+        return (hash(vert), hash(frag), hash(repr(sorted(state.items()))),
+                tuple(textures))
+
     def _get_hook(self, shader, name):
         """Return a FunctionChain that Filters may use to modify the program.
 
@@ -595,6 +623,14 @@ class CompoundVisual(BaseVisual):
             if v.visible:
                 v.draw()
 
+    def _draw_sort_key(self):
+        keys = tuple(v._draw_sort_key() for v in self._subvisuals
+                     if v.visible)
+        if len(keys) == 0 or None in keys:
+            return None
+        # Group by the state of the first sub-visual
+        return keys[0] + (keys[1:],)
+
     def _prepare_draw(self, view):
         pass
 
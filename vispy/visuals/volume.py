@@ -35,6 +35,8 @@ coordinates).
 
 """
 
+from collections import OrderedDict
+
 from ..gloo import Texture3D, TextureEmulated3D, VertexBuffer, IndexBuffer
 from . import Visual
 from .shaders import Function
@@ -383,6 +385,235 @@ frag_dict = {
     'additive': ADDITIVE_FRAG_SHADER,
 }
 
+# Sample a bricked volume through its page table. The page table has one
+# texel per brick, with the slot of the brick in the atlas in rgb and
+# alpha set if the brick is loaded.
+BRICKED_SAMPLE = """
+vec4 sample_bricked(sampler3D atlas, vec3 loc) {
+    // Find the brick that contains this location
+    vec3 pos = clamp(loc, 0.0, 1.0) * $vol_shape;
+    vec3 brick = min(floor(pos / $brick_size), $grid_shape - 1.0);
+    vec4 entry = texture3D($page_table, (brick + 0.5) / $grid_shape);
+    if (entry.a < 0.5) {
+        // Not loaded (yet)
+        return vec4(0.0);
+    }
+    vec3 slot = floor(entry.rgb * 255.0 + 0.5);
+    // Skip the border of one voxel around each brick in the atlas
+    vec3 texel = slot * ($brick_size + 2.0) + 1.0 + pos - brick * $brick_size;
+    return texture3D(atlas, texel / $atlas_shape);
+}
+"""
+
+# Internal formats of textures for data that is uploaded as-is, with the
+# factor by which sampling scales the values (normalized integer formats).
+# Data of other types is converted to float32.
+_NATIVE_FORMATS = {
+    np.dtype(np.uint8): ('8', 255.),
+    np.dtype(np.uint16): ('16', 65535.),
+    np.dtype(np.float16): ('16f', 1.),
+    np.dtype(np.float32): ('32f', 1.),
+}
+
+
+def _native_format(dtype, channels=1):
+    """Return the dtype, internalformat and value scale of the texture for
+    data of *dtype* that is normalized on the GPU.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in _NATIVE_FORMATS:
+        dtype = np.dtype(np.float32)
+    suffix, scale = _NATIVE_FORMATS[dtype]
+    return dtype, ('r', 'rg', 'rgb', 'rgba')[channels - 1] + suffix, scale
+
+
+# Size limit per dimension of the brick atlas. This is a common value of
+# GL_MAX_3D_TEXTURE_SIZE on desktop hardware.
+_MAX_ATLAS_SIZE = 2048
+
+
+def _subsample(vol, size=2 ** 18):
+    """Return a regularly strided subset of at most about *size* voxels,
+    to estimate statistics of volumes that do not fit in memory.
+    """
+    step = int(np.ceil((np.prod(vol.shape[:3]) / size) ** (1. / 3)))
+    step = max(step, 1)
+    return np.asarray(vol[::step, ::step, ::step])
+
+
+class _BrickCache(object):
+    """Cache of the bricks of a volume in a 3D texture atlas
+
+    The volume is split into cubic bricks of ``brick_size`` voxels. Each
+    loaded brick occupies a slot of the atlas, including a border of one
+    voxel so that linear interpolation matches that of a single texture.
+    The page table has one texel per brick and holds the slot of the
+    bricks that are loaded. When the atlas is full, the least recently
+    used brick that is not visible is evicted.
+
+    Parameters
+    ----------
+    atlas : Texture3D
+        The texture to store the bricks in. It is resized by ``reset()``.
+    brick_size : int
+        Number of voxels along each side of a brick.
+    budget : int
+        Maximum number of bytes of the atlas.
+    """
+
+    # Maximum number of bricks that are uploaded in one draw, so that
+    # loading a new region of the volume does not stall rendering
+    max_uploads = 16
+
+    def __init__(self, atlas, brick_size, budget):
+        self.atlas = atlas
+        self.brick_size = int(brick_size)
+        if self.brick_size < 1:
+            raise ValueError('brick_size must be at least 1')
+        self.budget = int(budget)
+        self.shape = None
+        self.page_table = Texture3D(np.zeros((1, 1, 1, 4), np.uint8),
+                                    interpolation='nearest',
+                                    wrapping='clamp_to_edge')
+        self.glsl_sample = Function(BRICKED_SAMPLE)
+        self.glsl_sample['page_table'] = self.page_table
+
+    def reset(self, shape, internalformat=None, itemsize=1):
+        """Lay out the atlas and page table for a volume of *shape*, with
+        *itemsize* bytes per voxel in the atlas.
+        """
+        self.shape = tuple(int(s) for s in shape[:3])
+        b = self.brick_size
+        padded = b + 2
+        self.grid_shape = tuple(-(-s // b) for s in self.shape)
+        n = min(self.budget // (padded ** 3 * itemsize),
+                int(np.prod(self.grid_shape)))
+        if n < 1:
+            raise ValueError('gpu_budget of %d bytes is too small for a '
+                             'brick of %d voxels' % (self.budget, padded ** 3))
+        # Slots are stored as bytes in the page table
+        per_axis = min(max(_MAX_ATLAS_SIZE // padded, 1), 255)
+        nx = min(n, per_axis)
+        ny = min(n // nx, per_axis)
+        nz = min(n // (nx * ny), per_axis)
+        self.slots_shape = (nz, ny, nx)
+        self.n_slots = nx * ny * nz
+        self.atlas.resize((nz * padded, ny * padded, nx * padded),
+                          internalformat=internalformat)
+
+        fun = self.glsl_sample
+        fun['vol_shape'] = tuple(float(s) for s in self.shape[::-1])
+        fun['grid_shape'] = tuple(float(g) for g in self.grid_shape[::-1])
+        fun['atlas_shape'] = tuple(float(s * padded)
+                                   for s in self.slots_shape[::-1])
+        fun['brick_size'] = float(b)
+        self.clear()
+
+    def clear(self):
+        """Evict all bricks, e.g. because the data has changed"""
+        self._table = np.zeros(self.grid_shape + (4,), np.uint8)
+        self.page_table.set_data(self._table)
+        self._resident = OrderedDict()
+        self._free = list(range(self.n_slots - 1, -1, -1))
+
+    @property
+    def resident(self):
+        """The indices of the loaded bricks, least recently used first"""
+        return list(self._resident)
+
+    def read_brick(self, vol, index):
+        """Read brick *index* from *vol*, with a border of one voxel
+
+        The border is taken from the neighbouring bricks or, at the edges
+        of the volume, repeats the edge voxels, like clamp_to_edge.
+        """
+        b = self.brick_size
+        lo = [i * b - 1 for i in index]
+        hi = [start + b + 2 for start in lo]
+        start = [max(x, 0) for x in lo]
+        stop = [min(x, s) for x, s in zip(hi, self.shape)]
+        data = np.asarray(vol[tuple(slice(*s) for s in zip(start, stop))])
+        pad = [(s - lo_, hi_ - e) for lo_, s, e, hi_
+               in zip(lo, start, stop, hi)]
+        return np.pad(data, pad, mode='edge')
+
+    def visible_bricks(self, transform):
+        """Return the indices of the bricks that intersect the view volume
+        after mapping with *transform*, nearest bricks first.
+        """
+        grid = self.grid_shape
+        if not transform.Linear:
+            return [tuple(i) for i in np.ndindex(*grid)]
+        # Map the lattice of brick corners (in xyz order) to clip coords
+        edges = [np.minimum(np.arange(g + 1) * self.brick_size, s) - 0.5
+                 for g, s in zip(grid[::-1], self.shape[::-1])]
+        lattice = np.array(np.meshgrid(*edges, indexing='ij'))
+        clip = transform.map(lattice.reshape(3, -1).T)
+        clip = clip.reshape(lattice.shape[1:] + (4,)).transpose(2, 1, 0, 3)
+        w = clip[..., 3]
+
+        corners = [(slice(i, i + g) for i, g in zip(offset, grid))
+                   for offset in np.ndindex(2, 2, 2)]
+        corners = [tuple(c) for c in corners]
+        # A brick is outside if all its corners are on the outer side of
+        # one of the clip planes -w <= x, y, z <= w
+        culled = np.zeros(grid, bool)
+        for axis in range(3):
+            for sign in (1, -1):
+                outside = sign * clip[..., axis] > w
+                culled |= np.logical_and.reduce([outside[c]
+                                                 for c in corners])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            depth = sum((clip[..., 2] / w)[c] for c in corners)
+        index = np.nonzero(~culled)
+        order = np.argsort(depth[index], kind='stable')
+        return list(zip(*[i[order].tolist() for i in index]))
+
+    def update(self, bricks, load):
+        """Make sure that *bricks* are loaded, in order of priority
+
+        Bricks that are not yet loaded are obtained by calling *load* with
+        the brick index. Returns True if bricks remain to be uploaded
+        because at most ``max_uploads`` are uploaded per call.
+        """
+        for brick in bricks:
+            if brick in self._resident:
+                self._resident.move_to_end(brick)
+        visible = set(bricks)
+        padded = self.brick_size + 2
+        uploads = 0
+        pending = False
+        for brick in bricks:
+            if brick in self._resident:
+                continue
+            if uploads == self.max_uploads:
+                pending = True
+                break
+            slot = self._acquire(visible)
+            if slot is None:
+                break  # the atlas is full of visible bricks
+            z, y, x = np.unravel_index(slot, self.slots_shape)
+            self.atlas.set_data(load(brick),
+                                offset=(z * padded, y * padded, x * padded))
+            self._table[brick] = (x, y, z, 255)
+            self._resident[brick] = slot
+            uploads += 1
+        if uploads:
+            self.page_table.set_data(self._table)
+        return pending
+
+    def _acquire(self, visible):
+        """Return a free slot, evicting the least recently used brick if
+        needed. Returns None if all loaded bricks are visible.
+        """
+        if self._free:
+            return self._free.pop()
+        brick = next(iter(self._resident))
+        if brick in visible:
+            return None
+        self._table[brick] = 0
+        return self._resident.pop(brick)
+
 
 class VolumeVisual(Visual):
     """ Displays a 3D Volume
@@ -390,7 +621,9 @@ class VolumeVisual(Visual):
     Parameters
     ----------
     vol : ndarray
-        The volume to display. Must be ndim==3.
+        The volume to display. Must be ndim==3. If ``brick_size`` is given,
+        this can be any array-like that supports slicing, such as a
+        ``np.memmap`` of a volume that does not fit in memory.
     clim : tuple of two floats | None
         The contrast limits. The values in the volume are mapped to
         black and white corresponding to these values. Default maps
@@ -422,6 +655,24 @@ class VolumeVisual(Visual):
         but has lower performance on desktop platforms.
     interpolation : {'linear', 'nearest'}
         Selects method of image interpolation. 
+    brick_size : int | None
+        If given, the volume is split into cubic bricks with this number of
+        voxels along each side, which are read from ``vol`` when they are
+        in view. Only the visible bricks are kept in a cache on the GPU,
+        the least recently used bricks are evicted when it is full.
+    gpu_budget : int
+        The size in bytes of the brick cache on the GPU, for a bricked
+        volume. Visible bricks that do not fit are not drawn. Default
+        256 MB.
+    texture_format : None | 'auto'
+        If None, the data is normalized to the contrast limits on the CPU
+        and stored in 8-bit textures; the data is normalized again when
+        the contrast limits leave the normalized range. If 'auto', uint8,
+        uint16, float16 and float32 data is uploaded unchanged into a
+        texture of matching precision (other types as float32), and the
+        contrast limits are applied in the shader only. This avoids a
+        float copy of the volume and makes changing ``clim`` cheap, but
+        requires support for the sized texture formats (not ES 2.0).
     """
 
     _interpolation_names = ['linear', 'nearest']
@@ -429,9 +680,16 @@ class VolumeVisual(Visual):
     def __init__(self, vol, clim=None, method='mip', threshold=None, 
                  relative_step_size=0.8, cmap='grays', gamma=1.0,
                  clim_range_threshold=0.2,
-                 emulate_texture=False, interpolation='linear'):
+                 emulate_texture=False, interpolation='linear',
+                 brick_size=None, gpu_budget=256 * 1024 ** 2,
+                 texture_format=None):
         
         tex_cls = TextureEmulated3D if emulate_texture else Texture3D
+        if texture_format not in (None, 'auto'):
+            raise ValueError("texture_format must be None or 'auto', not %r"
+                             % (texture_format,))
+        if brick_size is not None and emulate_texture:
+            raise ValueError('A bricked volume cannot emulate 3D textures')
 
         # Storage of information of volume
         self._vol_shape = ()
@@ -440,6 +698,8 @@ class VolumeVisual(Visual):
         self._gamma = gamma
         self._need_vertex_update = True
         self._clim_range_threshold = clim_range_threshold
+        self._texture_format = texture_format
+        self._texture_dtype = None
         # Set the colormap
         self._cmap = get_colormap(cmap)
 
@@ -460,6 +720,10 @@ class VolumeVisual(Visual):
         self._interpolation = interpolation
         self._tex = tex_cls((10, 10, 10), interpolation=self._interpolation, 
                             wrapping='clamp_to_edge')
+        self._bricks = None
+        if brick_size is not None:
+            # The texture becomes the atlas of the brick cache
+            self._bricks = _BrickCache(self._tex, brick_size, gpu_budget)
 
         # Create program
         Visual.__init__(self, vcode=VERT_SHADER, fcode="")
@@ -481,7 +745,10 @@ class VolumeVisual(Visual):
         # Set params
         self.method = method
         self.relative_step_size = relative_step_size
-        self.threshold = threshold if (threshold is not None) else vol.mean()
+        if threshold is None:
+            threshold = vol.mean() if self._bricks is None else \
+                _subsample(vol).mean()
+        self.threshold = threshold
         self.freeze()
     
     def set_data(self, vol, clim=None, copy=True):
@@ -490,16 +757,26 @@ class VolumeVisual(Visual):
         Parameters
         ----------
         vol : ndarray
-            The 3D volume.
+            The 3D volume. For a bricked volume, any array-like that
+            supports slicing.
         clim : tuple | None
             Colormap limits to use. None will use the min and max values.
+            For a bricked volume, these are estimated from a subset of
+            the voxels.
         copy : bool | True
             Whether to copy the input volume prior to applying clim normalization.
+            Data that is normalized on the GPU is never modified.
         """
         # Check volume
-        if not isinstance(vol, np.ndarray):
+        if self._bricks is not None:
+            if not (hasattr(vol, 'shape') and hasattr(vol, '__getitem__')):
+                raise ValueError('Bricked volume visual needs an array-like '
+                                 'that supports slicing.')
+            if len(vol.shape) != 3:
+                raise ValueError('Bricked volume visual needs a 3D image.')
+        elif not isinstance(vol, np.ndarray):
             raise ValueError('Volume visual needs a numpy array.')
-        if not ((vol.ndim == 3) or (vol.ndim == 4 and vol.shape[-1] <= 4)):
+        elif not ((vol.ndim == 3) or (vol.ndim == 4 and vol.shape[-1] <= 4)):
             raise ValueError('Volume visual needs a 3D image.')
         
         # Handle clim
@@ -509,16 +786,55 @@ class VolumeVisual(Visual):
                 raise ValueError('clim must be a 2-element array-like')
             self._clim = tuple(clim)
         if self._clim is None:
-            self._clim = vol.min(), vol.max()
+            sample = vol if self._bricks is None else _subsample(vol)
+            self._clim = sample.min(), sample.max()
         
-        # store clims used to normalize _tex data for use in clim_normalized
-        self._texture_limits = self._clim
+        shape = tuple(vol.shape[:3])
+        channels = vol.shape[3] if len(vol.shape) == 4 else 1
+        internalformat = None
+        if self._texture_format is not None:
+            # The texture holds the data divided by scale
+            dtype, internalformat, scale = _native_format(vol.dtype, channels)
+            self._texture_dtype = dtype
+            self._texture_limits = (0., scale)
+        else:
+            # store clims used to normalize _tex data for use in clim_normalized
+            self._texture_limits = self._clim
         # store volume in case it needs to be renormalized by clim.setter
         self._last_data = vol
         self.shared_program['clim'] = self.clim_normalized
 
-        # Apply clim (copy data by default... see issue #1727)
-        vol = np.array(vol, dtype='float32', copy=copy)
+        if self._bricks is not None:
+            # Bricks are read and normalized when they come into view
+            itemsize = 1 if internalformat is None else dtype.itemsize
+            if self._bricks.shape != shape or self._texture_format:
+                self._bricks.reset(shape, internalformat, itemsize)
+            else:
+                self._bricks.clear()
+            self._kb_for_texture = np.prod(self._tex.shape[:3]) * \
+                itemsize / 1024
+        elif internalformat is not None:
+            # Upload as-is; only other types are converted
+            vol = np.asarray(vol, dtype=dtype)
+            self._tex.resize(vol.shape, internalformat=internalformat)
+            self._tex.set_data(vol)
+            self._kb_for_texture = vol.nbytes / 1024
+        else:
+            # Apply clim (copy data by default... see issue #1727)
+            vol = self._apply_clim(np.array(vol, dtype='float32', copy=copy))
+            # Apply to texture
+            self._tex.set_data(vol)  # will be efficient if vol is same shape
+            self._kb_for_texture = np.prod(shape) / 1024
+        self.shared_program['u_shape'] = shape[::-1]
+        
+        if self._vol_shape != shape:
+            self._vol_shape = shape
+            self._need_vertex_update = True
+            self._bounds_changed()
+        self._vol_shape = shape
+
+    def _apply_clim(self, vol):
+        """Normalize float32 data in place to the clims"""
         if self._clim[1] == self._clim[0]:
             if self._clim[0] != 0.:
                 vol *= 1.0 / self._clim[0]
@@ -529,20 +845,20 @@ class VolumeVisual(Visual):
         else:
             vol -= self._clim[0]
             vol /= self._clim[1] - self._clim[0]
-        
-        # Apply to texture
-        self._tex.set_data(vol)  # will be efficient if vol is same shape
-        self.shared_program['u_shape'] = (vol.shape[2], vol.shape[1], 
-                                          vol.shape[0])
-        
-        shape = vol.shape[:3]
-        if self._vol_shape != shape:
-            self._vol_shape = shape
-            self._need_vertex_update = True
-        self._vol_shape = shape
-        
-        # Get some stats
-        self._kb_for_texture = np.prod(self._vol_shape) / 1024
+        return vol
+
+    def _load_brick(self, index):
+        brick = self._bricks.read_brick(self._last_data, index)
+        if self._texture_format is not None:
+            return brick.astype(self._texture_dtype, copy=False)
+        return self._apply_clim(brick.astype(np.float32))
+
+    @property
+    def bricked(self):
+        """Whether the volume is split into bricks that are loaded when
+        they come into view
+        """
+        return self._bricks is not None
 
     def rescale_data(self):
         """Force rescaling of data to the current contrast limits and texture upload.
@@ -553,9 +869,11 @@ class VolumeVisual(Visual):
         last texture was uploaded), posterization may become visible if the contrast limits
         become *too* small of a fraction of the clims used to normalize the texture.
         This function is a convenience to "force" rescaling of the Texture data to the
-        current contrast limits range.
+        current contrast limits range. It has no effect on data that is normalized on
+        the GPU (see ``texture_format``).
         """
-        self.set_data(self._last_data, clim=self._clim)
+        if self._texture_format is None:
+            self.set_data(self._last_data, clim=self._clim)
         self.update()
 
     @property
@@ -579,12 +897,17 @@ class VolumeVisual(Visual):
         ``value`` should be a 2-tuple of floats (min_clim, max_clim), where each value is
         within the range set by self.clim. If the new value is outside of the (min, max)
         range of the clims previously used to normalize the texture data, then data will
-        be renormalized using set_data.
+        be renormalized using set_data. Data that is normalized on the GPU is never
+        uploaded again.
         """
         clim = np.array(value, float)
         if not (clim.ndim == 1 and clim.size == 2):
             raise ValueError('clim must be a 2-element array-like')
         self._clim = tuple(clim)
+        if self._texture_format is not None:
+            self.shared_program['clim'] = self.clim_normalized
+            self.update()
+            return
         if self.texture_is_inverted:
             if (clim[0] > self._texture_limits[0]) or (clim[1] < self._texture_limits[1]):
                 self.rescale_data()
@@ -607,8 +930,9 @@ class VolumeVisual(Visual):
     def clim_normalized(self):
         """Normalize current clims between 0-1 based on last-used texture data range.
 
-        In set_data(), the data is normalized (on the CPU) to 0-1 using ``clim``.
-        During rendering, the frag shader will apply the final contrast adjustment based on
+        In set_data(), the data is normalized (on the CPU) to 0-1 using ``clim``,
+        or, with ``texture_format='auto'``, sampling the texture scales integer data
+        to 0-1. During rendering, the frag shader will apply the final contrast adjustment based on
         the current ``clim``.
         """
         range_min, range_max = self._texture_limits
@@ -704,7 +1028,10 @@ class VolumeVisual(Visual):
 
         self.shared_program.frag = frag_dict[method]
         self.shared_program.frag['sampler_type'] = self._tex.glsl_sampler_type
-        self.shared_program.frag['sample'] = self._tex.glsl_sample
+        if self._bricks is not None:
+            self.shared_program.frag['sample'] = self._bricks.glsl_sample
+        else:
+            self.shared_program.frag['sample'] = self._tex.glsl_sample
         self.shared_program.frag['cmap'] = Function(self._cmap.glsl_map)
         self.shared_program['texture2D_LUT'] = self.cmap.texture_lut() \
             if (hasattr(self.cmap, 'texture_lut')) else None
@@ -801,3 +1128,9 @@ class VolumeVisual(Visual):
     def _prepare_draw(self, view):
         if self._need_vertex_update:
             self._create_vertex_data()
+        if self._bricks is not None:
+            tr = view.transforms.get_transform('visual', 'render')
+            bricks = self._bricks.visible_bricks(tr)
+            if self._bricks.update(bricks, self._load_brick):
+                # Continue loading in the next frame
+                self.update()
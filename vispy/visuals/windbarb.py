@@ -267,6 +267,7 @@ class WindbarbVisual(Visual):
         data['a_size'] = size
         self.shared_program['u_antialias'] = antialias
         self._data = data
+        self._bounds_changed()
         self._vbo.set_data(data)
         self.shared_program.bind(self._vbo)
         self.update()